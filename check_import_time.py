@@ -0,0 +1,16 @@
+"""
+Import-Time Budget - fail if importing the API server is slow or loads heavy libraries
+
+    python check_import_time.py                          # src.api.server, 1500 ms budget
+    python check_import_time.py --module src.api.worker --budget-ms 2000
+    python check_import_time.py --top 30
+
+See src/benchmark/import_time.py for all options.
+"""
+import sys
+
+from src.benchmark.import_time import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+Pipeline Benchmark - record/replay the reference deals and report per-agent performance
+
+    python run_benchmark.py record --deal nvda_pltr      # needs network + API keys
+    python run_benchmark.py replay                       # offline, compares to benchmarks/baseline.json
+    python run_benchmark.py replay --latency fmp=40,sec=120,llm=600
+    python run_benchmark.py replay --update-baseline
+
+See src/benchmark/runner.py for all options.
+"""
+import sys
+
+from src.benchmark.runner import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+Analysis Worker - run queued analysis jobs outside the API process
+
+    JOB_QUEUE_BACKEND=redis python run_worker.py                  # Redis (REDIS_HOST / JOB_QUEUE_REDIS_URL)
+    JOB_QUEUE_BACKEND=sqlite python run_worker.py --concurrency 1 # local development
+
+Start as many workers as needed; the API (with the same JOB_QUEUE_BACKEND)
+only enqueues jobs. See src/api/worker.py for all options.
+"""
+import sys
+
+from src.api.worker import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
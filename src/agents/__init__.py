@@ -1,31 +1,38 @@
 # Agents module
+#
+# Agent classes are imported on first access (PEP 562): importing src.agents,
+# or any one agent module, does not load every agent and its LLM SDKs.
+# Code that creates agents by key should use src.agents.registry.
 
-from .base_agent import BaseAgent
-from .project_manager import ProjectManagerAgent
-from .data_ingestion import DataIngestionAgent
-from .financial_analyst import FinancialAnalystAgent
-from .legal_counsel import LegalCounselAgent
-from .market_strategist import MarketStrategistAgent
-from .integration_planner import IntegrationPlannerAgent
-from .synthesis_reporting import SynthesisReportingAgent
-from .competitive_benchmarking import CompetitiveBenchmarkingAgent
-from .macroeconomic_analyst import MacroeconomicAnalystAgent
-from .conversational_synthesis import ConversationalSynthesisAgent
-from .external_validator import ExternalValidatorAgent
-from .financial_deep_dive import FinancialDeepDiveAgent
+import importlib
 
-__all__ = [
-    'BaseAgent',
-    'ProjectManagerAgent',
-    'DataIngestionAgent',
-    'FinancialAnalystAgent',
-    'LegalCounselAgent',
-    'MarketStrategistAgent',
-    'IntegrationPlannerAgent',
-    'SynthesisReportingAgent',
-    'CompetitiveBenchmarkingAgent',
-    'MacroeconomicAnalystAgent',
-    'ConversationalSynthesisAgent',
-    'ExternalValidatorAgent',
-    'FinancialDeepDiveAgent',
-]
+_EXPORTS = {
+    'BaseAgent': 'base_agent',
+    'ProjectManagerAgent': 'project_manager',
+    'DataIngestionAgent': 'data_ingestion',
+    'FinancialAnalystAgent': 'financial_analyst',
+    'LegalCounselAgent': 'legal_counsel',
+    'MarketStrategistAgent': 'market_strategist',
+    'IntegrationPlannerAgent': 'integration_planner',
+    'SynthesisReportingAgent': 'synthesis_reporting',
+    'CompetitiveBenchmarkingAgent': 'competitive_benchmarking',
+    'MacroeconomicAnalystAgent': 'macroeconomic_analyst',
+    'ConversationalSynthesisAgent': 'conversational_synthesis',
+    'ExternalValidatorAgent': 'external_validator',
+    'FinancialDeepDiveAgent': 'financial_deep_dive',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
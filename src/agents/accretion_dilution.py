@@ -9,6 +9,7 @@ Key Outputs:
 - Pro forma combined EPS
 - Accretion/dilution $ and % impact
 - Sensitivity analysis (price, financing, synergies)
+- Scenario cube (price x synergy x cash mix x rate x acquirer price)
 - Breakeven synergy analysis
 """
 
@@ -19,6 +20,13 @@ from loguru import logger
 
 from .base_agent import BaseAgent
 from ..core.state import DiligenceState
+from ..utils.accretion_dilution_model import (
+    build_scenario_cube,
+    save_scenario_cube,
+    DEFAULT_PRICE_ADJUSTMENTS,
+    DEFAULT_SYNERGY_MULTIPLES,
+    DEFAULT_CASH_PERCENTAGES
+)
 
 class AccretionDilutionAgent(BaseAgent):
     """
@@ -145,7 +153,8 @@ class AccretionDilutionAgent(BaseAgent):
                 acquirer_standalone,
                 target_standalone,
                 deal_terms,
-                valuation_data
+                valuation_data,
+                cube_name=state.get('deal_id')
             )
             
             # 6. Breakeven analysis
@@ -158,10 +167,10 @@ class AccretionDilutionAgent(BaseAgent):
             
             # 7. Multi-year forecast
             multiyear_impact = self._forecast_multiyear_impact(
-                acquirer_data,
-                target_data,
+                acquirer_standalone,
+                target_standalone,
                 deal_terms,
-                accretion_dilution
+                financing_impact['total_consideration']
             )
             
             result = {
@@ -375,74 +384,97 @@ class AccretionDilutionAgent(BaseAgent):
         acquirer_standalone: Dict[str, Any],
         target_standalone: Dict[str, Any],
         deal_terms: Dict[str, Any],
-        valuation_data: Dict[str, Any]
+        valuation_data: Dict[str, Any],
+        cube_name: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Run sensitivity analysis on key variables"""
+        """
+        Run sensitivity analysis on key variables
         
-        base_eps = acquirer_standalone.get('eps', 0)
+        Evaluates the full price x synergy x cash-mix x interest-rate x
+        acquirer-price scenario cube in one vectorized pass, then slices the
+        one-way sensitivities, two-way grids and breakeven surface out of it.
+        The full cube is saved as a side file (named cube_name) and only its
+        summary is returned, since the result is kept in every state save.
+        """
         
-        # Sensitivity to purchase price
-        price_scenarios = []
-        base_price = deal_terms.get('purchase_price', 0)
-        if base_price == 0:
-            dcf_data = valuation_data.get('dcf_advanced', {})
-            base_price = dcf_data.get('dcf_analysis', {}).get('base', {}).get('enterprise_value', 0)
+        base_price = self._resolve_purchase_price(deal_terms, valuation_data)
         
-        for price_adj in [-0.10, -0.05, 0, 0.05, 0.10]:
-            scenario_terms = deal_terms.copy()
-            scenario_terms['purchase_price'] = base_price * (1 + price_adj)
-            
-            financing = self._calculate_financing_impact(scenario_terms, valuation_data, acquirer_standalone)
-            pro_forma = self._calculate_pro_forma_metrics(acquirer_standalone, target_standalone, financing, scenario_terms)
-            accretion = self._calculate_accretion_dilution(acquirer_standalone, pro_forma, scenario_terms)
-            
-            price_scenarios.append({
+        cube_model = build_scenario_cube(acquirer_standalone, target_standalone, deal_terms, base_price)
+        if cube_model is None:
+            return {
+                "price_sensitivity": [],
+                "synergy_sensitivity": [],
+                "financing_mix_sensitivity": [],
+                "summary": "Sensitivity analysis unavailable - acquirer share data missing"
+            }
+        
+        # Ensure the base-case cash mix sits exactly on the cash axis
+        base_cash = cube_model.inputs.cash_percentage
+        cash_axis = sorted(set(DEFAULT_CASH_PERCENTAGES) | {base_cash})
+        cube = cube_model.evaluate(cash_percentages=cash_axis)
+        
+        cube_path = None
+        if cube_name:
+            try:
+                cube_path = str(save_scenario_cube(cube, cube_name))
+            except OSError as e:
+                logger.warning(f"Could not save scenario cube for {cube_name}: {e}")
+        
+        # Sensitivity to purchase price
+        price_scenarios = [
+            {
                 "price_adjustment": price_adj,
-                "purchase_price": scenario_terms['purchase_price'],
-                "eps_impact_percent": accretion['eps_impact_percent']
-            })
+                "purchase_price": row['purchase_price'],
+                "eps_impact_percent": row['eps_impact_percent']
+            }
+            for price_adj, row in zip(DEFAULT_PRICE_ADJUSTMENTS, cube_model.one_way_sensitivity(cube, 'purchase_price'))
+        ]
         
         # Sensitivity to synergies
-        synergy_scenarios = []
-        base_synergies = deal_terms.get('synergies_year1', 0)
-        
-        for synergy_adj in [0, 0.5, 1.0, 1.5, 2.0]:
-            scenario_terms = deal_terms.copy()
-            scenario_terms['synergies_year1'] = base_synergies * synergy_adj
-            
-            financing = self._calculate_financing_impact(scenario_terms, valuation_data, acquirer_standalone)
-            pro_forma = self._calculate_pro_forma_metrics(acquirer_standalone, target_standalone, financing, scenario_terms)
-            accretion = self._calculate_accretion_dilution(acquirer_standalone, pro_forma, scenario_terms)
-            
-            synergy_scenarios.append({
+        synergy_scenarios = [
+            {
                 "synergy_multiple": synergy_adj,
-                "synergies_amount": scenario_terms['synergies_year1'],
-                "eps_impact_percent": accretion['eps_impact_percent']
-            })
+                "synergies_amount": row['synergies'],
+                "eps_impact_percent": row['eps_impact_percent']
+            }
+            for synergy_adj, row in zip(DEFAULT_SYNERGY_MULTIPLES, cube_model.one_way_sensitivity(cube, 'synergies'))
+        ]
         
         # Sensitivity to financing mix (cash vs stock)
-        financing_scenarios = []
-        for cash_pct in [0.0, 0.25, 0.5, 0.75, 1.0]:
-            scenario_terms = deal_terms.copy()
-            scenario_terms['cash_percentage'] = cash_pct
-            
-            financing = self._calculate_financing_impact(scenario_terms, valuation_data, acquirer_standalone)
-            pro_forma = self._calculate_pro_forma_metrics(acquirer_standalone, target_standalone, financing, scenario_terms)
-            accretion = self._calculate_accretion_dilution(acquirer_standalone, pro_forma, scenario_terms)
-            
-            financing_scenarios.append({
-                "cash_percentage": cash_pct,
-                "stock_percentage": 1 - cash_pct,
-                "eps_impact_percent": accretion['eps_impact_percent']
-            })
+        financing_scenarios = [
+            {
+                "cash_percentage": row['cash_percentage'],
+                "stock_percentage": 1 - row['cash_percentage'],
+                "eps_impact_percent": row['eps_impact_percent']
+            }
+            for row in cube_model.one_way_sensitivity(cube, 'cash_percentage')
+        ]
         
         return {
             "price_sensitivity": price_scenarios,
             "synergy_sensitivity": synergy_scenarios,
             "financing_mix_sensitivity": financing_scenarios,
+            "interest_rate_sensitivity": cube_model.one_way_sensitivity(cube, 'debt_interest_rate'),
+            "acquirer_price_sensitivity": cube_model.one_way_sensitivity(cube, 'acquirer_stock_price'),
+            "two_way_grids": {
+                "price_vs_synergies": cube_model.two_way_grid(cube, 'purchase_price', 'synergies'),
+                "price_vs_cash_mix": cube_model.two_way_grid(cube, 'purchase_price', 'cash_percentage'),
+                "cash_mix_vs_interest_rate": cube_model.two_way_grid(cube, 'cash_percentage', 'debt_interest_rate'),
+                "synergies_vs_acquirer_price": cube_model.two_way_grid(cube, 'synergies', 'acquirer_stock_price')
+            },
+            "breakeven_surface": cube_model.breakeven_surface(cube),
+            "scenario_cube": cube_model.to_summary(cube, cube_path),
             "summary": "Sensitivity analysis shows EPS impact across multiple scenarios"
         }
     
+    def _resolve_purchase_price(self, deal_terms: Dict[str, Any], valuation_data: Dict[str, Any]) -> float:
+        """Purchase price from deal terms, falling back to DCF base case enterprise value"""
+        base_price = deal_terms.get('purchase_price', 0)
+        if base_price == 0:
+            dcf_data = valuation_data.get('dcf_advanced', {})
+            base_price = dcf_data.get('dcf_analysis', {}).get('base', {}).get('enterprise_value', 0)
+        return base_price
+    
     def _calculate_breakeven_synergies(
         self,
         acquirer_standalone: Dict[str, Any],
@@ -484,44 +516,38 @@ class AccretionDilutionAgent(BaseAgent):
     
     def _forecast_multiyear_impact(
         self,
-        acquirer_data: Dict[str, Any],
-        target_data: Dict[str, Any],
+        acquirer_standalone: Dict[str, Any],
+        target_standalone: Dict[str, Any],
         deal_terms: Dict[str, Any],
-        year1_impact: Dict[str, Any]
+        purchase_price: float
     ) -> Dict[str, Any]:
         """Forecast accretion/dilution over multiple years"""
         
-        # Assume synergies ramp up over time
-        synergy_ramp = {
-            1: 0.5,  # 50% in Year 1
-            2: 0.75, # 75% in Year 2
-            3: 1.0,  # 100% in Year 3+
-        }
+        cube_model = build_scenario_cube(acquirer_standalone, target_standalone, deal_terms, purchase_price)
+        if cube_model is None:
+            return {
+                "forecast_years": [],
+                "summary": "Multi-year forecast unavailable - acquirer share data missing"
+            }
+        
+        # Synergies ramp up over time (50% Y1, 75% Y2, 100% Y3+); 5% growth for both companies
+        paths = cube_model.multiyear_paths(years=5)
+        base_price_idx = DEFAULT_PRICE_ADJUSTMENTS.index(0.0)
+        base_synergy_idx = DEFAULT_SYNERGY_MULTIPLES.index(1.0)
         
         forecast = []
-        for year in range(1, 6):
-            ramp_factor = synergy_ramp.get(year, 1.0)
-            
-            # Adjust synergies for ramp
-            year_terms = deal_terms.copy()
-            base_synergies = deal_terms.get('synergies_year1', 0) / 0.5  # Assume Year 1 is 50% of full
-            year_terms['synergies_year1'] = base_synergies * ramp_factor
-            
-            # Growth rates
-            acquirer_growth = 0.05  # 5% annual growth assumption
-            target_growth = 0.05
-            
-            # Simple forecast (would be more sophisticated in production)
-            year_impact = {
+        for i, year in enumerate(paths['years']):
+            ramp_factor = paths['synergy_ramp'][i]
+            forecast.append({
                 "year": year,
                 "synergy_realization_pct": ramp_factor * 100,
-                "estimated_eps_impact_percent": year1_impact['eps_impact_percent'] * ramp_factor,
+                "estimated_eps_impact_percent": paths['eps_impact_percent'][i][base_price_idx][base_synergy_idx],
                 "notes": f"Year {year} assumes {ramp_factor*100:.0f}% synergy realization"
-            }
-            forecast.append(year_impact)
+            })
         
         return {
             "forecast_years": forecast,
+            "scenario_paths": paths,
             "summary": "Multi-year forecast shows improving accretion as synergies fully realized"
         }
     
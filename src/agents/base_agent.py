@@ -1,6 +1,7 @@
 """
 Base Agent class for all specialized agents
 """
+import time
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -9,6 +10,8 @@ from loguru import logger
 from ..core.state import DiligenceState, AgentStatus, update_agent_status, add_agent_output
 from ..core.llm_factory import get_llm
 from ..core.config import get_config
+from ..utils.metrics import observe_agent
+from ..utils.tracing import mark_span_error, start_span
 
 
 class BaseAgent(ABC):
@@ -42,64 +45,76 @@ class BaseAgent(ABC):
             Updated state
         """
         logger.info(f"Starting {self.agent_config.name}")
+        agent_start = time.perf_counter()
         
-        # Update status to running
-        state = update_agent_status(state, self.agent_name, AgentStatus.RUNNING)
-        
-        try:
-            # Initialize anomalies list for this agent run
-            self._anomalies = []
-            
-            # Run agent-specific logic
-            result = await self.run(state)
+        with start_span(f"agent.{self.agent_name}", {
+            'agent.name': self.agent_name,
+            'deal.id': state.get('deal_id'),
+            'deal.target_ticker': state.get('target_ticker')
+        }) as span:
+            # Update status to running
+            state = update_agent_status(state, self.agent_name, AgentStatus.RUNNING)
             
-            # CRITICAL FIX: Collect anomalies from this agent run
-            if hasattr(self, '_anomalies') and self._anomalies:
-                logger.info(f"[{self.agent_name}] Collected {len(self._anomalies)} anomalies")
+            try:
+                # Initialize anomalies list for this agent run
+                self._anomalies = []
                 
-                # Add anomalies to global anomaly log in state
-                if 'anomaly_log' not in state:
-                    state['anomaly_log'] = []
-                state['anomaly_log'].extend(self._anomalies)
+                # Run agent-specific logic
+                result = await self.run(state)
                 
-                # Also add to agent's own data for easy access
-                if 'anomalies' not in result.get("data", {}):
-                    result.setdefault("data", {})['anomalies'] = self._anomalies
-            
-            # Update status to completed
-            state = update_agent_status(state, self.agent_name, AgentStatus.COMPLETED)
-            
-            # Add agent output to state
-            state = add_agent_output(
-                state,
-                agent_name=self.agent_name,
-                status=AgentStatus.COMPLETED,
-                data=result.get("data", {}),
-                errors=result.get("errors", []),
-                warnings=result.get("warnings", []),
-                recommendations=result.get("recommendations", [])
-            )
-            
-            logger.info(f"Completed {self.agent_config.name}")
-            
-        except Exception as e:
-            logger.error(f"Error in {self.agent_config.name}: {e}")
-            
-            # Update status to failed
-            state = update_agent_status(state, self.agent_name, AgentStatus.FAILED)
-            
-            # Add error to state
-            state["errors"].append(f"{self.agent_config.name}: {str(e)}")
-            
-            # Add failed agent output
-            state = add_agent_output(
-                state,
-                agent_name=self.agent_name,
-                status=AgentStatus.FAILED,
-                data={},
-                errors=[str(e)]
-            )
+                # CRITICAL FIX: Collect anomalies from this agent run
+                if hasattr(self, '_anomalies') and self._anomalies:
+                    logger.info(f"[{self.agent_name}] Collected {len(self._anomalies)} anomalies")
+                    
+                    # Add anomalies to global anomaly log in state
+                    if 'anomaly_log' not in state:
+                        state['anomaly_log'] = []
+                    state['anomaly_log'].extend(self._anomalies)
+                    
+                    # Also add to agent's own data for easy access
+                    if 'anomalies' not in result.get("data", {}):
+                        result.setdefault("data", {})['anomalies'] = self._anomalies
+                
+                # Update status to completed
+                state = update_agent_status(state, self.agent_name, AgentStatus.COMPLETED)
+                
+                # Add agent output to state
+                state = add_agent_output(
+                    state,
+                    agent_name=self.agent_name,
+                    status=AgentStatus.COMPLETED,
+                    data=result.get("data", {}),
+                    errors=result.get("errors", []),
+                    warnings=result.get("warnings", []),
+                    recommendations=result.get("recommendations", [])
+                )
+                
+                logger.info(f"Completed {self.agent_config.name}")
+                span.set_attribute('agent.status', AgentStatus.COMPLETED.value)
+                
+            except Exception as e:
+                logger.error(f"Error in {self.agent_config.name}: {e}")
+                span.record_exception(e)
+                mark_span_error(span, str(e))
+                span.set_attribute('agent.status', AgentStatus.FAILED.value)
+                
+                # Update status to failed
+                state = update_agent_status(state, self.agent_name, AgentStatus.FAILED)
+                
+                # Add error to state
+                state["errors"].append(f"{self.agent_config.name}: {str(e)}")
+                
+                # Add failed agent output
+                state = add_agent_output(
+                    state,
+                    agent_name=self.agent_name,
+                    status=AgentStatus.FAILED,
+                    data={},
+                    errors=[str(e)]
+                )
         
+        status = AgentStatus(state['agent_statuses'][self.agent_name]).value
+        observe_agent(self.agent_name, status, time.perf_counter() - agent_start)
         return state
     
     @abstractmethod
@@ -19,6 +19,16 @@ import statistics
 
 from .base_agent import BaseAgent
 from ..integrations.fmp_client import FMPClient
+from ..utils.anomaly_detection import screen_peer_outliers
+from ..utils.fundamentals_store import get_fundamentals_store
+from ..utils.reference_data import get_reference_data_service
+
+
+# Metrics screened cross-sectionally for outliers against the peer set
+PEER_SCREEN_METRICS = [
+    'gross_margin', 'operating_margin', 'net_margin', 'roe', 'roic',
+    'asset_turnover', 'debt_to_equity', 'current_ratio'
+]
 
 
 class CompetitiveBenchmarkingAgent(BaseAgent):
@@ -336,10 +346,12 @@ class CompetitiveBenchmarkingAgent(BaseAgent):
             """Analyze a single peer company."""
             try:
                 # Fetch key financial data with async context
+                # Filed statements are served by the shared fundamentals store
                 async with FMPClient() as client:
-                    income_stmt = await client.get_income_statement(ticker, period='annual', limit=3)
-                    balance_sheet = await client.get_balance_sheet(ticker, period='annual', limit=3)
-                    ratios = await client.get_financial_ratios(ticker, period='annual', limit=3)
+                    store = get_fundamentals_store()
+                    income_stmt = await store.statements(client, ticker, 'income_statement', limit=3)
+                    balance_sheet = await store.statements(client, ticker, 'balance_sheet', limit=3)
+                    ratios = await store.statements(client, ticker, 'ratios', limit=3)
                 
                 # Calculate key metrics
                 metrics = self._calculate_peer_metrics(income_stmt, balance_sheet, ratios)
@@ -444,8 +456,10 @@ class CompetitiveBenchmarkingAgent(BaseAgent):
                 profile = await client.get_company_profile(symbol)
                 sector = profile.get('sector', 'Unknown') if profile else 'Unknown'
                 
-                # Get sector performance data
-                sector_perf = await client.get_sector_performance()
+                # Sector performance (shared reference data, refreshed in the background)
+                reference_data = get_reference_data_service()
+                await reference_data.ensure_loaded()
+                sector_perf = reference_data.sector_performance()
                 
                 sector_data = {
                     'sector': sector,
@@ -583,6 +597,12 @@ class CompetitiveBenchmarkingAgent(BaseAgent):
             symbol, target_metrics, peer_metrics
         )
         
+        # Robust (MAD) outlier screen across target and peers in one pass
+        analysis['peer_outlier_screen'] = screen_peer_outliers(
+            {symbol: target_metrics, **peer_metrics},
+            metrics=PEER_SCREEN_METRICS
+        )
+        
         # Overall summary
         analysis['summary'] = self._create_executive_summary(
             symbol, analysis, sector_data
@@ -1179,6 +1199,27 @@ class CompetitiveBenchmarkingAgent(BaseAgent):
                 }
             })
         
+        # 10. Statistical Outliers vs Peer Set
+        target_outliers = [
+            o for o in analysis_result.get('peer_outlier_screen', {}).get('outliers', [])
+            if o['entity'] == symbol
+        ]
+        if target_outliers:
+            anomalies.append({
+                'type': 'peer_statistical_outlier',
+                'severity': 'high' if len(target_outliers) >= 2 else 'medium',
+                'description': f'{len(target_outliers)} metric(s) are statistical outliers vs peers: ' + ', '.join(
+                    f"{o['metric']} ({o['direction'].replace('_', ' ')}, robust z {o['robust_z_score']:.1f})"
+                    for o in target_outliers
+                ),
+                'impact': 'Structurally different from peers on these metrics - verify data and business model comparability',
+                'recommendation': 'Investigate drivers of the outlying metrics and confirm peer set relevance',
+                'data': {
+                    'outliers': target_outliers,
+                    'peer_medians': analysis_result.get('peer_outlier_screen', {}).get('peer_medians', {})
+                }
+            })
+        
         # Determine overall risk level
         critical_count = sum(1 for a in anomalies if a['severity'] == 'critical')
         high_count = sum(1 for a in anomalies if a['severity'] == 'high')
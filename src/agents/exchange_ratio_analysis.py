@@ -18,6 +18,7 @@ from loguru import logger
 
 from .base_agent import BaseAgent
 from ..core.state import DiligenceState
+from ..utils.price_store import get_price_store
 
 
 class ExchangeRatioAnalyzer(BaseAgent):
@@ -46,8 +47,18 @@ class ExchangeRatioAnalyzer(BaseAgent):
             deal_terms = state.get('deal_terms', {})
             valuation_data = state.get('valuation_models', {})
             
+            # Market prices and price history from the local price store
+            target_prices = await self._price_statistics(state.get('target_ticker'))
+            acquirer_prices = await self._price_statistics(state.get('acquirer_ticker'))
+            target_data = self._with_prices(target_data, target_prices)
+            acquirer_data = self._with_prices(acquirer_data, acquirer_prices)
+            
             # Call the analyze method
             result = self.analyze(acquirer_data, target_data, deal_terms, valuation_data)
+            result['price_statistics'] = {
+                'target': target_prices,
+                'acquirer': acquirer_prices
+            }
             
             # Return in BaseAgent format
             return {
@@ -70,6 +81,34 @@ class ExchangeRatioAnalyzer(BaseAgent):
                 "recommendations": []
             }
     
+    async def _price_statistics(self, ticker: str) -> Dict[str, Any]:
+        """Price statistics of a ticker from the price store (empty if unavailable)"""
+        if not ticker:
+            return {}
+        try:
+            history = await get_price_store().get_history(ticker)
+        except Exception as e:
+            logger.warning(f"Price history unavailable for {ticker}: {e}")
+            return {}
+        return history.summary() if history is not None and len(history) else {}
+    
+    def _with_prices(self, data: Dict[str, Any], prices: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in market prices the company data does not already carry"""
+        if not prices:
+            return data
+        data = dict(data or {})
+        fields = {
+            'current_stock_price': prices.get('current_price'),
+            'price_1day_ago': prices.get('price_1day_ago'),
+            'price_30day_avg': prices.get('price_30day_avg'),
+            'price_52week_high': prices.get('price_52week_high'),
+            'price_52week_low': prices.get('price_52week_low')
+        }
+        for key, value in fields.items():
+            if value is not None and not data.get(key):
+                data[key] = value
+        return data
+    
     def analyze(
         self,
         acquirer_data: Dict[str, Any],
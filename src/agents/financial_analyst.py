@@ -20,6 +20,8 @@ from ..core.state import DiligenceState, FinancialMetrics
 from ..integrations.fmp_client import FMPClient
 from ..utils.financial_normalizer import FinancialNormalizer, normalize_quarterly_data
 from ..utils.enhanced_valuation_engine import EnhancedValuationEngine
+from ..utils.compute_executor import get_compute_executor
+from ..utils.compute_tasks import valuation_inputs, valuation_task
 from ..utils.financial_calculator import FinancialCalculator
 from ..utils.llm_retry import llm_call_with_retry
 
@@ -503,7 +505,7 @@ class FinancialAnalystAgent(BaseAgent):
             if not income_statements:
                 return {'error': 'No income statements available for normalization'}
             
-            normalized = normalizer.normalize_financial_statements(
+            normalized = await normalizer.normalize_financial_statements_async(
                 income_statements=income_statements,
                 balance_sheets=balance_sheets,
                 cash_flows=cash_flows,
@@ -554,33 +556,40 @@ class FinancialAnalystAgent(BaseAgent):
             # Run full valuation suite with async comparable analysis
             results = {}
             
-            # 1. Multi-scenario DCF
-            results['dcf_analysis'] = valuation_engine.run_multi_scenario_dcf(
-                financial_data, company_profile
-            )
-            
-            # 2. Sensitivity Analysis
-            results['sensitivity_analysis'] = valuation_engine.run_sensitivity_analysis(
-                financial_data, company_profile
-            )
-            
-            # 3. Monte Carlo Simulation
-            results['monte_carlo_simulation'] = valuation_engine.run_monte_carlo_valuation(
-                financial_data, company_profile, num_simulations=10000
-            )
+            # 1-3, 5. DCF, sensitivity, Monte Carlo and LBO are pure CPU work - run them
+            # in parallel on the compute executor's worker processes, off the event loop
+            executor = get_compute_executor()
+            inputs = valuation_inputs(financial_data)
+            compute_jobs = {
+                'dcf_analysis': executor.run(
+                    valuation_task, 'run_multi_scenario_dcf', inputs, company_profile, name="Multi-scenario DCF"
+                ),
+                'sensitivity_analysis': executor.run(
+                    valuation_task, 'run_sensitivity_analysis', inputs, company_profile, name="Sensitivity analysis"
+                ),
+                'monte_carlo_simulation': executor.run(
+                    valuation_task, 'run_monte_carlo_valuation', inputs, company_profile,
+                    num_simulations=10000, name="Monte Carlo simulation"
+                ),
+                'lbo_analysis': executor.run(
+                    valuation_task, 'run_lbo_analysis', inputs, company_profile, name="LBO analysis"
+                )
+            }
+            compute_results = asyncio.gather(*compute_jobs.values())
             
-            # 4. Comparable Company Analysis - NOW ASYNC WITH REAL DATA
+            # 4. Comparable Company Analysis - NOW ASYNC WITH REAL DATA (I/O, overlaps the compute jobs)
             if comparable_companies:
                 logger.info(f"Running comparable company analysis with {len(comparable_companies)} peers...")
-                results['comparable_companies'] = await valuation_engine.run_comparable_analysis(
-                    financial_data, comparable_companies
-                )
+                try:
+                    results['comparable_companies'] = await valuation_engine.run_comparable_analysis(
+                        financial_data, comparable_companies
+                    )
+                except Exception:
+                    compute_results.cancel()
+                    raise
                 logger.info("✓ Comparable company analysis complete with real market data")
             
-            # 5. LBO Analysis
-            results['lbo_analysis'] = valuation_engine.run_lbo_analysis(
-                financial_data, company_profile
-            )
+            results.update(zip(compute_jobs.keys(), await compute_results))
             
             # 6. Valuation Summary
             results['valuation_summary'] = valuation_engine.generate_valuation_summary(results)
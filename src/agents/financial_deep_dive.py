@@ -21,6 +21,7 @@ from ..core.state import DiligenceState
 from ..core.llm_factory import get_llm
 from ..utils.enhanced_valuation_engine import EnhancedValuationEngine
 from ..utils.financial_calculator import FinancialCalculator
+from ..utils.financial_statements import get_financial_statements
 from ..utils.llm_retry import llm_call_with_retry
 
 
@@ -252,48 +253,43 @@ class FinancialDeepDiveAgent(BaseAgent):
         logger.info(f"[DEEP DIVE] Module 1: Working Capital Analysis for {ticker}")
         
         try:
-            balance_sheets = financial_data.get('balance_sheet', [])
-            income_statements = financial_data.get('income_statement', [])
+            statements = get_financial_statements(financial_data, ticker)
+            balance = statements.balance
             
-            if not balance_sheets or not income_statements:
+            if not len(balance) or not len(statements.income):
                 return {'error': 'Insufficient data for working capital analysis'}
             
-            # Calculate NWC for last 5 years
-            nwc_trend = []
-            for i, bs in enumerate(balance_sheets[:5]):
-                current_assets = bs.get('totalCurrentAssets', 0)
-                current_liabilities = bs.get('totalCurrentLiabilities', 0)
-                cash = bs.get('cashAndCashEquivalents', 0)
-                
-                # NWC = Current Assets - Current Liabilities - Cash
-                nwc = current_assets - current_liabilities - cash
-                
-                # Calculate as % of revenue
-                if i < len(income_statements):
-                    revenue = income_statements[i].get('revenue', 1)
-                    nwc_pct_revenue = (nwc / revenue * 100) if revenue > 0 else 0
-                else:
-                    nwc_pct_revenue = 0
-                
-                nwc_trend.append({
-                    'year': bs.get('date', 'Unknown'),
-                    'nwc': nwc,
-                    'current_assets': current_assets,
-                    'current_liabilities': current_liabilities,
-                    'cash': cash,
-                    'nwc_pct_revenue': round(nwc_pct_revenue, 2),
-                    'revenue': income_statements[i].get('revenue', 0) if i < len(income_statements) else 0
-                })
+            # Calculate NWC for last 5 years (revenue matched to each balance sheet date)
+            n = min(5, len(balance))
+            current_assets = np.nan_to_num(balance.column('total_current_assets')[:n])
+            current_liabilities = np.nan_to_num(balance.column('total_current_liabilities')[:n])
+            cash = np.nan_to_num(balance.column('cash')[:n])
+            revenues = np.nan_to_num(statements.aligned('revenue', on='balance_sheet')[:n])
             
-            # Calculate Cash Conversion Cycle using FinancialCalculator
-            latest_bs = balance_sheets[0]
-            latest_is = income_statements[0] if income_statements else {}
+            # NWC = Current Assets - Current Liabilities - Cash
+            nwc = current_assets - current_liabilities - cash
+            with np.errstate(divide='ignore', invalid='ignore'):
+                nwc_pct = np.where(revenues > 0, nwc / revenues * 100, 0.0)
             
-            inventory = latest_bs.get('inventory', 0)
-            receivables = latest_bs.get('netReceivables', 0)
-            payables = latest_bs.get('accountPayables', 0)
-            revenue = latest_is.get('revenue', 1)
-            cogs = latest_is.get('costOfRevenue', None)
+            nwc_trend = [
+                {
+                    'year': balance.records[i].get('date', 'Unknown'),
+                    'nwc': float(nwc[i]),
+                    'current_assets': float(current_assets[i]),
+                    'current_liabilities': float(current_liabilities[i]),
+                    'cash': float(cash[i]),
+                    'nwc_pct_revenue': round(float(nwc_pct[i]), 2),
+                    'revenue': float(revenues[i])
+                }
+                for i in range(n)
+            ]
+            
+            # Calculate Cash Conversion Cycle using FinancialCalculator
+            inventory = statements.latest('inventory', 0, statement='balance_sheet')
+            receivables = statements.latest('accounts_receivable', 0, statement='balance_sheet')
+            payables = statements.latest('accounts_payable', 0, statement='balance_sheet')
+            revenue = statements.latest('revenue', 1)
+            cogs = statements.latest('cost_of_revenue', None)
             
             # Use FinancialCalculator for deterministic working capital calculations
             wc_calc = self.financial_calculator.calculate_working_capital(
@@ -375,36 +371,34 @@ class FinancialDeepDiveAgent(BaseAgent):
         logger.info(f"[DEEP DIVE] Module 2: CapEx & Depreciation Analysis for {ticker}")
         
         try:
-            cash_flows = financial_data.get('cash_flow', [])
-            income_statements = financial_data.get('income_statement', [])
+            statements = get_financial_statements(financial_data, ticker)
+            cash_flows = statements.cash_flow
             
-            if not cash_flows or not income_statements:
+            if not len(cash_flows) or not len(statements.income):
                 return {'error': 'Insufficient data for CapEx analysis'}
             
-            # Analyze last 5 years
-            capex_trend = []
-            for i, cf in enumerate(cash_flows[:5]):
-                capex = abs(cf.get('capitalExpenditure', 0))
-                da = abs(cf.get('depreciationAndAmortization', 0))
-                
-                if i < len(income_statements):
-                    revenue = income_statements[i].get('revenue', 1)
-                    capex_pct_revenue = (capex / revenue * 100) if revenue > 0 else 0
-                    rd_expense = income_statements[i].get('researchAndDevelopmentExpenses', 0)
-                else:
-                    capex_pct_revenue = 0
-                    rd_expense = 0
-                
-                capex_to_da = (capex / da) if da > 0 else 0
-                
-                capex_trend.append({
-                    'year': cf.get('date', 'Unknown'),
-                    'capex': capex,
-                    'depreciation_amortization': da,
-                    'capex_pct_revenue': round(capex_pct_revenue, 2),
-                    'capex_to_da_ratio': round(capex_to_da, 2),
-                    'rd_expense': rd_expense
-                })
+            # Analyze last 5 years (income statement items matched to each cash flow date)
+            n = min(5, len(cash_flows))
+            capex = np.abs(np.nan_to_num(cash_flows.column('capital_expenditure')[:n]))
+            da = np.abs(np.nan_to_num(cash_flows.column('depreciation_and_amortization')[:n]))
+            revenues = np.nan_to_num(statements.aligned('revenue', on='cash_flow')[:n])
+            rd_expenses = np.nan_to_num(statements.aligned('research_and_development', on='cash_flow')[:n])
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                capex_pct = np.where(revenues > 0, capex / revenues * 100, 0.0)
+                capex_to_da = np.where(da > 0, capex / da, 0.0)
+            
+            capex_trend = [
+                {
+                    'year': cash_flows.records[i].get('date', 'Unknown'),
+                    'capex': float(capex[i]),
+                    'depreciation_amortization': float(da[i]),
+                    'capex_pct_revenue': round(float(capex_pct[i]), 2),
+                    'capex_to_da_ratio': round(float(capex_to_da[i]), 2),
+                    'rd_expense': float(rd_expenses[i])
+                }
+                for i in range(n)
+            ]
             
             # Estimate maintenance vs growth CapEx
             # Rule of thumb: Maintenance CapEx ≈ D&A
@@ -20,6 +20,7 @@ import numpy as np
 
 from .base_agent import BaseAgent
 from ..integrations.fmp_client import FMPClient
+from ..utils.reference_data import get_reference_data_service
 
 
 class MacroeconomicAnalystAgent(BaseAgent):
@@ -219,40 +220,36 @@ class MacroeconomicAnalystAgent(BaseAgent):
             
     async def _fetch_economic_indicators(self) -> Dict[str, Any]:
         """
-        Fetch key economic indicators from FMP and other sources.
+        Read key economic indicators from the shared reference data service
+        (refreshed in the background, or once here in processes that don't run
+        it; defaults if it has no data).
         
         Returns:
             Dictionary of current economic indicators
         """
         try:
             indicators = {}
+            reference_data = get_reference_data_service()
+            await reference_data.ensure_loaded()
             
-            # Fetch data with async context
-            async with FMPClient() as client:
-                # Fetch treasury rates (proxy for interest rates)
-                treasury_10y = await client.get_treasury_rates(maturity='10year')
-                if treasury_10y and len(treasury_10y) > 0:
-                    rate_value = treasury_10y[0].get('value')
-                    indicators['treasury_10y'] = float(rate_value) if rate_value is not None else 4.5
-                else:
-                    indicators['treasury_10y'] = 4.5
-                
-                # Fetch economic indicators from FMP
-                economic_calendar = await client.get_economic_calendar()
-                
-                # Extract key indicators
-                if economic_calendar:
-                    for event in economic_calendar[:50]:  # Recent events
-                        event_name = event.get('event', '')
-                        
-                        if 'GDP' in event_name.upper():
-                            indicators['gdp_growth'] = event.get('actual', 0)
-                        elif 'CPI' in event_name.upper() or 'INFLATION' in event_name.upper():
-                            indicators['inflation_rate'] = event.get('actual', 0)
-                        elif 'UNEMPLOYMENT' in event_name.upper():
-                            indicators['unemployment_rate'] = event.get('actual', 0)
-                        elif 'PPI' in event_name.upper():
-                            indicators['ppi'] = event.get('actual', 0)
+            # Treasury rates (proxy for interest rates)
+            treasury_10y = reference_data.treasury_10y()
+            indicators['treasury_10y'] = treasury_10y if treasury_10y is not None else 4.5
+            
+            # Extract key indicators from the economic calendar
+            economic_calendar = reference_data.economic_calendar()
+            if economic_calendar:
+                for event in economic_calendar[:50]:  # Recent events
+                    event_name = event.get('event', '')
+                    
+                    if 'GDP' in event_name.upper():
+                        indicators['gdp_growth'] = event.get('actual', 0)
+                    elif 'CPI' in event_name.upper() or 'INFLATION' in event_name.upper():
+                        indicators['inflation_rate'] = event.get('actual', 0)
+                    elif 'UNEMPLOYMENT' in event_name.upper():
+                        indicators['unemployment_rate'] = event.get('actual', 0)
+                    elif 'PPI' in event_name.upper():
+                        indicators['ppi'] = event.get('actual', 0)
             
             # Set defaults if not found
             indicators.setdefault('treasury_10y', 4.5)
@@ -268,6 +265,7 @@ class MacroeconomicAnalystAgent(BaseAgent):
             indicators['real_interest_rate'] = (
                 float(treasury_rate) - float(inflation_rate)
             )
+            indicators['data_as_of'] = reference_data.as_of()
             
             self.economic_cache = indicators
             return indicators
@@ -0,0 +1,106 @@
+"""
+Agent Registry - Agent factories keyed by agent name, imported on first use
+
+Agent modules pull in the LLM SDKs (langchain, Anthropic, Google, OpenAI) and
+the analysis libraries (pandas, scipy, financetoolkit, chromadb). The
+registry maps each agent key to "module:Class" and imports the module only
+when the agent is first created, so the API server can start and answer
+/api/health without loading any of them.
+
+prewarm() imports everything up front, off the request path (see
+PREWARM_ON_STARTUP in the server and the queue worker).
+"""
+import importlib
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from loguru import logger
+
+
+# Configuration (overridable via environment)
+PREWARM_ON_STARTUP = os.getenv("PREWARM_ON_STARTUP", "false").lower() == "true"
+
+# Agent key -> "module:Class" (module relative to src.agents)
+AGENT_FACTORIES: Dict[str, str] = {
+    "project_manager": "project_manager:ProjectManagerAgent",
+    "data_ingestion": "data_ingestion:DataIngestionAgent",
+    "financial_analyst": "financial_analyst:FinancialAnalystAgent",
+    "financial_deep_dive": "financial_deep_dive:FinancialDeepDiveAgent",
+    "deal_structuring": "deal_structuring:DealStructuringAgent",
+    "sources_uses": "sources_uses:SourcesUsesGenerator",
+    "legal_counsel": "legal_counsel:LegalCounselAgent",
+    "market_strategist": "market_strategist:MarketStrategistAgent",
+    "competitive_benchmarking": "competitive_benchmarking:CompetitiveBenchmarkingAgent",
+    "macroeconomic_analyst": "macroeconomic_analyst:MacroeconomicAnalystAgent",
+    "risk_assessment": "risk_assessment:RiskAssessmentAgent",
+    "tax_structuring": "tax_structuring:TaxStructuringAgent",
+    "accretion_dilution": "accretion_dilution:AccretionDilutionAgent",
+    "contribution_analysis": "contribution_analysis:ContributionAnalyzer",
+    "exchange_ratio_analysis": "exchange_ratio_analysis:ExchangeRatioAnalyzer",
+    "integration_planner": "integration_planner:IntegrationPlannerAgent",
+    "external_validator": "external_validator:ExternalValidatorAgent",
+    "synthesis_reporting": "synthesis_reporting:SynthesisReportingAgent",
+    "conversational_synthesis": "conversational_synthesis:ConversationalSynthesisAgent",
+}
+
+# Heavy modules outside the agents that the first job or copilot request would load
+PREWARM_MODULES = (
+    "src.core.llm_factory",
+    "src.utils.advanced_valuation",
+    "src.api.copilot_service_enhanced",
+)
+
+_classes: Dict[str, type] = {}
+
+
+def get_agent_class(agent_key: str) -> type:
+    """
+    Agent class for a key (imports its module on first use)
+
+    Raises:
+        KeyError: If no factory is registered for the key
+    """
+    agent_class = _classes.get(agent_key)
+    if agent_class is None:
+        module_name, class_name = AGENT_FACTORIES[agent_key].split(":")
+        module = importlib.import_module(f"{__package__}.{module_name}")
+        agent_class = _classes[agent_key] = getattr(module, class_name)
+    return agent_class
+
+
+def create_agent(agent_key: str, *args: Any, **kwargs: Any) -> Any:
+    """New instance of the agent registered under a key"""
+    return get_agent_class(agent_key)(*args, **kwargs)
+
+
+def loaded_agents() -> List[str]:
+    """Agent keys whose modules are imported in this process"""
+    return list(_classes)
+
+
+def prewarm(agent_keys: Optional[Iterable[str]] = None, modules: Iterable[str] = PREWARM_MODULES) -> List[str]:
+    """
+    Import agents (default all) and heavy supporting modules ahead of first use
+
+    Failures are logged, not raised: a module that cannot be imported fails
+    again, with its real error, when a job first needs it.
+
+    Returns:
+        Names that were imported
+    """
+    started = time.perf_counter()
+    loaded = []
+    for agent_key in agent_keys if agent_keys is not None else AGENT_FACTORIES:
+        try:
+            get_agent_class(agent_key)
+            loaded.append(agent_key)
+        except Exception as e:
+            logger.warning(f"Prewarm: could not load agent {agent_key}: {e}")
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+            loaded.append(module_name)
+        except Exception as e:
+            logger.warning(f"Prewarm: could not import {module_name}: {e}")
+    logger.info(f"Prewarmed {len(loaded)} agents/modules in {time.perf_counter() - started:.1f}s")
+    return loaded
@@ -31,6 +31,7 @@ except ImportError:
 from .base_agent import BaseAgent
 from ..core.state import DiligenceState
 from ..utils.llm_retry import llm_call_with_retry
+from ..utils.serialization import dumps, dumps_str
 
 # Import optimization components
 from ..utils.parallel_processor import ParallelProcessor, BatchedVerificationProcessor
@@ -1185,11 +1186,10 @@ ACTION: [Keep/Flag/Remove/Review]"""
         """
         findings = []
         
-        # IMPORTANT: Serialize AGAIN before json.dumps to catch any remaining Period objects
-        agent_data = self._serialize_dataframes(agent_data)
-        
+        # agent_data was passed through _serialize_dataframes by the caller; anything
+        # else pandas/numpy left in it is handled by the serializer
         try:
-            data_str = json.dumps(agent_data, separators=(',', ':'), default=str)
+            data_str = dumps_str(agent_data)
         except Exception as e:
             logger.warning(f"Error serializing agent data to JSON: {e}, using str() fallback")
             data_str = str(agent_data)
@@ -2502,8 +2502,8 @@ REASONING: [detailed explanation of your synthesis]"""
             # Serialize and save
             self.log_action(f"Saving consolidated data to {output_path}")
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(consolidated_data, f, indent=2, default=str)
+            with open(output_path, 'wb') as f:
+                f.write(dumps(consolidated_data, indent=True))
             
             self.log_action(f"✓ Consolidated data saved successfully to {output_path}")
             
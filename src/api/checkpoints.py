@@ -0,0 +1,124 @@
+"""
+Checkpoint store - per-agent snapshots of analysis state
+
+The orchestrator saves the full state after every agent. A failed or
+interrupted job can then be resumed from its last good snapshot, and a single
+agent (plus the agents that depend on it) can be re-run, without repeating
+the FMP, SEC and LLM work of the rest of the pipeline.
+
+Layout: data/checkpoints/<job_id>/<seq>_<agent>.msgpack.gz, where seq
+increases with every save, so the newest snapshot is always the highest seq
+(even when agents are re-run out of pipeline order). Snapshots are msgpack
+(src.utils.serialization.pack); .json.gz snapshots from older versions are
+still listed and loaded.
+"""
+import gzip
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from ..utils.serialization import BINARY_FORMAT, pack, unpack
+
+
+# Configuration (overridable via environment)
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "data/checkpoints")
+CHECKPOINT_KEEP = int(os.getenv("CHECKPOINT_KEEP", "40"))  # newest snapshots kept per job
+
+_FILE_PATTERN = re.compile(r"^(\d+)_([a-z0-9_]+)\.(json|msgpack)\.gz$")
+
+
+class CheckpointStore:
+    """Gzipped msgpack snapshots of job state, one per agent run"""
+
+    def __init__(self, root: str = CHECKPOINT_DIR, keep: int = CHECKPOINT_KEEP):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+
+    def _entries(self, job_id: str) -> List[Tuple[int, str, Path, str]]:
+        job_dir = self.root / job_id
+        if not job_dir.exists():
+            return []
+        entries = []
+        for path in job_dir.iterdir():
+            match = _FILE_PATTERN.match(path.name)
+            if match:
+                entries.append((int(match.group(1)), match.group(2), path, match.group(3)))
+        return sorted(entries)
+
+    def save(self, job_id: str, agent_key: str, state: Dict[str, Any]) -> Path:
+        """Snapshot the state after an agent ran
+
+        Args:
+            job_id: Job ID
+            agent_key: Agent that just finished
+            state: Full job state
+
+        Returns:
+            Checkpoint file path
+        """
+        entries = self._entries(job_id)
+        seq = entries[-1][0] + 1 if entries else 1
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        path = job_dir / f"{seq:04d}_{agent_key}.{BINARY_FORMAT}.gz"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(pack(state), compresslevel=1))
+        os.replace(tmp_path, path)
+
+        for _, _, old_path, _ in entries[:max(0, len(entries) + 1 - self.keep)]:
+            old_path.unlink(missing_ok=True)
+        return path
+
+    def load(self, job_id: str, agent_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Load the newest snapshot (optionally the newest one taken after a given agent)
+
+        Args:
+            job_id: Job ID
+            agent_key: Only consider snapshots taken after this agent
+
+        Returns:
+            Job state, or None if there is no matching checkpoint
+        """
+        for _, agent, path, fmt in reversed(self._entries(job_id)):
+            if agent_key and agent != agent_key:
+                continue
+            try:
+                with gzip.open(path, 'rb') as f:
+                    return unpack(f.read(), fmt)
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping unreadable checkpoint {path}: {e}")
+        return None
+
+    def list(self, job_id: str) -> List[Dict[str, Any]]:
+        """Checkpoints of a job, oldest first"""
+        return [
+            {
+                'seq': seq,
+                'agent': agent,
+                'saved_at': datetime.utcfromtimestamp(path.stat().st_mtime).isoformat(),
+                'size_bytes': path.stat().st_size
+            }
+            for seq, agent, path, _ in self._entries(job_id)
+        ]
+
+    def delete(self, job_id: str):
+        """Remove every checkpoint of a job"""
+        for _, _, path, _ in self._entries(job_id):
+            path.unlink(missing_ok=True)
+
+
+# Global checkpoint store instance
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Get global checkpoint store instance"""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
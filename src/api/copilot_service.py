@@ -16,6 +16,8 @@ from src.agents.conversational_synthesis import ConversationalSynthesisAgent
 from src.agents.external_validator import ExternalValidatorAgent
 from src.core.llm_factory import get_llm
 from src.api.job_manager import get_job_manager
+from src.utils.llm_streaming import StreamMetrics, stream_llm_events
+from src.api.copilot_session import CopilotSession, CopilotSessionCache, build_session, compact_history
 
 
 class CopilotService:
@@ -29,6 +31,7 @@ class CopilotService:
     def __init__(self):
         self.job_manager = get_job_manager()
         self.llm = get_llm(model_name="gemini-2.0-flash-exp", temperature=0.3)
+        self.sessions = CopilotSessionCache()  # job_id -> CopilotSession (LRU)
         
     async def initialize_chat(self, job_id: str) -> Dict[str, Any]:
         """
@@ -41,17 +44,15 @@ class CopilotService:
             Initial chat context with welcome message and suggestions
         """
         try:
-            # Load analysis results
-            result = self.job_manager.get_job_result(job_id)
-            if not result:
+            # Load (or reuse) analysis results and state
+            session = await self._get_session(job_id)
+            if not session:
                 return {
                     "error": "Analysis not found",
                     "welcome_message": None,
                     "suggestions": []
                 }
-            
-            # Load complete state from JSON file
-            state = await self._load_analysis_state(job_id, result)
+            result, state = session.result, session.state
             
             # Generate welcome message and suggestions
             welcome_message = self._generate_welcome_message(result, state)
@@ -91,9 +92,9 @@ class CopilotService:
             Response chunks for streaming
         """
         try:
-            # Load analysis context
-            result = self.job_manager.get_job_result(job_id)
-            if not result:
+            # Load analysis context (cached per job)
+            session = await self._get_session(job_id)
+            if not session:
                 yield {
                     "type": "error",
                     "content": "Analysis not found",
@@ -101,24 +102,27 @@ class CopilotService:
                 }
                 return
             
-            state = await self._load_analysis_state(job_id, result)
-            
             # Determine if we need live search
             needs_live_search = self._check_if_needs_live_search(message)
             
             # Build context and generate response
             if needs_live_search:
                 # Use external validator for live search capabilities
-                async for chunk in self._generate_live_search_response(
-                    message, state, result, conversation_history
-                ):
-                    yield chunk
+                handler = self._generate_live_search_response(
+                    message, session, conversation_history
+                )
             else:
                 # Use conversational synthesis agent for context-based response
-                async for chunk in self._generate_context_response(
-                    message, state, result, conversation_history
-                ):
+                handler = self._generate_context_response(
+                    message, session, conversation_history
+                )
+            
+            # Close the handler (and its LLM stream) promptly if the consumer stops early
+            try:
+                async for chunk in handler:
                     yield chunk
+            finally:
+                await handler.aclose()
                     
         except Exception as e:
             logger.error(f"Error processing message for job {job_id}: {e}")
@@ -128,6 +132,19 @@ class CopilotService:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    async def _get_session(self, job_id: str) -> Optional[CopilotSession]:
+        """Get the job's cached copilot session, loading and indexing it on first use."""
+        
+        async def build() -> Optional[CopilotSession]:
+            result = self.job_manager.get_job_result(job_id)
+            if not result:
+                return None
+            state = await self._load_analysis_state(job_id, result)
+            summary = self._build_context_for_llm(state, result, None)
+            return build_session(job_id, result, state, summary)
+        
+        return await self.sessions.get_or_create(job_id, build)
+    
     async def _load_analysis_state(self, job_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
         """Load complete analysis state with ALL data sources.
         
@@ -243,23 +260,22 @@ class CopilotService:
     async def _generate_context_response(
         self,
         message: str,
-        state: Dict[str, Any],
-        result: Dict[str, Any],
+        session: CopilotSession,
         conversation_history: Optional[List[Dict[str, Any]]]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate response using analysis context."""
         
-        # Build comprehensive context
-        context = self._build_context_for_llm(state, result, conversation_history)
+        # Cached section summaries plus only the excerpts relevant to this question
+        context = session.prompt_context(message)
         
         # Create prompt
         prompt = f"""You are an expert M&A analyst assistant helping a user understand their due diligence analysis.
 
 ANALYSIS CONTEXT:
-{json.dumps(context, indent=2, default=str)}
+{context}
 
 CONVERSATION HISTORY:
-{json.dumps(conversation_history or [], indent=2, default=str)}
+{compact_history(conversation_history)}
 
 USER QUESTION: {message}
 
@@ -280,25 +296,11 @@ RESPONSE:"""
         }
         
         try:
-            response = await self.llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(self.llm, prompt, metrics):
+                yield event
             
-            # Stream in chunks
-            chunk_size = 50
-            words = content.split()
-            
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            
-            yield {
-                "type": "end",
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error generating context response: {e}")
@@ -311,15 +313,14 @@ RESPONSE:"""
     async def _generate_live_search_response(
         self,
         message: str,
-        state: Dict[str, Any],
-        result: Dict[str, Any],
+        session: CopilotSession,
         conversation_history: Optional[List[Dict[str, Any]]]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate response with live web search using Gemini 2.5 Pro."""
         
         # Build context
-        context = self._build_context_for_llm(state, result, conversation_history)
-        target_company = result.get("project_name", "the target company")
+        context = session.prompt_context(message, top_k=3)
+        target_company = session.result.get("project_name", "the target company")
         
         # Create prompt with search directive
         prompt = f"""You are an expert M&A analyst with access to real-time web search capabilities.
@@ -327,7 +328,7 @@ RESPONSE:"""
 TARGET COMPANY: {target_company}
 
 INTERNAL ANALYSIS CONTEXT:
-{json.dumps(context, indent=2, default=str)[:3000]}
+{context}
 
 USER QUESTION: {message}
 
@@ -350,25 +351,11 @@ RESPONSE:"""
         try:
             # Use Gemini 2.5 Pro with search capabilities
             search_llm = get_llm(model_name="gemini-2.0-flash-exp", temperature=0.3)
-            response = await search_llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            
-            # Stream the response
-            chunk_size = 50
-            words = content.split()
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(search_llm, prompt, metrics):
+                yield event
             
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            
-            yield {
-                "type": "end",
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error generating live search response: {e}")
@@ -9,7 +9,6 @@ This enhanced version includes:
 """
 
 from typing import Dict, Any, List, Optional, AsyncGenerator
-import json
 from pathlib import Path
 from datetime import datetime
 from loguru import logger
@@ -18,7 +17,11 @@ from src.agents.conversational_synthesis import ConversationalSynthesisAgent
 from src.agents.external_validator import ExternalValidatorAgent
 from src.core.llm_factory import get_llm
 from src.api.job_manager import get_job_manager
-from src.utils.knowledge_graph import build_knowledge_graph_from_state, query_knowledge_graph, KnowledgeGraph
+from src.utils.knowledge_graph import load_or_build_knowledge_graph, query_knowledge_graph, KnowledgeGraph
+from src.utils.scenario_valuation import CompiledValuationModel, parse_scenario_overrides, format_scenario_tables
+from src.utils.llm_streaming import StreamMetrics, stream_llm_events
+from src.api.copilot_session import CopilotSession, CopilotSessionCache, build_session, compact_history
+from src.utils.serialization import dumps, dumps_str, loads
 
 
 class EnhancedCopilotService:
@@ -31,34 +34,29 @@ class EnhancedCopilotService:
     def __init__(self):
         self.job_manager = get_job_manager()
         self.llm = get_llm(model_name="gemini")
+        # Graphs and valuation models exist only for completed jobs with a cached session,
+        # and are dropped with it, so they share the session LRU bound (as does the
+        # conversation history, kept on the session itself)
         self.knowledge_graphs = {}  # job_id -> KnowledgeGraph
-        self.conversation_histories = {}  # job_id -> conversation history
+        self.valuation_models = {}  # job_id -> CompiledValuationModel
+        self.sessions = CopilotSessionCache(on_evict=self._drop_job_artifacts)  # job_id -> CopilotSession (LRU)
         
     async def initialize_chat(self, job_id: str) -> Dict[str, Any]:
         """
         Initialize a new chat session for a given analysis.
         """
         try:
-            result = self.job_manager.get_job_result(job_id)
-            if not result:
+            session = await self._get_session(job_id)
+            if not session:
                 return {
                     "error": "Analysis not found",
                     "welcome_message": None,
                     "suggestions": []
                 }
-            
-            # Load complete state from JSON file
-            state = await self._load_analysis_state(job_id, result)
-            
-            # Build knowledge graph
-            if state:
-                logger.info(f"Building knowledge graph for job {job_id}")
-                self.knowledge_graphs[job_id] = build_knowledge_graph_from_state(state)
-                graph = self.knowledge_graphs[job_id]
-                logger.info(f"Knowledge graph built: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+            result, state = session.result, session.state
             
             # Initialize conversation history
-            self.conversation_histories[job_id] = []
+            session.conversation_history = []
             
             # Generate welcome message and suggestions
             welcome_message = self._generate_welcome_message(result, state)
@@ -70,7 +68,8 @@ class EnhancedCopilotService:
                 "welcome_message": welcome_message,
                 "suggestions": suggestions,
                 "context_loaded": True,
-                "knowledge_graph_enabled": job_id in self.knowledge_graphs
+                "knowledge_graph_enabled": job_id in self.knowledge_graphs,
+                "scenario_model_enabled": job_id in self.valuation_models
             }
             
         except Exception as e:
@@ -91,20 +90,19 @@ class EnhancedCopilotService:
         Process a user message and stream the response with enhanced features.
         """
         try:
-            result = self.job_manager.get_job_result(job_id)
-            if not result:
+            session = await self._get_session(job_id)
+            if not session:
                 yield {
                     "type": "error",
                     "content": "Analysis not found",
                     "timestamp": datetime.utcnow().isoformat()
                 }
                 return
-            
-            state = await self._load_analysis_state(job_id, result)
+            result, state = session.result, session.state
             
             # Store conversation history
             if conversation_history:
-                self.conversation_histories[job_id] = conversation_history
+                session.conversation_history = conversation_history
             
             # Check query type
             needs_kg_query = self._check_if_needs_kg_query(message)
@@ -113,25 +111,28 @@ class EnhancedCopilotService:
             
             # Route to appropriate handler
             if needs_scenario:
-                async for chunk in self._handle_scenario_remodeling(
-                    message, state, result, conversation_history
-                ):
-                    yield chunk
+                handler = self._handle_scenario_remodeling(
+                    message, state, result, conversation_history, job_id
+                )
             elif needs_kg_query and job_id in self.knowledge_graphs:
-                async for chunk in self._handle_kg_query(
+                handler = self._handle_kg_query(
                     message, state, result, conversation_history, job_id
-                ):
-                    yield chunk
+                )
             elif needs_live_search:
-                async for chunk in self._generate_live_search_response(
-                    message, state, result, conversation_history
-                ):
-                    yield chunk
+                handler = self._generate_live_search_response(
+                    message, session, conversation_history
+                )
             else:
-                async for chunk in self._generate_context_response(
-                    message, state, result, conversation_history
-                ):
+                handler = self._generate_context_response(
+                    message, session, conversation_history
+                )
+            
+            # Close the handler (and its LLM stream) promptly if the consumer stops early
+            try:
+                async for chunk in handler:
                     yield chunk
+            finally:
+                await handler.aclose()
                     
         except Exception as e:
             logger.error(f"Error processing message for job {job_id}: {e}")
@@ -141,6 +142,37 @@ class EnhancedCopilotService:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    async def _get_session(self, job_id: str) -> Optional[CopilotSession]:
+        """Get the job's cached copilot session, loading and indexing it on first use."""
+        
+        async def build() -> Optional[CopilotSession]:
+            result = self.job_manager.get_job_result(job_id)
+            if not result:
+                return None
+            
+            # Load complete state from JSON file
+            state = await self._load_analysis_state(job_id, result)
+            
+            # Load persisted knowledge graph (built and saved on first use). Only for
+            # completed jobs: sessions of running jobs are rebuilt on every message
+            if state and result.get('status') == 'completed':
+                self.knowledge_graphs[job_id] = load_or_build_knowledge_graph(job_id, state)
+                graph = self.knowledge_graphs[job_id]
+                logger.info(f"Knowledge graph ready: {len(graph.nodes)} nodes, {graph.edge_count} edges")
+                
+                # Compile valuation model up front so the first what-if is instant
+                self._get_valuation_model(job_id, state, keep=True)
+            
+            summary = self._build_context_for_llm(state, result, None)
+            return build_session(job_id, result, state, summary)
+        
+        return await self.sessions.get_or_create(job_id, build)
+    
+    def _drop_job_artifacts(self, job_id: str):
+        """Release per-job models when a session is evicted."""
+        self.knowledge_graphs.pop(job_id, None)
+        self.valuation_models.pop(job_id, None)
+    
     async def _handle_kg_query(
         self,
         message: str,
@@ -168,10 +200,10 @@ Nodes Found: {len(kg_results.get('nodes', []))}
 Relationships: {len(kg_results.get('relationships', []))}
 
 RELEVANT NODES:
-{json.dumps(kg_results.get('nodes', [])[:5], indent=2, default=str)}
+{dumps_str(kg_results.get('nodes', [])[:5], indent=True)}
 
 RELATIONSHIPS:
-{json.dumps(kg_results.get('relationships', [])[:10], indent=2, default=str)}
+{dumps_str(kg_results.get('relationships', [])[:10], indent=True)}
 
 Provide a clear answer that:
 1. Explains the relationships found in the knowledge graph
@@ -186,23 +218,13 @@ Include a citation at the end:
 
 RESPONSE:"""
 
-            response = await self.llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            
-            # Stream response
-            chunk_size = 50
-            words = content.split()
-            
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "metadata": {"source": "knowledge_graph"}
-                }
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(
+                self.llm, prompt, metrics, metadata={"source": "knowledge_graph"}
+            ):
+                yield event
             
-            yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error handling KG query: {e}")
@@ -217,9 +239,15 @@ RESPONSE:"""
         message: str,
         state: Dict[str, Any],
         result: Dict[str, Any],
-        conversation_history: Optional[List[Dict[str, Any]]]
+        conversation_history: Optional[List[Dict[str, Any]]],
+        job_id: str
     ) -> AsyncGenerator[Dict[str, Any], None]:
-        """Handle scenario re-modeling requests."""
+        """
+        Handle scenario re-modeling requests.
+        
+        Re-runs DCF, LBO and accretion/dilution on the job's compiled valuation
+        model; the LLM only narrates the exact before/after numbers.
+        """
         
         yield {
             "type": "start",
@@ -231,58 +259,97 @@ RESPONSE:"""
             # Extract assumptions from message
             assumptions = self._extract_scenario_assumptions(message)
             
-            # Get current valuation
-            financial_data = state.get('financial_data', {})
-            current_val = financial_data.get('valuation', {})
+            model = self._get_valuation_model(job_id, state)
+            if model is None:
+                yield {
+                    "type": "content",
+                    "content": "Scenario re-modeling needs the analysis financial statements, which are not available for this job.",
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "metadata": {"scenario": True, "assumptions": assumptions}
+                }
+                yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+                return
+            
+            if not assumptions:
+                yield {
+                    "type": "content",
+                    "content": (
+                        "I couldn't find a specific assumption change in your request. Try e.g. "
+                        "\"What if WACC is 9% and revenue growth 12%?\" or \"What if margins expand by 2%?\" - "
+                        "supported inputs: revenue growth, "
+                        "EBITDA margin, WACC, terminal growth, tax rate, forecast years, entry/exit multiple, "
+                        "interest rate, cash/stock mix, synergies and purchase price."
+                    ),
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "metadata": {"scenario": True, "assumptions": assumptions}
+                }
+                yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+                return
+            
+            # Deterministic recomputation
+            comparison = model.compare(assumptions)
+            tables = format_scenario_tables(comparison)
+            logger.info(f"Scenario recomputed for job {job_id} in {comparison['compute_ms']:.1f}ms")
+            
+            # Only a clean recompute of exactly what was asked earns "High"
+            if comparison['adjustments']:
+                confidence = "Low (the model adjusted or ignored requested assumptions - see warnings)"
+            elif comparison['warnings']:
+                confidence = "Medium (recomputed by valuation model, with validation warnings)"
+            else:
+                confidence = "High (recomputed by valuation model)"
+            
+            metadata = {
+                "scenario": True,
+                "assumptions": assumptions,
+                "confidence": confidence.split(" ", 1)[0],
+                "scenario_results": {
+                    "before": comparison['before'],
+                    "after": comparison['after'],
+                    "compute_ms": comparison['compute_ms']
+                }
+            }
+            
+            yield {
+                "type": "content",
+                "content": tables + "\n\n",
+                "timestamp": datetime.utcnow().isoformat(),
+                "metadata": metadata
+            }
             
-            # Build scenario response
-            prompt = f"""You are an M&A valuation expert. The user wants to remodel a scenario.
+            # LLM narrates the computed numbers only
+            warnings = "\n".join(f"- {w}" for w in comparison['warnings']) or "None"
+            prompt = f"""You are an M&A valuation expert. A scenario has been recomputed by the valuation model.
 
 USER REQUEST: {message}
 
-EXTRACTED ASSUMPTIONS:
-{json.dumps(assumptions, indent=2)}
+MODEL OUTPUT (exact - already shown to the user):
+{tables}
 
-CURRENT VALUATION:
-{json.dumps(current_val, indent=2, default=str)}
+MODEL WARNINGS (ADJUSTED = the model did not use the requested value):
+{warnings}
 
-Provide a detailed scenario analysis that:
-1. Acknowledges the assumption changes
-2. Estimates the impact on valuation (show calculations)
-3. Presents before/after comparison in a markdown table
-4. Explains the key drivers of the change
-5. Adds relevant insights and caveats
+Write a short narrative (3-6 bullet points) that:
+1. Explains the key drivers behind the changes
+2. Notes which model (DCF, LBO, accretion/dilution) is most sensitive
+3. Adds relevant caveats, including every warning above (state the value the model actually used)
 
-Format with:
-- **Original Assumptions** vs **Updated Assumptions** table
-- **Valuation Impact** table showing before/after
-- Key insights in bullet points
+Rules: quote only numbers that appear in the model output above. Do not estimate or recalculate anything. Do not repeat the tables.
 
-Include citation:
+End with:
 **Analysis Type:** Scenario Re-modeling
 **Assumptions Changed:** {len(assumptions)}
-**Confidence:** Medium (estimated impact)
-**Recommendation:** Run full DCF with updated assumptions for precise valuation
+**Confidence:** {confidence}
 
 RESPONSE:"""
 
-            response = await self.llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(
+                self.llm, prompt, metrics, metadata={"scenario": True, "assumptions": assumptions}
+            ):
+                yield event
             
-            # Stream response
-            chunk_size = 50
-            words = content.split()
-            
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "metadata": {"scenario": True, "assumptions": assumptions}
-                }
-            
-            yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error handling scenario: {e}")
@@ -292,37 +359,29 @@ RESPONSE:"""
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    def _get_valuation_model(self, job_id: str, state: Dict[str, Any], keep: bool = False) -> Optional[CompiledValuationModel]:
+        """Get (compiling on first use) the job's in-memory valuation model.
+        
+        Kept only while the job's session is cached (or with keep=True, while
+        building that session), so models never outlive the session LRU.
+        """
+        if job_id not in self.valuation_models:
+            try:
+                model = CompiledValuationModel.from_state(state) if state else None
+            except Exception as e:
+                logger.warning(f"Could not compile valuation model for job {job_id}: {e}")
+                model = None
+            if model is None:
+                return None
+            if not (keep or job_id in self.sessions):
+                return model
+            self.valuation_models[job_id] = model
+            logger.info(f"Compiled valuation model for job {job_id}")
+        return self.valuation_models[job_id]
+    
     def _extract_scenario_assumptions(self, message: str) -> Dict[str, Any]:
         """Extract scenario assumptions from natural language."""
-        assumptions = {}
-        message_lower = message.lower()
-        
-        # Revenue growth
-        if 'revenue growth' in message_lower or 'growth rate' in message_lower:
-            import re
-            match = re.search(r'(\d+(?:\.\d+)?)\s*%', message)
-            if match:
-                assumptions['revenue_growth'] = float(match.group(1)) / 100
-        
-        # WACC
-        if 'wacc' in message_lower or 'discount rate' in message_lower:
-            import re
-            match = re.search(r'(\d+(?:\.\d+)?)\s*%', message)
-            if match:
-                assumptions['wacc'] = float(match.group(1)) / 100
-        
-        # Margins
-        if 'margin' in message_lower:
-            assumptions['margin_assumption'] = "modified"
-        
-        # Time period
-        if 'year' in message_lower:
-            import re
-            match = re.search(r'(\d+)\s*year', message)
-            if match:
-                assumptions['forecast_years'] = int(match.group(1))
-        
-        return assumptions
+        return parse_scenario_overrides(message)
     
     def _check_if_needs_kg_query(self, message: str) -> bool:
         """Check if message needs knowledge graph query."""
@@ -367,10 +426,9 @@ RESPONSE:"""
             state_files = sorted(output_dir.glob("*_complete_state_*.json"), reverse=True)
             
             if state_files:
-                with open(state_files[0], 'r') as f:
-                    state = json.load(f)
-                    logger.info(f"Loaded analysis state from {state_files[0]}")
-                    return state
+                state = loads(state_files[0].read_bytes())
+                logger.info(f"Loaded analysis state from {state_files[0]}")
+                return state
             
             logger.warning("No complete state file found")
             return {}
@@ -428,21 +486,21 @@ RESPONSE:"""
     async def _generate_context_response(
         self,
         message: str,
-        state: Dict[str, Any],
-        result: Dict[str, Any],
+        session: CopilotSession,
         conversation_history: Optional[List[Dict[str, Any]]]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate response using analysis context with citations."""
         
-        context = self._build_context_for_llm(state, result, conversation_history)
+        # Cached section summaries plus only the excerpts relevant to this question
+        context = session.prompt_context(message)
         
         prompt = f"""You are an expert M&A analyst assistant helping a user understand their due diligence analysis.
 
 ANALYSIS CONTEXT:
-{json.dumps(context, indent=2, default=str)}
+{context}
 
 CONVERSATION HISTORY:
-{json.dumps(conversation_history or [], indent=2, default=str)}
+{compact_history(conversation_history)}
 
 USER QUESTION: {message}
 
@@ -463,21 +521,11 @@ RESPONSE:"""
         yield {"type": "start", "timestamp": datetime.utcnow().isoformat()}
         
         try:
-            response = await self.llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            
-            chunk_size = 50
-            words = content.split()
-            
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat()
-                }
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(self.llm, prompt, metrics):
+                yield event
             
-            yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error generating context response: {e}")
@@ -490,21 +538,20 @@ RESPONSE:"""
     async def _generate_live_search_response(
         self,
         message: str,
-        state: Dict[str, Any],
-        result: Dict[str, Any],
+        session: CopilotSession,
         conversation_history: Optional[List[Dict[str, Any]]]
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """Generate response with live web search."""
         
-        context = self._build_context_for_llm(state, result, conversation_history)
-        target_company = result.get("project_name", "the target company")
+        context = session.prompt_context(message, top_k=3)
+        target_company = session.result.get("project_name", "the target company")
         
         prompt = f"""You are an expert M&A analyst with access to real-time web search capabilities.
 
 TARGET COMPANY: {target_company}
 
 INTERNAL ANALYSIS CONTEXT:
-{json.dumps(context, indent=2, default=str)[:3000]}
+{context}
 
 USER QUESTION: {message}
 
@@ -531,21 +578,11 @@ RESPONSE:"""
         
         try:
             search_llm = get_llm(model_name="gemini")
-            response = await search_llm.ainvoke(prompt)
-            content = response.content if hasattr(response, 'content') else str(response)
-            
-            chunk_size = 50
-            words = content.split()
-            
-            for i in range(0, len(words), chunk_size):
-                chunk = " ".join(words[i:i + chunk_size])
-                yield {
-                    "type": "content",
-                    "content": chunk + " ",
-                    "timestamp": datetime.utcnow().isoformat()
-                }
+            metrics = StreamMetrics()
+            async for event in stream_llm_events(search_llm, prompt, metrics):
+                yield event
             
-            yield {"type": "end", "timestamp": datetime.utcnow().isoformat()}
+            yield {"type": "end", "timestamp": datetime.utcnow().isoformat(), "metrics": metrics.to_dict()}
             
         except Exception as e:
             logger.error(f"Error generating live search response: {e}")
@@ -588,11 +625,12 @@ RESPONSE:"""
     async def export_conversation(self, job_id: str) -> Optional[str]:
         """Export conversation history to JSON (PDF export requires additional setup)."""
         try:
-            if job_id not in self.conversation_histories:
+            session = self.sessions.get(job_id)
+            if session is None:
                 return None
             
-            history = self.conversation_histories[job_id]
-            result = self.job_manager.get_job_result(job_id)
+            history = session.conversation_history
+            result = session.result
             
             export_data = {
                 "project_name": result.get("project_name") if result else "Unknown",
@@ -608,8 +646,8 @@ RESPONSE:"""
             filename = f"conversation_{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             file_path = export_dir / filename
             
-            with open(file_path, 'w') as f:
-                json.dump(export_data, f, indent=2, default=str)
+            with open(file_path, 'wb') as f:
+                f.write(dumps(export_data, indent=True))
             
             logger.info(f"Conversation exported to {file_path}")
             return str(file_path)
@@ -628,3 +666,9 @@ def get_enhanced_copilot_service() -> EnhancedCopilotService:
     if _enhanced_copilot_service is None:
         _enhanced_copilot_service = EnhancedCopilotService()
     return _enhanced_copilot_service
+
+
+def invalidate_copilot_session(job_id: str):
+    """Drop a job's cached session (after a resume or re-run), without creating the service."""
+    if _enhanced_copilot_service is not None:
+        _enhanced_copilot_service.sessions.invalidate(job_id)
@@ -0,0 +1,321 @@
+"""
+Copilot Session Cache - Per-job analysis context with a retrieval index
+
+Loads a job's analysis state once per session, precomputes compact section
+summaries, and indexes agent outputs as small text chunks so each copilot
+prompt carries only the summaries plus the top-k chunks relevant to the
+question instead of the whole re-serialized context.
+"""
+import asyncio
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+from loguru import logger
+import numpy as np
+
+from src.utils.serialization import dumps_str
+
+
+# Configuration (overridable via environment)
+COPILOT_SESSION_MAX_JOBS = int(os.getenv("COPILOT_SESSION_MAX_JOBS", "16"))
+COPILOT_RETRIEVAL_TOP_K = int(os.getenv("COPILOT_RETRIEVAL_TOP_K", "6"))
+COPILOT_CHUNK_CHARS = int(os.getenv("COPILOT_CHUNK_CHARS", "1200"))
+COPILOT_HISTORY_TURNS = int(os.getenv("COPILOT_HISTORY_TURNS", "10"))
+
+# Cap on chunks indexed per key so raw statement dumps don't dominate the index
+MAX_CHUNKS_PER_KEY = 8
+EMBEDDING_DIM = 4096
+
+# State keys that are bookkeeping rather than analysis content
+NON_CONTENT_KEYS = {
+    'agent_outputs', 'agent_statuses', 'messages', 'errors', 'warnings', 'metadata',
+    'progress_percentage', 'current_agent', 'workflow_started', 'workflow_completed',
+    'output_files', '_report_files_available', '_report_paths'
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9_]+|\d+(?:\.\d+)?")
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; snake_case keys are also split into their parts"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    expanded = []
+    for token in tokens:
+        expanded.append(token)
+        if '_' in token:
+            expanded.extend(part for part in token.split('_') if part)
+    return expanded
+
+
+class HashingEmbedder:
+    """
+    Dependency-free TF-IDF embedder using the hashing trick
+
+    Vectors are L2-normalized so cosine similarity is a dot product. IDF
+    weights are fitted on the indexed chunks of a single job.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _bucket(self, token: str) -> int:
+        return zlib.crc32(token.encode('utf-8')) % self.dim
+
+    def _term_counts(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _tokenize(text):
+            vector[self._bucket(token)] += 1.0
+        return vector
+
+    def fit_transform(self, texts: List[str]) -> np.ndarray:
+        """Fit IDF weights on the corpus and embed it"""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        counts = np.vstack([self._term_counts(t) for t in texts])
+        doc_freq = (counts > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + doc_freq)) + 1).astype(np.float32)
+        return self._normalize(np.log1p(counts) * self.idf)
+
+    def transform(self, text: str) -> np.ndarray:
+        """Embed a query with the fitted IDF weights"""
+        return self._normalize((np.log1p(self._term_counts(text)) * self.idf)[None, :])[0]
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+
+@dataclass
+class ContextChunk:
+    """A retrievable piece of analysis output"""
+    chunk_id: int
+    source: str  # Agent name or state section
+    path: str  # Key path within the source
+    text: str
+
+
+def _split_text(text: str, size: int) -> List[str]:
+    """Split text into pieces of roughly `size` characters on whitespace"""
+    if len(text) <= size:
+        return [text]
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            space = text.rfind(' ', start + size // 2, end)
+            if space > start:
+                end = space
+        pieces.append(text[start:end].strip())
+        start = end
+    return [p for p in pieces if p]
+
+
+def chunk_analysis_state(state: Dict[str, Any], chunk_chars: int = COPILOT_CHUNK_CHARS) -> List[ContextChunk]:
+    """
+    Break agent outputs and analysis sections into retrievable chunks
+
+    Each top-level key of an agent's data (or of a state section) is
+    serialized compactly and split into ~chunk_chars pieces, keeping at
+    most MAX_CHUNKS_PER_KEY pieces per key.
+    """
+    sections: List[Tuple[str, Dict[str, Any]]] = []
+    for output in state.get('agent_outputs', []) or []:
+        data = output.get('data')
+        if isinstance(data, dict) and data:
+            sections.append((output.get('agent_name', 'agent'), data))
+    for key, value in state.items():
+        if key not in NON_CONTENT_KEYS and isinstance(value, dict) and value:
+            sections.append((key, value))
+
+    chunks: List[ContextChunk] = []
+    for source, data in sections:
+        for key, value in data.items():
+            if value in (None, '', [], {}):
+                continue
+            serialized = value if isinstance(value, str) else dumps_str(value)
+            for piece in _split_text(serialized, chunk_chars)[:MAX_CHUNKS_PER_KEY]:
+                chunks.append(ContextChunk(len(chunks), source, key, f"{source}.{key}: {piece}"))
+    return chunks
+
+
+class RetrievalIndex:
+    """In-memory top-k chunk retrieval over a job's analysis outputs"""
+
+    def __init__(self, chunks: List[ContextChunk], embedder: Optional[HashingEmbedder] = None):
+        self.chunks = chunks
+        self.embedder = embedder or HashingEmbedder()
+        self.matrix = self.embedder.fit_transform([c.text for c in chunks])
+
+    def search(self, query: str, top_k: int = COPILOT_RETRIEVAL_TOP_K) -> List[Tuple[ContextChunk, float]]:
+        """Return the top_k chunks most similar to the query"""
+        if not self.chunks or top_k <= 0:
+            return []
+        scores = self.matrix @ self.embedder.transform(query)
+        k = min(top_k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+@dataclass
+class CopilotSession:
+    """Cached analysis context for one job"""
+    job_id: str
+    result: Dict[str, Any]
+    state: Dict[str, Any]
+    summary: Dict[str, Any]
+    index: RetrievalIndex
+    summary_json: str = ""
+    conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        if not self.summary_json:
+            self.summary_json = dumps_str(self.summary)
+
+    def retrieve(self, query: str, top_k: int = COPILOT_RETRIEVAL_TOP_K) -> List[Dict[str, Any]]:
+        """Top-k relevant chunks for a question"""
+        return [
+            {'source': chunk.source, 'path': chunk.path, 'text': chunk.text, 'score': round(score, 3)}
+            for chunk, score in self.index.search(query, top_k)
+        ]
+
+    def prompt_context(self, query: str, top_k: int = COPILOT_RETRIEVAL_TOP_K) -> str:
+        """Section summaries plus the excerpts relevant to the question"""
+        lines = ["SECTION SUMMARIES:", self.summary_json]
+        excerpts = self.retrieve(query, top_k)
+        if excerpts:
+            lines.append("")
+            lines.append("RELEVANT ANALYSIS EXCERPTS:")
+            lines.extend(f"[{e['source']} / {e['path']}] {e['text']}" for e in excerpts)
+        return "\n".join(lines)
+
+
+def compact_history(conversation_history: Optional[List[Dict[str, Any]]], turns: int = COPILOT_HISTORY_TURNS) -> str:
+    """Serialize only the most recent conversation turns, compactly"""
+    recent = (conversation_history or [])[-turns:]
+    return dumps_str(recent)
+
+
+class CopilotSessionCache:
+    """
+    LRU cache of copilot sessions
+
+    Sessions are built once per job (concurrent first messages share one
+    build) and the least recently used job is evicted once the cache holds
+    more than max_jobs sessions.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = COPILOT_SESSION_MAX_JOBS,
+        on_evict: Optional[Callable[[str], None]] = None
+    ):
+        self.max_jobs = max_jobs
+        self.on_evict = on_evict
+        self._sessions: "OrderedDict[str, CopilotSession]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, job_id: str) -> bool:
+        """Whether a session is cached (without touching its LRU position)"""
+        return job_id in self._sessions
+
+    def get(self, job_id: str) -> Optional[CopilotSession]:
+        """Get a cached session without building one"""
+        session = self._sessions.get(job_id)
+        if session:
+            self._sessions.move_to_end(job_id)
+            session.last_used = time.time()
+        return session
+
+    async def get_or_create(
+        self,
+        job_id: str,
+        builder: Callable[[], Awaitable[Optional[CopilotSession]]]
+    ) -> Optional[CopilotSession]:
+        """
+        Get the job's session, building it with `builder` on a miss
+
+        Sessions for jobs that have not completed are returned but not cached,
+        since their state is still changing.
+        """
+        session = self.get(job_id)
+        if session:
+            self.hits += 1
+            return session
+
+        lock = self._locks.setdefault(job_id, asyncio.Lock())
+        async with lock:
+            session = self.get(job_id)
+            if session:
+                self.hits += 1
+                return session
+
+            self.misses += 1
+            start = time.perf_counter()
+            session = await builder()
+            if session is None:
+                self._locks.pop(job_id, None)
+                return None
+
+            logger.info(
+                f"Built copilot session for {job_id}: {len(session.index.chunks)} chunks indexed "
+                f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+            if session.result.get('status') == 'completed':
+                self._sessions[job_id] = session
+                self._evict()
+            else:
+                self._locks.pop(job_id, None)
+            return session
+
+    def invalidate(self, job_id: str):
+        """Drop a job's session"""
+        if self._sessions.pop(job_id, None) is not None and self.on_evict:
+            self.on_evict(job_id)
+        self._locks.pop(job_id, None)
+
+    def _evict(self):
+        while len(self._sessions) > self.max_jobs:
+            job_id, _ = self._sessions.popitem(last=False)
+            self._locks.pop(job_id, None)
+            logger.info(f"Evicted copilot session for {job_id} (LRU)")
+            if self.on_evict:
+                self.on_evict(job_id)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        total = self.hits + self.misses
+        return {
+            'resident_jobs': len(self._sessions),
+            'max_jobs': self.max_jobs,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+def build_session(
+    job_id: str,
+    result: Dict[str, Any],
+    state: Dict[str, Any],
+    summary: Dict[str, Any]
+) -> CopilotSession:
+    """Index a job's analysis state into a CopilotSession"""
+    return CopilotSession(
+        job_id=job_id,
+        result=result,
+        state=state,
+        summary=summary,
+        index=RetrievalIndex(chunk_analysis_state(state or {}))
+    )
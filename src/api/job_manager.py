@@ -2,15 +2,19 @@
 Job manager for handling analysis jobs
 """
 import asyncio
-import json
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Awaitable, Callable
 from uuid import uuid4
 from loguru import logger
 
 from src.core.state import create_initial_state, DiligenceState, AgentStatus as StateAgentStatus
 from src.api.models import AgentStatusEnum
+from src.utils.metrics import observe_state_save, observe_websocket_fanout
+from src.utils.serialization import dumps, dumps_str, loads
+from src.utils.tracing import start_span
 
 
 class JobManager:
@@ -31,6 +35,9 @@ class JobManager:
         
         # WebSocket connections for each job
         self.job_websockets: Dict[str, List] = {}
+        
+        # Set in queue workers: updates are published to the queue for the API to relay
+        self.event_sink: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
     
     def create_job(
         self,
@@ -41,7 +48,8 @@ class JobManager:
         deal_value: Optional[float] = None,
         investment_thesis: Optional[str] = None,
         strategic_rationale: Optional[str] = None,
-        user_id: str = None
+        user_id: str = None,
+        reuse_results: bool = True
     ) -> Dict[str, Any]:
         """Create a new analysis job
         
@@ -54,6 +62,7 @@ class JobManager:
             investment_thesis: Investment thesis
             strategic_rationale: Strategic rationale
             user_id: User ID who created the job
+            reuse_results: Reuse stored agent results whose inputs are unchanged
         
         Returns:
             Job data
@@ -80,6 +89,7 @@ class JobManager:
         state['metadata']['project_name'] = project_name
         state['metadata']['user_id'] = user_id
         state['metadata']['status'] = 'pending'
+        state['metadata']['reuse_results'] = reuse_results
         
         # Store state
         self.active_jobs[job_id] = state
@@ -110,6 +120,17 @@ class JobManager:
         # Try to load from disk
         return self._load_job(job_id)
     
+    def forget_job(self, job_id: str):
+        """Drop a job's in-memory state so reads come from disk
+        
+        Used when another process (a queue worker) owns the job.
+        
+        Args:
+            job_id: Job ID
+        """
+        self.active_jobs.pop(job_id, None)
+        self.job_tasks.pop(job_id, None)
+    
     def get_job_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get job progress
         
@@ -191,7 +212,8 @@ class JobManager:
             "top_opportunities": opportunities,
             "key_metrics": metrics,
             "completed_at": datetime.fromisoformat(state['workflow_completed']) if state['workflow_completed'] else None,
-            "reports": reports
+            "reports": reports,
+            "reused_agents": state['metadata'].get('reused_results', {})
         }
     
     def list_jobs(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -208,8 +230,7 @@ class JobManager:
         # Get all job files
         for job_file in self.jobs_dir.glob("*.json"):
             try:
-                with open(job_file, 'r') as f:
-                    state = json.load(f)
+                state = loads(job_file.read_bytes())
                 
                 # Filter by user if specified
                 if user_id and state['metadata'].get('user_id') != user_id:
@@ -260,16 +281,26 @@ class JobManager:
             job_id: Job ID
             message: Message to broadcast
         """
+        if self.event_sink is not None:
+            try:
+                await self.event_sink(job_id, message)
+            except Exception as e:
+                logger.warning(f"Could not publish update for job {job_id}: {e}")
+        
         if job_id not in self.job_websockets:
             return
         
         dead_connections = []
+        fanout_start = time.perf_counter()
+        # Encode once for every connection
+        text = dumps_str(message)
         for ws in self.job_websockets[job_id]:
             try:
-                await ws.send_json(message)
+                await ws.send_text(text)
             except Exception as e:
                 logger.error(f"Error broadcasting to WebSocket: {e}")
                 dead_connections.append(ws)
+        observe_websocket_fanout(message.get('type', 'unknown'), time.perf_counter() - fanout_start, len(dead_connections))
         
         # Remove dead connections
         for ws in dead_connections:
@@ -283,8 +314,17 @@ class JobManager:
             state: Job state
         """
         job_file = self.jobs_dir / f"{job_id}.json"
-        with open(job_file, 'w') as f:
-            json.dump(state, f, indent=2, default=str)
+        save_start = time.perf_counter()
+        with start_span("job.save_state", {'job.id': job_id}) as span:
+            # Write then rename, so readers in other processes never see a partial file
+            tmp_file = job_file.with_suffix(f".{os.getpid()}.tmp")
+            data = dumps(state)
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            size_bytes = len(data)
+            os.replace(tmp_file, job_file)
+            span.set_attribute('job.state_bytes', size_bytes)
+        observe_state_save(time.perf_counter() - save_start, size_bytes)
     
     def _load_job(self, job_id: str) -> Optional[DiligenceState]:
         """Load job from disk
@@ -299,8 +339,7 @@ class JobManager:
         if not job_file.exists():
             return None
         
-        with open(job_file, 'r') as f:
-            return json.load(f)
+        return loads(job_file.read_bytes())
     
     def _convert_agent_status(self, status: StateAgentStatus) -> AgentStatusEnum:
         """Convert internal agent status to API status
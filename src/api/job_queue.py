@@ -0,0 +1,536 @@
+"""
+Job Queue - Durable hand-off of analysis jobs from the API to worker processes
+
+By default (JOB_QUEUE_BACKEND=inline) the API runs each analysis as a task on
+its own event loop. With a queue backend the API only enqueues the job id, and
+worker processes (python run_worker.py, any number of them, on any host that
+shares data/jobs) claim and run jobs:
+
+- A claim is a lease: the worker must heartbeat within JOB_VISIBILITY_TIMEOUT
+  or the job returns to the queue (a crashed worker's jobs are retried)
+- A job is tried at most JOB_MAX_ATTEMPTS times, then moved to the dead list
+- Progress messages are published on the queue; every API process relays
+  them to its own websocket subscribers
+
+Backends:
+- redis   Redis lists / sorted set with Lua scripts for atomic transitions
+- sqlite  single-host stand-in for development (JOB_QUEUE_SQLITE_PATH)
+"""
+import asyncio
+import importlib.util
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import uuid4
+from loguru import logger
+
+from src.utils.metrics import record_job_queue_event
+from src.utils.serialization import dumps_str, loads
+
+# redis is imported only when the redis backend is configured
+REDIS_AVAILABLE = importlib.util.find_spec("redis") is not None
+
+
+# Configuration (overridable via environment)
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "inline").lower()
+JOB_QUEUE_REDIS_URL = os.getenv("JOB_QUEUE_REDIS_URL") or os.getenv("REDIS_URL")
+JOB_QUEUE_PREFIX = os.getenv("JOB_QUEUE_PREFIX", "aimadds:jobs")
+JOB_QUEUE_SQLITE_PATH = os.getenv("JOB_QUEUE_SQLITE_PATH", "data/job_queue.sqlite3")
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_QUEUE_POLL_INTERVAL = float(os.getenv("JOB_QUEUE_POLL_INTERVAL", "1.0"))
+
+# Progress messages older than this are pruned from the SQLite event table
+EVENT_RETENTION_SECONDS = 3600
+
+
+@dataclass
+class QueuedJob:
+    """A job claimed by a worker (the token identifies this particular lease)"""
+    job_id: str
+    token: str
+    attempts: int
+    payload: Dict[str, Any] = field(default_factory=dict)
+    enqueued_at: float = 0.0
+
+
+class JobQueue(ABC):
+    """Queue interface shared by the API (producer) and workers (consumers)"""
+
+    def __init__(self, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    async def enqueue(self, job_id: str, payload: Optional[Dict[str, Any]] = None):
+        """Add a job to the back of the queue"""
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        """Lease the oldest waiting job, or None if the queue is empty"""
+
+    @abstractmethod
+    async def heartbeat(self, job: QueuedJob) -> bool:
+        """Extend a lease; False if the lease expired and the job was handed to someone else"""
+
+    @abstractmethod
+    async def complete(self, job: QueuedJob) -> bool:
+        """Acknowledge a finished job and forget it"""
+
+    @abstractmethod
+    async def fail(self, job: QueuedJob, error: str, retry: bool = True) -> str:
+        """Return a failed job to the front of the queue, or dead-letter it; returns 'retried' or 'dead'"""
+
+    @abstractmethod
+    async def release(self, job: QueuedJob) -> bool:
+        """Give a job back without counting the attempt (graceful worker shutdown)"""
+
+    @abstractmethod
+    async def requeue_expired(self) -> Tuple[List[str], List[str]]:
+        """Return jobs with expired leases to the queue; returns (requeued, dead) job ids"""
+
+    @abstractmethod
+    async def publish(self, job_id: str, message: Dict[str, Any]):
+        """Publish a progress message for API processes to relay"""
+
+    @abstractmethod
+    def subscribe(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (job_id, message) for every progress message published from now on"""
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, int]:
+        """Number of pending, leased and dead jobs"""
+
+    async def close(self):
+        pass
+
+
+# ============================================================================
+# REDIS
+# ============================================================================
+
+# Server time, so lease deadlines don't depend on worker clocks
+_LUA_NOW = "local t = redis.call('TIME') local now = tonumber(t[1]) + tonumber(t[2]) / 1000000 "
+
+# KEYS: pending, leases | ARGV: job key prefix, visibility timeout, worker id, token
+_CLAIM = _LUA_NOW + """
+local id = redis.call('RPOP', KEYS[1])
+if not id then return nil end
+local key = ARGV[1] .. id
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), id)
+local attempts = redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'token', ARGV[4], 'worker', ARGV[3], 'claimed_at', now)
+return {id, attempts, redis.call('HGET', key, 'payload') or '{}', redis.call('HGET', key, 'enqueued_at') or '0'}
+"""
+
+# KEYS: leases | ARGV: job key, job id, token, visibility timeout
+_HEARTBEAT = _LUA_NOW + """
+if redis.call('HGET', ARGV[1], 'token') ~= ARGV[3] then return 0 end
+if not redis.call('ZSCORE', KEYS[1], ARGV[2]) then return 0 end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[2])
+return 1
+"""
+
+# KEYS: leases | ARGV: job key, job id, token
+_COMPLETE = """
+if redis.call('HGET', ARGV[1], 'token') ~= ARGV[3] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[2])
+redis.call('DEL', ARGV[1])
+return 1
+"""
+
+# KEYS: leases, pending, dead | ARGV: job key, job id, token, error, mode (retry|dead|release), max attempts
+_FAIL = """
+if redis.call('HGET', ARGV[1], 'token') ~= ARGV[3] then return 'lost' end
+redis.call('ZREM', KEYS[1], ARGV[2])
+redis.call('HDEL', ARGV[1], 'token', 'worker')
+redis.call('HSET', ARGV[1], 'last_error', ARGV[4])
+if ARGV[5] == 'release' then
+    redis.call('HINCRBY', ARGV[1], 'attempts', -1)
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    return 'released'
+end
+local attempts = tonumber(redis.call('HGET', ARGV[1], 'attempts') or '0')
+if ARGV[5] == 'retry' and attempts < tonumber(ARGV[6]) then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+    return 'retried'
+end
+redis.call('LPUSH', KEYS[3], ARGV[2])
+return 'dead'
+"""
+
+# KEYS: leases, pending, dead | ARGV: job key prefix, max attempts
+_REQUEUE_EXPIRED = _LUA_NOW + """
+local requeued, dead = {}, {}
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+    local key = ARGV[1] .. id
+    redis.call('ZREM', KEYS[1], id)
+    redis.call('HDEL', key, 'token', 'worker')
+    redis.call('HSET', key, 'last_error', 'lease expired')
+    if tonumber(redis.call('HGET', key, 'attempts') or '0') >= tonumber(ARGV[2]) then
+        redis.call('LPUSH', KEYS[3], id)
+        table.insert(dead, id)
+    else
+        redis.call('RPUSH', KEYS[2], id)
+        table.insert(requeued, id)
+    end
+end
+return {requeued, dead}
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Redis-backed queue
+
+    Keys (under JOB_QUEUE_PREFIX):
+        pending   LIST  job ids waiting (LPUSH on enqueue, RPOP on claim; retries go back to the RPOP end)
+        leases    ZSET  claimed job id -> lease deadline
+        job:<id>  HASH  attempts, token, worker, payload, enqueued_at, last_error
+        dead      LIST  job ids that ran out of attempts
+        events    pub/sub channel for progress messages
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = JOB_QUEUE_PREFIX, **kwargs):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("JOB_QUEUE_BACKEND=redis requires the redis package")
+        super().__init__(**kwargs)
+        import redis.asyncio as aioredis
+        url = url or JOB_QUEUE_REDIS_URL
+        if url:
+            self._redis = aioredis.from_url(url, decode_responses=True)
+        else:
+            self._redis = aioredis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", "6379")),
+                password=os.getenv("REDIS_PASSWORD") or None,
+                decode_responses=True
+            )
+        self.prefix = prefix
+        self.pending_key = f"{prefix}:pending"
+        self.leases_key = f"{prefix}:leases"
+        self.dead_key = f"{prefix}:dead"
+        self.events_channel = f"{prefix}:events"
+        self.job_key_prefix = f"{prefix}:job:"
+        self._claim = self._redis.register_script(_CLAIM)
+        self._heartbeat = self._redis.register_script(_HEARTBEAT)
+        self._complete = self._redis.register_script(_COMPLETE)
+        self._fail = self._redis.register_script(_FAIL)
+        self._requeue_expired = self._redis.register_script(_REQUEUE_EXPIRED)
+
+    async def enqueue(self, job_id: str, payload: Optional[Dict[str, Any]] = None):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.job_key_prefix + job_id, mapping={
+                'attempts': 0,
+                'payload': dumps_str(payload or {}),
+                'enqueued_at': time.time()
+            })
+            pipe.lpush(self.pending_key, job_id)
+            await pipe.execute()
+        record_job_queue_event('enqueued')
+
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        token = uuid4().hex
+        result = await self._claim(
+            keys=[self.pending_key, self.leases_key],
+            args=[self.job_key_prefix, self.visibility_timeout, worker_id, token]
+        )
+        if not result:
+            return None
+        job_id, attempts, payload, enqueued_at = result
+        record_job_queue_event('claimed')
+        return QueuedJob(job_id, token, int(attempts), loads(payload), float(enqueued_at))
+
+    async def heartbeat(self, job: QueuedJob) -> bool:
+        extended = await self._heartbeat(
+            keys=[self.leases_key],
+            args=[self.job_key_prefix + job.job_id, job.job_id, job.token, self.visibility_timeout]
+        )
+        return bool(extended)
+
+    async def complete(self, job: QueuedJob) -> bool:
+        done = await self._complete(
+            keys=[self.leases_key],
+            args=[self.job_key_prefix + job.job_id, job.job_id, job.token]
+        )
+        if done:
+            record_job_queue_event('completed')
+        return bool(done)
+
+    async def _settle(self, job: QueuedJob, error: str, mode: str) -> str:
+        outcome = await self._fail(
+            keys=[self.leases_key, self.pending_key, self.dead_key],
+            args=[self.job_key_prefix + job.job_id, job.job_id, job.token, error[:2000], mode, self.max_attempts]
+        )
+        record_job_queue_event(outcome)
+        return outcome
+
+    async def fail(self, job: QueuedJob, error: str, retry: bool = True) -> str:
+        return await self._settle(job, error, 'retry' if retry else 'dead')
+
+    async def release(self, job: QueuedJob) -> bool:
+        return await self._settle(job, 'worker shutdown', 'release') == 'released'
+
+    async def requeue_expired(self) -> Tuple[List[str], List[str]]:
+        requeued, dead = await self._requeue_expired(
+            keys=[self.leases_key, self.pending_key, self.dead_key],
+            args=[self.job_key_prefix, self.max_attempts]
+        )
+        for _ in requeued:
+            record_job_queue_event('retried')
+        for _ in dead:
+            record_job_queue_event('dead')
+        return list(requeued), list(dead)
+
+    async def publish(self, job_id: str, message: Dict[str, Any]):
+        await self._redis.publish(self.events_channel, dumps_str({'job_id': job_id, 'message': message}))
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.events_channel)
+        try:
+            async for item in pubsub.listen():
+                if item.get('type') != 'message':
+                    continue
+                event = loads(item['data'])
+                yield event['job_id'], event['message']
+        finally:
+            await pubsub.aclose()
+
+    async def stats(self) -> Dict[str, int]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.llen(self.pending_key)
+            pipe.zcard(self.leases_key)
+            pipe.llen(self.dead_key)
+            pending, leased, dead = await pipe.execute()
+        return {'pending': pending, 'leased': leased, 'dead': dead}
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+# ============================================================================
+# SQLITE (development)
+# ============================================================================
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL DEFAULT '{}',
+    enqueued_at REAL NOT NULL,
+    token TEXT,
+    worker TEXT,
+    lease_deadline REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS queue_jobs_status ON queue_jobs (status, enqueued_at);
+CREATE TABLE IF NOT EXISTS queue_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Single-host queue in a SQLite file (WAL mode), for development
+
+    Same semantics as RedisJobQueue; transitions run in BEGIN IMMEDIATE
+    transactions so several worker processes can share the file. Progress
+    messages go through an event table that subscribers poll.
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_SQLITE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SQLITE_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _transaction(self, fn, *args):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        finally:
+            conn.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._transaction, fn, *args)
+
+    async def enqueue(self, job_id: str, payload: Optional[Dict[str, Any]] = None):
+        def insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO queue_jobs (job_id, status, attempts, payload, enqueued_at) "
+                "VALUES (?, 'pending', 0, ?, ?)",
+                (job_id, dumps_str(payload or {}), time.time())
+            )
+        await self._run(insert)
+        record_job_queue_event('enqueued')
+
+    async def claim(self, worker_id: str) -> Optional[QueuedJob]:
+        token = uuid4().hex
+
+        def lease(conn):
+            row = conn.execute(
+                "SELECT * FROM queue_jobs WHERE status = 'pending' ORDER BY enqueued_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE queue_jobs SET status = 'leased', attempts = attempts + 1, token = ?, worker = ?, "
+                "lease_deadline = ? WHERE job_id = ?",
+                (token, worker_id, time.time() + self.visibility_timeout, row['job_id'])
+            )
+            return QueuedJob(row['job_id'], token, row['attempts'] + 1, loads(row['payload']), row['enqueued_at'])
+
+        job = await self._run(lease)
+        if job:
+            record_job_queue_event('claimed')
+        return job
+
+    async def heartbeat(self, job: QueuedJob) -> bool:
+        def extend(conn):
+            return conn.execute(
+                "UPDATE queue_jobs SET lease_deadline = ? WHERE job_id = ? AND token = ? AND status = 'leased'",
+                (time.time() + self.visibility_timeout, job.job_id, job.token)
+            ).rowcount
+        return bool(await self._run(extend))
+
+    async def complete(self, job: QueuedJob) -> bool:
+        def delete(conn):
+            return conn.execute(
+                "DELETE FROM queue_jobs WHERE job_id = ? AND token = ?", (job.job_id, job.token)
+            ).rowcount
+        done = bool(await self._run(delete))
+        if done:
+            record_job_queue_event('completed')
+        return done
+
+    async def _settle(self, job: QueuedJob, error: str, mode: str) -> str:
+        def settle(conn):
+            row = conn.execute(
+                "SELECT attempts FROM queue_jobs WHERE job_id = ? AND token = ?", (job.job_id, job.token)
+            ).fetchone()
+            if row is None:
+                return 'lost'
+            attempts = row['attempts'] - 1 if mode == 'release' else row['attempts']
+            if mode == 'release':
+                outcome, status = 'released', 'pending'
+            elif mode == 'retry' and attempts < self.max_attempts:
+                outcome, status = 'retried', 'pending'
+            else:
+                outcome, status = 'dead', 'dead'
+            conn.execute(
+                "UPDATE queue_jobs SET status = ?, attempts = ?, token = NULL, worker = NULL, "
+                "lease_deadline = NULL, last_error = ? WHERE job_id = ?",
+                (status, attempts, error[:2000], job.job_id)
+            )
+            return outcome
+
+        outcome = await self._run(settle)
+        record_job_queue_event(outcome)
+        return outcome
+
+    async def fail(self, job: QueuedJob, error: str, retry: bool = True) -> str:
+        return await self._settle(job, error, 'retry' if retry else 'dead')
+
+    async def release(self, job: QueuedJob) -> bool:
+        return await self._settle(job, 'worker shutdown', 'release') == 'released'
+
+    async def requeue_expired(self) -> Tuple[List[str], List[str]]:
+        def reap(conn):
+            now = time.time()
+            rows = conn.execute(
+                "SELECT job_id, attempts FROM queue_jobs WHERE status = 'leased' AND lease_deadline < ?", (now,)
+            ).fetchall()
+            requeued = [r['job_id'] for r in rows if r['attempts'] < self.max_attempts]
+            dead = [r['job_id'] for r in rows if r['attempts'] >= self.max_attempts]
+            for job_ids, status in ((requeued, 'pending'), (dead, 'dead')):
+                conn.executemany(
+                    "UPDATE queue_jobs SET status = ?, token = NULL, worker = NULL, lease_deadline = NULL, "
+                    "last_error = 'lease expired' WHERE job_id = ?",
+                    [(status, job_id) for job_id in job_ids]
+                )
+            conn.execute("DELETE FROM queue_events WHERE created_at < ?", (now - EVENT_RETENTION_SECONDS,))
+            return requeued, dead
+
+        requeued, dead = await self._run(reap)
+        for _ in requeued:
+            record_job_queue_event('retried')
+        for _ in dead:
+            record_job_queue_event('dead')
+        return requeued, dead
+
+    async def publish(self, job_id: str, message: Dict[str, Any]):
+        def insert(conn):
+            conn.execute(
+                "INSERT INTO queue_events (job_id, message, created_at) VALUES (?, ?, ?)",
+                (job_id, dumps_str(message), time.time())
+            )
+        await self._run(insert)
+
+    async def subscribe(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        def latest(conn):
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM queue_events").fetchone()[0]
+
+        def since(conn, last_id):
+            return conn.execute(
+                "SELECT id, job_id, message FROM queue_events WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+
+        last_id = await self._run(latest)
+        while True:
+            for row in await self._run(since, last_id):
+                last_id = row['id']
+                yield row['job_id'], loads(row['message'])
+            await asyncio.sleep(JOB_QUEUE_POLL_INTERVAL / 2)
+
+    async def stats(self) -> Dict[str, int]:
+        def count(conn):
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM queue_jobs GROUP BY status").fetchall()
+            return {row['status']: row['n'] for row in rows}
+        counts = await self._run(count)
+        return {'pending': counts.get('pending', 0), 'leased': counts.get('leased', 0), 'dead': counts.get('dead', 0)}
+
+
+# Global job queue instance
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """Get global job queue instance (None when JOB_QUEUE_BACKEND=inline)"""
+    global _job_queue
+    if _job_queue is None and JOB_QUEUE_BACKEND != 'inline':
+        if JOB_QUEUE_BACKEND == 'redis':
+            _job_queue = RedisJobQueue()
+        elif JOB_QUEUE_BACKEND == 'sqlite':
+            _job_queue = SQLiteJobQueue()
+        else:
+            raise ValueError(f"Unknown JOB_QUEUE_BACKEND '{JOB_QUEUE_BACKEND}' (expected inline, redis or sqlite)")
+        logger.info(f"Job queue: {JOB_QUEUE_BACKEND} (visibility timeout {JOB_VISIBILITY_TIMEOUT:g}s, "
+                    f"max attempts {JOB_MAX_ATTEMPTS})")
+    return _job_queue
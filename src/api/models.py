@@ -65,6 +65,27 @@ class AnalysisRequest(BaseModel):
     deal_value: Optional[float] = Field(None, description="Deal value in USD")
     investment_thesis: Optional[str] = Field(None, description="Investment thesis")
     strategic_rationale: Optional[str] = Field(None, description="Strategic rationale")
+    reuse_results: bool = Field(True, description="Reuse agent results of earlier analyses whose inputs are unchanged")
+
+
+class PortfolioRequest(BaseModel):
+    """Request to screen many targets against one acquirer"""
+    project_name: str = Field(..., description="User-friendly project name")
+    acquirer_ticker: str = Field(..., description="Acquirer company ticker")
+    target_tickers: List[str] = Field(..., min_length=1, description="Candidate target tickers")
+    deal_type: DealType = Field(..., description="Type of deal")
+    top_k: int = Field(3, ge=0, le=10, description="Top-ranked candidates escalated to a full analysis")
+    investment_thesis: Optional[str] = Field(None, description="Investment thesis")
+    strategic_rationale: Optional[str] = Field(None, description="Strategic rationale")
+
+
+class PortfolioResponse(BaseModel):
+    """Response when a portfolio screen is created"""
+    batch_id: str
+    project_name: str
+    status: str
+    target_tickers: List[str]
+    created_at: datetime
 
 
 class AnalysisResponse(BaseModel):
@@ -109,6 +130,7 @@ class AnalysisResult(BaseModel):
     key_metrics: Dict[str, Any] = Field(default_factory=dict)
     completed_at: Optional[datetime] = None
     reports: Dict[str, str] = Field(default_factory=dict)  # report_type -> file_path
+    reused_agents: Dict[str, Any] = Field(default_factory=dict)  # agent_key -> job the result was reused from
 
 
 class AnalysisList(BaseModel):
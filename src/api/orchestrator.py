@@ -2,58 +2,123 @@
 Analysis orchestrator - coordinates agents and sends real-time updates
 """
 import asyncio
+import time
 from datetime import datetime
-from typing import Dict, Any, Set, List
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Set, List
 import copy
 from loguru import logger
 
+from src.api.checkpoints import get_checkpoint_store
 from src.api.job_manager import get_job_manager
 from src.api.models import AgentStatusEnum
+from src.api.report_pipeline import REPORT_ARTIFACTS, REPORT_EAGER_ARTIFACTS, get_report_pipeline
+from src.api.result_store import RESULT_REUSE_ENABLED, StateDelta, agent_fingerprint, get_result_store, job_inputs
 from src.core.state import update_agent_status, AgentStatus
 
 # Import quality control systems
-from src.utils.api_health_check import run_health_check
-from src.utils.data_validator import validate_data
+from src.utils.acquirer_data import fetch_acquirer_data
+from src.utils.api_health_check import get_health_monitor
+from src.utils.metrics import observe_job, observe_job_queue_wait, track_job_in_progress
+from src.utils.serialization import utc_now_iso
+from src.utils.tracing import mark_span_error, start_span
 
-# Import all agents
-from src.agents.project_manager import ProjectManagerAgent
-from src.agents.data_ingestion import DataIngestionAgent
-from src.agents.financial_analyst import FinancialAnalystAgent
-from src.agents.financial_deep_dive import FinancialDeepDiveAgent
-from src.agents.legal_counsel import LegalCounselAgent
-from src.agents.market_strategist import MarketStrategistAgent
-from src.agents.competitive_benchmarking import CompetitiveBenchmarkingAgent
-from src.agents.macroeconomic_analyst import MacroeconomicAnalystAgent
-from src.agents.integration_planner import IntegrationPlannerAgent
-from src.agents.external_validator import ExternalValidatorAgent
-from src.agents.risk_assessment import RiskAssessmentAgent
-from src.agents.tax_structuring import TaxStructuringAgent
-from src.agents.deal_structuring import DealStructuringAgent
-from src.agents.accretion_dilution import AccretionDilutionAgent
-from src.agents.sources_uses import SourcesUsesGenerator
-from src.agents.contribution_analysis import ContributionAnalyzer
-from src.agents.exchange_ratio_analysis import ExchangeRatioAnalyzer
-from src.agents.synthesis_reporting import SynthesisReportingAgent
+# Agents are created through the registry, which imports each agent module
+# (and the LLM SDKs behind it) on first use rather than at server start
+from src.agents.registry import create_agent, get_agent_class
 # Import FMP client for agents that need it
 from src.integrations.fmp_client import FMPClient
 # Import symbol validator
 from src.utils.symbol_validator import SymbolValidator
-# Import report generators (using revolutionary generators)
-try:
-    from src.outputs.report_generator import ReportGenerator
-    REPORT_AVAILABLE = True
-except ImportError as e:
-    ReportGenerator = None
-    REPORT_AVAILABLE = False
 
-# Import M&A report generator
-try:
-    from src.outputs.ma_report_generator import MAReportGenerator
-    MA_REPORTS_AVAILABLE = True
-except ImportError as e:
-    MAReportGenerator = None
-    MA_REPORTS_AVAILABLE = False
-    logger.warning("M&A Report Generator not available")
+
+# Run order (OPTIMAL WORKFLOW ORDER); each key is an agent registry key
+PIPELINE_AGENTS = (
+    "project_manager",
+    "data_ingestion",  # Not implemented yet, skipped (SKIPPED_AGENTS)
+    "financial_analyst",
+    "financial_deep_dive",
+    "deal_structuring",  # Deal structure optimization
+    "sources_uses",  # Sources & uses of funds
+    "legal_counsel",
+    "market_strategist",
+    "competitive_benchmarking",
+    "macroeconomic_analyst",
+    "risk_assessment",  # Aggregates all risks
+    "tax_structuring",  # Tax analysis
+    "accretion_dilution",  # EPS accretion/dilution analysis
+    "contribution_analysis",  # Value contribution analysis
+    "exchange_ratio_analysis",  # Exchange ratio fairness
+    "integration_planner",  # Uses all prior data + synergies
+    "external_validator",  # Validates everything
+    "synthesis_reporting"  # Final consolidation
+)
+SKIPPED_AGENTS = frozenset({"data_ingestion"})
+
+ALL_PRIOR = "*"
+
+# Deal value, acquirer data and deal terms the orchestrator derives after the financial
+# analyst (_derive_deal_context). Fingerprinted on its own, so a new deal value or
+# acquirer only invalidates the agents that read them, not the target analysis.
+DEAL_CONTEXT = "deal_context"
+DEAL_CONTEXT_INPUTS = ("acquirer_ticker", "deal_value", "deal_terms")
+
+# Earlier agents whose output each agent reads (DEAL_CONTEXT: the derived deal fields)
+AGENT_DEPENDENCIES = {
+    "financial_deep_dive": ("financial_analyst",),
+    "deal_structuring": ("financial_analyst", DEAL_CONTEXT),
+    "sources_uses": ("financial_analyst", DEAL_CONTEXT),
+    "legal_counsel": (DEAL_CONTEXT,),
+    "market_strategist": ("financial_analyst",),
+    "macroeconomic_analyst": ("financial_analyst",),
+    "risk_assessment": ("financial_analyst", DEAL_CONTEXT, "legal_counsel", "market_strategist",
+                        "competitive_benchmarking", "macroeconomic_analyst"),
+    "tax_structuring": ("financial_analyst", DEAL_CONTEXT, "risk_assessment"),
+    "accretion_dilution": ("financial_analyst", DEAL_CONTEXT),
+    "contribution_analysis": ("financial_analyst", DEAL_CONTEXT),
+    "exchange_ratio_analysis": ("financial_analyst", DEAL_CONTEXT),
+    "integration_planner": ALL_PRIOR,
+    "external_validator": ALL_PRIOR,
+    "synthesis_reporting": ALL_PRIOR,
+}
+
+# Job fields that feed result fingerprints: every agent reads the first two, the
+# agents below also the listed ones (agents depending on ALL_PRIOR read them all)
+JOB_INPUT_FIELDS = ("target_ticker", "deal_type", "acquirer_ticker", "deal_value", "deal_structure",
+                    "investment_thesis", "strategic_rationale", "expected_close_date")
+AGENT_INPUTS = {
+    "legal_counsel": ("deal_value",),
+}
+
+# Always run, never reused: the project manager writes the job's own deal_id into its
+# output and its plan into state['metadata'], which a stored result cannot carry over
+NOT_REUSED_AGENTS = frozenset({"project_manager"})
+
+
+def downstream_agents(agent_keys: Iterable[str]) -> List[str]:
+    """The given agents plus every agent that (transitively) depends on them, in run order"""
+    selected = set(agent_keys)
+    unknown = selected - set(PIPELINE_AGENTS)
+    if unknown:
+        raise ValueError(f"Unknown agent(s): {', '.join(sorted(unknown))}")
+    if "financial_analyst" in selected:
+        selected.add(DEAL_CONTEXT)  # Derived again whenever the financial analyst runs
+    for position, agent_key in enumerate(PIPELINE_AGENTS):
+        dependencies = AGENT_DEPENDENCIES.get(agent_key, ())
+        if dependencies == ALL_PRIOR:
+            dependencies = PIPELINE_AGENTS[:position]
+        if selected.intersection(dependencies):
+            selected.add(agent_key)
+    return [agent_key for agent_key in PIPELINE_AGENTS if agent_key in selected]
+
+
+def incomplete_agents(state: Dict[str, Any]) -> List[str]:
+    """Agents that did not finish (failed, interrupted or never started), in run order"""
+    statuses = state.get('agent_statuses', {})
+    return [
+        agent_key for agent_key in PIPELINE_AGENTS
+        if statuses.get(agent_key) not in (AgentStatus.COMPLETED, AgentStatus.SKIPPED)
+    ]
 
 
 class AnalysisOrchestrator:
@@ -62,7 +127,9 @@ class AnalysisOrchestrator:
     def __init__(self):
         """Initialize orchestrator"""
         self.job_manager = get_job_manager()
-        self.report_generator = ReportGenerator() if REPORT_AVAILABLE else None
+        self.checkpoints = get_checkpoint_store()
+        self.results = get_result_store()
+        self.reports = get_report_pipeline()  # report artifacts are built in worker processes
         
         # Agent status messages for UI
         self.agent_messages = {
@@ -284,12 +351,83 @@ class AnalysisOrchestrator:
             }
         }
     
-    async def run_analysis(self, job_id: str):
-        """Run complete analysis workflow
+    async def run_analysis(self, job_id: str, agents: Optional[Set[str]] = None):
+        """Run complete analysis workflow (traced as one analysis.job span)
         
         Args:
             job_id: Job ID to run
+            agents: Only run these agents (resume / re-run); others keep their output
         """
+        job = self.job_manager.get_job(job_id) or {}
+        if job.get('workflow_started') and agents is None:
+            queued_seconds = (datetime.utcnow() - datetime.fromisoformat(job['workflow_started'])).total_seconds()
+            observe_job_queue_wait(queued_seconds)
+        
+        job_start = time.perf_counter()
+        with start_span("analysis.job", {
+            'job.id': job_id,
+            'deal.id': job.get('deal_id'),
+            'deal.type': job.get('deal_type'),
+            'deal.target_ticker': job.get('target_ticker'),
+            'deal.acquirer_ticker': job.get('acquirer_ticker'),
+            'job.resumed_agents': ",".join(sorted(agents)) if agents is not None else None
+        }) as span, track_job_in_progress():
+            await self._run_analysis(job_id, agents)
+            
+            status = (self.job_manager.get_job(job_id) or {}).get('metadata', {}).get('status') or 'unknown'
+            span.set_attribute('job.status', status)
+            if status == 'failed':
+                mark_span_error(span, "Analysis failed")
+        observe_job(status, time.perf_counter() - job_start)
+    
+    async def resume_analysis(self, job_id: str, agents: List[str]):
+        """Re-run part of a job from its newest checkpoint
+        
+        The state is restored from the last per-agent checkpoint (the saved job state
+        may hold partial output of whatever failed), the given agents are reset and run
+        in pipeline order, then reports are regenerated.
+        
+        Args:
+            job_id: Job ID
+            agents: Agents to run (see downstream_agents / incomplete_agents)
+        """
+        current = self.job_manager.get_job(job_id)
+        if not current:
+            logger.error(f"Job {job_id} not found")
+            return
+        
+        state = self.checkpoints.load(job_id) or current
+        state['metadata'] = current['metadata']
+        state['metadata'].setdefault('resume_history', []).append({
+            'agents': list(agents),
+            'timestamp': utc_now_iso()
+        })
+        state['workflow_completed'] = None
+        for agent_key in agents:
+            state = update_agent_status(state, agent_key, AgentStatus.PENDING)
+        self.job_manager.active_jobs[job_id] = state
+        self.job_manager._save_job(job_id, state)
+        
+        logger.info(f"Resuming job {job_id}: re-running {len(agents)} agent(s): {', '.join(agents) or 'reports only'}")
+        await self.run_analysis(job_id, agents=set(agents))
+    
+    def _reset_agent_output(self, state: Dict[str, Any], agent_key: str):
+        """Drop an agent's previous output before it runs again"""
+        state['agent_outputs'] = [
+            output for output in state.get('agent_outputs', [])
+            if output.get('agent_name') != agent_key
+        ]
+        (state.get('metadata', {}).get('reused_results') or {}).pop(agent_key, None)
+        if agent_key == "financial_analyst":
+            # Values derived from the previous valuation must be derived again
+            if (state.get('deal_value_metadata') or {}).get('source') in ('auto_calculated', 'default'):
+                state['deal_value'] = None
+            if (state.get('deal_terms') or {}).get('auto_generated'):
+                state['deal_terms'] = None
+    
+    async def _run_analysis(self, job_id: str, agents: Optional[Set[str]] = None):
+        """Agent pipeline, report generation and completion for one job"""
+        acquirer_task: Optional[asyncio.Task] = None
         try:
             logger.info(f"Starting analysis for job {job_id}")
             
@@ -299,16 +437,14 @@ class AnalysisOrchestrator:
                 logger.error(f"Job {job_id} not found")
                 return
             
-            # STEP 0: API Health Check - Validate all API credentials BEFORE starting
-            logger.info("Running API health check...")
+            # STEP 0: API Health Check - cached status from the background monitor (no live probes per job)
+            logger.info("Checking cached API health status...")
             try:
-                is_healthy, health_results = await run_health_check()
+                is_healthy, health_results = await get_health_monitor().get_status()
                 
                 if not is_healthy:
-                    unhealthy_apis = []
-                    for api, result in health_results.items():
-                        if isinstance(result, dict) and result.get('status') in ['missing', 'error']:
-                            unhealthy_apis.append(api)
+                    # Only probe results mark a critical API missing/error (real-call failures degrade to 'warning')
+                    unhealthy_apis = get_health_monitor().get_unhealthy_apis()
                     
                     error_msg = f"API health check failed: {', '.join(unhealthy_apis)} unavailable"
                     logger.error(error_msg)
@@ -330,7 +466,7 @@ class AnalysisOrchestrator:
                                 f"Unhealthy APIs: {', '.join(unhealthy_apis)}"
                             ]
                         },
-                        "timestamp": datetime.utcnow().isoformat()
+                        "timestamp": utc_now_iso()
                     })
                     
                     logger.error(f"Analysis aborted for job {job_id} due to API health check failure")
@@ -389,7 +525,7 @@ class AnalysisOrchestrator:
                             "Suggestions are provided if similar tickers were found."
                         ]
                     },
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": utc_now_iso()
                 })
                 
                 logger.error(f"Analysis aborted for job {job_id} due to invalid ticker: {target_ticker}")
@@ -408,6 +544,12 @@ class AnalysisOrchestrator:
             
             # Note: FMP client will be initialized by each agent individually using async context manager
             
+            # Acquirer fundamentals are fetched alongside the pipeline; the financial analyst step collects them
+            acquirer_ticker = state.get('acquirer_ticker')
+            if acquirer_ticker and (agents is None or 'financial_analyst' in agents):
+                acquirer_task = asyncio.create_task(fetch_acquirer_data(acquirer_ticker))
+                acquirer_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            
             # Update status to running
             state['metadata']['status'] = 'running'
             self.job_manager._save_job(job_id, state)
@@ -416,29 +558,40 @@ class AnalysisOrchestrator:
             if 'agent_outputs' not in state:
                 state['agent_outputs'] = []
 
-            # Run agents sequentially with updates (OPTIMAL WORKFLOW ORDER)
+            # Import the agent modules off the event loop (only the first job in a process pays for it)
+            selected_agents = [
+                agent_key for agent_key in PIPELINE_AGENTS
+                if agent_key not in SKIPPED_AGENTS and (agents is None or agent_key in agents)
+            ]
+            await asyncio.to_thread(lambda: [get_agent_class(agent_key) for agent_key in selected_agents])
+            
+            # Fingerprint each agent's inputs so unchanged results are shared across jobs (fresh runs only)
+            fingerprints: Dict[str, str] = {}
+            if agents is None and RESULT_REUSE_ENABLED:
+                data_version = await self._source_data_version(state)
+                if data_version is not None:
+                    fingerprints = self._agent_fingerprints(state, data_version)
+            reuse = bool(fingerprints) and state['metadata'].get('reuse_results', True)
+            
+            # Run agents sequentially with updates (only the selected ones when resuming)
             agents_to_run = [
-                ("project_manager", ProjectManagerAgent()),
-                ("data_ingestion", None),  # Not implemented yet, skip
-                ("financial_analyst", FinancialAnalystAgent()),
-                ("financial_deep_dive", FinancialDeepDiveAgent()),
-                ("deal_structuring", DealStructuringAgent()),  # Deal structure optimization
-                ("sources_uses", SourcesUsesGenerator()),  # NEW: Sources & uses of funds
-                ("legal_counsel", LegalCounselAgent()),
-                ("market_strategist", MarketStrategistAgent()),
-                ("competitive_benchmarking", CompetitiveBenchmarkingAgent()),
-                ("macroeconomic_analyst", MacroeconomicAnalystAgent()),
-                ("risk_assessment", RiskAssessmentAgent()),  # Aggregates all risks
-                ("tax_structuring", TaxStructuringAgent()),  # Tax analysis
-                ("accretion_dilution", AccretionDilutionAgent()),  # EPS accretion/dilution analysis
-                ("contribution_analysis", ContributionAnalyzer()),  # NEW: Value contribution analysis
-                ("exchange_ratio_analysis", ExchangeRatioAnalyzer()),  # NEW: Exchange ratio fairness
-                ("integration_planner", IntegrationPlannerAgent()),  # Uses all prior data + synergies
-                ("external_validator", ExternalValidatorAgent()),  # Validates everything
-                ("synthesis_reporting", SynthesisReportingAgent())  # Final consolidation
+                (agent_key, None if agent_key in SKIPPED_AGENTS else create_agent(agent_key))
+                for agent_key in PIPELINE_AGENTS
+                if agents is None or agent_key in agents
             ]
             
             for agent_key, agent_instance in agents_to_run:
+                # An earlier job already ran this agent on the same inputs
+                if reuse and agent_key in fingerprints:
+                    stored = await asyncio.to_thread(self.results.load, agent_key, fingerprints[agent_key])
+                    if stored:
+                        self._apply_result(state, agent_key, stored)
+                        if agent_key == "financial_analyst":
+                            await self._derive_deal_context(job_id, state, acquirer_task, acquirer_ticker, target_ticker)
+                        await self._send_agent_update(job_id, agent_key, AgentStatusEnum.COMPLETED, reused_from=stored['job_id'])
+                        await self._save_progress(job_id, agent_key, state)
+                        continue
+                
                 # Send "running" status
                 await self._send_agent_update(
                     job_id,
@@ -448,6 +601,8 @@ class AnalysisOrchestrator:
                 
                 if agent_instance:
                     # Update state
+                    self._reset_agent_output(state, agent_key)
+                    delta = await asyncio.to_thread(StateDelta, state) if agent_key in fingerprints else None
                     state = update_agent_status(state, agent_key, AgentStatus.RUNNING)
                     self.job_manager.active_jobs[job_id] = state
                     self.job_manager._save_job(job_id, state)
@@ -455,268 +610,11 @@ class AnalysisOrchestrator:
                     try:
                         # Run agent
                         state = await agent_instance.execute(state)
+                        # The agent's own changes, without the orchestrator's deal context
+                        changes = await asyncio.to_thread(delta.changes, state) if delta is not None else None
                         
-                        # CRITICAL FIX: Auto-calculate deal_value from DCF if not provided by user
                         if agent_key == "financial_analyst":
-                            # Check if user provided deal_value
-                            user_provided_value = state.get('deal_value')
-                            
-                            if not user_provided_value:
-                                logger.info("deal_value not provided by user - calculating from DCF valuation...")
-                                
-                                # Extract all DCF scenarios for transparency
-                                dcf_base = state.get('valuation_models', {}).get('dcf', {}).get('enterprise_value', 0)
-                                
-                                # Fallback to advanced DCF with all scenarios
-                                advanced_val = state.get('valuation_models', {}).get('dcf_advanced', {})
-                                dcf_analysis = advanced_val.get('dcf_analysis', {})
-                                
-                                dcf_scenarios = {
-                                    'base': dcf_analysis.get('base', {}).get('enterprise_value', 0),
-                                    'optimistic': dcf_analysis.get('optimistic', {}).get('enterprise_value', 0),
-                                    'pessimistic': dcf_analysis.get('pessimistic', {}).get('enterprise_value', 0)
-                                }
-                                
-                                # Use base case as primary valuation
-                                dcf_valuation = dcf_base or dcf_scenarios['base']
-                                
-                                # Set deal_value to DCF base case with full metadata
-                                if dcf_valuation and dcf_valuation > 0:
-                                    state['deal_value'] = dcf_valuation
-                                    
-                                    # CRITICAL: Store metadata about deal_value source
-                                    state['deal_value_metadata'] = {
-                                        'source': 'auto_calculated',
-                                        'method': 'DCF Base Case Valuation',
-                                        'calculation_basis': 'Financial Analyst Agent - Multi-scenario DCF Analysis',
-                                        'user_provided': False,
-                                        'dcf_base_case': dcf_scenarios['base'],
-                                        'dcf_optimistic': dcf_scenarios['optimistic'],
-                                        'dcf_pessimistic': dcf_scenarios['pessimistic'],
-                                        'valuation_range': {
-                                            'low': dcf_scenarios['pessimistic'] or dcf_valuation * 0.8,
-                                            'mid': dcf_valuation,
-                                            'high': dcf_scenarios['optimistic'] or dcf_valuation * 1.2
-                                        },
-                                        'note': 'User did not provide deal value. System automatically calculated from DCF base case scenario.',
-                                        'report_annotation': f"Deal value auto-calculated from DCF analysis. Base case: ${dcf_valuation:,.0f}. Range: ${(dcf_scenarios['pessimistic'] or dcf_valuation * 0.8):,.0f} - ${(dcf_scenarios['optimistic'] or dcf_valuation * 1.2):,.0f}",
-                                        'timestamp': datetime.utcnow().isoformat()
-                                    }
-                                    
-                                    logger.info(f"✓ Auto-calculated deal_value from DCF: ${dcf_valuation:,.0f}")
-                                    logger.info(f"  DCF Scenarios - Base: ${dcf_scenarios['base']:,.0f}, Optimistic: ${dcf_scenarios['optimistic']:,.0f}, Pessimistic: ${dcf_scenarios['pessimistic']:,.0f}")
-                                    
-                                    await self.job_manager.broadcast_update(job_id, {
-                                        "type": "deal_value_calculated",
-                                        "job_id": job_id,
-                                        "data": {
-                                            "message": f"💰 Deal Value Calculated: ${dcf_valuation:,.0f}",
-                                            "details": [
-                                                "User did not specify deal value",
-                                                f"Calculated from DCF Base Case: ${dcf_valuation:,.0f}",
-                                                f"DCF Valuation Range: ${dcf_scenarios['pessimistic'] or dcf_valuation * 0.8:,.0f} - ${dcf_scenarios['optimistic'] or dcf_valuation * 1.2:,.0f}",
-                                                "Deal structuring will use base case valuation"
-                                            ]
-                                        },
-                                        "timestamp": datetime.utcnow().isoformat()
-                                    })
-                                else:
-                                    logger.warning("Unable to calculate deal_value - DCF valuation not available")
-                                    state['deal_value'] = 0
-                                    state['deal_value_metadata'] = {
-                                        'source': 'default',
-                                        'method': 'Default Value',
-                                        'user_provided': False,
-                                        'note': 'User did not provide deal value and DCF calculation was unavailable. Using $0 as placeholder.',
-                                        'report_annotation': 'Deal value not specified and could not be calculated from DCF.',
-                                        'timestamp': datetime.utcnow().isoformat()
-                                    }
-                            else:
-                                # User provided deal_value - store metadata
-                                logger.info(f"Using user-provided deal_value: ${user_provided_value:,.0f}")
-                                
-                                # Get DCF for comparison
-                                dcf_base = state.get('valuation_models', {}).get('dcf', {}).get('enterprise_value', 0)
-                                advanced_val = state.get('valuation_models', {}).get('dcf_advanced', {})
-                                dcf_analysis = advanced_val.get('dcf_analysis', {})
-                                dcf_scenarios = {
-                                    'base': dcf_analysis.get('base', {}).get('enterprise_value', 0),
-                                    'optimistic': dcf_analysis.get('optimistic', {}).get('enterprise_value', 0),
-                                    'pessimistic': dcf_analysis.get('pessimistic', {}).get('enterprise_value', 0)
-                                }
-                                
-                                dcf_valuation = dcf_base or dcf_scenarios['base']
-                                
-                                # Calculate variance if DCF available
-                                variance_pct = 0
-                                if dcf_valuation > 0:
-                                    variance_pct = ((user_provided_value - dcf_valuation) / dcf_valuation) * 100
-                                
-                                state['deal_value_metadata'] = {
-                                    'source': 'user_provided',
-                                    'method': 'User Specified',
-                                    'user_provided': True,
-                                    'dcf_comparison': {
-                                        'dcf_base_case': dcf_valuation,
-                                        'user_value': user_provided_value,
-                                        'variance_amount': user_provided_value - dcf_valuation,
-                                        'variance_percent': variance_pct
-                                    },
-                                    'note': f'Deal value provided by user: ${user_provided_value:,.0f}',
-                                    'report_annotation': f"Deal value specified by user: ${user_provided_value:,.0f}" + 
-                                                       (f" (DCF base case: ${dcf_valuation:,.0f}, variance: {variance_pct:+.1f}%)" if dcf_valuation > 0 else ""),
-                                    'timestamp': datetime.utcnow().isoformat()
-                                }
-                                
-                                logger.info(f"  Deal value metadata stored: User-provided value with DCF comparison")
-                            
-                            # Fetch acquirer data after target's financial analysis completes
-                            acquirer_ticker = state.get('acquirer_ticker')
-                            if acquirer_ticker:
-                                logger.info(f"Acquirer ticker detected: {acquirer_ticker} - Fetching acquirer financial data...")
-                                
-                                await self.job_manager.broadcast_update(job_id, {
-                                    "type": "acquirer_analysis",
-                                    "job_id": job_id,
-                                    "data": {
-                                        "message": f"💼 Fetching Acquirer Data: {acquirer_ticker}",
-                                        "details": [
-                                            f"Downloading {acquirer_ticker} financial statements...",
-                                            "Analyzing acquirer's financial capacity...",
-                                            "Calculating combined pro forma metrics..."
-                                        ]
-                                    },
-                                    "timestamp": datetime.utcnow().isoformat()
-                                })
-                                
-                                try:
-                                    # Fetch acquirer's financial data using the same financial analyst agent
-                                    acquirer_analyst = FinancialAnalystAgent()
-                                    acquirer_result = await acquirer_analyst.analyze(acquirer_ticker)
-                                    
-                                    # CRITICAL FIX: Store in format that accretion_dilution agent expects
-                                    historical_data = acquirer_result.get('historical_data', {})
-                                    state['acquirer_data'] = {
-                                        'income_statement': historical_data.get('income_statement', []),
-                                        'balance_sheet': historical_data.get('balance_sheet', []),
-                                        'cash_flow': historical_data.get('cash_flow', []),
-                                        'current_stock_price': acquirer_result.get('price_data', {}).get('current_price', 100)
-                                    }
-                                    
-                                    # Also store in original locations for backward compatibility
-                                    state['acquirer_financial_data'] = historical_data
-                                    state['acquirer_metrics'] = acquirer_result.get('financial_health', {})
-                                    state['acquirer_analysis'] = {
-                                        'ticker': acquirer_ticker,
-                                        'financial_data': acquirer_result,
-                                        'timestamp': datetime.utcnow().isoformat()
-                                    }
-                                    
-                                    logger.info(f"✓ Acquirer data fetched and stored in state['acquirer_data'] for {acquirer_ticker}")
-                                    logger.info(f"  Income statements: {len(state['acquirer_data']['income_statement'])} periods")
-                                    logger.info(f"  Balance sheets: {len(state['acquirer_data']['balance_sheet'])} periods")
-                                    
-                                except Exception as acq_error:
-                                    logger.error(f"Failed to fetch acquirer data: {acq_error}")
-                                    state['warnings'].append(f"Could not fetch acquirer data for {acquirer_ticker}: {str(acq_error)}")
-
-                        # NEW: Data Validation after Financial Analyst
-                        if agent_key == "financial_analyst":
-                            # CRITICAL FIX: Auto-generate deal_terms if not provided (required for M&A agents)
-                            if not state.get('deal_terms'):
-                                logger.info("deal_terms not provided - auto-generating from valuation for M&A agents...")
-                                
-                                # Get DCF valuation
-                                dcf_value = state.get('valuation_models', {}).get('dcf_advanced', {})
-                                dcf_analysis = dcf_value.get('dcf_analysis', {})
-                                base_case = dcf_analysis.get('base', {})
-                                base_ev = base_case.get('enterprise_value', 0)
-                                
-                                # Get acquirer stock price
-                                acquirer_price = state.get('acquirer_data', {}).get('current_stock_price', 100)
-                                
-                                # Auto-generate reasonable defaults based on industry norms
-                                state['deal_terms'] = {
-                                    'purchase_price': base_ev,
-                                    'cash_percentage': 0.5,  # 50/50 cash/stock mix (common structure)
-                                    'debt_interest_rate': 0.05,  # 5% interest rate
-                                    'tax_rate': 0.21,  # Federal corporate tax rate
-                                    'acquirer_stock_price': acquirer_price,
-                                    'synergies_year1': base_ev * 0.05,  # 5% synergies (industry standard)
-                                    'acquirer_cash_available': 0,  # Conservative assumption
-                                    'proposed_exchange_ratio': 0.50,  # Will be recalculated by exchange ratio agent
-                                    'auto_generated': True,
-                                    'generation_source': 'DCF Base Case Valuation',
-                                    'note': 'Auto-generated deal terms using industry-standard assumptions. User should provide actual negotiated terms for precise analysis.',
-                                    'timestamp': datetime.utcnow().isoformat()
-                                }
-                                
-                                logger.info(f"✓ Auto-generated deal_terms:")
-                                logger.info(f"  Purchase Price: ${base_ev/1e9:.1f}B (from DCF)")
-                                logger.info(f"  Cash/Stock Mix: 50%/50% (industry standard)")
-                                logger.info(f"  Year 1 Synergies: ${base_ev * 0.05/1e9:.1f}B (5% of deal value)")
-                                logger.info(f"  Acquirer Stock Price: ${acquirer_price:.2f}")
-                                
-                                await self.job_manager.broadcast_update(job_id, {
-                                    "type": "deal_terms_generated",
-                                    "job_id": job_id,
-                                    "data": {
-                                        "message": "💼 Deal Terms Auto-Generated for M&A Analysis",
-                                        "details": [
-                                            f"Purchase Price: ${base_ev/1e9:.1f}B (from DCF valuation)",
-                                            "Cash/Stock Mix: 50%/50% (industry standard)",
-                                            f"Year 1 Synergies: ${base_ev * 0.05/1e9:.1f}B (5% assumption)",
-                                            "Note: Provide actual deal terms for precise analysis"
-                                        ]
-                                    },
-                                    "timestamp": datetime.utcnow().isoformat()
-                                })
-                            
-                            logger.info("Running data quality validation on financial data...")
-                            try:
-                                financial_data = state.get('financial_data', {})
-                                if financial_data:
-                                    validation_result = validate_data(financial_data, target_ticker)
-                                    
-                                    # Store in state
-                                    state['data_quality'] = {
-                                        'is_valid': validation_result.is_valid,
-                                        'completeness_score': validation_result.completeness_score,
-                                        'quality_grade': validation_result.quality_grade,
-                                        'error_count': len(validation_result.errors),
-                                        'warning_count': len(validation_result.warnings),
-                                        'outlier_count': len(validation_result.outliers),
-                                        'timestamp': datetime.utcnow().isoformat()
-                                    }
-                                    
-                                    # Broadcast data quality results
-                                    await self.job_manager.broadcast_update(job_id, {
-                                        "type": "data_quality",
-                                        "job_id": job_id,
-                                        "data": {
-                                            "message": f"Data Quality: Grade {validation_result.quality_grade}",
-                                            "completeness": float(validation_result.completeness_score),
-                                            "grade": str(validation_result.quality_grade),
-                                            "is_valid": bool(validation_result.is_valid),
-                                            "error_count": len(validation_result.errors),
-                                            "warning_count": len(validation_result.warnings),
-                                            "outlier_count": len(validation_result.outliers),
-                                            "details": [
-                                                f"Completeness: {validation_result.completeness_score:.1f}%",
-                                                f"Errors: {len(validation_result.errors)}",
-                                                f"Warnings: {len(validation_result.warnings)}",
-                                                f"Outliers: {len(validation_result.outliers)}"
-                                            ]
-                                        },
-                                        "timestamp": datetime.utcnow().isoformat()
-                                    })
-                                    
-                                    if not validation_result.is_valid:
-                                        logger.warning(f"Data quality issues detected - Grade: {validation_result.quality_grade}")
-                                    else:
-                                        logger.info(f"Data quality validated - Grade: {validation_result.quality_grade}")
-                            except Exception as val_error:
-                                logger.error(f"Data validation error: {val_error}")
+                            await self._derive_deal_context(job_id, state, acquirer_task, acquirer_ticker, target_ticker)
 
                         # Mark as completed
                         state = update_agent_status(state, agent_key, AgentStatus.COMPLETED)
@@ -751,6 +649,9 @@ class AnalysisOrchestrator:
 
                         logger.info(f"Collected output for {agent_key}: {len(output_keys)} keys populated from {len(agent_data)} total data keys")
 
+                        if changes is not None:
+                            await self._store_result(job_id, agent_key, fingerprints[agent_key], state, changes)
+
                         await self._send_agent_update(
                             job_id,
                             agent_key,
@@ -774,19 +675,24 @@ class AnalysisOrchestrator:
                         AgentStatusEnum.COMPLETED
                     )
                 
-                # Save updated state
-                self.job_manager.active_jobs[job_id] = state
-                self.job_manager._save_job(job_id, state)
+                await self._save_progress(job_id, agent_key, state)
             
             # Generate reports
-            await self._generate_reports(job_id, state)
+            with start_span("analysis.reports", {'job.id': job_id}):
+                await self._generate_reports(job_id, state)
             
             # Mark as completed
             state['metadata']['status'] = 'completed'
-            state['workflow_completed'] = datetime.utcnow().isoformat()
+            state['workflow_completed'] = utc_now_iso()
             self.job_manager.active_jobs[job_id] = state
             self.job_manager._save_job(job_id, state)
             
+            # Persist the knowledge graph so copilot graph queries start warm
+            try:
+                load_or_build_knowledge_graph(job_id, state)
+            except Exception as kg_error:
+                logger.warning(f"Knowledge graph prebuild failed for job {job_id}: {kg_error}")
+            
             # Send completion message
             await self._send_completion(job_id)
             
@@ -800,14 +706,373 @@ class AnalysisOrchestrator:
                 state['metadata']['status'] = 'failed'
                 state['errors'].append(f"Orchestration error: {str(e)}")
                 self.job_manager._save_job(job_id, state)
+        finally:
+            if acquirer_task:
+                acquirer_task.cancel()
+    
+    async def _derive_deal_context(
+        self,
+        job_id: str,
+        state: Dict[str, Any],
+        acquirer_task: Optional[asyncio.Task],
+        acquirer_ticker: Optional[str],
+        target_ticker: str
+    ):
+        """Deal value, acquirer data, deal terms and data quality, derived after the financial analyst
+        
+        Runs whether the financial analyst ran or its result was reused: these depend on
+        the job's deal inputs, which the analyst's stored result does not (see DEAL_CONTEXT).
+        """
+        # CRITICAL FIX: Auto-calculate deal_value from DCF if not provided by user
+        # Check if user provided deal_value
+        user_provided_value = state.get('deal_value')
+        
+        if not user_provided_value:
+            logger.info("deal_value not provided by user - calculating from DCF valuation...")
+            
+            # Extract all DCF scenarios for transparency
+            dcf_base = state.get('valuation_models', {}).get('dcf', {}).get('enterprise_value', 0)
+            
+            # Fallback to advanced DCF with all scenarios
+            advanced_val = state.get('valuation_models', {}).get('dcf_advanced', {})
+            dcf_analysis = advanced_val.get('dcf_analysis', {})
+            
+            dcf_scenarios = {
+                'base': dcf_analysis.get('base', {}).get('enterprise_value', 0),
+                'optimistic': dcf_analysis.get('optimistic', {}).get('enterprise_value', 0),
+                'pessimistic': dcf_analysis.get('pessimistic', {}).get('enterprise_value', 0)
+            }
+            
+            # Use base case as primary valuation
+            dcf_valuation = dcf_base or dcf_scenarios['base']
+            
+            # Set deal_value to DCF base case with full metadata
+            if dcf_valuation and dcf_valuation > 0:
+                state['deal_value'] = dcf_valuation
+                
+                # CRITICAL: Store metadata about deal_value source
+                state['deal_value_metadata'] = {
+                    'source': 'auto_calculated',
+                    'method': 'DCF Base Case Valuation',
+                    'calculation_basis': 'Financial Analyst Agent - Multi-scenario DCF Analysis',
+                    'user_provided': False,
+                    'dcf_base_case': dcf_scenarios['base'],
+                    'dcf_optimistic': dcf_scenarios['optimistic'],
+                    'dcf_pessimistic': dcf_scenarios['pessimistic'],
+                    'valuation_range': {
+                        'low': dcf_scenarios['pessimistic'] or dcf_valuation * 0.8,
+                        'mid': dcf_valuation,
+                        'high': dcf_scenarios['optimistic'] or dcf_valuation * 1.2
+                    },
+                    'note': 'User did not provide deal value. System automatically calculated from DCF base case scenario.',
+                    'report_annotation': f"Deal value auto-calculated from DCF analysis. Base case: ${dcf_valuation:,.0f}. Range: ${(dcf_scenarios['pessimistic'] or dcf_valuation * 0.8):,.0f} - ${(dcf_scenarios['optimistic'] or dcf_valuation * 1.2):,.0f}",
+                    'timestamp': utc_now_iso()
+                }
+                
+                logger.info(f"✓ Auto-calculated deal_value from DCF: ${dcf_valuation:,.0f}")
+                logger.info(f"  DCF Scenarios - Base: ${dcf_scenarios['base']:,.0f}, Optimistic: ${dcf_scenarios['optimistic']:,.0f}, Pessimistic: ${dcf_scenarios['pessimistic']:,.0f}")
+                
+                await self.job_manager.broadcast_update(job_id, {
+                    "type": "deal_value_calculated",
+                    "job_id": job_id,
+                    "data": {
+                        "message": f"💰 Deal Value Calculated: ${dcf_valuation:,.0f}",
+                        "details": [
+                            "User did not specify deal value",
+                            f"Calculated from DCF Base Case: ${dcf_valuation:,.0f}",
+                            f"DCF Valuation Range: ${dcf_scenarios['pessimistic'] or dcf_valuation * 0.8:,.0f} - ${dcf_scenarios['optimistic'] or dcf_valuation * 1.2:,.0f}",
+                            "Deal structuring will use base case valuation"
+                        ]
+                    },
+                    "timestamp": utc_now_iso()
+                })
+            else:
+                logger.warning("Unable to calculate deal_value - DCF valuation not available")
+                state['deal_value'] = 0
+                state['deal_value_metadata'] = {
+                    'source': 'default',
+                    'method': 'Default Value',
+                    'user_provided': False,
+                    'note': 'User did not provide deal value and DCF calculation was unavailable. Using $0 as placeholder.',
+                    'report_annotation': 'Deal value not specified and could not be calculated from DCF.',
+                    'timestamp': utc_now_iso()
+                }
+        else:
+            # User provided deal_value - store metadata
+            logger.info(f"Using user-provided deal_value: ${user_provided_value:,.0f}")
+            
+            # Get DCF for comparison
+            dcf_base = state.get('valuation_models', {}).get('dcf', {}).get('enterprise_value', 0)
+            advanced_val = state.get('valuation_models', {}).get('dcf_advanced', {})
+            dcf_analysis = advanced_val.get('dcf_analysis', {})
+            dcf_scenarios = {
+                'base': dcf_analysis.get('base', {}).get('enterprise_value', 0),
+                'optimistic': dcf_analysis.get('optimistic', {}).get('enterprise_value', 0),
+                'pessimistic': dcf_analysis.get('pessimistic', {}).get('enterprise_value', 0)
+            }
+            
+            dcf_valuation = dcf_base or dcf_scenarios['base']
+            
+            # Calculate variance if DCF available
+            variance_pct = 0
+            if dcf_valuation > 0:
+                variance_pct = ((user_provided_value - dcf_valuation) / dcf_valuation) * 100
+            
+            state['deal_value_metadata'] = {
+                'source': 'user_provided',
+                'method': 'User Specified',
+                'user_provided': True,
+                'dcf_comparison': {
+                    'dcf_base_case': dcf_valuation,
+                    'user_value': user_provided_value,
+                    'variance_amount': user_provided_value - dcf_valuation,
+                    'variance_percent': variance_pct
+                },
+                'note': f'Deal value provided by user: ${user_provided_value:,.0f}',
+                'report_annotation': f"Deal value specified by user: ${user_provided_value:,.0f}" + 
+                                   (f" (DCF base case: ${dcf_valuation:,.0f}, variance: {variance_pct:+.1f}%)" if dcf_valuation > 0 else ""),
+                'timestamp': utc_now_iso()
+            }
+            
+            logger.info(f"  Deal value metadata stored: User-provided value with DCF comparison")
+        
+        # Collect the acquirer data fetched since the job started
+        if acquirer_task:
+            logger.info(f"Acquirer ticker detected: {acquirer_ticker} - Collecting acquirer financial data...")
+            
+            await self.job_manager.broadcast_update(job_id, {
+                "type": "acquirer_analysis",
+                "job_id": job_id,
+                "data": {
+                    "message": f"💼 Fetching Acquirer Data: {acquirer_ticker}",
+                    "details": [
+                        f"Downloading {acquirer_ticker} financial statements...",
+                        "Analyzing acquirer's financial capacity...",
+                        "Calculating combined pro forma metrics..."
+                    ]
+                },
+                "timestamp": utc_now_iso()
+            })
+            
+            try:
+                acquirer_result = await acquirer_task
+                
+                # CRITICAL FIX: Store in format that accretion_dilution agent expects
+                state['acquirer_data'] = {
+                    'income_statement': acquirer_result['income_statement'],
+                    'balance_sheet': acquirer_result['balance_sheet'],
+                    'cash_flow': acquirer_result['cash_flow']
+                }
+                if 'current_stock_price' in acquirer_result:
+                    state['acquirer_data']['current_stock_price'] = acquirer_result['current_stock_price']
+                else:
+                    state['warnings'].append(f"No current share price for {acquirer_ticker} - M&A agents will use their default")
+                
+                # Same shape as the target's financial data (synergy calculator reads the statements)
+                state['acquirer_financial_data'] = {
+                    key: acquirer_result[key]
+                    for key in ('profile', 'income_statement', 'balance_sheet', 'cash_flow')
+                }
+                state['acquirer_analysis'] = {
+                    'ticker': acquirer_ticker,
+                    'company_name': acquirer_result['company_name'],
+                    'market_cap': acquirer_result['market_cap'],
+                    'shares_outstanding': acquirer_result['shares_outstanding'],
+                    'current_stock_price': acquirer_result.get('current_stock_price'),
+                    'timestamp': acquirer_result['fetched_at']
+                }
+                
+                logger.info(f"✓ Acquirer data fetched and stored in state['acquirer_data'] for {acquirer_ticker}")
+                logger.info(f"  Income statements: {len(state['acquirer_data']['income_statement'])} periods")
+                logger.info(f"  Balance sheets: {len(state['acquirer_data']['balance_sheet'])} periods")
+            
+            except Exception as acq_error:
+                logger.error(f"Failed to fetch acquirer data: {acq_error}")
+                state['warnings'].append(f"Could not fetch acquirer data for {acquirer_ticker}: {str(acq_error)}")
+        
+        # NEW: Data Validation after Financial Analyst
+        # CRITICAL FIX: Auto-generate deal_terms if not provided (required for M&A agents)
+        if not state.get('deal_terms'):
+            logger.info("deal_terms not provided - auto-generating from valuation for M&A agents...")
+            
+            # Get DCF valuation
+            dcf_value = state.get('valuation_models', {}).get('dcf_advanced', {})
+            dcf_analysis = dcf_value.get('dcf_analysis', {})
+            base_case = dcf_analysis.get('base', {})
+            base_ev = base_case.get('enterprise_value', 0)
+            
+            # Get acquirer stock price
+            acquirer_price = state.get('acquirer_data', {}).get('current_stock_price', 100)
+            
+            # Auto-generate reasonable defaults based on industry norms
+            state['deal_terms'] = {
+                'purchase_price': base_ev,
+                'cash_percentage': 0.5,  # 50/50 cash/stock mix (common structure)
+                'debt_interest_rate': 0.05,  # 5% interest rate
+                'tax_rate': 0.21,  # Federal corporate tax rate
+                'acquirer_stock_price': acquirer_price,
+                'synergies_year1': base_ev * 0.05,  # 5% synergies (industry standard)
+                'acquirer_cash_available': 0,  # Conservative assumption
+                'proposed_exchange_ratio': 0.50,  # Will be recalculated by exchange ratio agent
+                'auto_generated': True,
+                'generation_source': 'DCF Base Case Valuation',
+                'note': 'Auto-generated deal terms using industry-standard assumptions. User should provide actual negotiated terms for precise analysis.',
+                'timestamp': utc_now_iso()
+            }
+            
+            logger.info(f"✓ Auto-generated deal_terms:")
+            logger.info(f"  Purchase Price: ${base_ev/1e9:.1f}B (from DCF)")
+            logger.info(f"  Cash/Stock Mix: 50%/50% (industry standard)")
+            logger.info(f"  Year 1 Synergies: ${base_ev * 0.05/1e9:.1f}B (5% of deal value)")
+            logger.info(f"  Acquirer Stock Price: ${acquirer_price:.2f}")
+            
+            await self.job_manager.broadcast_update(job_id, {
+                "type": "deal_terms_generated",
+                "job_id": job_id,
+                "data": {
+                    "message": "💼 Deal Terms Auto-Generated for M&A Analysis",
+                    "details": [
+                        f"Purchase Price: ${base_ev/1e9:.1f}B (from DCF valuation)",
+                        "Cash/Stock Mix: 50%/50% (industry standard)",
+                        f"Year 1 Synergies: ${base_ev * 0.05/1e9:.1f}B (5% assumption)",
+                        "Note: Provide actual deal terms for precise analysis"
+                    ]
+                },
+                "timestamp": utc_now_iso()
+            })
+        
+        logger.info("Running data quality validation on financial data...")
+        try:
+            financial_data = state.get('financial_data', {})
+            if financial_data:
+                validation_result = validate_data(financial_data, target_ticker)
+                
+                # Store in state
+                state['data_quality'] = {
+                    'is_valid': validation_result.is_valid,
+                    'completeness_score': validation_result.completeness_score,
+                    'quality_grade': validation_result.quality_grade,
+                    'error_count': len(validation_result.errors),
+                    'warning_count': len(validation_result.warnings),
+                    'outlier_count': len(validation_result.outliers),
+                    'timestamp': utc_now_iso()
+                }
+                
+                # Broadcast data quality results
+                await self.job_manager.broadcast_update(job_id, {
+                    "type": "data_quality",
+                    "job_id": job_id,
+                    "data": {
+                        "message": f"Data Quality: Grade {validation_result.quality_grade}",
+                        "completeness": float(validation_result.completeness_score),
+                        "grade": str(validation_result.quality_grade),
+                        "is_valid": bool(validation_result.is_valid),
+                        "error_count": len(validation_result.errors),
+                        "warning_count": len(validation_result.warnings),
+                        "outlier_count": len(validation_result.outliers),
+                        "details": [
+                            f"Completeness: {validation_result.completeness_score:.1f}%",
+                            f"Errors: {len(validation_result.errors)}",
+                            f"Warnings: {len(validation_result.warnings)}",
+                            f"Outliers: {len(validation_result.outliers)}"
+                        ]
+                    },
+                    "timestamp": utc_now_iso()
+                })
+                
+                if not validation_result.is_valid:
+                    logger.warning(f"Data quality issues detected - Grade: {validation_result.quality_grade}")
+                else:
+                    logger.info(f"Data quality validated - Grade: {validation_result.quality_grade}")
+        except Exception as val_error:
+            logger.error(f"Data validation error: {val_error}")
+    
+    async def _save_progress(self, job_id: str, agent_key: str, state: Dict[str, Any]):
+        """Save updated state after an agent, and a checkpoint to resume from"""
+        self.job_manager.active_jobs[job_id] = state
+        self.job_manager._save_job(job_id, state)
+        try:
+            await asyncio.to_thread(self.checkpoints.save, job_id, agent_key, state)
+        except OSError as checkpoint_error:
+            logger.warning(f"Could not checkpoint {agent_key} for job {job_id}: {checkpoint_error}")
     
-    async def _send_agent_update(self, job_id: str, agent_key: str, status: AgentStatusEnum):
+    async def _source_data_version(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Latest filing of each company in the deal (a new filing invalidates stored results)
+        
+        Returns:
+            {ticker: {period, filed}}, or None if it cannot be determined (no reuse then)
+        """
+        tickers = [ticker for ticker in (state.get('target_ticker'), state.get('acquirer_ticker')) if ticker]
+        try:
+            async with FMPClient() as fmp_client:
+                latest = await asyncio.gather(*[
+                    fmp_client.get_income_statement(ticker, period="quarter", limit=1) for ticker in tickers
+                ])
+        except Exception as e:
+            logger.warning(f"Could not determine source data version - agent results will not be reused: {e}")
+            return None
+        return {
+            ticker: {'period': statements[0].get('date'), 'filed': statements[0].get('fillingDate')} if statements else None
+            for ticker, statements in zip(tickers, latest)
+        }
+    
+    def _agent_fingerprints(self, state: Dict[str, Any], data_version: Dict[str, Any]) -> Dict[str, str]:
+        """Input fingerprint of every reusable agent, in run order"""
+        fingerprints: Dict[str, str] = {}
+        for position, agent_key in enumerate(PIPELINE_AGENTS):
+            if agent_key in SKIPPED_AGENTS or agent_key in NOT_REUSED_AGENTS:
+                continue
+            dependencies = AGENT_DEPENDENCIES.get(agent_key, ())
+            if dependencies == ALL_PRIOR:
+                dependencies = PIPELINE_AGENTS[:position] + (DEAL_CONTEXT,)
+                fields = JOB_INPUT_FIELDS
+            else:
+                fields = JOB_INPUT_FIELDS[:2] + AGENT_INPUTS.get(agent_key, ())
+            fingerprints[agent_key] = agent_fingerprint(
+                agent_key,
+                get_agent_class(agent_key),
+                job_inputs(state, fields),
+                {dependency: fingerprints[dependency] for dependency in dependencies if dependency in fingerprints},
+                data_version
+            )
+            if agent_key == "financial_analyst":
+                fingerprints[DEAL_CONTEXT] = agent_fingerprint(
+                    DEAL_CONTEXT,
+                    AnalysisOrchestrator,
+                    job_inputs(state, DEAL_CONTEXT_INPUTS),
+                    {agent_key: fingerprints[agent_key]},
+                    data_version
+                )
+        return fingerprints
+    
+    async def _store_result(self, job_id: str, agent_key: str, fingerprint: str, state: Dict[str, Any], changes: Dict[str, Any]):
+        """Share a successful agent run (its output and StateDelta changes) with later jobs"""
+        output = next((entry for entry in reversed(state.get('agent_outputs', [])) if entry.get('agent_name') == agent_key), None)
+        if output is None or output.get('status') != AgentStatus.COMPLETED:
+            return
+        try:
+            await asyncio.to_thread(self.results.save, agent_key, fingerprint, job_id, output, changes)
+        except (OSError, TypeError, ValueError) as store_error:
+            logger.warning(f"Could not store {agent_key} result of job {job_id}: {store_error}")
+    
+    def _apply_result(self, state: Dict[str, Any], agent_key: str, result: Dict[str, Any]):
+        """Use a stored agent result in this job instead of running the agent"""
+        self._reset_agent_output(state, agent_key)
+        StateDelta.apply(state, result['changes'])
+        reused_from = {'job_id': result['job_id'], 'created_at': result['created_at']}
+        state['agent_outputs'].append({**result['output'], 'reused_from': reused_from})
+        update_agent_status(state, agent_key, AgentStatus.COMPLETED)
+        state['metadata'].setdefault('reused_results', {})[agent_key] = reused_from
+        logger.info(f"Reused {agent_key} result of job {result['job_id']} (inputs unchanged)")
+    
+    async def _send_agent_update(self, job_id: str, agent_key: str, status: AgentStatusEnum, reused_from: Optional[str] = None):
         """Send agent status update via WebSocket
         
         Args:
             job_id: Job ID
             agent_key: Agent key
             status: Agent status
+            reused_from: Job whose result was reused instead of running the agent
         """
         agent_info = self.agent_messages.get(agent_key, {
             "name": agent_key.replace('_', ' ').title(),
@@ -823,18 +1088,79 @@ class AnalysisOrchestrator:
                 "status": status.value,
                 "message": agent_info["running"] if status == AgentStatusEnum.RUNNING else f"{agent_info['name']} {status.value}",
                 "details": agent_info["details"] if status == AgentStatusEnum.RUNNING else [],
-                "timestamp": datetime.utcnow().isoformat()
+                "reused": reused_from is not None,
+                "timestamp": utc_now_iso()
             },
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_now_iso()
         }
+        if reused_from:
+            message["data"]["reused_from"] = reused_from
+            message["data"]["message"] = f"{agent_info['name']} reused (inputs unchanged since job {reused_from})"
         
         await self.job_manager.broadcast_update(job_id, message)
         
         # Small delay for UX (so user can see the update)
         await asyncio.sleep(0.5)
     
+    async def _validate_for_reports(self, job_id: str, state: Dict[str, Any]) -> bool:
+        """Check data consistency before generating ANY reports
+        
+        Args:
+            job_id: Job ID
+            state: Analysis state
+        
+        Returns:
+            False if blocking issues were found (already logged and broadcast)
+        """
+        from src.outputs.report_consistency_validator import ReportConsistencyValidator
+        
+        logger.info("Running pre-report data consistency validation...")
+        validation = ReportConsistencyValidator.validate_pre_report_generation(state)
+        
+        if not validation['valid']:
+            # Validation failed - block report generation
+            critical_issues = [i for i in validation['issues'] if i.get('blocker', False)]
+            error_msg = f"Cannot generate reports: {len(critical_issues)} blocking issues found"
+            logger.error(error_msg)
+            
+            # Log each blocking issue
+            for issue in critical_issues:
+                logger.error(f"  - [{issue['severity']}] {issue['issue']}")
+                logger.error(f"    Fix: {issue['fix']}")
+            
+            # Send error notification
+            await self.job_manager.broadcast_update(job_id, {
+                "type": "report_generation_blocked",
+                "job_id": job_id,
+                "data": {
+                    "message": "Report generation blocked due to data consistency issues",
+                    "issues": critical_issues,
+                    "validation_report": ReportConsistencyValidator.format_validation_report(validation)
+                },
+                "timestamp": utc_now_iso()
+            })
+            
+            state['errors'].append(error_msg)
+            return False
+        
+        # Log validation summary
+        summary = validation.get('summary', {})
+        logger.info(f"✓ Validation PASSED - Safe to generate reports")
+        logger.info(f"  Issues found: {summary.get('total_issues', 0)} (non-blocking)")
+        
+        # Log non-blocking warnings
+        warnings = [i for i in validation['issues'] if not i.get('blocker', False)]
+        if warnings:
+            logger.warning(f"Found {len(warnings)} non-blocking issues:")
+            for warning in warnings[:5]:  # Log first 5
+                logger.warning(f"  - [{warning['severity']}] {warning['issue']}")
+        return True
+    
     async def _generate_reports(self, job_id: str, state: Dict[str, Any]):
-        """Generate all reports with data consistency validation
+        """Generate reports with data consistency validation
+        
+        Only REPORT_EAGER_ARTIFACTS are built here, in parallel worker processes;
+        other formats are built when first downloaded (see build_report_output).
         
         Args:
             job_id: Job ID
@@ -843,49 +1169,16 @@ class AnalysisOrchestrator:
         logger.info(f"Generating reports for job {job_id}")
         
         try:
-            # CRITICAL: Validate data consistency BEFORE generating ANY reports
-            from src.outputs.report_consistency_validator import ReportConsistencyValidator
-            
-            logger.info("Running pre-report data consistency validation...")
-            validation = ReportConsistencyValidator.validate_pre_report_generation(state)
-            
-            if not validation['valid']:
-                # Validation failed - block report generation
-                critical_issues = [i for i in validation['issues'] if i.get('blocker', False)]
-                error_msg = f"Cannot generate reports: {len(critical_issues)} blocking issues found"
-                logger.error(error_msg)
-                
-                # Log each blocking issue
-                for issue in critical_issues:
-                    logger.error(f"  - [{issue['severity']}] {issue['issue']}")
-                    logger.error(f"    Fix: {issue['fix']}")
-                
-                # Send error notification
-                await self.job_manager.broadcast_update(job_id, {
-                    "type": "report_generation_blocked",
-                    "job_id": job_id,
-                    "data": {
-                        "message": "Report generation blocked due to data consistency issues",
-                        "issues": critical_issues,
-                        "validation_report": ReportConsistencyValidator.format_validation_report(validation)
-                    },
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                
-                state['errors'].append(error_msg)
+            if not await self._validate_for_reports(job_id, state):
                 return
             
-            # Log validation summary
-            summary = validation.get('summary', {})
-            logger.info(f"✓ Validation PASSED - Safe to generate reports")
-            logger.info(f"  Issues found: {summary.get('total_issues', 0)} (non-blocking)")
-            
-            # Log non-blocking warnings
-            warnings = [i for i in validation['issues'] if not i.get('blocker', False)]
-            if warnings:
-                logger.warning(f"Found {len(warnings)} non-blocking issues:")
-                for warning in warnings[:5]:  # Log first 5
-                    logger.warning(f"  - [{warning['severity']}] {warning['issue']}")
+            # Reports of an earlier run (resume / re-run) no longer match the state
+            state['output_files'] = {}
+            self.reports.manifests.clear(job_id)
+            artifacts = self.reports.applicable(state, REPORT_EAGER_ARTIFACTS)
+            if not artifacts:
+                logger.info(f"No reports built eagerly for job {job_id} - formats are built on download")
+                return
             
             # Send status update
             await self.job_manager.broadcast_update(job_id, {
@@ -893,86 +1186,53 @@ class AnalysisOrchestrator:
                 "job_id": job_id,
                 "data": {
                     "message": "✓ Data validated - Generating revolutionary reports...",
-                    "details": [
-                        "Data consistency validated successfully",
-                        "Creating Glass Box Excel with 6 revolutionary tabs...",
-                        "Building C-Suite PowerPoint with agent attribution...",
-                        "Generating Diligence Bible PDF with embedded evidence..."
-                    ]
+                    "details": [f"Building {REPORT_ARTIFACTS[key].label}..." for key in artifacts]
                 },
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": utc_now_iso()
             })
             
-            # ARCHITECTURE FIX: Generate ONLY revolutionary reports (removed redundant standard reports)
-            logger.info(f"Generating REVOLUTIONARY 'Glass Box' reports for job {job_id}")
-            
-            try:
-                report_paths = self.report_generator.generate_all_revolutionary_reports(state)
-                logger.info(f"✓ Revolutionary reports generated: {list(report_paths.keys())}")
-            except Exception as rev_error:
-                logger.error(f"Revolutionary reports failed: {rev_error}")
-                report_paths = {}
-                state['errors'].append(f"Report generation error: {str(rev_error)}")
+            results = await self.reports.generate(
+                job_id, state, artifacts,
+                notify=lambda message: self.job_manager.broadcast_update(job_id, message)
+            )
             
-            # Generate M&A reports if deal terms are provided
-            deal_terms = state.get('deal_terms', {})
-            acquirer_ticker = state.get('acquirer_ticker')
-            
-            if MA_REPORTS_AVAILABLE and deal_terms and acquirer_ticker:
-                logger.info(f"Deal terms detected - Generating M&A transaction reports...")
-                await self.job_manager.broadcast_update(job_id, {
-                    "type": "ma_reports",
-                    "job_id": job_id,
-                    "data": {
-                        "message": "💼 Generating M&A Transaction Reports...",
-                        "details": [
-                            "Creating Investment Committee Memorandum...",
-                            "Building M&A Financial Model (Excel)...",
-                            "Generating Board Presentation Deck..."
-                        ]
-                    },
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-                
-                try:
-                    ma_generator = MAReportGenerator()
-                    
-                    # Extract target ticker
-                    target_ticker = state.get('target_ticker', '')
-                    
-                    # Generate M&A reports
-                    ma_results = await ma_generator.generate_complete_ma_report(
-                        acquirer_symbol=acquirer_ticker,
-                        target_symbol=target_ticker,
-                        deal_terms=deal_terms,
-                        output_dir=None  # Auto-generate path
-                    )
-                    
-                    # Add M&A reports to output files
-                    report_paths.update({
-                        'ma_ic_memo': ma_results.get('ic_memo'),
-                        'ma_financial_model': ma_results.get('financial_model'),
-                        'ma_board_deck': ma_results.get('board_deck')
-                    })
-                    
-                    # Store M&A analysis summary in state
-                    state['ma_analysis'] = ma_results.get('summary', {})
-                    
-                    logger.info(f"M&A reports generated successfully")
-                    
-                except Exception as ma_error:
-                    logger.warning(f"M&A reports failed (non-critical): {ma_error}")
-                    # Don't fail workflow if M&A reports fail
-            
-            # Update state with all report paths
-            state['output_files'] = report_paths
-            
-            logger.info(f"Reports generated for job {job_id}: {list(report_paths.keys())}")
+            failed = [key for key, result in results.items() if result['status'] != 'completed']
+            logger.info(
+                f"Reports generated for job {job_id}: {list(state['output_files'].keys())}"
+                + (f" (failed: {failed})" if failed else "")
+            )
             
         except Exception as e:
             logger.error(f"Error generating reports for job {job_id}: {e}")
             state['errors'].append(f"Report generation error: {str(e)}")
     
+    async def build_report_output(self, job_id: str, output_key: str) -> Optional[str]:
+        """Path of a report of a completed job, building it now if it was not built yet
+        
+        Args:
+            job_id: Job ID
+            output_key: output_files key (e.g. 'pdf_full', 'excel', 'ma_board_deck')
+        
+        Returns:
+            File path, or None if the report is unavailable
+        """
+        state = self.job_manager.get_job(job_id)
+        if not state or state['metadata'].get('status') != 'completed':
+            return None
+        
+        existing = state.get('output_files', {}).get(output_key)
+        if existing and Path(existing).exists():
+            return existing
+        if self.reports.artifact_for(output_key) is None or not await self._validate_for_reports(job_id, state):
+            return None
+        
+        return await self.reports.ensure_output(
+            job_id, output_key,
+            load_state=lambda: self.job_manager.get_job(job_id),
+            save_state=lambda updated: self.job_manager._save_job(job_id, updated),
+            notify=lambda message: self.job_manager.broadcast_update(job_id, message)
+        )
+    
     async def _send_completion(self, job_id: str):
         """Send completion message
         
@@ -991,9 +1251,10 @@ class AnalysisOrchestrator:
                 "valuation_range": result.get('valuation_range'),
                 "top_risks": result.get('top_risks', []),
                 "top_opportunities": result.get('top_opportunities', []),
-                "reports": result.get('reports', {})
+                "reports": result.get('reports', {}),
+                "reused_agents": result.get('reused_agents', {})
             },
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": utc_now_iso()
         }
 
         await self.job_manager.broadcast_update(job_id, message)
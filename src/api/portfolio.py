@@ -0,0 +1,279 @@
+"""
+Portfolio Screener - One acquirer against many candidate targets in a single batch
+
+A batch fetches the acquirer's fundamentals once, takes treasury rates and
+sector performance from the shared reference data service, fetches the
+candidates' financials in parallel, computes valuation, accretion/dilution,
+contribution and exchange-ratio metrics for all of them in one vectorized
+pass (utils/portfolio_screen.py), ranks them, and starts the full agent
+pipeline only for the top K.
+
+Batches are stored as data/batches/<batch_id>.json; the escalated analyses
+are ordinary jobs (metadata['batch_id'] points back to the batch).
+"""
+import asyncio
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+from loguru import logger
+
+from src.api.job_manager import get_job_manager
+from src.integrations.fmp_client import FMPClient
+from src.utils.acquirer_data import fetch_acquirer_data
+from src.utils.portfolio_screen import ScreenAssumptions, company_fundamentals, screen_targets
+from src.utils.reference_data import get_reference_data_service
+from src.utils.serialization import dumps, loads
+from src.utils.tracing import start_span
+
+
+# Configuration (overridable via environment)
+BATCH_DIR = os.getenv("BATCH_DIR", "data/batches")
+PORTFOLIO_MAX_TARGETS = int(os.getenv("PORTFOLIO_MAX_TARGETS", "50"))
+PORTFOLIO_FETCH_CONCURRENCY = int(os.getenv("PORTFOLIO_FETCH_CONCURRENCY", "8"))  # candidates fetched at once
+PORTFOLIO_PREMIUM = float(os.getenv("PORTFOLIO_PREMIUM", "0.30"))
+PORTFOLIO_CASH_PERCENTAGE = float(os.getenv("PORTFOLIO_CASH_PERCENTAGE", "0.5"))
+PORTFOLIO_DEBT_SPREAD = float(os.getenv("PORTFOLIO_DEBT_SPREAD", "0.02"))  # over the 10-year treasury
+
+
+class PortfolioScreener:
+    """Creates, runs and stores batch screens"""
+
+    def __init__(self, root: str = BATCH_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.job_manager = get_job_manager()
+        self.batch_tasks: Dict[str, asyncio.Task] = {}  # batches screening in this process
+
+    def create_batch(
+        self,
+        project_name: str,
+        acquirer_ticker: str,
+        target_tickers: List[str],
+        deal_type: str,
+        top_k: int,
+        investment_thesis: Optional[str] = None,
+        strategic_rationale: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create a batch record
+
+        Args:
+            project_name: User-friendly project name
+            acquirer_ticker: Acquirer ticker
+            target_tickers: Candidate target tickers
+            deal_type: Type of deal
+            top_k: Number of top-ranked candidates escalated to a full analysis
+            investment_thesis: Investment thesis (passed to escalated analyses)
+            strategic_rationale: Strategic rationale (passed to escalated analyses)
+            user_id: User ID who created the batch
+
+        Returns:
+            Batch record
+        """
+        acquirer_ticker = acquirer_ticker.strip().upper()
+        targets = list(dict.fromkeys(t.strip().upper() for t in target_tickers if t and t.strip()))
+        targets = [t for t in targets if t != acquirer_ticker]
+        if not targets:
+            raise ValueError("At least one target ticker (other than the acquirer) is required")
+        if len(targets) > PORTFOLIO_MAX_TARGETS:
+            raise ValueError(f"At most {PORTFOLIO_MAX_TARGETS} targets per batch")
+
+        batch = {
+            'batch_id': str(uuid4()),
+            'project_name': project_name,
+            'acquirer_ticker': acquirer_ticker,
+            'target_tickers': targets,
+            'deal_type': deal_type,
+            'top_k': max(0, min(top_k, len(targets))),
+            'investment_thesis': investment_thesis,
+            'strategic_rationale': strategic_rationale,
+            'user_id': user_id,
+            'status': 'pending',
+            'created_at': datetime.utcnow().isoformat(),
+            'completed_at': None,
+            'shared_data': {},
+            'ranking': [],
+            'unavailable': {},
+            'escalated': {},
+            'errors': []
+        }
+        self._save_batch(batch)
+        logger.info(f"Created batch {batch['batch_id']}: {acquirer_ticker} vs {len(targets)} targets")
+        return batch
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Get a batch record"""
+        path = self.root / f"{batch_id}.json"
+        if not path.exists():
+            return None
+        return loads(path.read_bytes())
+
+    def list_batches(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Batch summaries, newest first (optionally only one user's)"""
+        batches = []
+        for path in self.root.glob("*.json"):
+            try:
+                batch = loads(path.read_bytes())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable batch {path}: {e}")
+                continue
+            if user_id and batch.get('user_id') != user_id:
+                continue
+            batches.append({
+                key: batch.get(key)
+                for key in ('batch_id', 'project_name', 'acquirer_ticker', 'target_tickers', 'status', 'created_at', 'escalated')
+            })
+        return sorted(batches, key=lambda b: b['created_at'] or '', reverse=True)
+
+    def _save_batch(self, batch: Dict[str, Any]):
+        path = self.root / f"{batch['batch_id']}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(dumps(batch))
+        os.replace(tmp_path, path)
+
+    async def run_batch(self, batch_id: str, dispatch: Callable[[str], Awaitable[None]]):
+        """Screen every candidate and escalate the top K
+
+        Args:
+            batch_id: Batch ID
+            dispatch: Starts a full analysis job (here or on a queue worker)
+        """
+        batch = self.get_batch(batch_id)
+        if not batch:
+            logger.error(f"Batch {batch_id} not found")
+            return
+
+        with start_span("portfolio.batch", {
+            'batch.id': batch_id,
+            'deal.acquirer_ticker': batch['acquirer_ticker'],
+            'batch.targets': len(batch['target_tickers'])
+        }):
+            try:
+                batch['status'] = 'screening'
+                self._save_batch(batch)
+                await self._screen(batch)
+
+                batch['status'] = 'escalating'
+                self._save_batch(batch)
+                await self._escalate(batch, dispatch)
+
+                batch['status'] = 'completed'
+            except Exception as e:
+                logger.error(f"Batch {batch_id} failed: {e}")
+                batch['status'] = 'failed'
+                batch['errors'].append(str(e))
+            batch['completed_at'] = datetime.utcnow().isoformat()
+            self._save_batch(batch)
+
+    async def _screen(self, batch: Dict[str, Any]):
+        """Fetch shared and per-candidate data, then rank the candidates"""
+        acquirer_ticker = batch['acquirer_ticker']
+        async with FMPClient() as client:
+            # The acquirer is fetched once per batch, alongside the candidates
+            # (bounded so a large batch does not flood FMP)
+            acquirer, company_data = await asyncio.gather(
+                fetch_acquirer_data(acquirer_ticker),
+                client.fetch_multiple_companies(
+                    batch['target_tickers'], extended=False, max_concurrency=PORTFOLIO_FETCH_CONCURRENCY
+                ),
+                return_exceptions=True
+            )
+        if isinstance(acquirer, BaseException):
+            raise RuntimeError(f"Acquirer data unavailable for {acquirer_ticker}: {acquirer}")
+        if isinstance(company_data, BaseException):
+            raise company_data
+
+        # Market-wide data shared by every job
+        reference_data = get_reference_data_service()
+        await reference_data.ensure_loaded()
+        treasury_10y = reference_data.treasury_10y() or 4.5
+        sector_performance = {
+            s.get('sector'): s.get('changesPercentage')
+            for s in reference_data.sector_performance() if isinstance(s, dict)
+        }
+        batch['shared_data'] = {
+            'acquirer': {
+                key: acquirer.get(key)
+                for key in ('company_name', 'current_stock_price', 'market_cap', 'shares_outstanding', 'fetched_at')
+            },
+            'treasury_10y': treasury_10y,
+            'sector_performance': sector_performance,
+            'reference_data_as_of': reference_data.as_of()
+        }
+
+        fundamentals: Dict[str, Dict[str, float]] = {}
+        sectors_by_ticker: Dict[str, Optional[str]] = {}
+        for ticker in batch['target_tickers']:
+            data = company_data.get(ticker)
+            if not data or not data.get('income_statement'):
+                batch['unavailable'][ticker] = "no financial statements"
+                continue
+            market_cap = (data.get('market_cap') or {}).get('marketCap')
+            fundamentals[ticker] = company_fundamentals(
+                data.get('profile'), data['income_statement'], data.get('balance_sheet'),
+                dcf=data.get('dcf'), market_cap=market_cap
+            )
+            sectors_by_ticker[ticker] = (data.get('profile') or {}).get('sector')
+
+        assumptions = ScreenAssumptions(
+            premium=PORTFOLIO_PREMIUM,
+            cash_percentage=PORTFOLIO_CASH_PERCENTAGE,
+            debt_interest_rate=treasury_10y / 100 + PORTFOLIO_DEBT_SPREAD
+        )
+        acquirer_fundamentals = company_fundamentals(
+            acquirer['profile'], acquirer['income_statement'], acquirer['balance_sheet'],
+            share_price=acquirer.get('current_stock_price'),
+            shares_outstanding=acquirer.get('shares_outstanding'),
+            market_cap=acquirer.get('market_cap')
+        )
+        ranking = screen_targets(acquirer_fundamentals, fundamentals, assumptions)
+        for row in ranking:
+            row['sector'] = sectors_by_ticker.get(row['ticker'])
+            row['sector_performance'] = sector_performance.get(row['sector'])
+        batch['assumptions'] = {
+            'premium': assumptions.premium,
+            'cash_percentage': assumptions.cash_percentage,
+            'debt_interest_rate': assumptions.debt_interest_rate,
+            'tax_rate': assumptions.tax_rate
+        }
+        batch['ranking'] = ranking
+        logger.info(f"Batch {batch['batch_id']}: ranked {len(ranking)} candidates ({len(batch['unavailable'])} unavailable)")
+
+    async def _escalate(self, batch: Dict[str, Any], dispatch: Callable[[str], Awaitable[None]]):
+        """Start full analyses for the top K affordable candidates"""
+        candidates = [row for row in batch['ranking'] if row['affordable']][:batch['top_k']]
+        for row in candidates:
+            ticker = row['ticker']
+            job = self.job_manager.create_job(
+                project_name=f"{batch['project_name']} - {ticker}",
+                target_ticker=ticker,
+                deal_type=batch['deal_type'],
+                acquirer_ticker=batch['acquirer_ticker'],
+                investment_thesis=batch['investment_thesis'],
+                strategic_rationale=batch['strategic_rationale'],
+                user_id=batch['user_id']
+            )
+            state = self.job_manager.get_job(job['job_id'])
+            state['metadata']['batch_id'] = batch['batch_id']
+            state['metadata']['screen_rank'] = row['rank']
+            self.job_manager._save_job(job['job_id'], state)
+
+            await dispatch(job['job_id'])
+            batch['escalated'][ticker] = job['job_id']
+            self._save_batch(batch)
+            logger.info(f"Batch {batch['batch_id']}: escalated #{row['rank']} {ticker} to job {job['job_id']}")
+
+
+# Global portfolio screener instance
+_portfolio_screener: Optional[PortfolioScreener] = None
+
+
+def get_portfolio_screener() -> PortfolioScreener:
+    """Get global portfolio screener instance"""
+    global _portfolio_screener
+    if _portfolio_screener is None:
+        _portfolio_screener = PortfolioScreener()
+    return _portfolio_screener
@@ -0,0 +1,270 @@
+"""
+Report Delivery - Downloads served from artifact metadata recorded at build time
+
+When the report pipeline builds an artifact it records the file's size,
+SHA-256, content type and modification time in a small per-job manifest
+(data/report_manifests/<job_id>.json). A download reads only that manifest,
+never the job state, and:
+- Answers If-None-Match / If-Modified-Since with 304 Not Modified
+- Serves Range / If-Range requests (FileResponse does the byte ranges; the
+  manifest supplies the ETag)
+- With REPORT_OFFLOAD_ENABLED, artifacts are uploaded through GCSClient as
+  they are built, and downloads redirect to a short-lived signed URL so large
+  PDFs and decks are not streamed through the API workers. Without a GCS
+  bucket, GCSClient's local storage stands in, behind HMAC-signed links to
+  /api/storage
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+from fastapi import Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from src.utils.serialization import dumps, loads, utc_now_iso
+
+
+# Configuration (overridable via environment)
+REPORT_MANIFEST_DIR = os.getenv("REPORT_MANIFEST_DIR", "data/report_manifests")
+REPORT_OFFLOAD_ENABLED = os.getenv("REPORT_OFFLOAD_ENABLED", "true" if os.getenv("GCS_BUCKET_NAME") else "false").lower() == "true"
+REPORT_SIGNED_URL_SECONDS = int(os.getenv("REPORT_SIGNED_URL_SECONDS", "900"))
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "data/report_cache")  # GCS copies served when a URL can't be signed
+
+CONTENT_TYPES = {
+    '.pdf': 'application/pdf',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+}
+
+# Downloads always revalidate: a re-run replaces the file under the same URL
+CACHE_CONTROL = "private, no-cache"
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def content_type_for(path: str) -> str:
+    suffix = Path(path).suffix.lower()
+    return CONTENT_TYPES.get(suffix) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+# ============================================================================
+# BUILD TIME (report workers)
+# ============================================================================
+
+def artifact_metadata(path: str, object_prefix: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Size, hash, content type and modification time of a built file
+
+    Args:
+        path: Local file path
+        object_prefix: Upload the file through GCSClient under this prefix (offload)
+    """
+    file_path = Path(path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    stat = file_path.stat()
+    metadata = {
+        'path': str(file_path),
+        'size_bytes': stat.st_size,
+        'sha256': digest.hexdigest(),
+        'content_type': content_type_for(str(file_path)),
+        'modified_at': stat.st_mtime,
+        'built_at': utc_now_iso()
+    }
+    if object_prefix:
+        from src.integrations.gcs_client import get_gcs_client
+        object_path = f"{object_prefix}/{metadata['sha256'][:16]}_{file_path.name}"
+        try:
+            stored = get_gcs_client().upload_file(str(file_path), object_path, content_type=metadata['content_type'])
+            metadata['object_path'] = object_path
+            metadata['storage'] = 'gcs' if stored.startswith('gs://') else 'local'
+        except Exception as e:
+            logger.warning(f"Could not offload {file_path.name}: {e}")
+    return metadata
+
+
+# ============================================================================
+# MANIFESTS
+# ============================================================================
+
+class ReportManifestStore:
+    """Per-job artifact metadata: {'project_name', 'artifacts': {output_key: metadata}}"""
+
+    def __init__(self, root: str = REPORT_MANIFEST_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def _path(self, job_id: str) -> Path:
+        return self.root / f"{job_id}.json"
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Manifest of a job (cached until the file changes), or None"""
+        path = self._path(job_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+        cached = self._cache.get(job_id)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            manifest = loads(path.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable report manifest {path}: {e}")
+            return None
+        self._cache[job_id] = (mtime, manifest)
+        return manifest
+
+    def record(self, job_id: str, artifacts: Dict[str, Dict[str, Any]], project_name: Optional[str] = None):
+        """Add or replace artifact entries"""
+        manifest = dict(self.load(job_id) or {'artifacts': {}})
+        manifest['artifacts'] = {**manifest.get('artifacts', {}), **artifacts}
+        if project_name:
+            manifest['project_name'] = project_name
+        path = self._path(job_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(dumps(manifest))
+        os.replace(tmp_path, path)
+        self._cache[job_id] = (path.stat().st_mtime_ns, manifest)
+
+    def clear(self, job_id: str):
+        """Forget a job's artifacts (before its reports are rebuilt)"""
+        self._path(job_id).unlink(missing_ok=True)
+        self._cache.pop(job_id, None)
+
+    def artifact(self, job_id: str, output_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of an artifact that can still be served
+
+        A local file that changed since it was recorded (e.g. regenerated by a
+        script) is hashed again, so its ETag never describes old content.
+        """
+        metadata = ((self.load(job_id) or {}).get('artifacts') or {}).get(output_key)
+        if not metadata:
+            return None
+        try:
+            stat = os.stat(metadata['path'])
+        except OSError:
+            return metadata if REPORT_OFFLOAD_ENABLED and metadata.get('object_path') else None
+        if stat.st_size != metadata['size_bytes'] or stat.st_mtime != metadata['modified_at']:
+            metadata = artifact_metadata(metadata['path'])
+            self.record(job_id, {output_key: metadata})
+        return metadata
+
+    def backfill(self, job_id: str, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build the manifest of a job whose reports predate manifests, from its state"""
+        artifacts = {
+            key: artifact_metadata(path)
+            for key, path in (state.get('output_files') or {}).items()
+            if path and Path(path).is_file()
+        }
+        self.record(job_id, artifacts, state.get('metadata', {}).get('project_name'))
+        return self.load(job_id)
+
+
+# ============================================================================
+# SERVING
+# ============================================================================
+
+def _validators(etag: str, modified_at: float) -> Dict[str, str]:
+    return {'etag': etag, 'last-modified': formatdate(modified_at, usegmt=True), 'cache-control': CACHE_CONTROL}
+
+
+def _not_modified(request: Request, etag: str, modified_at: float) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def file_response(
+    request: Request,
+    path: Path,
+    filename: str,
+    content_type: str,
+    etag: str,
+    modified_at: float
+) -> Response:
+    """FileResponse with validators; 304 when the client's copy is current"""
+    headers = _validators(etag, modified_at)
+    if _not_modified(request, etag, modified_at):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path=path, media_type=content_type, filename=filename, headers=headers)
+
+
+async def report_response(request: Request, metadata: Dict[str, Any], filename: str) -> Response:
+    """
+    Download response for a recorded artifact
+
+    304 if the client's copy is current; a redirect to a signed URL if the
+    artifact was offloaded; otherwise the local file (with range support).
+    """
+    etag = f'"{metadata["sha256"]}"'
+    modified_at = metadata['modified_at']
+    if _not_modified(request, etag, modified_at):
+        return Response(status_code=304, headers=_validators(etag, modified_at))
+
+    local_path = Path(metadata['path'])
+    object_path = metadata.get('object_path')
+    if REPORT_OFFLOAD_ENABLED and object_path:
+        from src.integrations.gcs_client import get_gcs_client
+        gcs = get_gcs_client()
+        url = await asyncio.to_thread(
+            gcs.generate_signed_url, object_path, REPORT_SIGNED_URL_SECONDS, filename, metadata['content_type']
+        )
+        if url:
+            return RedirectResponse(url, status_code=307, headers={'cache-control': 'no-store'})
+        if not local_path.exists() and gcs.use_gcs:
+            # Can't sign (no private key): fetch the object once and serve it from here
+            local_path = Path(REPORT_CACHE_DIR) / object_path
+            if not local_path.exists():
+                await asyncio.to_thread(gcs.download_file, object_path, str(local_path))
+
+    return file_response(request, local_path, filename, metadata['content_type'], etag, modified_at)
+
+
+def storage_response(request: Request, object_path: str, expires: int, signature: str, filename: Optional[str]) -> Optional[Response]:
+    """
+    Serve a local-storage signed URL (the GCS stand-in)
+
+    Returns:
+        The response, or None if the signature is invalid, expired or the file is missing
+    """
+    from src.integrations.gcs_client import get_gcs_client
+    gcs = get_gcs_client()
+    if gcs.use_gcs or not gcs.verify_local_signature(object_path, expires, signature, filename):
+        return None
+    path = gcs.local_file(object_path)
+    if path is None:
+        return None
+    stat = path.stat()
+    # Object names start with the content hash (see artifact_metadata)
+    etag = f'"{path.name.split("_", 1)[0]}-{stat.st_size}"'
+    return file_response(request, path, filename or path.name, content_type_for(path.name), etag, stat.st_mtime)
+
+
+# Global manifest store instance
+_manifest_store: Optional[ReportManifestStore] = None
+
+
+def get_report_manifests() -> ReportManifestStore:
+    """Get global report manifest store instance"""
+    global _manifest_store
+    if _manifest_store is None:
+        _manifest_store = ReportManifestStore()
+    return _manifest_store
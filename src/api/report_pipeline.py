@@ -0,0 +1,387 @@
+"""
+Report Pipeline - Report artifacts built in parallel worker processes
+
+Building the Excel workbook, the PowerPoint deck, the PDF and the M&A
+deliverables (openpyxl, python-pptx, reportlab) is CPU work that used to run
+one artifact after another on the event loop. The pipeline:
+- Writes the job state once to a snapshot file (serialization.pack); every
+  worker reads that file, so the state is not pickled once per artifact
+- Builds each artifact in its own task on a dedicated ComputeExecutor pool,
+  with its own timeout; one artifact failing or timing out does not affect
+  the others
+- Broadcasts a report_progress update as each artifact starts and finishes
+- Builds only REPORT_EAGER_ARTIFACTS when a job completes; the others are
+  built the first time they are downloaded (ensure_output)
+- Records each file's size, hash and content type in the job's report
+  manifest (and offloads it to storage), which downloads are served from
+  (see report_delivery)
+"""
+import asyncio
+import functools
+import importlib
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from src.api.report_delivery import REPORT_OFFLOAD_ENABLED, artifact_metadata, get_report_manifests
+from src.utils.compute_executor import ComputeExecutor, ComputeTimeout
+from src.utils.metrics import observe_report_artifact
+from src.utils.serialization import pack, unpack, utc_now_iso
+from src.utils.tracing import start_span
+
+
+# Configuration (overridable via environment)
+REPORT_MAX_WORKERS = int(os.getenv("REPORT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 = threads
+REPORT_TIMEOUT_SECONDS = float(os.getenv("REPORT_TIMEOUT_SECONDS", "600"))  # per artifact
+REPORT_CPU_BUDGET_SECONDS = float(os.getenv("REPORT_CPU_BUDGET_SECONDS", "900"))  # per artifact
+REPORT_SNAPSHOT_DIR = os.getenv("REPORT_SNAPSHOT_DIR", "data/report_snapshots")
+REPORT_EAGER_ARTIFACTS = tuple(
+    key.strip() for key in os.getenv("REPORT_EAGER_ARTIFACTS", "excel,ppt,pdf_full,ma_reports").split(",") if key.strip()
+)
+
+# Imported by every report worker at start-up
+REPORT_WARM_MODULES = (
+    'pandas',
+    'src.outputs.report_config',
+    'src.outputs.revolutionary_excel_generator',
+    'src.outputs.revolutionary_ppt_generator',
+    'src.outputs.revolutionary_pdf_generator',
+)
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+def _report_config(state: Dict[str, Any]) -> Any:
+    from src.outputs.report_config import create_report_config
+    return create_report_config(
+        target_company=state.get('target_company'),
+        target_ticker=state.get('target_ticker'),
+        acquirer_company=state.get('acquirer_company', 'Strategic Acquirer'),
+        deal_id=state.get('deal_id'),
+        deal_type=state.get('deal_type', 'acquisition'),
+        buyer_type=state.get('buyer_type', 'strategic'),
+        industry=state.get('industry', 'technology')
+    )
+
+
+def _build_revolutionary(
+    module_name: str,
+    class_name: str,
+    method: str,
+    output_key: str,
+    state: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """One revolutionary ('Glass Box') report: Excel, PowerPoint or PDF"""
+    config = _report_config(state)
+    generator_class = getattr(importlib.import_module(module_name), class_name)
+    path = getattr(generator_class(config=config), method)(state, config)
+    return {output_key: path}, {}
+
+
+def _build_ma_reports(state: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """IC memo, M&A financial model and board deck (the generator fetches its own market data)"""
+    from src.outputs.ma_report_generator import MAReportGenerator
+    results = asyncio.run(MAReportGenerator().generate_complete_ma_report(
+        acquirer_symbol=state['acquirer_ticker'],
+        target_symbol=state.get('target_ticker', ''),
+        deal_terms=state['deal_terms'],
+        output_dir=None  # Auto-generate path
+    ))
+    paths = {
+        'ma_ic_memo': results.get('ic_memo'),
+        'ma_financial_model': results.get('financial_model'),
+        'ma_board_deck': results.get('board_deck')
+    }
+    return paths, {'ma_analysis': results.get('summary', {})}
+
+
+@dataclass(frozen=True)
+class ReportArtifact:
+    """One deliverable and how to build it"""
+    key: str
+    label: str
+    builder: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], Dict[str, Any]]]  # state -> (output files, state updates)
+    outputs: Tuple[str, ...]  # output_files keys it produces
+    requires: Tuple[str, ...] = ()  # state fields that must be set for it to apply
+    timeout: float = REPORT_TIMEOUT_SECONDS
+
+
+REPORT_ARTIFACTS: Dict[str, ReportArtifact] = {
+    artifact.key: artifact for artifact in (
+        ReportArtifact(
+            'excel', "Glass Box Excel workbook",
+            functools.partial(_build_revolutionary, 'src.outputs.revolutionary_excel_generator',
+                              'RevolutionaryExcelGenerator', 'generate_revolutionary_workbook', 'excel'),
+            outputs=('excel',)
+        ),
+        ReportArtifact(
+            'ppt', "C-Suite PowerPoint deck",
+            functools.partial(_build_revolutionary, 'src.outputs.revolutionary_ppt_generator',
+                              'RevolutionaryPowerPointGenerator', 'generate_revolutionary_deck', 'ppt'),
+            outputs=('ppt',)
+        ),
+        ReportArtifact(
+            'pdf_full', "Diligence Bible PDF",
+            functools.partial(_build_revolutionary, 'src.outputs.revolutionary_pdf_generator',
+                              'RevolutionaryPDFGenerator', 'generate_revolutionary_report', 'pdf_full'),
+            outputs=('pdf_full',)
+        ),
+        ReportArtifact(
+            'ma_reports', "M&A transaction reports",
+            _build_ma_reports,
+            outputs=('ma_ic_memo', 'ma_financial_model', 'ma_board_deck'),
+            requires=('deal_terms', 'acquirer_ticker')
+        ),
+    )
+}
+
+# Last snapshot read in this worker: the artifacts of one job often land on the same worker
+# (snapshot file names are unique per generate() call)
+_snapshot_cache: Tuple[Optional[str], Optional[Dict[str, Any]]] = (None, None)
+
+
+def _load_snapshot(snapshot_path: str) -> Dict[str, Any]:
+    global _snapshot_cache
+    if _snapshot_cache[0] != snapshot_path:
+        _snapshot_cache = (snapshot_path, unpack(Path(snapshot_path).read_bytes()))
+    return _snapshot_cache[1]
+
+
+def build_artifact(artifact_key: str, snapshot_path: str, object_prefix: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build one artifact from a state snapshot (runs in a report worker)
+
+    Args:
+        artifact_key: Key of REPORT_ARTIFACTS
+        snapshot_path: State snapshot written by the pipeline
+        object_prefix: Offload the files to storage under this prefix
+
+    Returns:
+        {'paths': output_files entries, 'files': their metadata, 'updates': state fields to set}
+    """
+    paths, updates = REPORT_ARTIFACTS[artifact_key].builder(_load_snapshot(snapshot_path))
+    paths = {key: str(path) for key, path in paths.items() if path}
+    files = {key: artifact_metadata(path, object_prefix) for key, path in paths.items() if Path(path).is_file()}
+    return {'paths': paths, 'files': files, 'updates': updates}
+
+
+# ============================================================================
+# PARENT SIDE
+# ============================================================================
+
+class ReportPipeline:
+    """
+    Parallel report generation for completed jobs
+
+    Usage:
+        results = await get_report_pipeline().generate(job_id, state, notify=broadcast)
+        path = await get_report_pipeline().ensure_output(job_id, 'pdf_full', load_state, save_state)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = REPORT_MAX_WORKERS,
+        timeout: float = REPORT_TIMEOUT_SECONDS,
+        cpu_budget: float = REPORT_CPU_BUDGET_SECONDS,
+        snapshot_dir: str = REPORT_SNAPSHOT_DIR
+    ):
+        self.executor = ComputeExecutor(
+            max_workers=max_workers,
+            cpu_budget=cpu_budget,
+            timeout=timeout,
+            warm_modules=REPORT_WARM_MODULES,
+            name="Report"
+        )
+        self.snapshot_dir = Path(snapshot_dir)
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests = get_report_manifests()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def applicable(self, state: Dict[str, Any], artifacts: Optional[Iterable[str]] = None) -> List[str]:
+        """Artifacts (default all) that can be built for a state"""
+        keys = REPORT_ARTIFACTS if artifacts is None else artifacts
+        return [
+            key for key in keys
+            if key in REPORT_ARTIFACTS and all(state.get(field) for field in REPORT_ARTIFACTS[key].requires)
+        ]
+
+    @staticmethod
+    def artifact_for(output_key: str) -> Optional[str]:
+        """Artifact that produces an output_files key (e.g. 'ma_board_deck' -> 'ma_reports')"""
+        for artifact in REPORT_ARTIFACTS.values():
+            if output_key in artifact.outputs:
+                return artifact.key
+        return None
+
+    def _write_snapshot(self, job_id: str, state: Dict[str, Any]) -> Path:
+        path = self.snapshot_dir / f"{job_id}.{time.time_ns()}.snapshot"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(pack(state))
+        os.replace(tmp_path, path)
+        return path
+
+    async def generate(
+        self,
+        job_id: str,
+        state: Dict[str, Any],
+        artifacts: Optional[Iterable[str]] = None,
+        notify: Optional[ProgressCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Build artifacts in parallel and record them in the state
+
+        Output paths go into state['output_files'], file metadata into the
+        job's report manifest and state updates (e.g. ma_analysis) into the
+        state; failures are appended to state['errors'].
+
+        Args:
+            job_id: Job ID
+            state: Job state (updated in place)
+            artifacts: Artifact keys (default every applicable artifact)
+            notify: Receives a report_progress message per artifact start and finish
+
+        Returns:
+            Artifact key -> {'status', 'seconds', 'paths' | 'error'}
+        """
+        keys = self.applicable(state, artifacts)
+        if not keys:
+            return {}
+
+        with start_span("reports.generate", {'job.id': job_id, 'reports.artifacts': ",".join(keys)}):
+            snapshot = await asyncio.to_thread(self._write_snapshot, job_id, state)
+            try:
+                outcomes = await asyncio.gather(*[self._build(job_id, key, snapshot, notify) for key in keys])
+            finally:
+                snapshot.unlink(missing_ok=True)
+
+        results = {}
+        files = {}
+        for key, (result, value) in zip(keys, outcomes):
+            results[key] = result
+            if result['status'] == 'completed':
+                state.setdefault('output_files', {}).update(value['paths'])
+                state.update(value['updates'])
+                files.update(value['files'])
+            else:
+                state.setdefault('errors', []).append(f"Report generation error ({key}): {result['error']}")
+        if files:
+            self.manifests.record(job_id, files, state.get('metadata', {}).get('project_name'))
+        return results
+
+    async def _build(
+        self,
+        job_id: str,
+        artifact_key: str,
+        snapshot: Path,
+        notify: Optional[ProgressCallback]
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        artifact = REPORT_ARTIFACTS[artifact_key]
+        await self._notify(notify, job_id, artifact, 'started')
+        start = time.perf_counter()
+        value = None
+        try:
+            value = await self.executor.run(
+                build_artifact, artifact_key, str(snapshot), f"reports/{job_id}" if REPORT_OFFLOAD_ENABLED else None,
+                name=f"report {artifact_key}", timeout=artifact.timeout
+            )
+            result = {'status': 'completed', 'paths': value['paths']}
+            logger.info(f"Report {artifact_key} for job {job_id} built in {time.perf_counter() - start:.1f}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = 'timeout' if isinstance(e, ComputeTimeout) else 'failed'
+            result = {'status': status, 'error': str(e)}
+            logger.error(f"Report {artifact_key} for job {job_id} {status}: {e}")
+        result['seconds'] = round(time.perf_counter() - start, 2)
+        observe_report_artifact(artifact_key, result['status'], result['seconds'])
+        await self._notify(notify, job_id, artifact, result['status'], result)
+        return result, value
+
+    @staticmethod
+    async def _notify(
+        notify: Optional[ProgressCallback],
+        job_id: str,
+        artifact: ReportArtifact,
+        status: str,
+        result: Optional[Dict[str, Any]] = None
+    ):
+        if notify is None:
+            return
+        data = {'artifact': artifact.key, 'label': artifact.label, 'status': status}
+        if result:
+            data.update({key: result[key] for key in ('seconds', 'paths', 'error') if key in result})
+        try:
+            await notify({
+                "type": "report_progress",
+                "job_id": job_id,
+                "data": data,
+                "timestamp": utc_now_iso()
+            })
+        except Exception as e:
+            logger.warning(f"Could not send report progress for job {job_id}: {e}")
+
+    async def ensure_output(
+        self,
+        job_id: str,
+        output_key: str,
+        load_state: Callable[[], Optional[Dict[str, Any]]],
+        save_state: Callable[[Dict[str, Any]], None],
+        notify: Optional[ProgressCallback] = None
+    ) -> Optional[str]:
+        """
+        Path of an output file, building its artifact first if it is missing
+
+        On-demand builds of one job run one at a time; the state is loaded
+        inside the lock, so a request that waited sees what the previous one
+        built instead of building it again.
+
+        Args:
+            job_id: Job ID
+            output_key: output_files key
+            load_state: Returns the job's current state
+            save_state: Persists the state after a build
+            notify: Receives report_progress messages
+
+        Returns:
+            File path, or None if the output is unknown, not applicable or failed to build
+        """
+        def existing(state: Dict[str, Any]) -> Optional[str]:
+            path = state.get('output_files', {}).get(output_key)
+            return path if path and Path(path).exists() else None
+
+        artifact_key = self.artifact_for(output_key)
+        if artifact_key is None:
+            return None
+        async with self._locks.setdefault(job_id, asyncio.Lock()):
+            state = load_state()
+            if state is None:
+                return None
+            path = existing(state)
+            if path is None and self.applicable(state, [artifact_key]):
+                await self.generate(job_id, state, [artifact_key], notify)
+                save_state(state)
+                path = existing(state)
+        return path
+
+    def shutdown(self, wait: bool = True):
+        """Stop the report worker processes"""
+        self.executor.shutdown(wait=wait)
+
+
+# Global report pipeline instance
+_report_pipeline: Optional[ReportPipeline] = None
+
+
+def get_report_pipeline() -> ReportPipeline:
+    """Get global report pipeline instance"""
+    global _report_pipeline
+    if _report_pipeline is None:
+        _report_pipeline = ReportPipeline()
+    return _report_pipeline
@@ -0,0 +1,233 @@
+"""
+Result store - agent results shared across jobs, keyed by input fingerprint
+
+Analysts often re-run a target with a different deal value or acquirer.
+Each agent's fingerprint hashes what it reads: the job inputs it declares,
+the fingerprints of the agents it depends on, the source data version (the
+latest filings of the companies involved), its LLM configuration and its
+code. When a new job reaches an agent whose fingerprint has a stored result,
+the orchestrator applies that result instead of running the agent. Changing
+an input invalidates exactly the agents downstream of it.
+
+A result is the agent's output entry plus the state changes it made,
+captured with StateDelta around the run. Layout:
+data/results/<agent>/<fingerprint>.msgpack.gz
+"""
+import gzip
+import hashlib
+import inspect
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from src.core.config import get_config
+from src.utils.serialization import BINARY_FORMAT, dumps, pack, unpack
+
+
+# Configuration (overridable via environment)
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "data/results")
+RESULT_STORE_MAX_AGE_HOURS = float(os.getenv("RESULT_STORE_MAX_AGE_HOURS", "168"))  # results older than this are recomputed
+RESULT_REUSE_ENABLED = os.getenv("RESULT_REUSE_ENABLED", "true").lower() == "true"
+
+# Bump to invalidate every stored result (e.g. after changing shared helpers agents call)
+RESULT_FORMAT_VERSION = 2
+
+# State the orchestrator manages itself; never part of an agent's result
+BOOKKEEPING_KEYS = frozenset({
+    'agent_statuses', 'agent_outputs', 'current_agent', 'progress_percentage',
+    'metadata', 'workflow_started', 'workflow_completed'
+})
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(dumps(value, sort_keys=True)).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _source_digest(path: str) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def code_version(agent_class: type) -> str:
+    """Hash of the module that defines an agent (a code change invalidates its results)"""
+    try:
+        return _source_digest(inspect.getsourcefile(agent_class))
+    except (TypeError, OSError):
+        return agent_class.__qualname__
+
+
+def model_settings(agent_key: str) -> Dict[str, Any]:
+    """LLM settings an agent runs with (agent config plus its model config)"""
+    config = get_config()
+    agent_config = config.agents.get(agent_key)
+    if agent_config is None:
+        return {}
+    settings = {'agent': agent_config.model_dump()}
+    for llm_name in filter(None, (agent_config.llm, agent_config.social_media_llm)):
+        model = config.ai_models.get(llm_name)
+        settings[llm_name] = model.model_dump() if model else None
+    return settings
+
+
+def agent_fingerprint(
+    agent_key: str,
+    agent_class: type,
+    job_inputs: Dict[str, Any],
+    upstream: Dict[str, str],
+    data_version: Dict[str, Any]
+) -> str:
+    """
+    Fingerprint of everything an agent's result depends on
+
+    Args:
+        agent_key: Agent key
+        agent_class: Agent class (its module source is hashed)
+        job_inputs: The job fields the agent reads
+        upstream: Fingerprints of the agents it depends on
+        data_version: Source data version of the job's companies
+
+    Returns:
+        Hex fingerprint
+    """
+    return _digest({
+        'format': RESULT_FORMAT_VERSION,
+        'agent': agent_key,
+        'code': code_version(agent_class),
+        'model': model_settings(agent_key),
+        'inputs': job_inputs,
+        'upstream': upstream,
+        'data': data_version
+    })
+
+
+class StateDelta:
+    """
+    The state changes an agent run makes
+
+    Captured as new values for replaced keys and appended items for lists the
+    agent extended (errors, warnings, anomaly_log), so a reused result can be
+    applied to a different job's state.
+    """
+
+    def __init__(self, state: Dict[str, Any]):
+        self._before: Dict[str, Tuple[str, Optional[int]]] = {
+            key: (_digest(value), len(value) if isinstance(value, list) else None)
+            for key, value in state.items() if key not in BOOKKEEPING_KEYS
+        }
+
+    def changes(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Changes since construction: {'set': {...}, 'extend': {...}, 'delete': [...]}"""
+        changed: Dict[str, Any] = {'set': {}, 'extend': {}, 'delete': []}
+        for key, value in state.items():
+            if key in BOOKKEEPING_KEYS:
+                continue
+            before = self._before.get(key)
+            if before is not None and before[0] == _digest(value):
+                continue
+            length = before[1] if before else None
+            if isinstance(value, list) and length is not None and len(value) >= length and _digest(value[:length]) == before[0]:
+                changed['extend'][key] = value[length:]
+            else:
+                changed['set'][key] = value
+        changed['delete'] = [key for key in self._before if key not in state]
+        return changed
+
+    @staticmethod
+    def apply(state: Dict[str, Any], changes: Dict[str, Any]):
+        """Apply captured changes to another state"""
+        state.update(changes.get('set', {}))
+        for key, items in changes.get('extend', {}).items():
+            state[key] = list(state.get(key) or []) + items
+        for key in changes.get('delete', []):
+            state.pop(key, None)
+
+
+class ResultStore:
+    """Gzipped msgpack agent results, one file per (agent, fingerprint)"""
+
+    def __init__(self, root: str = RESULT_STORE_DIR, max_age_hours: float = RESULT_STORE_MAX_AGE_HOURS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_age = timedelta(hours=max_age_hours)
+
+    def _path(self, agent_key: str, fingerprint: str) -> Path:
+        return self.root / agent_key / f"{fingerprint}.{BINARY_FORMAT}.gz"
+
+    def save(self, agent_key: str, fingerprint: str, job_id: str, output: Dict[str, Any], changes: Dict[str, Any]) -> Path:
+        """Store an agent's result
+
+        Args:
+            agent_key: Agent key
+            fingerprint: Input fingerprint of the run
+            job_id: Job that produced it
+            output: The agent's agent_outputs entry
+            changes: StateDelta changes of the run
+
+        Returns:
+            Result file path
+        """
+        path = self._path(agent_key, fingerprint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(pack({
+                'agent': agent_key,
+                'fingerprint': fingerprint,
+                'job_id': job_id,
+                'created_at': datetime.utcnow().isoformat(),
+                'output': output,
+                'changes': changes
+            }), compresslevel=1))
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, agent_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Stored result for a fingerprint, or None if there is none (or it expired)"""
+        path = self._path(agent_key, fingerprint)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rb') as f:
+                result = unpack(f.read())
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Skipping unreadable result {path}: {e}")
+            return None
+        if datetime.utcnow() - datetime.fromisoformat(result['created_at']) > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+        return result
+
+    def prune(self) -> int:
+        """Remove expired results; returns how many were removed"""
+        cutoff = (datetime.utcnow() - self.max_age).timestamp()
+        removed = 0
+        for path in self.root.glob("*/*.gz"):  # also the .json.gz files of format version 1
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+def job_inputs(state: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """The given job fields of a state"""
+    return {field: state.get(field) for field in fields}
+
+
+def reused_agents(state: Dict[str, Any]) -> List[str]:
+    """Agents whose output in this job was reused from an earlier job"""
+    return list((state.get('metadata', {}).get('reused_results') or {}).keys())
+
+
+# Global result store instance
+_result_store: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """Get global result store instance"""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore()
+    return _result_store
@@ -1,13 +1,13 @@
 """
 FastAPI server for M&A Diligence Swarm
 """
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, status
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from typing import Optional
 import asyncio
-import json
+import sys
 from datetime import datetime
 from pathlib import Path
 from loguru import logger
@@ -16,12 +16,22 @@ from src.api.models import (
     UserCreate, UserLogin, Token, UserResponse,
     AnalysisRequest, AnalysisResponse, AnalysisProgress,
     AnalysisResult, AnalysisList, WSMessage, StatusUpdate,
-    AgentStatusEnum
+    AgentStatusEnum, PortfolioRequest, PortfolioResponse
 )
 from src.api.auth import AuthService
 from src.api.job_manager import get_job_manager
-from src.api.orchestrator import AnalysisOrchestrator
-from src.api.copilot_service_enhanced import get_enhanced_copilot_service
+from src.api.job_queue import get_job_queue
+from src.api.orchestrator import PIPELINE_AGENTS, AnalysisOrchestrator, downstream_agents, incomplete_agents
+from src.api.portfolio import get_portfolio_screener
+from src.api.report_delivery import get_report_manifests, report_response, storage_response
+from src.agents.registry import PREWARM_ON_STARTUP, loaded_agents, prewarm
+from src.utils.api_health_check import get_health_monitor
+from src.utils.compute_executor import get_compute_executor
+from src.utils.llm_gateway import get_llm_gateway
+from src.utils.metrics import PROMETHEUS_AVAILABLE, register_live_gauge, render_metrics
+from src.utils.reference_data import get_reference_data_service
+from src.utils.serialization import dumps_str
+from src.utils.tracing import inject_context, setup_tracing, shutdown_tracing
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -53,8 +63,22 @@ security = HTTPBearer()
 # Services
 auth_service = AuthService()
 job_manager = get_job_manager()
+job_queue = get_job_queue()  # None: jobs run in this process
 orchestrator = AnalysisOrchestrator()
-copilot_service = get_enhanced_copilot_service()
+portfolio_screener = get_portfolio_screener()
+
+
+def get_copilot_service():
+    """Copilot service, created on first use (it loads the LLM and valuation stack)"""
+    from src.api.copilot_service_enhanced import get_enhanced_copilot_service
+    return get_enhanced_copilot_service()
+
+
+def _invalidate_copilot_session(job_id: str):
+    """Drop the copilot's cached session for a job whose results changed (no-op if the copilot isn't loaded)"""
+    if 'src.api.copilot_service_enhanced' in sys.modules:
+        from src.api.copilot_service_enhanced import invalidate_copilot_session
+        invalidate_copilot_session(job_id)
 
 
 # Dependency for getting current user
@@ -188,11 +212,12 @@ async def start_analysis(request: AnalysisRequest, user: dict = Depends(get_curr
             deal_value=request.deal_value,
             investment_thesis=request.investment_thesis,
             strategic_rationale=request.strategic_rationale,
-            user_id=user['user_id']
+            user_id=user['user_id'],
+            reuse_results=request.reuse_results
         )
         
-        # Start orchestration in background
-        asyncio.create_task(orchestrator.run_analysis(job['job_id']))
+        # Start orchestration in background (here, or on a queue worker)
+        await _dispatch_analysis(job['job_id'])
         
         return AnalysisResponse(
             job_id=job['job_id'],
@@ -205,6 +230,145 @@ async def start_analysis(request: AnalysisRequest, user: dict = Depends(get_curr
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _dispatch_analysis(job_id: str, resume_agents: Optional[list] = None):
+    """Run a job (or resume part of it) in this process, or hand it to the job queue"""
+    payload = {'resume': True, 'agents': resume_agents} if resume_agents is not None else {}
+    if job_queue is not None:
+        await job_queue.enqueue(job_id, {**payload, 'trace_context': inject_context()})
+        job_manager.forget_job(job_id)
+        return
+    
+    if resume_agents is not None:
+        task = asyncio.create_task(orchestrator.resume_analysis(job_id, resume_agents))
+    else:
+        task = asyncio.create_task(orchestrator.run_analysis(job_id))
+    job_manager.job_tasks[job_id] = task
+    
+    def on_done(_):
+        job_manager.job_tasks.pop(job_id, None)
+        _invalidate_copilot_session(job_id)
+    
+    task.add_done_callback(on_done)
+
+
+async def _resume(job_id: str, user: dict, force: bool, agent_key: Optional[str] = None, include_dependents: bool = True) -> dict:
+    """Validate and dispatch a resume / agent re-run"""
+    state = job_manager.get_job(job_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if user.get('role') != 'admin' and state['metadata'].get('user_id') != user['user_id']:
+        raise HTTPException(status_code=403, detail="Not allowed to modify this analysis")
+    
+    # A job still marked running may belong to a process that died; force=true takes it over
+    if job_id in job_manager.job_tasks or (state['metadata'].get('status') in ('pending', 'running') and not force):
+        raise HTTPException(
+            status_code=409,
+            detail="Analysis is still running (pass force=true if its process was interrupted)"
+        )
+    
+    if agent_key is None:
+        agents = downstream_agents(incomplete_agents(state))
+    elif agent_key not in PIPELINE_AGENTS:
+        raise HTTPException(status_code=404, detail=f"Unknown agent '{agent_key}'")
+    else:
+        agents = downstream_agents([agent_key]) if include_dependents else [agent_key]
+    
+    state['metadata']['status'] = 'pending'
+    job_manager._save_job(job_id, state)
+    # The copilot must not keep answering from the results being replaced
+    _invalidate_copilot_session(job_id)
+    await _dispatch_analysis(job_id, agents)
+    
+    return {
+        "job_id": job_id,
+        "status": "pending",
+        "agents": agents,
+        "checkpoints": len(orchestrator.checkpoints.list(job_id))
+    }
+
+
+@app.post("/api/analysis/{job_id}/resume", tags=["analysis"])
+async def resume_analysis(job_id: str, force: bool = False, user: dict = Depends(get_current_user)):
+    """Resume a failed or interrupted analysis from its last checkpoint (re-runs unfinished agents and their dependents)"""
+    return await _resume(job_id, user, force)
+
+
+@app.post("/api/analysis/{job_id}/agents/{agent_key}/rerun", tags=["analysis"])
+async def rerun_agent(
+    job_id: str,
+    agent_key: str,
+    include_dependents: bool = True,
+    force: bool = False,
+    user: dict = Depends(get_current_user)
+):
+    """Re-run one agent (and, by default, every agent that depends on it), then regenerate reports"""
+    return await _resume(job_id, user, force, agent_key, include_dependents)
+
+
+@app.get("/api/analysis/{job_id}/checkpoints", tags=["analysis"])
+async def list_checkpoints(job_id: str, user: dict = Depends(get_current_user)):
+    """Per-agent checkpoints available for resume"""
+    if not job_manager.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return {"job_id": job_id, "checkpoints": orchestrator.checkpoints.list(job_id)}
+
+
+@app.post("/api/portfolio/screen", response_model=PortfolioResponse, tags=["portfolio"])
+async def start_portfolio_screen(request: PortfolioRequest, user: dict = Depends(get_current_user)):
+    """Screen many targets against one acquirer and run the full analysis on the top K"""
+    try:
+        batch = portfolio_screener.create_batch(
+            project_name=request.project_name,
+            acquirer_ticker=request.acquirer_ticker,
+            target_tickers=request.target_tickers,
+            deal_type=request.deal_type.value,
+            top_k=request.top_k,
+            investment_thesis=request.investment_thesis,
+            strategic_rationale=request.strategic_rationale,
+            user_id=user['user_id']
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Screening is cheap (FMP + NumPy) and runs here; escalated jobs go through the usual dispatch
+    batch_id = batch['batch_id']
+    task = asyncio.create_task(portfolio_screener.run_batch(batch_id, _dispatch_analysis))
+    portfolio_screener.batch_tasks[batch_id] = task
+    task.add_done_callback(lambda _: portfolio_screener.batch_tasks.pop(batch_id, None))
+    
+    return PortfolioResponse(
+        batch_id=batch_id,
+        project_name=batch['project_name'],
+        status=batch['status'],
+        target_tickers=batch['target_tickers'],
+        created_at=datetime.fromisoformat(batch['created_at'])
+    )
+
+
+@app.get("/api/portfolio/list", tags=["portfolio"])
+async def list_portfolio_screens(user: dict = Depends(get_current_user)):
+    """List portfolio screens for current user"""
+    user_id = None if user.get('role') == 'admin' else user['user_id']
+    batches = portfolio_screener.list_batches(user_id)
+    return {"batches": batches, "total": len(batches)}
+
+
+@app.get("/api/portfolio/{batch_id}", tags=["portfolio"])
+async def get_portfolio_screen(batch_id: str, user: dict = Depends(get_current_user)):
+    """Ranking, shared data and escalated jobs of a portfolio screen"""
+    batch = portfolio_screener.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Portfolio screen not found")
+    if user.get('role') != 'admin' and batch.get('user_id') != user['user_id']:
+        raise HTTPException(status_code=403, detail="Not allowed to view this portfolio screen")
+    
+    batch['escalated_status'] = {
+        ticker: ((job_manager.get_job(job_id) or {}).get('metadata', {}).get('status') or 'unknown')
+        for ticker, job_id in batch['escalated'].items()
+    }
+    return batch
+
+
 @app.get("/api/analysis/{job_id}/progress", response_model=AnalysisProgress, tags=["analysis"])
 async def get_analysis_progress(job_id: str, user: dict = Depends(get_current_user)):
     """Get analysis progress"""
@@ -242,17 +406,19 @@ async def list_analyses(user: dict = Depends(get_current_user)):
     )
 
 
-@app.get("/api/analysis/{job_id}/download/{file_type}", tags=["analysis"])
+@app.api_route("/api/analysis/{job_id}/download/{file_type}", methods=["GET", "HEAD"], tags=["analysis"])
 async def download_report(
     job_id: str,
     file_type: str,
+    request: Request,
     user: dict = Depends(get_current_user)
 ):
-    """Download analysis report"""
-    result = job_manager.get_job_result(job_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Analysis not found")
+    """Download analysis report
     
+    Served from the report manifest recorded when the file was built (ETag,
+    Last-Modified, 304s and Range requests); offloaded reports redirect to a
+    signed storage URL.
+    """
     # Map frontend file types to backend keys
     file_type_map = {
         'pdf': 'pdf_full',  # Full PDF report
@@ -262,39 +428,46 @@ async def download_report(
     
     backend_key = file_type_map.get(file_type, file_type)
     
-    # Get file path
-    file_path = result['reports'].get(backend_key)
-    if not file_path:
-        raise HTTPException(status_code=404, detail=f"Report type '{file_type}' not found")
-    
-    file_path = Path(file_path)
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Report file not found")
+    manifests = get_report_manifests()
+    metadata = manifests.artifact(job_id, backend_key)
+    if metadata is None and manifests.load(job_id) is None:
+        # Reports built before manifests existed
+        state = job_manager.get_job(job_id)
+        if not state:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        manifests.backfill(job_id, state)
+        metadata = manifests.artifact(job_id, backend_key)
     
-    # Determine media type
-    media_types = {
-        'pdf': 'application/pdf',
-        'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
-    }
-    media_type = media_types.get(file_type, 'application/octet-stream')
-    
-    # Create proper filename with extension
-    extensions = {
-        'pdf': '.pdf',
-        'excel': '.xlsx',
-        'pptx': '.pptx'
-    }
+    # Formats not built when the job completed are built now
+    if metadata is None:
+        try:
+            await orchestrator.build_report_output(job_id, backend_key)
+        except Exception as e:
+            logger.error(f"On-demand report {backend_key} failed for job {job_id}: {e}")
+        metadata = manifests.artifact(job_id, backend_key)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail=f"Report type '{file_type}' not found")
     
-    # Use project name from result for filename
-    project_name = result.get('project_name', 'Analysis').replace(' ', '_')
-    filename = f"{project_name}_Report{extensions.get(file_type, '')}"
+    # Use project name from the manifest for filename
+    project_name = (manifests.load(job_id) or {}).get('project_name') or 'Analysis'
+    filename = f"{project_name.replace(' ', '_')}_Report{Path(metadata['path']).suffix}"
     
-    return FileResponse(
-        path=file_path,
-        media_type=media_type,
-        filename=filename
-    )
+    return await report_response(request, metadata, filename)
+
+
+@app.api_route("/api/storage/{object_path:path}", methods=["GET", "HEAD"], tags=["analysis"])
+async def download_stored_object(
+    object_path: str,
+    request: Request,
+    expires: int,
+    signature: str,
+    filename: Optional[str] = None
+):
+    """Signed-URL downloads from local storage (stands in for GCS when no bucket is configured)"""
+    response = storage_response(request, object_path, expires, signature, filename)
+    if response is None:
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+    return response
 
 
 # ============================================================================
@@ -305,7 +478,7 @@ async def download_report(
 async def initialize_copilot(job_id: str, user: dict = Depends(get_current_user)):
     """Initialize copilot chat session for an analysis"""
     try:
-        init_data = await copilot_service.initialize_chat(job_id)
+        init_data = await get_copilot_service().initialize_chat(job_id)
         
         if "error" in init_data:
             raise HTTPException(status_code=404, detail=init_data["error"])
@@ -320,11 +493,15 @@ async def initialize_copilot(job_id: str, user: dict = Depends(get_current_user)
 async def chat_with_copilot(
     job_id: str,
     request: dict,
+    http_request: Request,
     user: dict = Depends(get_current_user)
 ):
     """
     Send a message to the copilot and get streaming response.
     
+    Tokens are forwarded as the model generates them. If the client
+    disconnects, the copilot stream (and the upstream LLM stream) is closed.
+    
     Request body:
     {
         "message": "User's question",
@@ -342,10 +519,17 @@ async def chat_with_copilot(
         
         async def generate_response():
             """Generator for streaming response"""
-            async for chunk in copilot_service.process_message(
+            stream = get_copilot_service().process_message(
                 job_id, message, conversation_history
-            ):
-                yield f"data: {json.dumps(chunk)}\n\n"
+            )
+            try:
+                async for chunk in stream:
+                    if await http_request.is_disconnected():
+                        logger.info(f"Copilot client disconnected for job {job_id} - cancelling response")
+                        break
+                    yield f"data: {dumps_str(chunk)}\n\n"
+            finally:
+                await stream.aclose()
         
         return StreamingResponse(
             generate_response(),
@@ -365,7 +549,7 @@ async def chat_with_copilot(
 async def export_copilot_conversation(job_id: str, user: dict = Depends(get_current_user)):
     """Export conversation history to JSON"""
     try:
-        file_path = await copilot_service.export_conversation(job_id)
+        file_path = await get_copilot_service().export_conversation(job_id)
         if not file_path:
             raise HTTPException(status_code=404, detail="No conversation history found")
         
@@ -395,12 +579,12 @@ async def websocket_analysis(websocket: WebSocket, job_id: str):
         # Send initial status
         progress = job_manager.get_job_progress(job_id)
         if progress:
-            await websocket.send_json({
+            await websocket.send_text(dumps_str({
                 "type": "status_update",
                 "job_id": job_id,
                 "data": progress,
                 "timestamp": datetime.utcnow().isoformat()
-            })
+            }))
         
         # Keep connection alive and handle messages
         while True:
@@ -426,10 +610,86 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "reference_data": get_reference_data_service().snapshot(),
+        "agents_loaded": len(loaded_agents())
     }
 
 
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint (bearer token required when METRICS_AUTH_TOKEN is set)"""
+    import os
+    token = os.getenv("METRICS_AUTH_TOKEN")
+    if token and request.headers.get("authorization") != f"Bearer {token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    if not PROMETHEUS_AVAILABLE:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="prometheus-client not installed")
+    
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+async def _relay_job_events():
+    """Forward progress published by queue workers to this process's websockets"""
+    retry_delay = 1.0
+    while True:
+        try:
+            async for job_id, message in job_queue.subscribe():
+                retry_delay = 1.0
+                if message.get('type') == 'completion':
+                    # A worker finished (or re-ran) the job: cached copilot sessions are stale
+                    _invalidate_copilot_session(job_id)
+                await job_manager.broadcast_update(job_id, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Job event relay interrupted: {e} - reconnecting in {retry_delay:g}s")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30.0)
+
+
+_job_event_relay: Optional[asyncio.Task] = None
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+async def _warm_up():
+    """Start compute workers and (optionally) import agents after the server is already serving"""
+    # Queue workers warm their own pool
+    if job_queue is None:
+        try:
+            await get_compute_executor().warm_up()
+        except Exception as e:
+            logger.warning(f"Compute executor warm-up failed: {e}")
+    if PREWARM_ON_STARTUP:
+        await asyncio.to_thread(prewarm)
+
+
+def _register_live_metrics():
+    """Gauges read from live objects at scrape time"""
+    register_live_gauge(
+        'websocket_connections', "Open analysis websocket connections",
+        lambda: sum(len(connections) for connections in job_manager.job_websockets.values())
+    )
+    register_live_gauge(
+        'jobs_in_memory', "Job states held in memory by the job manager",
+        lambda: len(job_manager.active_jobs)
+    )
+    register_live_gauge(
+        'compute_active_jobs', "Compute executor jobs queued or running",
+        lambda: get_compute_executor().active_jobs
+    )
+    register_live_gauge(
+        'llm_gateway_in_flight', "LLM gateway requests in flight",
+        lambda: get_llm_gateway().in_flight
+    )
+    register_live_gauge(
+        'reference_data_age_seconds', "Age of each market reference data series",
+        lambda: {name: info['age_seconds'] for name, info in get_reference_data_service().snapshot().items()},
+        label='series'
+    )
+
+
 # ============================================================================
 # STARTUP/SHUTDOWN
 # ============================================================================
@@ -439,6 +699,10 @@ async def startup_event():
     """Startup event"""
     logger.info("🚀 M&A Diligence Swarm API starting...")
     
+    # Export spans (TRACING_EXPORTER=otlp|json|console) before any job runs
+    setup_tracing()
+    _register_live_metrics()
+    
     # Initialize database in production
     import os
     if os.getenv("ENVIRONMENT") == "production":
@@ -457,6 +721,22 @@ async def startup_event():
             logger.error(f"Database initialization error: {e}")
             logger.warning("Continuing without database - file-based storage will be used")
     
+    # Start background API health monitor (jobs read cached status instead of probing)
+    await get_health_monitor().start()
+    
+    # Market-wide reference data (rates, calendar, sectors) refreshed in the background for all jobs
+    await get_reference_data_service().start()
+    
+    # With a job queue, analyses run on workers and their progress arrives over the queue
+    global _job_event_relay
+    if job_queue is not None:
+        _job_event_relay = asyncio.create_task(_relay_job_events())
+    
+    # Spawn the compute worker pool (and import agents with PREWARM_ON_STARTUP=true) in the
+    # background, so /api/health answers before any heavy library is loaded
+    global _warm_up_task
+    _warm_up_task = asyncio.create_task(_warm_up())
+    
     logger.info("API documentation available at /docs")
 
 
@@ -464,6 +744,17 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown event"""
     logger.info("Shutting down M&A Diligence Swarm API...")
+    if _job_event_relay is not None:
+        _job_event_relay.cancel()
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+    if job_queue is not None:
+        await job_queue.close()
+    await get_health_monitor().stop()
+    await get_reference_data_service().stop()
+    get_compute_executor().shutdown()
+    orchestrator.reports.shutdown()
+    shutdown_tracing()
 
 
 if __name__ == "__main__":
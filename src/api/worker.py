@@ -0,0 +1,245 @@
+"""
+Job Worker - Runs queued analysis jobs outside the API process
+
+    JOB_QUEUE_BACKEND=redis python run_worker.py --concurrency 2
+
+Each worker claims up to JOB_WORKER_CONCURRENCY jobs at a time, heartbeats
+their leases while AnalysisOrchestrator runs them, and publishes every
+progress update to the queue (the API relays them to websockets). Scale
+out by starting more workers; they share the queue and the job store.
+
+On SIGTERM/SIGINT the worker stops claiming, lets running jobs finish for
+JOB_WORKER_SHUTDOWN_GRACE seconds, then hands the rest back to the queue.
+Jobs of a worker that dies without doing so are retried once their lease
+expires (see job_queue.py).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from loguru import logger
+
+from src.agents.registry import PREWARM_ON_STARTUP, prewarm
+from src.api.job_manager import get_job_manager
+from src.api.job_queue import JOB_QUEUE_BACKEND, JOB_QUEUE_POLL_INTERVAL, JobQueue, QueuedJob, get_job_queue
+from src.api.orchestrator import AnalysisOrchestrator
+from src.utils.api_health_check import get_health_monitor
+from src.utils.compute_executor import get_compute_executor
+from src.utils.metrics import serve_metrics
+from src.utils.reference_data import get_reference_data_service
+from src.utils.tracing import attach_context, setup_tracing, shutdown_tracing
+
+
+# Configuration (overridable via environment)
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+JOB_WORKER_SHUTDOWN_GRACE = float(os.getenv("JOB_WORKER_SHUTDOWN_GRACE", "60"))
+JOB_WORKER_METRICS_PORT = int(os.getenv("JOB_WORKER_METRICS_PORT", "0"))
+
+
+class JobWorker:
+    """Claims jobs from the queue and runs them with a per-worker concurrency limit"""
+
+    def __init__(
+        self,
+        queue: Optional[JobQueue] = None,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        worker_id: Optional[str] = None
+    ):
+        self.queue = queue or get_job_queue()
+        if self.queue is None:
+            raise RuntimeError("No job queue configured - set JOB_QUEUE_BACKEND=redis or sqlite")
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.job_manager = get_job_manager()
+        self.orchestrator = AnalysisOrchestrator()
+        self.heartbeat_interval = self.queue.visibility_timeout / 4
+
+        self._running: Dict[str, Tuple[QueuedJob, asyncio.Task]] = {}
+        self._lost_leases: Set[str] = set()
+        self._stopping: Optional[asyncio.Event] = None
+
+    def stop(self):
+        """Stop claiming new jobs (running jobs get the shutdown grace period)"""
+        if self._stopping is not None and not self._stopping.is_set():
+            logger.info(f"Worker {self.worker_id} stopping - {len(self._running)} job(s) running")
+            self._stopping.set()
+
+    async def run(self):
+        """Claim and run jobs until stop() is called"""
+        self._stopping = asyncio.Event()
+        # Updates go to the queue; this process has no websockets
+        self.job_manager.event_sink = self.queue.publish
+        await get_health_monitor().start()
+        await get_reference_data_service().start()
+        try:
+            await get_compute_executor().warm_up()
+        except Exception as e:
+            logger.warning(f"Compute executor warm-up failed: {e}")
+        if PREWARM_ON_STARTUP:
+            await asyncio.to_thread(prewarm)
+
+        logger.info(f"Worker {self.worker_id} started ({type(self.queue).__name__}, concurrency {self.concurrency})")
+        reaper = asyncio.create_task(self._requeue_expired_loop())
+        slots = asyncio.Semaphore(self.concurrency)
+        try:
+            while not self._stopping.is_set():
+                await slots.acquire()
+                job = None
+                try:
+                    if not self._stopping.is_set():
+                        job = await self.queue.claim(self.worker_id)
+                except Exception as e:
+                    logger.error(f"Job queue unavailable: {e}")
+                if job is None:
+                    slots.release()
+                    await self._sleep(JOB_QUEUE_POLL_INTERVAL)
+                    continue
+
+                task = asyncio.create_task(self._process(job))
+                self._running[job.job_id] = (job, task)
+                task.add_done_callback(lambda _, job_id=job.job_id: self._finished(job_id, slots))
+        finally:
+            reaper.cancel()
+            await self._drain()
+            await get_health_monitor().stop()
+            await get_reference_data_service().stop()
+            get_compute_executor().shutdown()
+            self.orchestrator.reports.shutdown()
+            await self.queue.close()
+            logger.info(f"Worker {self.worker_id} stopped")
+
+    def _finished(self, job_id: str, slots: asyncio.Semaphore):
+        self._running.pop(job_id, None)
+        slots.release()
+
+    async def _process(self, job: QueuedJob):
+        """Run one claimed job while keeping its lease alive"""
+        state = self.job_manager.get_job(job.job_id)
+        if state is None:
+            logger.error(f"Queued job {job.job_id} has no saved state - dropping it")
+            await self.queue.fail(job, "job state not found", retry=False)
+            return
+        if job.attempts > 1:
+            logger.warning(f"Retrying job {job.job_id} (attempt {job.attempts}/{self.queue.max_attempts})")
+
+        logger.info(f"Worker {self.worker_id} running job {job.job_id}")
+        self.job_manager.active_jobs[job.job_id] = state
+        with attach_context(job.payload.get('trace_context')):
+            if job.payload.get('resume'):
+                run = asyncio.create_task(self.orchestrator.resume_analysis(job.job_id, job.payload.get('agents', [])))
+            else:
+                run = asyncio.create_task(self.orchestrator.run_analysis(job.job_id))
+        heartbeat = asyncio.create_task(self._heartbeat(job, run))
+        try:
+            await run
+            await self.queue.complete(job)
+        except asyncio.CancelledError:
+            if job.job_id in self._lost_leases:
+                logger.warning(f"Abandoned job {job.job_id}: its lease expired and it was re-queued")
+            else:
+                await self.queue.release(job)
+                logger.info(f"Returned job {job.job_id} to the queue")
+        except Exception as e:
+            logger.error(f"Job {job.job_id} crashed: {e}")
+            outcome = await self.queue.fail(job, str(e), retry=True)
+            if outcome == 'dead':
+                self._mark_failed(job.job_id, f"Analysis crashed after {job.attempts} attempt(s): {e}")
+        finally:
+            heartbeat.cancel()
+            self._lost_leases.discard(job.job_id)
+            self.job_manager.forget_job(job.job_id)
+
+    async def _heartbeat(self, job: QueuedJob, run: asyncio.Task):
+        """Extend the lease until the job ends; cancel the run if the lease was lost"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if not await self.queue.heartbeat(job):
+                    logger.error(f"Lost lease on job {job.job_id} - stopping this run")
+                    self._lost_leases.add(job.job_id)
+                    run.cancel()
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job.job_id} failed: {e}")
+
+    async def _requeue_expired_loop(self):
+        """Return jobs of crashed workers to the queue (every worker does this; it is idempotent)"""
+        while True:
+            try:
+                requeued, dead = await self.queue.requeue_expired()
+                for job_id in requeued:
+                    logger.warning(f"Job {job_id} lease expired - re-queued")
+                for job_id in dead:
+                    logger.error(f"Job {job_id} lease expired on its last attempt - giving up")
+                    self._mark_failed(job_id, "Analysis worker stopped responding")
+            except Exception as e:
+                logger.warning(f"Lease check failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def _mark_failed(self, job_id: str, error: str):
+        """Record a job the queue gave up on as failed in its saved state"""
+        state = self.job_manager.get_job(job_id)
+        if not state:
+            return
+        state['metadata']['status'] = 'failed'
+        state['errors'] = state.get('errors', []) + [error]
+        state['workflow_completed'] = datetime.utcnow().isoformat()
+        self.job_manager._save_job(job_id, state)
+
+    async def _drain(self):
+        """Wait for running jobs, then hand back whatever is left"""
+        tasks: List[asyncio.Task] = [task for _, task in self._running.values()]
+        if not tasks:
+            return
+        logger.info(f"Waiting up to {JOB_WORKER_SHUTDOWN_GRACE:g}s for {len(tasks)} running job(s)")
+        _, pending = await asyncio.wait(tasks, timeout=JOB_WORKER_SHUTDOWN_GRACE)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_worker(concurrency: int = JOB_WORKER_CONCURRENCY):
+    """Run a worker until SIGTERM/SIGINT"""
+    worker = JobWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    await worker.run()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued M&A analysis jobs")
+    parser.add_argument('--concurrency', type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs run at once by this worker")
+    parser.add_argument('--metrics-port', type=int, default=JOB_WORKER_METRICS_PORT, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+
+    if JOB_QUEUE_BACKEND == 'inline':
+        parser.error("JOB_QUEUE_BACKEND is 'inline' - set it to redis or sqlite to run workers")
+    setup_tracing()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    try:
+        asyncio.run(run_worker(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_tracing()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+# Benchmark module - offline record/replay performance harness
+
+from .cassette import Cassette, CassetteMiss, LatencyProfile, use_cassette
+from .metrics import AgentMetrics, MetricsCollector, compare_to_baseline
+from .runner import BenchmarkDeal, load_deals, run_deal, run_suite
+
+__all__ = [
+    'Cassette', 'CassetteMiss', 'LatencyProfile', 'use_cassette',
+    'AgentMetrics', 'MetricsCollector', 'compare_to_baseline',
+    'BenchmarkDeal', 'load_deals', 'run_deal', 'run_suite'
+]
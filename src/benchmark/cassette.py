@@ -0,0 +1,610 @@
+"""
+Cassette - Record and replay external responses for offline benchmarks
+
+In record mode every FMP / SEC EDGAR / Tavily HTTP response and every LLM
+completion made by the pipeline is captured into a gzip'd JSON cassette. In
+replay mode the same calls are answered from the cassette (with optional
+injected latency) and any real network connection is refused, so a
+benchmark run is deterministic and works on a laptop with no network.
+
+Interception points:
+- requests.Session.request and aiohttp.ClientSession._request (all HTTP APIs)
+- BaseChatModel.ainvoke / invoke (every LangChain model from llm_factory)
+- LLMGateway.complete (direct Anthropic calls)
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import inspect
+import json
+import os
+import re
+import socket
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from loguru import logger
+
+try:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    HAS_LANGCHAIN = True
+except ImportError:
+    HAS_LANGCHAIN = False
+
+
+# Hosts mapped to the service names used in metrics
+SERVICE_HOSTS = {
+    'financialmodelingprep.com': 'fmp',
+    'sec.gov': 'sec',
+    'tavily.com': 'tavily',
+}
+
+# Query / body keys that carry credentials and must never reach a cassette
+SECRET_KEYS = {'apikey', 'api_key', 'apiKey', 'token', 'key', 'access_token'}
+
+_DATE_VALUE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_INHERITED = object()
+
+
+class CassetteMiss(ConnectionError):
+    """A replayed call has no recorded response"""
+
+
+@dataclass
+class Interaction:
+    """One recorded external call"""
+    service: str  # fmp, sec, tavily, http, llm
+    key: str  # Exact match key
+    fallback_key: str  # Looser key used when the exact key is not found
+    request: Dict[str, Any]
+    response: Dict[str, Any]
+    latency: float = 0.0
+    tokens: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Latency injected into replayed calls
+
+    delay = fixed_ms[service] (or fixed_ms['default']) + scale * recorded latency
+    """
+    fixed_ms: Dict[str, float] = field(default_factory=dict)
+    scale: float = 0.0
+
+    def delay(self, interaction: Interaction) -> float:
+        fixed = self.fixed_ms.get(interaction.service, self.fixed_ms.get('default', 0.0))
+        return fixed / 1000.0 + self.scale * interaction.latency
+
+    @classmethod
+    def parse(cls, spec: Optional[str], scale: float = 0.0) -> 'LatencyProfile':
+        """Parse 'fmp=50,sec=120,llm=800' (milliseconds per service)"""
+        fixed = {}
+        for part in (spec or '').split(','):
+            if '=' in part:
+                service, ms = part.split('=', 1)
+                fixed[service.strip()] = float(ms)
+        return cls(fixed_ms=fixed, scale=scale)
+
+
+class Cassette:
+    """
+    Recorded interactions for one benchmark deal
+
+    Replay matches on the exact key first (repeated calls consume recordings
+    in order and then reuse the last one), then on the fallback key, which
+    ignores date parameters for HTTP and prompt text for LLMs so date- or
+    job-id-dependent requests still replay in call order.
+    """
+
+    def __init__(self, path: Path, interactions: Optional[List[Interaction]] = None):
+        self.path = Path(path)
+        self.interactions: List[Interaction] = interactions or []
+        self.misses: List[Dict[str, str]] = []
+        self._index()
+
+    @classmethod
+    def load(cls, path: Path) -> 'Cassette':
+        path = Path(path)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        cassette = cls(path, [Interaction(**item) for item in payload['interactions']])
+        logger.info(f"Loaded cassette {path.name}: {len(cassette.interactions)} interactions")
+        return cassette
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'version': 1,
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'interactions': [asdict(i) for i in self.interactions]
+        }
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, separators=(',', ':'))
+        logger.info(f"Saved cassette {self.path.name}: {len(self.interactions)} interactions")
+
+    def _index(self):
+        self._by_key: Dict[Tuple[str, str], Deque[int]] = defaultdict(deque)
+        self._by_fallback: Dict[Tuple[str, str], Deque[int]] = defaultdict(deque)
+        self._last: Dict[Tuple[str, str], int] = {}
+        self._used = set()
+        for i, interaction in enumerate(self.interactions):
+            self._by_key[(interaction.service, interaction.key)].append(i)
+            self._by_fallback[(interaction.service, interaction.fallback_key)].append(i)
+
+    def add(self, interaction: Interaction):
+        self.interactions.append(interaction)
+
+    def match(self, service: str, key: str, fallback_key: str) -> Optional[Interaction]:
+        index = self._take_unused(self._by_key.get((service, key)))
+        if index is None:
+            index = self._take_unused(self._by_fallback.get((service, fallback_key)))
+        if index is None:
+            index = self._last.get((service, key))
+        if index is None:
+            self.misses.append({'service': service, 'key': key})
+            return None
+        self._used.add(index)
+        self._last[(service, key)] = index
+        return self.interactions[index]
+
+    def _take_unused(self, queue: Optional[Deque[int]]) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                return index
+        return None
+
+
+# ============================================================================
+# REQUEST KEYS
+# ============================================================================
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def _service_for(url: str) -> str:
+    host = urlsplit(url).hostname or ''
+    for suffix, service in SERVICE_HOSTS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return service
+    return 'http'
+
+
+def _secret_values() -> List[str]:
+    """API keys from the environment, so echoes of them in response bodies can be redacted"""
+    return [v for k, v in os.environ.items() if k.endswith('_API_KEY') and len(v) >= 8]
+
+
+def _redact(text: str, secrets: List[str]) -> str:
+    for secret in secrets:
+        text = text.replace(secret, 'REDACTED')
+    return text
+
+
+def _strip_secrets(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_secrets(v) for k, v in value.items() if k not in SECRET_KEYS}
+    return value
+
+
+def _http_keys(method: str, url: str, params: Any, body: Any) -> Tuple[str, str, str]:
+    """Return (sanitized url, exact key, fallback key) for an HTTP request"""
+    parts = urlsplit(str(url))
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if isinstance(params, dict):
+        query += [(k, str(v)) for k, v in params.items() if v is not None]
+    elif params:
+        query += [(str(k), str(v)) for k, v in params]
+    query = sorted((k, v) for k, v in query if k not in SECRET_KEYS)
+    clean_url = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+    if isinstance(body, (bytes, bytearray)):
+        body = body.decode('utf-8', errors='replace')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+    body = _strip_secrets(body)
+
+    exact = f"{method.upper()} {clean_url} {_digest(body) if body else ''}".strip()
+    undated = [(k, v) for k, v in query if not _DATE_VALUE.match(v)]
+    fallback = f"{method.upper()} {parts.netloc}{parts.path}?{urlencode(undated)}"
+    return clean_url, exact, fallback
+
+
+def _llm_input_text(value: Any) -> Any:
+    if hasattr(value, 'to_messages'):
+        value = value.to_messages()
+    if isinstance(value, (list, tuple)):
+        return [
+            [getattr(m, 'type', ''), getattr(m, 'content', m)] if not isinstance(m, (list, tuple)) else list(m)
+            for m in value
+        ]
+    return value
+
+
+def _llm_model_name(llm: Any) -> str:
+    return str(getattr(llm, 'model', None) or getattr(llm, 'model_name', None) or type(llm).__name__)
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {'body': body.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'body_b64': base64.b64encode(body).decode('ascii')}
+
+
+def _decode_body(response: Dict[str, Any]) -> bytes:
+    if 'body_b64' in response:
+        return base64.b64decode(response['body_b64'])
+    return response.get('body', '').encode('utf-8')
+
+
+# ============================================================================
+# REPLAYED RESPONSE OBJECTS
+# ============================================================================
+
+class _ReplayedAiohttpResponse:
+    """Minimal aiohttp.ClientResponse stand-in for replayed calls"""
+
+    def __init__(self, method: str, url: str, response: Dict[str, Any]):
+        self.method = method
+        self.url = url
+        self.status = response.get('status', 200)
+        self.reason = response.get('reason', '')
+        self.headers = dict(response.get('headers', {}))
+        self.content_type = self.headers.get('Content-Type', 'application/json').split(';')[0]
+        self._body = _decode_body(response)
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            import aiohttp
+            raise aiohttp.ClientResponseError(
+                request_info=None, history=(), status=self.status, message=self.reason
+            )
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, **kwargs) -> str:
+        return self._body.decode(encoding or 'utf-8', errors='replace')
+
+    async def json(self, *args, loads: Callable = json.loads, **kwargs) -> Any:
+        return loads(self._body.decode('utf-8'))
+
+    def release(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+def _replayed_requests_response(method: str, url: str, response: Dict[str, Any]):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    result = requests.Response()
+    result.status_code = response.get('status', 200)
+    result.reason = response.get('reason', '')
+    result.headers = CaseInsensitiveDict(response.get('headers', {}))
+    result._content = _decode_body(response)
+    result.url = url
+    result.request = requests.Request(method, url).prepare()
+    return result
+
+
+# ============================================================================
+# PATCHING
+# ============================================================================
+
+class CassettePatcher:
+    """
+    Installs the record / replay interceptors
+
+    Args:
+        cassette: Cassette to record into or replay from
+        mode: 'record' or 'replay'
+        latency: Latency injected into replayed calls
+        on_call: Callback(service, interaction) for metrics
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str,
+        latency: Optional[LatencyProfile] = None,
+        on_call: Optional[Callable[[str, Interaction], None]] = None
+    ):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency or LatencyProfile()
+        self.on_call = on_call or (lambda service, interaction: None)
+        self._patches: List[Tuple[Any, str, Any]] = []
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def _patch(self, owner: Any, name: str, replacement: Any):
+        # Inherited attributes (e.g. socket.socket.connect) are restored by deleting the override
+        self._patches.append((owner, name, owner.__dict__.get(name, _INHERITED)))
+        setattr(owner, name, replacement)
+
+    def __enter__(self):
+        self._patch_requests()
+        self._patch_aiohttp()
+        if HAS_LANGCHAIN:
+            self._patch_langchain()
+        self._patch_llm_gateway()
+        if self.replaying:
+            self._block_network()
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._patches):
+            if original is _INHERITED:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patches.clear()
+        if self.mode == 'record':
+            self.cassette.save()
+        return False
+
+    # -- replay helpers -------------------------------------------------------
+
+    def _lookup(self, service: str, key: str, fallback_key: str) -> Interaction:
+        interaction = self.cassette.match(service, key, fallback_key)
+        if interaction is None:
+            raise CassetteMiss(f"No recorded {service} response for {key[:160]}")
+        self.on_call(service, interaction)
+        return interaction
+
+    def _raise_recorded_error(self, interaction: Interaction, kind: str):
+        error = interaction.response.get('error')
+        if not error:
+            return
+        if kind == 'aiohttp':
+            import aiohttp
+            raise aiohttp.ClientConnectionError(error)
+        if kind == 'requests':
+            import requests
+            raise requests.ConnectionError(error)
+        raise RuntimeError(error)
+
+    # -- HTTP -------------------------------------------------------------------
+
+    def _patch_requests(self):
+        import requests
+
+        original = requests.Session.request
+        signature = inspect.signature(original)
+        patcher = self
+
+        def request(session, method, url, *args, **kwargs):
+            bound = signature.bind(session, method, url, *args, **kwargs).arguments
+            body = bound.get('json') if bound.get('json') is not None else bound.get('data')
+            clean_url, key, fallback = _http_keys(method, url, bound.get('params'), body)
+            service = _service_for(clean_url)
+
+            if patcher.replaying:
+                interaction = patcher._lookup(service, key, fallback)
+                time.sleep(patcher.latency.delay(interaction))
+                patcher._raise_recorded_error(interaction, 'requests')
+                return _replayed_requests_response(method, clean_url, interaction.response)
+
+            start = time.perf_counter()
+            try:
+                response = original(session, method, url, *args, **kwargs)
+            except requests.RequestException as e:
+                patcher._record(service, key, fallback, {'method': method, 'url': clean_url},
+                                {'error': f"{type(e).__name__}: {e}"}, time.perf_counter() - start)
+                raise
+            patcher._record(
+                service, key, fallback, {'method': method, 'url': clean_url},
+                {
+                    'status': response.status_code,
+                    'reason': response.reason,
+                    'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                    **_encode_body(response.content)
+                },
+                time.perf_counter() - start
+            )
+            return response
+
+        self._patch(requests.Session, 'request', request)
+
+    def _patch_aiohttp(self):
+        import aiohttp
+
+        original = aiohttp.ClientSession._request
+        signature = inspect.signature(original)
+        patcher = self
+
+        async def _request(session, method, str_or_url, *args, **kwargs):
+            bound = signature.bind(session, method, str_or_url, *args, **kwargs).arguments
+            options = {**bound.get('kwargs', {}), **bound}
+            body = options.get('json') if options.get('json') is not None else options.get('data')
+            clean_url, key, fallback = _http_keys(method, str(str_or_url), options.get('params'), body)
+            service = _service_for(clean_url)
+
+            if patcher.replaying:
+                interaction = patcher._lookup(service, key, fallback)
+                await asyncio.sleep(patcher.latency.delay(interaction))
+                patcher._raise_recorded_error(interaction, 'aiohttp')
+                return _ReplayedAiohttpResponse(method, clean_url, interaction.response)
+
+            start = time.perf_counter()
+            try:
+                response = await original(session, method, str_or_url, *args, **kwargs)
+                content = await response.read()
+            except aiohttp.ClientError as e:
+                patcher._record(service, key, fallback, {'method': method, 'url': clean_url},
+                                {'error': f"{type(e).__name__}: {e}"}, time.perf_counter() - start)
+                raise
+            patcher._record(
+                service, key, fallback, {'method': method, 'url': clean_url},
+                {
+                    'status': response.status,
+                    'reason': response.reason or '',
+                    'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                    **_encode_body(content)
+                },
+                time.perf_counter() - start
+            )
+            return response
+
+        self._patch(aiohttp.ClientSession, '_request', _request)
+
+    # -- LLMs -------------------------------------------------------------------
+
+    def _patch_langchain(self):
+        original_ainvoke = BaseChatModel.ainvoke
+        original_invoke = BaseChatModel.invoke
+        patcher = self
+
+        def keys(llm, value):
+            model = _llm_model_name(llm)
+            return model, f"{model} {_digest(_llm_input_text(value))}"
+
+        def replay(llm, value):
+            model, key = keys(llm, value)
+            interaction = patcher._lookup('llm', key, model)
+            patcher._raise_recorded_error(interaction, 'llm')
+            return interaction, AIMessage(
+                content=interaction.response.get('content', ''),
+                usage_metadata=interaction.response.get('usage_metadata') or None,
+                response_metadata=interaction.response.get('response_metadata', {})
+            )
+
+        def record(llm, value, result, elapsed):
+            model, key = keys(llm, value)
+            usage = dict(getattr(result, 'usage_metadata', None) or {})
+            patcher._record(
+                'llm', key, model, {'model': model},
+                {
+                    'content': getattr(result, 'content', str(result)),
+                    'usage_metadata': usage,
+                    'response_metadata': {
+                        k: v for k, v in (getattr(result, 'response_metadata', None) or {}).items()
+                        if isinstance(v, (str, int, float, bool))
+                    }
+                },
+                elapsed,
+                tokens={
+                    'input_tokens': int(usage.get('input_tokens', 0) or 0),
+                    'output_tokens': int(usage.get('output_tokens', 0) or 0)
+                }
+            )
+
+        async def ainvoke(llm, value, config=None, **kwargs):
+            if patcher.replaying:
+                interaction, message = replay(llm, value)
+                await asyncio.sleep(patcher.latency.delay(interaction))
+                return message
+            start = time.perf_counter()
+            result = await original_ainvoke(llm, value, config, **kwargs)
+            record(llm, value, result, time.perf_counter() - start)
+            return result
+
+        def invoke(llm, value, config=None, **kwargs):
+            if patcher.replaying:
+                interaction, message = replay(llm, value)
+                time.sleep(patcher.latency.delay(interaction))
+                return message
+            start = time.perf_counter()
+            result = original_invoke(llm, value, config, **kwargs)
+            record(llm, value, result, time.perf_counter() - start)
+            return result
+
+        self._patch(BaseChatModel, 'ainvoke', ainvoke)
+        self._patch(BaseChatModel, 'invoke', invoke)
+
+    def _patch_llm_gateway(self):
+        from ..utils.llm_gateway import LLMGateway, LLM_GATEWAY_MODEL
+
+        original = LLMGateway.complete
+        patcher = self
+
+        async def complete(gateway, prompt, model=LLM_GATEWAY_MODEL, *args, **kwargs):
+            key = f"{model} {_digest(prompt)}"
+            if patcher.replaying:
+                interaction = patcher._lookup('llm', key, model)
+                await asyncio.sleep(patcher.latency.delay(interaction))
+                patcher._raise_recorded_error(interaction, 'llm')
+                return interaction.response.get('content', '')
+            start = time.perf_counter()
+            try:
+                text = await original(gateway, prompt, model, *args, **kwargs)
+            except RuntimeError as e:
+                patcher._record('llm', key, model, {'model': model}, {'error': str(e)}, time.perf_counter() - start)
+                raise
+            patcher._record('llm', key, model, {'model': model}, {'content': text}, time.perf_counter() - start)
+            return text
+
+        self._patch(LLMGateway, 'complete', complete)
+
+    # -- recording / network guard ---------------------------------------------
+
+    def _record(
+        self,
+        service: str,
+        key: str,
+        fallback_key: str,
+        request: Dict[str, Any],
+        response: Dict[str, Any],
+        latency: float,
+        tokens: Optional[Dict[str, int]] = None
+    ):
+        secrets = _secret_values()
+        for field_name in ('body', 'content', 'error'):
+            if isinstance(response.get(field_name), str):
+                response[field_name] = _redact(response[field_name], secrets)
+        interaction = Interaction(service, key, fallback_key, request, response, latency, tokens or {})
+        self.cassette.add(interaction)
+        self.on_call(service, interaction)
+
+    def _block_network(self):
+        original_connect = socket.socket.connect
+
+        def connect(sock, address):
+            host = address[0] if isinstance(address, tuple) else address
+            if sock.family == socket.AF_UNIX or host in ('127.0.0.1', '::1', 'localhost'):
+                return original_connect(sock, address)
+            raise CassetteMiss(f"Network access blocked during replay: {address}")
+
+        self._patch(socket.socket, 'connect', connect)
+
+
+@contextmanager
+def use_cassette(
+    path: Path,
+    mode: str,
+    latency: Optional[LatencyProfile] = None,
+    on_call: Optional[Callable[[str, Interaction], None]] = None
+):
+    """Record into, or replay from, the cassette at `path`"""
+    cassette = Cassette.load(path) if mode == 'replay' else Cassette(path)
+    with CassettePatcher(cassette, mode, latency, on_call):
+        yield cassette
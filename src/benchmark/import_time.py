@@ -0,0 +1,121 @@
+"""
+Import-Time Budget - How long importing the API server takes and what it loads
+
+Usage:
+    python check_import_time.py                          # src.api.server against the default budget
+    python check_import_time.py --module src.api.worker --budget-ms 2000
+    python check_import_time.py --top 30 --allow pandas
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports the slowest imports, leaving out what the bare interpreter imports
+anyway. The check fails (exit 1) when the total is over budget or a library
+in HEAVY_MODULES was loaded at import time; those belong behind the agent
+registry or a function-level import. Exit 2 means the module did not import.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+
+DEFAULT_MODULE = "src.api.server"
+DEFAULT_BUDGET_MS = 1500
+
+# Libraries that must not be loaded before the first job or copilot request
+HEAVY_MODULES = (
+    'langchain', 'langchain_core', 'langchain_anthropic', 'langchain_google_genai', 'langchain_openai',
+    'anthropic', 'openai', 'google.generativeai', 'google.genai', 'chromadb', 'financetoolkit',
+    'pandas', 'scipy', 'sklearn', 'statsmodels', 'pyarrow', 'matplotlib', 'plotly',
+    'reportlab', 'docx', 'pptx', 'openpyxl', 'xlsxwriter', 'sentence_transformers', 'torch'
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    """One module from -X importtime (times in microseconds)"""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure(module: Optional[str]) -> List[ImportRecord]:
+    """
+    Import records of a fresh interpreter importing `module` (None = bare interpreter)
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True
+    )
+    records = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            records.append(ImportRecord(
+                name=match.group(4),
+                self_us=int(match.group(1)),
+                cumulative_us=int(match.group(2)),
+                depth=len(match.group(3)) // 2
+            ))
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors[-15:]))
+    return records
+
+
+def heavy_modules(names: Set[str], allow: Set[str]) -> List[str]:
+    """HEAVY_MODULES (top-level packages) among the imported names"""
+    return sorted(
+        heavy for heavy in HEAVY_MODULES
+        if heavy not in allow and any(name == heavy or name.startswith(heavy + '.') for name in names)
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check for the API server")
+    parser.add_argument('--module', default=DEFAULT_MODULE, help=f"Module to import (default {DEFAULT_MODULE})")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help="Maximum total import time")
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to list")
+    parser.add_argument('--allow', action='append', default=[], help="Heavy module allowed at import time (repeatable)")
+    args = parser.parse_args(argv)
+
+    try:
+        baseline: Set[str] = {record.name for record in measure(None)}
+        records = measure(args.module)
+    except RuntimeError as e:
+        print(f"Importing {args.module} failed:\n{e}")
+        return 2
+
+    # Top-level imports the bare interpreter doesn't already do
+    imported = [record for record in records if record.name not in baseline]
+    total_ms = sum(record.cumulative_us for record in imported if record.depth == 0) / 1000
+
+    print(f"{args.module}: {total_ms:.0f} ms import time ({len(imported)} modules), budget {args.budget_ms:.0f} ms")
+    print(f"\nSlowest {args.top} packages (self time):")
+    packages: Dict[str, int] = {}
+    for record in imported:
+        top_level = record.name.split('.')[0]
+        packages[top_level] = packages.get(top_level, 0) + record.self_us
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    heavy = heavy_modules({record.name for record in imported}, set(args.allow))
+    failed = False
+    if heavy:
+        failed = True
+        print(f"\nFAIL: heavy libraries loaded at import time: {', '.join(heavy)}")
+        print("      Import them where they are used, or create agents through src.agents.registry.")
+    if total_ms > args.budget_ms:
+        failed = True
+        print(f"\nFAIL: {total_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
@@ -0,0 +1,194 @@
+"""
+Benchmark Metrics - Per-agent wall time, CPU, memory, requests and tokens
+
+Wraps BaseAgent.execute so every agent run is measured, and attributes each
+external call seen by the cassette to the agent that made it (via a
+context variable, which follows the agent into tasks and worker threads).
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .cassette import Interaction
+
+
+# Calls made outside any agent (symbol validation, health checks, reports)
+PIPELINE_SCOPE = '_pipeline'
+
+_current_agent: ContextVar[str] = ContextVar('benchmark_agent', default=PIPELINE_SCOPE)
+
+# Regression thresholds: a timing metric regresses when it exceeds the baseline by
+# more than the relative tolerance AND the absolute floor (to ignore noise on tiny values)
+TIMING_METRICS = {
+    'wall_seconds': (0.20, 0.05),
+    'cpu_seconds': (0.20, 0.05),
+    'worker_cpu_seconds': (0.20, 0.05),
+    'peak_memory_mb': (0.25, 5.0),
+}
+# Deterministic under replay: any increase is a regression
+COUNT_METRICS = ('llm_calls', 'input_tokens', 'output_tokens', 'request_total')
+
+
+@dataclass
+class AgentMetrics:
+    """Measurements for one agent run"""
+    agent: str
+    status: str = 'completed'
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    worker_cpu_seconds: float = 0.0
+    peak_memory_mb: float = 0.0
+    requests: Dict[str, int] = field(default_factory=dict)
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def request_total(self) -> int:
+        return sum(self.requests.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'request_total': self.request_total}
+
+
+class MetricsCollector:
+    """Collects AgentMetrics for one pipeline run"""
+
+    def __init__(self, track_memory: bool = True):
+        self.track_memory = track_memory
+        self.agents: Dict[str, AgentMetrics] = {PIPELINE_SCOPE: AgentMetrics(PIPELINE_SCOPE)}
+        self._original_execute = None
+
+    def on_call(self, service: str, interaction: Interaction):
+        """Cassette callback: attribute an external call to the running agent"""
+        metrics = self.agents.setdefault(_current_agent.get(), AgentMetrics(_current_agent.get()))
+        metrics.requests[service] = metrics.requests.get(service, 0) + 1
+        if service == 'llm':
+            metrics.llm_calls += 1
+            metrics.input_tokens += interaction.tokens.get('input_tokens', 0)
+            metrics.output_tokens += interaction.tokens.get('output_tokens', 0)
+
+    @contextmanager
+    def measure(self, agent: str):
+        """Measure one agent run"""
+        from ..utils.compute_executor import get_compute_executor
+
+        metrics = self.agents.setdefault(agent, AgentMetrics(agent))
+        token = _current_agent.set(agent)
+        executor = get_compute_executor()
+        worker_cpu_start = executor.stats['cpu_seconds']
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield metrics
+        finally:
+            metrics.wall_seconds += time.perf_counter() - wall_start
+            metrics.cpu_seconds += time.process_time() - cpu_start
+            metrics.worker_cpu_seconds += executor.stats['cpu_seconds'] - worker_cpu_start
+            if self.track_memory:
+                peak = (tracemalloc.get_traced_memory()[1] - memory_start) / 1e6
+                metrics.peak_memory_mb = max(metrics.peak_memory_mb, peak)
+            _current_agent.reset(token)
+
+    def __enter__(self):
+        from ..agents.base_agent import BaseAgent
+        from ..core.state import AgentStatus
+
+        collector = self
+        self._original_execute = original = BaseAgent.execute
+
+        async def execute(agent, state):
+            with collector.measure(agent.agent_name) as metrics:
+                state = await original(agent, state)
+            status = state.get('agent_statuses', {}).get(agent.agent_name, AgentStatus.COMPLETED)
+            metrics.status = AgentStatus(status).value
+            return state
+
+        BaseAgent.execute = execute
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        from ..agents.base_agent import BaseAgent
+
+        BaseAgent.execute = self._original_execute
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return False
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-agent metrics plus pipeline totals"""
+        agents = {name: m.to_dict() for name, m in self.agents.items()}
+        totals = AgentMetrics('total')
+        for m in self.agents.values():
+            totals.wall_seconds += m.wall_seconds if m.agent != PIPELINE_SCOPE else 0.0
+            totals.cpu_seconds += m.cpu_seconds
+            totals.worker_cpu_seconds += m.worker_cpu_seconds
+            totals.peak_memory_mb = max(totals.peak_memory_mb, m.peak_memory_mb)
+            totals.llm_calls += m.llm_calls
+            totals.input_tokens += m.input_tokens
+            totals.output_tokens += m.output_tokens
+            for service, count in m.requests.items():
+                totals.requests[service] = totals.requests.get(service, 0) + count
+        return {'agents': agents, 'totals': totals.to_dict()}
+
+
+def compare_to_baseline(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    timing_tolerance: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Compare a benchmark result against a stored baseline
+
+    Args:
+        current: Result of run_suite()
+        baseline: A previous result of run_suite()
+        timing_tolerance: Override the relative tolerance of every timing metric
+
+    Returns:
+        List of regressions (empty when the run is within tolerance)
+    """
+    regressions = []
+    for deal, deal_result in current.get('deals', {}).items():
+        baseline_deal = baseline.get('deals', {}).get(deal)
+        if not baseline_deal:
+            continue
+        reference_agents = {**baseline_deal.get('agents', {}), 'total': baseline_deal.get('totals', {})}
+        for agent, metrics in {**deal_result.get('agents', {}), 'total': deal_result.get('totals', {})}.items():
+            reference = reference_agents.get(agent)
+            if not reference:
+                continue
+            for metric, (tolerance, floor) in TIMING_METRICS.items():
+                tolerance = timing_tolerance if timing_tolerance is not None else tolerance
+                value, previous = metrics.get(metric, 0.0), reference.get(metric, 0.0)
+                if value > previous * (1 + tolerance) and value - previous > floor:
+                    regressions.append(_regression(deal, agent, metric, value, previous))
+            for metric in COUNT_METRICS:
+                value, previous = metrics.get(metric, 0), reference.get(metric, 0)
+                if value > previous:
+                    regressions.append(_regression(deal, agent, metric, value, previous))
+            if reference.get('status') == 'completed' and metrics.get('status') != 'completed':
+                regressions.append(_regression(deal, agent, 'status', metrics.get('status'), 'completed'))
+    return regressions
+
+
+def _regression(deal: str, agent: str, metric: str, value: Any, baseline: Any) -> Dict[str, Any]:
+    change = None
+    if isinstance(value, (int, float)) and isinstance(baseline, (int, float)) and baseline:
+        change = round((value - baseline) / baseline * 100, 1)
+    return {
+        'deal': deal,
+        'agent': agent,
+        'metric': metric,
+        'value': value,
+        'baseline': baseline,
+        'change_percent': change
+    }
@@ -0,0 +1,257 @@
+"""
+Benchmark Runner - Record and replay reference deals through the full pipeline
+
+Usage:
+    # Once, with network and API keys: capture every external response
+    python run_benchmark.py record --deal nvda_pltr
+
+    # Anywhere, offline: replay and measure, failing on regressions
+    python run_benchmark.py replay --latency fmp=40,sec=120,llm=600 --baseline benchmarks/baseline.json
+
+    # Accept the current numbers as the new baseline
+    python run_benchmark.py replay --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+from loguru import logger
+
+from .cassette import LatencyProfile, use_cassette
+from .metrics import MetricsCollector, compare_to_baseline
+
+
+BENCHMARK_DIR = Path(__file__).parent.parent.parent / "benchmarks"
+DEALS_FILE = BENCHMARK_DIR / "deals.yaml"
+CASSETTE_DIR = BENCHMARK_DIR / "cassettes"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+BASELINE_FILE = BENCHMARK_DIR / "baseline.json"
+
+# Keys the clients require at construction time; replay never sends them anywhere
+REPLAY_PLACEHOLDER_KEYS = (
+    'ANTHROPIC_API_KEY', 'GOOGLE_API_KEY', 'OPENAI_API_KEY', 'XAI_API_KEY', 'FMP_API_KEY', 'TAVILY_API_KEY'
+)
+
+
+@dataclass
+class BenchmarkDeal:
+    """A reference deal run end to end by the benchmark"""
+    name: str
+    target_ticker: str
+    acquirer_ticker: Optional[str] = None
+    deal_type: str = "acquisition"
+    deal_value: Optional[float] = None
+    investment_thesis: Optional[str] = None
+    strategic_rationale: Optional[str] = None
+
+    @property
+    def cassette_path(self) -> Path:
+        return CASSETTE_DIR / f"{self.name}.json.gz"
+
+
+def load_deals(path: Path = DEALS_FILE) -> List[BenchmarkDeal]:
+    """Load the reference deals from benchmarks/deals.yaml"""
+    with open(path, 'r') as f:
+        return [BenchmarkDeal(**deal) for deal in yaml.safe_load(f)['deals']]
+
+
+class _HealthyMonitor:
+    """Replay stand-in for the API health monitor (there is no network to probe)"""
+
+    async def get_status(self):
+        return True, {'overall_status': 'replay'}
+
+
+async def run_deal(
+    deal: BenchmarkDeal,
+    mode: str,
+    latency: Optional[LatencyProfile] = None,
+    track_memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Run one deal through AnalysisOrchestrator under a cassette
+
+    Args:
+        deal: Reference deal
+        mode: 'record' or 'replay'
+        latency: Latency injected into replayed calls
+        track_memory: Measure per-agent peak memory (tracemalloc adds overhead)
+
+    Returns:
+        Per-agent metrics, totals and cassette statistics
+    """
+    if mode == 'replay':
+        if not deal.cassette_path.exists():
+            raise FileNotFoundError(
+                f"No cassette for {deal.name} - run `python run_benchmark.py record --deal {deal.name}` first"
+            )
+        for key in REPLAY_PLACEHOLDER_KEYS:
+            os.environ.setdefault(key, 'replay')
+
+    from ..api import job_manager as job_manager_module
+    from ..api import orchestrator as orchestrator_module
+    from ..api import report_pipeline as report_pipeline_module
+    from ..api import result_store as result_store_module
+    from ..utils import fundamentals_store as fundamentals_store_module
+    from ..utils import price_store as price_store_module
+    from ..utils import reference_data as reference_data_module
+
+    collector = MetricsCollector(track_memory=track_memory)
+    with tempfile.TemporaryDirectory(prefix='benchmark_jobs_') as jobs_dir, \
+            use_cassette(deal.cassette_path, mode, latency, collector.on_call) as cassette, \
+            collector:
+        # Isolated job store, and no live health probes under replay
+        job_manager_module._job_manager = job_manager_module.JobManager(jobs_dir=jobs_dir)
+        # Empty result store, so every agent actually runs instead of loading a previous run's output
+        result_store_module._result_store = result_store_module.ResultStore(root=os.path.join(jobs_dir, 'results'))
+        original_health_monitor = orchestrator_module.get_health_monitor
+        if mode == 'replay':
+            orchestrator_module.get_health_monitor = lambda: _HealthyMonitor()
+        # Market reference data fetched under the cassette, not read from data/reference
+        reference_data = reference_data_module.ReferenceDataService(root=os.path.join(jobs_dir, 'reference'))
+        reference_data_module._reference_data_service = reference_data
+        # Statements and prices fetched under the cassette, not read from data/fundamentals and data/prices
+        fundamentals_store_module._fundamentals_store = fundamentals_store_module.FundamentalsStore(
+            root=os.path.join(jobs_dir, 'fundamentals')
+        )
+        price_store_module._price_store = price_store_module.PriceStore(root=os.path.join(jobs_dir, 'prices'))
+        # Reports on threads: spawned report workers would fetch market data outside the cassette
+        report_pipeline = report_pipeline_module.ReportPipeline(
+            max_workers=0, snapshot_dir=os.path.join(jobs_dir, 'report_snapshots')
+        )
+        report_pipeline_module._report_pipeline = report_pipeline
+        try:
+            await reference_data.refresh(force=True)
+            orchestrator = orchestrator_module.AnalysisOrchestrator()
+            job = orchestrator.job_manager.create_job(
+                project_name=f"benchmark-{deal.name}",
+                target_ticker=deal.target_ticker,
+                deal_type=deal.deal_type,
+                acquirer_ticker=deal.acquirer_ticker,
+                deal_value=deal.deal_value,
+                investment_thesis=deal.investment_thesis,
+                strategic_rationale=deal.strategic_rationale
+            )
+            start = time.perf_counter()
+            await orchestrator.run_analysis(job['job_id'])
+            pipeline_wall = time.perf_counter() - start
+            state = orchestrator.job_manager.get_job(job['job_id']) or {}
+        finally:
+            orchestrator_module.get_health_monitor = original_health_monitor
+            job_manager_module._job_manager = None
+            result_store_module._result_store = None
+            reference_data_module._reference_data_service = None
+            fundamentals_store_module._fundamentals_store = None
+            price_store_module._price_store = None
+            report_pipeline_module._report_pipeline = None
+            report_pipeline.shutdown()
+
+    result = collector.summary()
+    result['pipeline_wall_seconds'] = pipeline_wall
+    result['pipeline_status'] = state.get('metadata', {}).get('status')
+    result['cassette'] = {
+        'interactions': len(cassette.interactions),
+        'misses': len(cassette.misses),
+        'missed': cassette.misses[:20]
+    }
+    return result
+
+
+async def run_suite(
+    deals: List[BenchmarkDeal],
+    mode: str,
+    latency: Optional[LatencyProfile] = None,
+    track_memory: bool = True
+) -> Dict[str, Any]:
+    """Run several deals sequentially and collect their results"""
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'mode': mode,
+        'latency': asdict(latency or LatencyProfile()),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'deals': {}
+    }
+    for deal in deals:
+        logger.info(f"Benchmark [{mode}] {deal.name}: {deal.acquirer_ticker or '-'} → {deal.target_ticker}")
+        results['deals'][deal.name] = await run_deal(deal, mode, latency, track_memory)
+    return results
+
+
+def _print_summary(results: Dict[str, Any], regressions: List[Dict[str, Any]]):
+    for name, deal in results['deals'].items():
+        totals = deal['totals']
+        print(f"\n{name}: pipeline {deal['pipeline_wall_seconds']:.1f}s "
+              f"({deal['pipeline_status']}), cassette misses {deal['cassette']['misses']}")
+        print(f"  {'agent':<28}{'wall s':>9}{'cpu s':>9}{'worker s':>10}{'peak MB':>9}{'reqs':>7}{'llm':>5}{'tokens':>10}")
+        for agent, m in sorted(deal['agents'].items(), key=lambda item: -item[1]['wall_seconds']):
+            print(f"  {agent:<28}{m['wall_seconds']:>9.2f}{m['cpu_seconds']:>9.2f}{m['worker_cpu_seconds']:>10.2f}"
+                  f"{m['peak_memory_mb']:>9.1f}{m['request_total']:>7}{m['llm_calls']:>5}"
+                  f"{m['input_tokens'] + m['output_tokens']:>10}")
+        print(f"  {'TOTAL':<28}{totals['wall_seconds']:>9.2f}{totals['cpu_seconds']:>9.2f}"
+              f"{totals['worker_cpu_seconds']:>10.2f}{totals['peak_memory_mb']:>9.1f}{totals['request_total']:>7}"
+              f"{totals['llm_calls']:>5}{totals['input_tokens'] + totals['output_tokens']:>10}")
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against baseline:")
+        for r in regressions:
+            change = f" ({r['change_percent']:+.1f}%)" if r['change_percent'] is not None else ""
+            print(f"  {r['deal']} / {r['agent']} / {r['metric']}: {r['value']} vs {r['baseline']}{change}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Record/replay benchmark for the agent pipeline")
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--deal', action='append', help="Deal name from benchmarks/deals.yaml (repeatable; default all)")
+    parser.add_argument('--latency', help="Injected replay latency in ms per service, e.g. fmp=40,sec=120,llm=600,default=0")
+    parser.add_argument('--latency-scale', type=float, default=0.0, help="Add this multiple of the recorded latency")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc peak-memory tracking")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE, help="Baseline to compare against")
+    parser.add_argument('--update-baseline', action='store_true', help="Write this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, help="Relative tolerance for timing metrics (default per metric)")
+    parser.add_argument('--output', type=Path, help="Result JSON path (default benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    deals = load_deals()
+    if args.deal:
+        unknown = set(args.deal) - {d.name for d in deals}
+        if unknown:
+            parser.error(f"Unknown deal(s): {', '.join(sorted(unknown))}")
+        deals = [d for d in deals if d.name in args.deal]
+
+    latency = LatencyProfile.parse(args.latency, args.latency_scale)
+    results = asyncio.run(run_suite(deals, args.mode, latency, track_memory=not args.no_memory))
+
+    output = args.output or RESULTS_DIR / f"benchmark_{args.mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, default=str))
+    print(f"Results written to {output}")
+
+    regressions = []
+    if args.mode == 'replay' and args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, default=str))
+        print(f"Baseline updated: {args.baseline}")
+    elif args.mode == 'replay' and args.baseline.exists():
+        regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.tolerance)
+
+    _print_summary(results, regressions)
+    misses = sum(d['cassette']['misses'] for d in results['deals'].values())
+    if args.mode == 'replay' and misses:
+        print(f"\n❌ {misses} call(s) had no recorded response - re-record the affected cassettes")
+    return 1 if regressions or (args.mode == 'replay' and misses) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,80 @@
 """
 LLM Factory for creating and managing AI model instances
 """
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.language_models import BaseChatModel
+from langchain_core.outputs import LLMResult
 from openai import AsyncOpenAI
 from loguru import logger
 
 from .config import get_config, AIModelConfig
+from ..utils.metrics import observe_llm_request
+from ..utils.tracing import mark_span_error, open_span, set_span_attributes
+
+
+class LLMTelemetryCallback(BaseCallbackHandler):
+    """Traces (llm.chat span) and meters (latency, tokens) every chat model call"""
+    
+    # Run in the caller's context so the span parents to the agent that made the call
+    run_inline = True
+    
+    def __init__(self):
+        self._calls: Dict[UUID, Tuple[Any, float, str, str]] = {}
+    
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs):
+        metadata = kwargs.get('metadata') or {}
+        params = kwargs.get('invocation_params') or {}
+        provider = metadata.get('ls_provider') or 'unknown'
+        model = metadata.get('ls_model_name') or params.get('model') or params.get('model_name') or 'unknown'
+        span = open_span("llm.chat", {
+            'gen_ai.system': provider,
+            'gen_ai.request.model': model,
+            'gen_ai.request.temperature': metadata.get('ls_temperature'),
+            'gen_ai.request.max_tokens': metadata.get('ls_max_tokens'),
+            'llm.message_count': sum(len(batch) for batch in messages)
+        }, kind='client')
+        self._calls[run_id] = (span, time.perf_counter(), provider, model)
+    
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        span, start, provider, model = call
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or usage
+        if not usage:
+            token_usage = (response.llm_output or {}).get('usage') or (response.llm_output or {}).get('token_usage') or {}
+            usage = {
+                'input_tokens': token_usage.get('input_tokens', token_usage.get('prompt_tokens')),
+                'output_tokens': token_usage.get('output_tokens', token_usage.get('completion_tokens'))
+            }
+        set_span_attributes(span, {
+            'gen_ai.usage.input_tokens': usage.get('input_tokens'),
+            'gen_ai.usage.output_tokens': usage.get('output_tokens')
+        })
+        span.end()
+        observe_llm_request(
+            provider, model, time.perf_counter() - start,
+            input_tokens=usage.get('input_tokens'), output_tokens=usage.get('output_tokens')
+        )
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        span, start, provider, model = call
+        span.record_exception(error)
+        mark_span_error(span, type(error).__name__)
+        span.end()
+        outcome = 'rate_limited' if '429' in str(error) or 'RateLimit' in type(error).__name__ else 'error'
+        observe_llm_request(provider, model, time.perf_counter() - start, outcome=outcome)
 
 
 class LLMFactory:
@@ -18,6 +84,7 @@ class LLMFactory:
         """Initialize LLM factory"""
         self.config = get_config()
         self._llm_cache = {}
+        self._telemetry_callback = LLMTelemetryCallback()
     
     def get_llm(self, model_name: str) -> BaseChatModel:
         """
@@ -69,7 +136,8 @@ class LLMFactory:
             temperature=config.temperature,
             max_tokens=config.max_tokens,
             timeout=120.0,
-            max_retries=3
+            max_retries=3,
+            callbacks=[self._telemetry_callback]
         )
     
     def _create_gemini(self, config: AIModelConfig) -> ChatGoogleGenerativeAI:
@@ -84,7 +152,8 @@ class LLMFactory:
             temperature=config.temperature,
             max_output_tokens=config.max_tokens,
             timeout=120.0,
-            max_retries=3
+            max_retries=3,
+            callbacks=[self._telemetry_callback]
         )
     
     def _create_grok(self, config: AIModelConfig) -> BaseChatModel:
@@ -106,7 +175,8 @@ class LLMFactory:
             temperature=config.temperature,
             max_tokens=config.max_tokens,
             timeout=120.0,
-            max_retries=3
+            max_retries=3,
+            callbacks=[self._telemetry_callback]
         )
     
     async def get_async_openai_client(self) -> AsyncOpenAI:
@@ -3,12 +3,97 @@ Financial Modeling Prep (FMP) API Client with async support
 Handles parallel data fetching for financial analysis
 """
 import asyncio
-from typing import Dict, List, Any, Optional
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 import aiohttp
 from loguru import logger
 
 from ..core.config import get_config
+from ..utils.api_health_check import record_api_success, record_api_failure
+from ..utils.fundamentals_store import get_fundamentals_store
+from ..utils.metrics import http_outcome, observe_external_request, record_cache_lookup
+from ..utils.tracing import start_span
+
+
+# Response cache (overridable via environment; TTL 0 disables it)
+FMP_CACHE_TTL_SECONDS = float(os.getenv("FMP_CACHE_TTL_SECONDS", "900"))
+FMP_CACHE_PRICE_TTL_SECONDS = float(os.getenv("FMP_CACHE_PRICE_TTL_SECONDS", "60"))
+FMP_CACHE_MAX_BYTES = int(os.getenv("FMP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Endpoints whose data moves intraday get the short TTL
+PRICE_ENDPOINTS = ('quote/', 'historical-price-full/', 'historical-chart/', 'stock_news')
+
+
+class FMPResponseCache:
+    """
+    Process-wide cache of FMP response bodies, shared by every FMPClient
+    
+    Agents, the acquirer data stage and concurrent jobs ask for the same
+    profiles and statements; each distinct request goes to FMP once per TTL.
+    Bodies are kept as bytes and parsed per hit, so callers get their own
+    objects to mutate. Identical requests in flight share one HTTP call.
+    """
+    
+    def __init__(self, max_bytes: int = FMP_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+        self._inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+    
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Any]) -> str:
+        return f"{endpoint}?{urlencode(sorted((k, str(v)) for k, v in params.items() if k != 'apikey'))}"
+    
+    @staticmethod
+    def ttl(endpoint: str) -> float:
+        if any(endpoint.startswith(prefix) for prefix in PRICE_ENDPOINTS):
+            return min(FMP_CACHE_PRICE_TTL_SECONDS, FMP_CACHE_TTL_SECONDS)
+        return FMP_CACHE_TTL_SECONDS
+    
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, body = entry
+        if expires < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return body
+    
+    def put(self, key: str, body: bytes, ttl: float):
+        if ttl <= 0 or len(body) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, body)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+    
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'bytes': self._size, 'in_flight': len(self._inflight)}
+
+
+_response_cache = FMPResponseCache()
+
+
+def get_fmp_response_cache() -> FMPResponseCache:
+    """Get the process-wide FMP response cache"""
+    return _response_cache
 
 
 class FMPClient:
@@ -96,21 +181,83 @@ class FMPClient:
         if params is None:
             params = {}
         
-        params["apikey"] = self.api_key
+        # Served from the shared cache, or joined to an identical request already in flight
+        cache_key = FMPResponseCache.key(endpoint, params)
+        ttl = FMPResponseCache.ttl(endpoint)
+        if ttl > 0:
+            body = _response_cache.get(cache_key)
+            record_cache_lookup('fmp', body is not None)
+            if body is not None:
+                return json.loads(body)
+            inflight_key = (id(asyncio.get_running_loop()), cache_key)
+            pending = _response_cache._inflight.get(inflight_key)
+            while pending is not None:
+                # wait() never passes on the leader's cancellation (only our own)
+                await asyncio.wait((pending,))
+                if not pending.cancelled():
+                    return json.loads(pending.result())
+                # The leader's job was cancelled: join the next leader or fetch ourselves
+                pending = _response_cache._inflight.get(inflight_key)
+            future = asyncio.get_running_loop().create_future()
+            _response_cache._inflight[inflight_key] = future
+            try:
+                data, body = await self._fetch(endpoint, params)
+                if not (isinstance(data, dict) and 'Error Message' in data):
+                    _response_cache.put(cache_key, body, ttl)
+                future.set_result(body)
+                return data
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # Waiters re-raise it; don't warn when there are none
+                raise
+            finally:
+                _response_cache._inflight.pop(inflight_key, None)
+        
+        data, _ = await self._fetch(endpoint, params)
+        return data
+    
+    async def _fetch(self, endpoint: str, params: Dict[str, Any]) -> Tuple[Any, bytes]:
+        """One HTTP request to FMP; returns the parsed data and the raw body"""
+        params = {**params, "apikey": self.api_key}
         
         # Dynamically determine correct API version
         api_version = self._get_api_version(endpoint)
         url = f"{self.base_domain}/{api_version}/{endpoint}"
         
-        try:
-            async with self.session.get(url, params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                logger.debug(f"FMP API request successful: {endpoint} (using {api_version})")
-                return data
-        except aiohttp.ClientError as e:
-            logger.error(f"FMP API request failed: {endpoint} (v{api_version}) - {e}")
-            raise
+        request_start = time.perf_counter()
+        with start_span("fmp.request", {
+            'peer.service': 'fmp',
+            'http.request.method': 'GET',
+            'url.full': url,  # Without the apikey query parameter
+            'fmp.endpoint': endpoint,
+            'fmp.symbol': params.get('symbol')
+        }, kind='client') as span:
+            try:
+                async with self.session.get(url, params=params) as response:
+                    span.set_attribute('http.response.status_code', response.status)
+                    response.raise_for_status()
+                    body = await response.read()
+                    data = await response.json()
+                    logger.debug(f"FMP API request successful: {endpoint} (using {api_version})")
+                    latency = time.perf_counter() - request_start
+                    record_api_success('fmp', latency)
+                    observe_external_request('fmp', latency)
+                    return data, body
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"FMP API request failed: {endpoint} (v{api_version}) - {e}")
+                observe_external_request('fmp', time.perf_counter() - request_start, http_outcome(e.status))
+                # 4xx other than auth/rate-limit means a bad request for this symbol, not an outage
+                if e.status in (401, 403, 429) or e.status >= 500:
+                    record_api_failure('fmp', f"HTTP {e.status}", rate_limited=e.status == 429)
+                raise
+            except aiohttp.ClientError as e:
+                logger.error(f"FMP API request failed: {endpoint} (v{api_version}) - {e}")
+                observe_external_request('fmp', time.perf_counter() - request_start, http_outcome(error=e))
+                record_api_failure('fmp', str(e))
+                raise
     
     async def get_company_profile(self, symbol: str) -> Dict[str, Any]:
         """
@@ -125,6 +272,19 @@ class FMPClient:
         data = await self._make_request(f"profile/{symbol}")
         return data[0] if data else {}
     
+    async def get_quote(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get real-time quote (price, market cap, shares outstanding)
+        
+        Args:
+            symbol: Stock ticker symbol
+        
+        Returns:
+            Quote data
+        """
+        data = await self._make_request(f"quote/{symbol}")
+        return data[0] if data else {}
+    
     async def get_income_statement(self, symbol: str, period: str = "annual", limit: int = 5, from_date: Optional[str] = None, to_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get income statements with enhanced date filtering
@@ -688,43 +848,49 @@ class FMPClient:
         logger.info(f"✓ Fetching data from {date_ranges['from_date']} to {date_ranges['to_date']}")
         logger.info(f"✓ Target: Last 10-K + {date_ranges['expected_quarters']} quarters of 10-Qs")
         
+        # Filed statements come from the fundamentals store, which only asks FMP
+        # for periods newer than the ones it holds
+        store = get_fundamentals_store()
+        annual_limit = 10 if extended else 5
+        
+        def statements(statement: str, period: str = "annual", limit: int = annual_limit):
+            return store.statements(
+                self, symbol, statement, period=period, limit=limit,
+                most_recent_fy_end=date_ranges.get('most_recent_fy_end')
+            )
+        
         # Base tasks (always fetch) - NOW WITH FISCAL INTELLIGENCE
         tasks = {
             "profile": self.get_company_profile(symbol),
-            "income_statement": self.get_income_statement(
-                symbol, 
-                limit=10 if extended else 5,
-                from_date=date_ranges['from_date'],
-                to_date=date_ranges['to_date']
-            ),
-            "balance_sheet": self.get_balance_sheet(symbol, limit=10 if extended else 5),
-            "cash_flow": self.get_cash_flow_statement(symbol, limit=10 if extended else 5),
-            "key_metrics": self.get_key_metrics(symbol, limit=10 if extended else 5),
-            "ratios": self.get_financial_ratios(symbol, limit=10 if extended else 5),
+            "income_statement": statements("income_statement"),
+            "balance_sheet": statements("balance_sheet"),
+            "cash_flow": statements("cash_flow"),
+            "key_metrics": statements("key_metrics"),
+            "ratios": statements("ratios"),
             "outlook": self.get_company_outlook(symbol),
             "dcf": self.get_dcf(symbol),
             "market_cap": self.get_market_cap(symbol),
-            "enterprise_value": self.get_enterprise_value(symbol),
+            "enterprise_value": statements("enterprise_value", limit=5),
         }
         
         # Extended tasks for Phase 2 professional analysis
         if extended:
             extended_tasks = {
                 # Quarterly data for trend analysis (20 quarters = 5 years)
-                "income_statement_quarterly": self.get_income_statement(symbol, period="quarter", limit=20),
-                "balance_sheet_quarterly": self.get_balance_sheet(symbol, period="quarter", limit=20),
-                "cash_flow_quarterly": self.get_cash_flow_statement(symbol, period="quarter", limit=20),
+                "income_statement_quarterly": statements("income_statement", period="quarter", limit=20),
+                "balance_sheet_quarterly": statements("balance_sheet", period="quarter", limit=20),
+                "cash_flow_quarterly": statements("cash_flow", period="quarter", limit=20),
                 
                 # Growth metrics
-                "financial_growth": self.get_financial_growth(symbol, limit=10),
-                "income_growth": self.get_income_growth(symbol, limit=10),
-                "balance_sheet_growth": self.get_balance_sheet_growth(symbol, limit=10),
-                "cash_flow_growth": self.get_cash_flow_growth(symbol, limit=10),
+                "financial_growth": statements("financial_growth", limit=10),
+                "income_growth": statements("income_growth", limit=10),
+                "balance_sheet_growth": statements("balance_sheet_growth", limit=10),
+                "cash_flow_growth": statements("cash_flow_growth", limit=10),
                 
                 # As-reported data (GAAP vs non-GAAP detection)
-                "income_as_reported": self.get_income_statement_as_reported(symbol, limit=10),
-                "balance_as_reported": self.get_balance_sheet_as_reported(symbol, limit=10),
-                "cash_flow_as_reported": self.get_cash_flow_as_reported(symbol, limit=10),
+                "income_as_reported": statements("income_as_reported", limit=10),
+                "balance_as_reported": statements("balance_as_reported", limit=10),
+                "cash_flow_as_reported": statements("cash_flow_as_reported", limit=10),
                 
                 # TTM data for most recent analysis
                 "key_metrics_ttm": self.get_key_metrics_ttm(symbol),
@@ -891,19 +1057,34 @@ class FMPClient:
                 'fallback': True
             }
     
-    async def fetch_multiple_companies(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    async def fetch_multiple_companies(
+        self,
+        symbols: List[str],
+        extended: bool = True,
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
         """
         Fetch financial data for multiple companies in parallel
         
         Args:
             symbols: List of stock ticker symbols
+            extended: Fetch the extended data set for each company
+            max_concurrency: Companies fetched at once (None = all)
         
         Returns:
             Dictionary mapping symbols to their financial data
         """
         logger.info(f"Fetching data for {len(symbols)} companies in parallel")
         
-        tasks = [self.fetch_all_financial_data(symbol) for symbol in symbols]
+        slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            if slots is None:
+                return await self.fetch_all_financial_data(symbol, extended=extended)
+            async with slots:
+                return await self.fetch_all_financial_data(symbol, extended=extended)
+        
+        tasks = [fetch(symbol) for symbol in symbols]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         company_data = {}
@@ -1,9 +1,14 @@
 """
 Google Cloud Storage client with local fallback
 """
+import hashlib
+import hmac
 import os
+import time
+from datetime import timedelta
 from pathlib import Path
 from typing import Optional, List, BinaryIO
+from urllib.parse import quote, urlencode
 from loguru import logger
 
 try:
@@ -15,6 +20,13 @@ except ImportError:
     logger.warning("Google Cloud Storage libraries not available, using local storage fallback")
 
 
+# Configuration (overridable via environment)
+# Local storage stands in for signed URLs with HMAC-signed links to the API's /api/storage
+# route; set the prefix to its public URL (e.g. https://host/api/storage) behind a proxy
+LOCAL_STORAGE_URL_PREFIX = os.getenv("LOCAL_STORAGE_URL_PREFIX", "/api/storage")
+STORAGE_URL_SECRET = os.getenv("STORAGE_URL_SECRET") or os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+
+
 class GCSClient:
     """
     Google Cloud Storage client with automatic local fallback
@@ -256,6 +268,67 @@ class GCSClient:
             return f"deals/{deal_id}/{category}"
         return f"deals/{deal_id}"
     
+    def generate_signed_url(
+        self,
+        path: str,
+        expires_in: int = 900,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Time-limited download URL for a stored file
+        
+        GCS: a V4 signed URL (the browser downloads straight from the bucket).
+        Local storage: an HMAC-signed link to LOCAL_STORAGE_URL_PREFIX, checked
+        with verify_local_signature().
+        
+        Args:
+            path: Path in bucket or local storage
+            expires_in: Seconds the URL stays valid
+            filename: Download filename (Content-Disposition)
+            content_type: Response content type
+        
+        Returns:
+            URL, or None if the URL could not be signed (e.g. credentials without a private key)
+        """
+        if self.use_gcs:
+            try:
+                return self.bucket.blob(path).generate_signed_url(
+                    version="v4",
+                    expiration=timedelta(seconds=expires_in),
+                    method="GET",
+                    response_disposition=f'attachment; filename="{filename}"' if filename else None,
+                    response_type=content_type
+                )
+            except Exception as e:
+                logger.warning(f"Could not sign GCS URL for {path}: {e}")
+                return None
+        
+        expires = int(time.time()) + expires_in
+        query = {'expires': expires, 'signature': self._local_signature(path, expires, filename or '')}
+        if filename:
+            query['filename'] = filename
+        return f"{LOCAL_STORAGE_URL_PREFIX}/{quote(path)}?{urlencode(query)}"
+    
+    @staticmethod
+    def _local_signature(path: str, expires: int, filename: str) -> str:
+        message = f"{path}\n{expires}\n{filename}".encode('utf-8')
+        return hmac.new(STORAGE_URL_SECRET.encode('utf-8'), message, hashlib.sha256).hexdigest()
+    
+    def verify_local_signature(self, path: str, expires: int, signature: str, filename: Optional[str] = None) -> bool:
+        """Whether a local-storage signed URL is authentic and not expired"""
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._local_signature(path, expires, filename or ''), signature)
+    
+    def local_file(self, path: str) -> Optional[Path]:
+        """Local-storage file for a path (None if missing or outside the storage root)"""
+        root = self.local_storage_root.resolve()
+        file_path = (root / path).resolve()
+        if root not in file_path.parents or not file_path.is_file():
+            return None
+        return file_path
+    
     def file_exists(self, path: str) -> bool:
         """
         Check if file exists
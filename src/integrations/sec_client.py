@@ -22,6 +22,10 @@ import asyncio
 import aiohttp
 from datetime import datetime
 
+from ..utils.llm_gateway import get_llm_gateway, ANTHROPIC_AVAILABLE as LLM_GATEWAY_AVAILABLE
+from ..utils.metrics import http_outcome, observe_external_request
+from ..utils.tracing import mark_span_error, start_span
+
 try:
     import sec_parser
     from sec_downloader import Downloader
@@ -44,6 +48,9 @@ except ImportError as e:
     SEC_PARSER_AVAILABLE = False
     logger.warning(f"sec-parser library not available: {e}. Install with: pip install sec-parser")
 
+# Per-attempt budget for streamed 32K-token section extractions
+SEC_LLM_EXTRACTION_TIMEOUT = int(os.getenv("SEC_LLM_EXTRACTION_TIMEOUT", "600"))
+
 
 class SECClient:
     """
@@ -71,17 +78,15 @@ class SECClient:
         
         # Initialize LLM for intelligent section extraction
         self.llm = None
-        try:
-            from anthropic import Anthropic
-            import os
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if api_key:
-                self.llm = Anthropic(api_key=api_key)
-                logger.info("✓ LLM-powered SEC extraction ENABLED")
-            else:
-                logger.warning("⚠️ ANTHROPIC_API_KEY not found - LLM extraction unavailable")
-        except ImportError:
+        gateway = get_llm_gateway()
+        if gateway.available:
+            # Shared async gateway - long extractions never block the event loop
+            self.llm = gateway
+            logger.info("✓ LLM-powered SEC extraction ENABLED")
+        elif not LLM_GATEWAY_AVAILABLE:
             logger.warning("⚠️ Anthropic library not available - LLM extraction unavailable")
+        else:
+            logger.warning("⚠️ ANTHROPIC_API_KEY not found - LLM extraction unavailable")
         
         # Phase 2: Keywords for deep analysis
         self.risk_keywords = [
@@ -104,6 +109,35 @@ class SECClient:
             'guarantee', 'indemnification', 'contingent liability'
         ]
     
+    def _http(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send an EDGAR request (traced as a sec.request span)
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Extra requests arguments (e.g. params)
+        
+        Returns:
+            Response
+        """
+        request_start = time.perf_counter()
+        with start_span("sec.request", {
+            'peer.service': 'sec',
+            'http.request.method': method,
+            'url.full': url
+        }, kind='client') as span:
+            try:
+                response = requests.request(method, url, headers=self.headers, **kwargs)
+            except requests.RequestException as e:
+                observe_external_request('sec', time.perf_counter() - request_start, http_outcome(error=e))
+                raise
+            observe_external_request('sec', time.perf_counter() - request_start, http_outcome(response.status_code))
+            span.set_attribute('http.response.status_code', response.status_code)
+            if response.status_code >= 400:
+                mark_span_error(span, f"HTTP {response.status_code}")
+            return response
+    
     def get_company_cik(self, ticker: str) -> Optional[str]:
         """
         Get CIK (Central Index Key) for a company ticker
@@ -117,7 +151,7 @@ class SECClient:
         try:
             # Use SEC's company tickers JSON
             url = "https://www.sec.gov/files/company_tickers.json"
-            response = requests.get(url, headers=self.headers)
+            response = self._http('GET', url)
             response.raise_for_status()
             
             data = response.json()
@@ -197,7 +231,7 @@ class SECClient:
             filings = []
             for filing_type in filing_types:
                 params["type"] = filing_type
-                response = requests.get(url, headers=self.headers, params=params)
+                response = self._http('GET', url, params=params)
 
                 if response.status_code == 200:
                     # Parse filing information with date extraction
@@ -392,11 +426,22 @@ class SECClient:
             # Fetch and parse the filing
             async with aiohttp.ClientSession() as session:
                 await asyncio.sleep(self.rate_limit_delay)
-                async with session.get(filing_url, headers=self.headers) as response:
-                    if response.status != 200:
-                        return {'error': f'Failed to fetch filing: {response.status}'}
-                    
-                    html_content = await response.text()
+                with start_span("sec.request", {
+                    'peer.service': 'sec',
+                    'http.request.method': 'GET',
+                    'url.full': filing_url,
+                    'sec.filing_type': filing_type
+                }, kind='client') as span:
+                    request_start = time.perf_counter()
+                    async with session.get(filing_url, headers=self.headers) as response:
+                        span.set_attribute('http.response.status_code', response.status)
+                        if response.status != 200:
+                            mark_span_error(span, f"HTTP {response.status}")
+                            observe_external_request('sec', time.perf_counter() - request_start, http_outcome(response.status))
+                            return {'error': f'Failed to fetch filing: {response.status}'}
+                        
+                        html_content = await response.text()
+                    observe_external_request('sec', time.perf_counter() - request_start)
             
             # Parse HTML and extract text
             soup = BeautifulSoup(html_content, 'html.parser')
@@ -447,7 +492,7 @@ class SECClient:
                 "output": "atom"
             }
 
-            response = requests.get(submissions_url, headers=self.headers, params=params)
+            response = self._http('GET', submissions_url, params=params)
 
             if response.status_code == 200:
                 # Try lxml parser first, fallback to html.parser
@@ -476,7 +521,7 @@ class SECClient:
                             
                             # Fetch the index page to find the actual document
                             await asyncio.sleep(self.rate_limit_delay)
-                            index_response = requests.get(index_url, headers=self.headers)
+                            index_response = self._http('GET', index_url)
                             
                             if index_response.status_code == 200:
                                 index_soup = BeautifulSoup(index_response.text, 'html.parser')
@@ -527,7 +572,7 @@ class SECClient:
                             fallback_url = f"{self.base_url}/Archives/edgar/data/{cik}/{accession_clean}/{pattern}"
                             # Test if this URL exists
                             await asyncio.sleep(self.rate_limit_delay)
-                            test_response = requests.head(fallback_url, headers=self.headers)
+                            test_response = self._http('HEAD', fallback_url)
                             if test_response.status_code == 200:
                                 logger.info(f"Using fallback filing URL: {fallback_url}")
                                 return fallback_url, accession_text
@@ -1111,19 +1156,16 @@ TASK:
 IMPORTANT: Return the full section text as it appears, preserving all details, tables, and formatting."""
 
             # Call Claude with streaming enabled for long operations
-            extracted_text = ""
-            
-            with self.llm.messages.stream(
+            extracted_text = await self.llm.complete(
+                prompt,
                 model="claude-sonnet-4-20250514",
                 max_tokens=32000,  # Doubled for longer sections
                 temperature=0,  # Deterministic extraction
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            ) as stream:
-                for text in stream.text_stream:
-                    extracted_text += text
+                timeout=SEC_LLM_EXTRACTION_TIMEOUT,
+                max_retries=2,
+                context=f"SEC section extraction ({start_marker})",
+                stream=True
+            )
             
             extracted_text = extracted_text.strip()
             
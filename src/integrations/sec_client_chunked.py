@@ -8,11 +8,18 @@ PRODUCTION-GRADE SOLUTION for Item 1A and other large sections:
 - Progressive extraction with checkpoints
 """
 import asyncio
+import os
 import re
 from typing import Dict, List, Any, Optional
 from loguru import logger
-from anthropic import Anthropic
-import os
+
+from ..utils.llm_gateway import get_llm_gateway
+
+
+# Configuration (overridable via environment)
+SEC_CHUNK_MAX_TOKENS = int(os.getenv("SEC_CHUNK_MAX_TOKENS", "16000"))
+# Long enough to stream a full SEC_CHUNK_MAX_TOKENS response (~50 tokens/s)
+SEC_CHUNK_TIMEOUT_SECONDS = int(os.getenv("SEC_CHUNK_TIMEOUT_SECONDS", "360"))
 
 
 class ChunkedSECExtractor:
@@ -22,7 +29,7 @@ class ChunkedSECExtractor:
     Features:
     - Splits large sections into semantic chunks
     - Processes chunks in parallel (5 concurrent API calls)
-    - Timeout protection (30s per chunk)
+    - Timeout protection (SEC_CHUNK_TIMEOUT_SECONDS per chunk)
     - Progressive assembly of results
     - Fallback to regex if LLM fails
     """
@@ -30,21 +37,18 @@ class ChunkedSECExtractor:
     def __init__(self):
         """Initialize chunked extractor with LLM"""
         self.llm = None
-        try:
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if api_key:
-                self.llm = Anthropic(api_key=api_key)
-                logger.info("✓ Chunked SEC extractor initialized with LLM")
-            else:
-                logger.warning("⚠️ ANTHROPIC_API_KEY not found - will use regex fallback")
-        except ImportError:
-            logger.warning("⚠️ Anthropic library not available - will use regex fallback")
+        gateway = get_llm_gateway()
+        if gateway.available:
+            self.llm = gateway
+            logger.info("✓ Chunked SEC extractor initialized with LLM")
+        else:
+            logger.warning("⚠️ Anthropic client not available - will use regex fallback")
         
         # Configuration
         self.chunk_size = 15000  # Chars per chunk (safe for Claude)
         self.chunk_overlap = 500  # Overlap between chunks
         self.max_parallel = 5  # Max concurrent API calls
-        self.timeout_per_chunk = 30  # Seconds
+        self.timeout_per_chunk = SEC_CHUNK_TIMEOUT_SECONDS
     
     async def extract_large_section_parallel(
         self,
@@ -352,20 +356,19 @@ TASK:
 
 Return the cleaned text directly."""
 
-            # Use streaming for efficiency
-            extracted_text = ""
-            
-            with self.llm.messages.stream(
+            # Single streamed attempt on the shared gateway - the caller's per-chunk
+            # timeout is the budget, and the original chunk is the fallback
+            extracted_text = await self.llm.complete(
+                prompt,
                 model="claude-sonnet-4-20250514",
-                max_tokens=16000,
+                max_tokens=SEC_CHUNK_MAX_TOKENS,
                 temperature=0,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            ) as stream:
-                for text in stream.text_stream:
-                    extracted_text += text
+                timeout=self.timeout_per_chunk,
+                max_retries=1,
+                context=f"SEC chunk extraction ({context})",
+                stream=True,
+                enable_fallback=False
+            )
             
             return extracted_text.strip()
             
@@ -10,10 +10,14 @@ Provides production-grade web search capabilities for external validation:
 Used by: External Validator Agent
 """
 import os
+import time
 from typing import Dict, List, Any, Optional
 from loguru import logger
 from dotenv import load_dotenv
 
+from ..utils.metrics import http_outcome, observe_external_request
+from ..utils.tracing import start_span
+
 # Load environment variables
 load_dotenv()
 
@@ -89,7 +93,21 @@ class TavilySearchClient:
             logger.info(f"Tavily search: '{query}' (depth={search_depth}, max={max_results})")
             
             # Execute search
-            results = self.client.search(**search_params)
+            with start_span("tavily.search", {
+                'peer.service': 'tavily',
+                'tavily.query': query,
+                'tavily.search_depth': search_depth,
+                'tavily.max_results': max_results
+            }, kind='client') as span:
+                request_start = time.perf_counter()
+                try:
+                    results = self.client.search(**search_params)
+                except Exception as e:
+                    outcome = 'rate_limited' if '429' in str(e) or 'rate limit' in str(e).lower() else http_outcome(error=e)
+                    observe_external_request('tavily', time.perf_counter() - request_start, outcome)
+                    raise
+                observe_external_request('tavily', time.perf_counter() - request_start)
+                span.set_attribute('tavily.result_count', len(results.get('results', [])))
             
             # Extract and structure results
             search_results = {
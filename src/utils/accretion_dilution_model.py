@@ -0,0 +1,415 @@
+"""
+Vectorized Accretion/Dilution Model - Scenario cube for EPS impact analysis
+Evaluates price x synergy x cash-mix x interest-rate x acquirer-price grids in one pass
+"""
+import gzip
+import os
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+from dataclasses import dataclass, replace
+from loguru import logger
+import numpy as np
+
+from .serialization import BINARY_FORMAT, pack, unpack
+
+
+# Configuration (overridable via environment)
+SCENARIO_CUBE_DIR = os.getenv("SCENARIO_CUBE_DIR", "data/scenario_cubes")  # full cubes, referenced from state
+
+
+# Default scenario axes (relative adjustments unless noted)
+DEFAULT_PRICE_ADJUSTMENTS = (-0.10, -0.05, 0.0, 0.05, 0.10)
+DEFAULT_SYNERGY_MULTIPLES = (0.0, 0.5, 1.0, 1.5, 2.0)
+DEFAULT_CASH_PERCENTAGES = (0.0, 0.25, 0.5, 0.75, 1.0)  # absolute
+DEFAULT_RATE_SHIFTS = (-0.02, -0.01, 0.0, 0.01, 0.02)  # absolute shift in debt rate
+DEFAULT_ACQUIRER_PRICE_ADJUSTMENTS = (-0.20, -0.10, 0.0, 0.10, 0.20)
+
+# Synergy ramp used by the multi-year forecast (Year 1 synergies = 50% of run-rate)
+SYNERGY_RAMP = (0.5, 0.75, 1.0, 1.0, 1.0)
+DEFAULT_GROWTH_RATE = 0.05
+
+CUBE_AXES = ['purchase_price', 'synergies', 'cash_percentage', 'debt_interest_rate', 'acquirer_stock_price']
+
+
+@dataclass
+class AccretionDilutionInputs:
+    """Base-case inputs for the accretion/dilution model"""
+    acquirer_net_income: float
+    acquirer_shares: float
+    acquirer_tax_rate: float
+    target_net_income: float
+    purchase_price: float
+    synergies: float
+    cash_percentage: float
+    debt_interest_rate: float
+    deal_tax_rate: float
+    acquirer_stock_price: float
+    acquirer_cash_available: float
+
+    @property
+    def acquirer_eps(self) -> float:
+        """Standalone acquirer EPS"""
+        return self.acquirer_net_income / self.acquirer_shares if self.acquirer_shares > 0 else 0.0
+
+    @classmethod
+    def from_agent_data(
+        cls,
+        acquirer_standalone: Dict[str, Any],
+        target_standalone: Dict[str, Any],
+        deal_terms: Dict[str, Any],
+        purchase_price: float
+    ) -> 'AccretionDilutionInputs':
+        """
+        Build inputs from AccretionDilutionAgent standalone metrics and deal terms
+
+        Uses the same defaults as the agent's scalar calculations.
+        """
+        return cls(
+            acquirer_net_income=acquirer_standalone.get('net_income', 0) or 0,
+            acquirer_shares=acquirer_standalone.get('shares_outstanding', 0) or 0,
+            acquirer_tax_rate=acquirer_standalone.get('tax_rate', 0.21),
+            target_net_income=target_standalone.get('net_income', 0) or 0,
+            purchase_price=purchase_price or 0,
+            synergies=deal_terms.get('synergies_year1', 0) or 0,
+            cash_percentage=deal_terms.get('cash_percentage', 0.5),
+            debt_interest_rate=deal_terms.get('debt_interest_rate', 0.05),
+            deal_tax_rate=deal_terms.get('tax_rate', 0.21),
+            acquirer_stock_price=deal_terms.get('acquirer_stock_price', 100),
+            acquirer_cash_available=deal_terms.get('acquirer_cash_available', 0) or 0
+        )
+
+
+class AccretionDilutionCube:
+    """
+    Array-based accretion/dilution model
+
+    All scenario dimensions are broadcast against each other, so a full
+    5-dimensional cube (and its multi-year paths) is a handful of NumPy
+    operations rather than one Python recalculation per scenario.
+    """
+
+    def __init__(self, inputs: AccretionDilutionInputs):
+        """
+        Initialize model
+
+        Args:
+            inputs: Base-case model inputs
+        """
+        self.inputs = inputs
+
+    def _axis_values(
+        self,
+        price_adjustments: Sequence[float],
+        synergy_multiples: Sequence[float],
+        cash_percentages: Sequence[float],
+        rate_shifts: Sequence[float],
+        acquirer_price_adjustments: Sequence[float]
+    ) -> Dict[str, np.ndarray]:
+        """Convert relative axis definitions to absolute values"""
+        base = self.inputs
+        return {
+            'purchase_price': base.purchase_price * (1 + np.asarray(price_adjustments, dtype=float)),
+            'synergies': base.synergies * np.asarray(synergy_multiples, dtype=float),
+            'cash_percentage': np.clip(np.asarray(cash_percentages, dtype=float), 0.0, 1.0),
+            'debt_interest_rate': np.maximum(base.debt_interest_rate + np.asarray(rate_shifts, dtype=float), 0.0),
+            'acquirer_stock_price': base.acquirer_stock_price * (1 + np.asarray(acquirer_price_adjustments, dtype=float))
+        }
+
+    @staticmethod
+    def _broadcast(axes: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        """Reshape each axis so they broadcast into a (P, S, C, R, A) cube"""
+        ndim = len(CUBE_AXES)
+        shaped = []
+        for i, name in enumerate(CUBE_AXES):
+            shape = [1] * ndim
+            shape[i] = -1
+            shaped.append(axes[name].reshape(shape))
+        return shaped
+
+    def _financing(self, price, cash_pct, rate, acq_price):
+        """Vectorized financing impact: after-tax interest cost and new shares issued"""
+        base = self.inputs
+        debt_needed = np.maximum(price * cash_pct - base.acquirer_cash_available, 0.0)
+        after_tax_interest = debt_needed * rate * (1 - base.deal_tax_rate)
+        safe_price = np.where(acq_price > 0, acq_price, 1.0)
+        new_shares = np.where(acq_price > 0, price * (1 - cash_pct) / safe_price, 0.0)
+        return after_tax_interest, new_shares
+
+    def evaluate(
+        self,
+        price_adjustments: Sequence[float] = DEFAULT_PRICE_ADJUSTMENTS,
+        synergy_multiples: Sequence[float] = DEFAULT_SYNERGY_MULTIPLES,
+        cash_percentages: Sequence[float] = DEFAULT_CASH_PERCENTAGES,
+        rate_shifts: Sequence[float] = DEFAULT_RATE_SHIFTS,
+        acquirer_price_adjustments: Sequence[float] = DEFAULT_ACQUIRER_PRICE_ADJUSTMENTS
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the full scenario cube in one vectorized pass
+
+        Args:
+            price_adjustments: Relative purchase price adjustments
+            synergy_multiples: Multiples of base Year 1 synergies
+            cash_percentages: Absolute cash share of consideration (0-1)
+            rate_shifts: Absolute shifts to the debt interest rate
+            acquirer_price_adjustments: Relative acquirer share price adjustments
+
+        Returns:
+            Dictionary with axis values and (P, S, C, R, A) arrays for
+            pro forma EPS, EPS impact % and breakeven pre-tax synergies
+        """
+        base = self.inputs
+        axes = self._axis_values(
+            price_adjustments, synergy_multiples, cash_percentages,
+            rate_shifts, acquirer_price_adjustments
+        )
+        price, synergies, cash_pct, rate, acq_price = self._broadcast(axes)
+
+        after_tax_interest, new_shares = self._financing(price, cash_pct, rate, acq_price)
+        pro_forma_shares = base.acquirer_shares + new_shares
+
+        pre_synergy_ni = base.acquirer_net_income + base.target_net_income - after_tax_interest
+        pro_forma_ni = pre_synergy_ni + synergies * (1 - base.acquirer_tax_rate)
+
+        safe_shares = np.where(pro_forma_shares > 0, pro_forma_shares, 1.0)
+        pro_forma_eps = np.where(pro_forma_shares > 0, pro_forma_ni / safe_shares, 0.0)
+
+        base_eps = base.acquirer_eps
+        if base_eps > 0:
+            eps_impact_percent = (pro_forma_eps - base_eps) / base_eps * 100
+        else:
+            eps_impact_percent = np.zeros_like(pro_forma_eps)
+
+        # Breakeven synergies do not depend on the synergy axis
+        breakeven_after_tax = np.maximum(base_eps * pro_forma_shares - pre_synergy_ni, 0.0)
+        tax_factor = (1 - base.acquirer_tax_rate) or 1.0
+        breakeven_pretax = breakeven_after_tax / tax_factor
+
+        return {
+            'axes': axes,
+            'pro_forma_eps': np.broadcast_to(pro_forma_eps, eps_impact_percent.shape),
+            'eps_impact_percent': eps_impact_percent,
+            'breakeven_synergies_pretax': breakeven_pretax[:, 0, :, :, :]
+        }
+
+    def one_way_sensitivity(self, cube: Dict[str, Any], axis: str) -> List[Dict[str, float]]:
+        """
+        Slice a one-at-a-time sensitivity out of an evaluated cube
+
+        All other dimensions are held at their base-case index.
+
+        Args:
+            cube: Result of evaluate()
+            axis: Axis name from CUBE_AXES
+
+        Returns:
+            List of {axis value, eps_impact_percent}
+        """
+        index = tuple(
+            slice(None) if name == axis else self._base_index(cube['axes'][name], name)
+            for name in CUBE_AXES
+        )
+        impacts = cube['eps_impact_percent'][index]
+        return [
+            {axis: float(v), 'eps_impact_percent': float(i)}
+            for v, i in zip(cube['axes'][axis], impacts)
+        ]
+
+    def two_way_grid(self, cube: Dict[str, Any], row_axis: str, col_axis: str) -> Dict[str, Any]:
+        """
+        Slice a two-way EPS impact grid out of an evaluated cube
+
+        Args:
+            cube: Result of evaluate()
+            row_axis: Axis name for rows
+            col_axis: Axis name for columns
+
+        Returns:
+            Dictionary with row/column values and a 2D list of EPS impact %
+        """
+        index = tuple(
+            slice(None) if name in (row_axis, col_axis) else self._base_index(cube['axes'][name], name)
+            for name in CUBE_AXES
+        )
+        grid = cube['eps_impact_percent'][index]
+        if CUBE_AXES.index(row_axis) > CUBE_AXES.index(col_axis):
+            grid = grid.T
+        return {
+            'row_axis': row_axis,
+            'column_axis': col_axis,
+            'rows': cube['axes'][row_axis].tolist(),
+            'columns': cube['axes'][col_axis].tolist(),
+            'eps_impact_percent': np.round(grid, 4).tolist()
+        }
+
+    def breakeven_surface(self, cube: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Breakeven pre-tax synergies over purchase price x cash mix
+
+        Interest rate and acquirer share price are held at base case.
+        """
+        axes = cube['axes']
+        rate_idx = self._base_index(axes['debt_interest_rate'], 'debt_interest_rate')
+        acq_idx = self._base_index(axes['acquirer_stock_price'], 'acquirer_stock_price')
+        surface = cube['breakeven_synergies_pretax'][:, :, rate_idx, acq_idx]
+        return {
+            'rows': axes['purchase_price'].tolist(),
+            'columns': axes['cash_percentage'].tolist(),
+            'row_axis': 'purchase_price',
+            'column_axis': 'cash_percentage',
+            'breakeven_synergies_pretax': np.round(surface, 2).tolist()
+        }
+
+    def multiyear_paths(
+        self,
+        years: int = 5,
+        growth_rate: float = DEFAULT_GROWTH_RATE,
+        synergy_ramp: Sequence[float] = SYNERGY_RAMP,
+        price_adjustments: Sequence[float] = DEFAULT_PRICE_ADJUSTMENTS,
+        synergy_multiples: Sequence[float] = DEFAULT_SYNERGY_MULTIPLES
+    ) -> Dict[str, Any]:
+        """
+        EPS impact paths by year over a price x synergy grid
+
+        Both companies' net income grows at growth_rate; synergies ramp to
+        run-rate (base Year 1 synergies / first ramp step); financing cost and
+        share count are held at their closing values.
+
+        Returns:
+            Dictionary with year list, grid axes and a (years, P, S) list of EPS impact %
+        """
+        base = self.inputs
+        ramp = np.asarray(list(synergy_ramp) + [synergy_ramp[-1]] * max(0, years - len(synergy_ramp)), dtype=float)[:years]
+        year_idx = np.arange(years, dtype=float)
+        growth = (1 + growth_rate) ** year_idx
+
+        price = (base.purchase_price * (1 + np.asarray(price_adjustments, dtype=float)))[None, :, None]
+        run_rate = base.synergies / (ramp[0] or 1.0)
+        synergies = (run_rate * np.asarray(synergy_multiples, dtype=float))[None, None, :] * ramp[:, None, None]
+
+        after_tax_interest, new_shares = self._financing(
+            price, base.cash_percentage, base.debt_interest_rate, base.acquirer_stock_price
+        )
+        pro_forma_shares = base.acquirer_shares + new_shares
+        growth_col = growth[:, None, None]
+
+        pro_forma_ni = (
+            (base.acquirer_net_income + base.target_net_income) * growth_col
+            - after_tax_interest
+            + synergies * (1 - base.acquirer_tax_rate)
+        )
+        safe_shares = np.where(pro_forma_shares > 0, pro_forma_shares, 1.0)
+        pro_forma_eps = np.where(pro_forma_shares > 0, pro_forma_ni / safe_shares, 0.0)
+        standalone_eps = base.acquirer_eps * growth_col
+
+        safe_eps = np.where(standalone_eps > 0, standalone_eps, 1.0)
+        impact = np.where(standalone_eps > 0, (pro_forma_eps - standalone_eps) / safe_eps * 100, 0.0)
+
+        return {
+            'years': list(range(1, years + 1)),
+            'synergy_ramp': ramp.tolist(),
+            'purchase_prices': price.ravel().tolist(),
+            'synergy_multiples': list(synergy_multiples),
+            'eps_impact_percent': np.round(impact, 4).tolist(),
+            'growth_rate': growth_rate
+        }
+
+    def to_summary(self, cube: Dict[str, Any], cube_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Compact, JSON-serializable summary of an evaluated cube for state/reports
+
+        The per-scenario values are not included (they are saved separately,
+        see save_scenario_cube); cube_path points at that file.
+        """
+        impacts = cube['eps_impact_percent']
+        flat = impacts.ravel()
+        return {
+            'axes': {name: cube['axes'][name].tolist() for name in CUBE_AXES},
+            'shape': list(impacts.shape),
+            'scenario_count': int(flat.size),
+            'accretive_share_pct': float((flat > 0).mean() * 100) if flat.size else 0.0,
+            'min_eps_impact_percent': float(flat.min()) if flat.size else 0.0,
+            'max_eps_impact_percent': float(flat.max()) if flat.size else 0.0,
+            'cube_path': cube_path
+        }
+
+    def _base_index(self, values: np.ndarray, axis: str) -> int:
+        """Index of the scenario closest to the base case on an axis"""
+        base_value = {
+            'purchase_price': self.inputs.purchase_price,
+            'synergies': self.inputs.synergies,
+            'cash_percentage': self.inputs.cash_percentage,
+            'debt_interest_rate': self.inputs.debt_interest_rate,
+            'acquirer_stock_price': self.inputs.acquirer_stock_price
+        }[axis]
+        return int(np.argmin(np.abs(values - base_value)))
+
+    def with_inputs(self, **changes) -> 'AccretionDilutionCube':
+        """Return a new model with some base-case inputs replaced"""
+        return AccretionDilutionCube(replace(self.inputs, **changes))
+
+
+def save_scenario_cube(cube: Dict[str, Any], name: str, cube_dir: str = SCENARIO_CUBE_DIR) -> Path:
+    """
+    Write an evaluated cube to a side file, so job state only carries its summary
+
+    Args:
+        cube: Result of AccretionDilutionCube.evaluate()
+        name: File name stem (the job's deal id)
+        cube_dir: Directory holding cube files
+
+    Returns:
+        Path of the gzipped cube file
+    """
+    path = Path(cube_dir) / f"{name}.{BINARY_FORMAT}.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(pack({
+            'axes': {axis: cube['axes'][axis].tolist() for axis in CUBE_AXES},
+            'eps_impact_percent': np.round(cube['eps_impact_percent'], 4).tolist(),
+            'breakeven_synergies_pretax': np.round(cube['breakeven_synergies_pretax'], 2).tolist()
+        }), compresslevel=1))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_scenario_cube(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a cube written by save_scenario_cube
+
+    Returns:
+        Dictionary of NumPy arrays ('axes', 'eps_impact_percent',
+        'breakeven_synergies_pretax'), or None if the file is missing or unreadable
+    """
+    try:
+        with gzip.open(path, 'rb') as f:
+            data = unpack(f.read())
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Could not read scenario cube {path}: {e}")
+        return None
+    return {
+        'axes': {axis: np.asarray(values) for axis, values in data['axes'].items()},
+        'eps_impact_percent': np.asarray(data['eps_impact_percent']),
+        'breakeven_synergies_pretax': np.asarray(data['breakeven_synergies_pretax'])
+    }
+
+
+def build_scenario_cube(
+    acquirer_standalone: Dict[str, Any],
+    target_standalone: Dict[str, Any],
+    deal_terms: Dict[str, Any],
+    purchase_price: float
+) -> Optional[AccretionDilutionCube]:
+    """
+    Convenience function to build a cube from agent data
+
+    Returns:
+        AccretionDilutionCube or None if acquirer data is insufficient
+    """
+    inputs = AccretionDilutionInputs.from_agent_data(
+        acquirer_standalone, target_standalone, deal_terms, purchase_price
+    )
+    if inputs.acquirer_shares <= 0:
+        logger.warning("Scenario cube unavailable: acquirer share count missing")
+        return None
+    return AccretionDilutionCube(inputs)
@@ -0,0 +1,87 @@
+"""
+Acquirer Data - The acquirer fundamentals the M&A agents need, fetched in one round
+
+Accretion/dilution, sources & uses, contribution and exchange ratio analysis
+only read the acquirer's latest statements and share price, and the
+integration planner its income statement. Running a full FinancialAnalystAgent
+on the acquirer (DCF, normalization, LLM insights) produced far more than
+that, on the critical path after the target's analysis.
+
+fetch_acquirer_data() issues the five FMP requests concurrently; the
+orchestrator starts it as soon as the job begins so it overlaps the target's
+analysis. The statements come from the fundamentals store and the profile
+and quote go through the shared FMP response cache, so an acquirer analysed
+by several jobs is fetched once.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict
+from loguru import logger
+
+from ..integrations.fmp_client import FMPClient
+from .fundamentals_store import get_fundamentals_store
+from .tracing import start_span
+
+
+# Periods fetched per statement (same as the target's extended fetch, so cached responses are shared)
+STATEMENT_LIMIT = 10
+
+
+async def fetch_acquirer_data(ticker: str) -> Dict[str, Any]:
+    """
+    Fetch the acquirer's profile, annual statements and current quote concurrently
+
+    Args:
+        ticker: Acquirer ticker symbol
+
+    Returns:
+        Dictionary with profile, income_statement, balance_sheet, cash_flow,
+        current_stock_price (omitted when FMP has no price), market_cap and
+        shares_outstanding
+
+    Raises:
+        ValueError: If FMP returns no income statement for the ticker
+    """
+    with start_span("acquirer.fetch", {'deal.acquirer_ticker': ticker}):
+        store = get_fundamentals_store()
+        async with FMPClient() as client:
+            profile, income, balance, cash_flow, quote = await asyncio.gather(
+                client.get_company_profile(ticker),
+                store.statements(client, ticker, 'income_statement', limit=STATEMENT_LIMIT),
+                store.statements(client, ticker, 'balance_sheet', limit=STATEMENT_LIMIT),
+                store.statements(client, ticker, 'cash_flow', limit=STATEMENT_LIMIT),
+                client.get_quote(ticker),
+                return_exceptions=True
+            )
+
+    if isinstance(income, BaseException) or not income:
+        raise ValueError(f"No income statement available for {ticker}: {income if isinstance(income, BaseException) else 'empty response'}")
+
+    profile = _or_empty(ticker, 'profile', profile, {})
+    balance = _or_empty(ticker, 'balance sheet', balance, [])
+    cash_flow = _or_empty(ticker, 'cash flow', cash_flow, [])
+    quote = _or_empty(ticker, 'quote', quote, {})
+
+    data = {
+        'ticker': ticker,
+        'company_name': profile.get('companyName', ticker),
+        'profile': profile,
+        'income_statement': income,
+        'balance_sheet': balance,
+        'cash_flow': cash_flow,
+        'market_cap': quote.get('marketCap') or profile.get('mktCap'),
+        'shares_outstanding': quote.get('sharesOutstanding'),
+        'fetched_at': datetime.utcnow().isoformat()
+    }
+    price = quote.get('price') or profile.get('price')
+    if price:
+        data['current_stock_price'] = float(price)
+    return data
+
+
+def _or_empty(ticker: str, name: str, result: Any, empty: Any) -> Any:
+    """A gathered result, or an empty value (logged) when its request failed"""
+    if isinstance(result, BaseException):
+        logger.warning(f"Acquirer {name} unavailable for {ticker}: {result}")
+        return empty
+    return result or empty
@@ -16,6 +16,8 @@ from dataclasses import dataclass
 from loguru import logger
 import scipy.stats as stats
 
+from .financial_statements import get_financial_statements
+
 
 @dataclass
 class DCFAssumptions:
@@ -31,6 +33,20 @@ class DCFAssumptions:
     depreciation_percent_revenue: float = 0.03
 
 
+@dataclass
+class LBOAssumptions:
+    """LBO model assumptions (typical PE deal structure)"""
+    entry_multiple: float = 12.0  # 12x EBITDA entry (typical for quality assets)
+    exit_multiple: float = 11.0  # 11x EBITDA exit (slight discount to entry)
+    equity_percent: float = 0.35  # 35% equity / 65% debt
+    debt_interest_rate: float = 0.07  # 7% blended rate
+    holding_period: int = 7
+    tax_rate: float = 0.21
+    cash_sweep: float = 0.75  # Share of FCF used for debt paydown
+    revenue_growth: Optional[float] = None  # Year 1 growth; defaults to historical average
+    ebitda_margin: Optional[float] = None  # Defaults to historical margin
+
+
 class AdvancedValuationEngine:
     """
     Advanced valuation engine for M&A analysis
@@ -175,36 +191,33 @@ class AdvancedValuationEngine:
         if not income:
             return {}
         
-        latest_income = income[0]
-        latest_balance = balance[0] if balance else {}
-        latest_cf = cash_flow[0] if cash_flow else {}
+        statements = get_financial_statements({
+            'income_statement': income,
+            'balance_sheet': balance,
+            'cash_flow': cash_flow
+        })
         
-        # Calculate historical growth rates
-        revenue_growth_rates = []
-        for i in range(min(3, len(income) - 1)):
-            current_rev = income[i].get('revenue', 0)
-            prior_rev = income[i + 1].get('revenue', 1)
-            if prior_rev > 0:
-                growth = (current_rev - prior_rev) / prior_rev
-                revenue_growth_rates.append(growth)
+        # Calculate historical growth rates (last 3 years)
+        revenue_growth_rates = statements.growth('revenue')[:3]
+        revenue_growth_rates = revenue_growth_rates[~np.isnan(revenue_growth_rates)]
         
-        avg_revenue_growth = np.mean(revenue_growth_rates) if revenue_growth_rates else 0.05
+        avg_revenue_growth = float(np.mean(revenue_growth_rates)) if revenue_growth_rates.size else 0.05
         
         # Calculate margins
-        revenue = latest_income.get('revenue', 1)
-        ebitda = latest_income.get('ebitda', 0)
+        revenue = statements.latest('revenue', 1)
+        ebitda = statements.latest('ebitda', 0)
         ebitda_margin = ebitda / revenue if revenue > 0 else 0
         
         # Free cash flow
-        fcf = latest_cf.get('freeCashFlow', 0)
+        fcf = statements.latest('free_cash_flow', 0)
         fcf_margin = fcf / revenue if revenue > 0 else 0
         
         # Calculate WACC components
-        total_debt = latest_balance.get('totalDebt', 0)
+        total_debt = statements.latest('total_debt', 0, statement='balance_sheet')
         
         # CRITICAL FIX: Use ACTUAL market cap from balance sheet if available
         # Balance sheet contains market cap from FMP API
-        actual_market_cap = latest_balance.get('marketCap', 0)
+        actual_market_cap = statements.latest('market_cap', 0, statement='balance_sheet')
         
         if actual_market_cap and actual_market_cap > 0:
             market_cap = actual_market_cap
@@ -751,9 +764,11 @@ class AdvancedValuationEngine:
         
         try:
             from src.integrations.fmp_client import FMPClient
+            from src.utils.fundamentals_store import get_fundamentals_store
             import asyncio
             
-            # Fetch real comp data from FMP
+            # Fetch real comp data from FMP (filed metrics and ratios via the fundamentals store)
+            store = get_fundamentals_store()
             async with FMPClient() as fmp_client:
                 # Fetch data for all comparables in parallel
                 comp_data_tasks = [
@@ -763,13 +778,13 @@ class AdvancedValuationEngine:
                 
                 # Fetch key metrics for all comps
                 metrics_tasks = [
-                    fmp_client.get_key_metrics(ticker) for ticker in comparable_tickers
+                    store.statements(fmp_client, ticker, 'key_metrics') for ticker in comparable_tickers
                 ]
                 comp_metrics = await asyncio.gather(*metrics_tasks, return_exceptions=True)
                 
                 # Fetch ratios
                 ratios_tasks = [
-                    fmp_client.get_financial_ratios(ticker) for ticker in comparable_tickers
+                    store.statements(fmp_client, ticker, 'ratios') for ticker in comparable_tickers
                 ]
                 comp_ratios = await asyncio.gather(*ratios_tasks, return_exceptions=True)
             
@@ -990,33 +1005,51 @@ with sensitivity to key value drivers such as WACC and terminal growth assumptio
             cash_flows
         )
         
+        return self._calculate_lbo(historical, LBOAssumptions())
+    
+    def _calculate_lbo(
+        self,
+        historical: Dict[str, Any],
+        assumptions: LBOAssumptions
+    ) -> Dict[str, Any]:
+        """
+        Project the LBO and compute returns from historical metrics
+
+        Split out of run_lbo_analysis so the projection can be re-run
+        with modified assumptions.
+        """
         # LBO Entry Assumptions
         latest_ebitda = historical.get('latest_ebitda', 0)
-        entry_multiple = 12.0  # 12x EBITDA entry (typical for quality assets)
+        entry_multiple = assumptions.entry_multiple
         purchase_price = latest_ebitda * entry_multiple
         
         # Capital Structure (typical PE deal)
-        equity_percent = 0.35  # 35% equity
-        debt_percent = 0.65  # 65% debt (leverage)
+        equity_percent = assumptions.equity_percent
+        debt_percent = 1 - equity_percent
         
         equity_contribution = purchase_price * equity_percent
         debt_raised = purchase_price * debt_percent
         
         # Debt Terms
-        debt_interest_rate = 0.07  # 7% blended rate
-        debt_term_years = 7
+        debt_interest_rate = assumptions.debt_interest_rate
+        debt_term_years = assumptions.holding_period
         
         # Operating Assumptions (based on historical)
-        base_growth = historical.get('avg_revenue_growth', 0.05)
-        growth_rates = [base_growth * 0.9**i for i in range(7)]  # Declining growth
-        ebitda_margin = historical.get('ebitda_margin', 0.20)
-        
-        # Build 7-year projection
+        base_growth = assumptions.revenue_growth
+        if base_growth is None:
+            base_growth = historical.get('avg_revenue_growth', 0.05)
+        ebitda_margin = assumptions.ebitda_margin
+        if ebitda_margin is None:
+            ebitda_margin = historical.get('ebitda_margin', 0.20)
+        holding_period = assumptions.holding_period
+        growth_rates = [base_growth * 0.9**i for i in range(holding_period)]  # Declining growth
+        
+        # Build projection over the holding period
         projections = []
         current_revenue = historical.get('latest_revenue', 0)
         outstanding_debt = debt_raised
         
-        for year in range(1, 8):
+        for year in range(1, holding_period + 1):
             # Revenue
             growth = growth_rates[year - 1]
             current_revenue = current_revenue * (1 + growth)
@@ -1029,7 +1062,7 @@ with sensitivity to key value drivers such as WACC and terminal growth assumptio
             ebit = ebitda - depreciation
             interest_expense = outstanding_debt * debt_interest_rate
             ebt = ebit - interest_expense
-            taxes = max(0, ebt * 0.21)  # 21% tax rate
+            taxes = max(0, ebt * assumptions.tax_rate)
             net_income = ebt - taxes
             
             # Add back D&A, subtract CapEx and NWC
@@ -1040,7 +1073,7 @@ with sensitivity to key value drivers such as WACC and terminal growth assumptio
             fcf = net_income + depreciation - capex - nwc_investment
             
             # Debt paydown (all excess cash goes to debt)
-            debt_paydown = max(0, fcf * 0.75)  # 75% of FCF to debt
+            debt_paydown = max(0, fcf * assumptions.cash_sweep)
             outstanding_debt = max(0, outstanding_debt - debt_paydown)
             
             projections.append({
@@ -1055,9 +1088,9 @@ with sensitivity to key value drivers such as WACC and terminal growth assumptio
                 'outstanding_debt': outstanding_debt
             })
         
-        # Exit Assumptions (Year 7)
+        # Exit Assumptions (final year of holding period)
         exit_ebitda = projections[-1]['ebitda']
-        exit_multiple = 11.0  # 11x EBITDA exit (slight discount to entry)
+        exit_multiple = assumptions.exit_multiple
         exit_enterprise_value = exit_ebitda * exit_multiple
         remaining_debt = projections[-1]['outstanding_debt']
         exit_equity_value = exit_enterprise_value - remaining_debt
@@ -1065,7 +1098,6 @@ with sensitivity to key value drivers such as WACC and terminal growth assumptio
         # Returns Calculation
         initial_equity = equity_contribution
         final_equity = exit_equity_value
-        holding_period = 7  # years
         
         # IRR Calculation
         # IRR is the rate where NPV of cash flows = 0
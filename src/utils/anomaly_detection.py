@@ -10,27 +10,402 @@ Revolutionary Capabilities:
 - Real-time anomaly scoring for new data points
 - Relationship modeling between financial metrics
 - Early warning system for operational irregularities
+- Vectorized screening of whole peer sets and watchlists in one pass
+
+Baselines are learned on an (entities x periods x metrics) array so every
+period of every entity is scored at once (z-scores, robust MAD scores and
+ratio-relationship violations), and new quarters can be folded into the
+baselines incrementally without retraining.
 """
 
+from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional, Tuple
+import warnings
 import numpy as np
 from datetime import datetime
 import statistics
 
+from .financial_statements import StatementTable
+
+
+# Metrics profiled by the detector
+KEY_METRICS = [
+    'revenue', 'cost_of_revenue', 'gross_profit', 'operating_expenses',
+    'operating_income', 'net_income', 'total_assets', 'total_liabilities',
+    'total_equity', 'cash', 'inventory', 'accounts_receivable',
+    'accounts_payable', 'operating_cash_flow'
+]
+
+# Key relationships to monitor
+METRIC_RELATIONSHIPS = [
+    {
+        'name': 'inventory_revenue_relationship',
+        'numerator': 'inventory',
+        'denominator': 'revenue',
+        'description': 'Inventory as % of revenue'
+    },
+    {
+        'name': 'ar_revenue_relationship',
+        'numerator': 'accounts_receivable',
+        'denominator': 'revenue',
+        'description': 'AR as % of revenue (DSO proxy)'
+    },
+    {
+        'name': 'cogs_revenue_relationship',
+        'numerator': 'cost_of_revenue',
+        'denominator': 'revenue',
+        'description': 'COGS as % of revenue (gross margin inverse)'
+    },
+    {
+        'name': 'opex_revenue_relationship',
+        'numerator': 'operating_expenses',
+        'denominator': 'revenue',
+        'description': 'OpEx as % of revenue'
+    },
+    {
+        'name': 'cash_assets_relationship',
+        'numerator': 'cash',
+        'denominator': 'total_assets',
+        'description': 'Cash as % of assets'
+    }
+]
+
+# Minimum observations before a metric or ratio gets a baseline
+MIN_TRAINING_PERIODS = 4
+
+# Scales MAD to a standard-deviation equivalent for normally distributed data
+MAD_SCALE = 1.4826
+
+# Entity name used by the single-company train()/detect_anomalies() API
+DEFAULT_ENTITY = 'target'
+
+
+def _to_float(value: Any) -> float:
+    """Convert a statement value to float, NaN when missing or non-numeric"""
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+@dataclass
+class FinancialPanel:
+    """
+    Financial data for several entities as an (entities x periods x metrics) array
+    
+    Entities with fewer periods are padded with NaN, as are missing values.
+    """
+    entities: List[str]
+    metrics: List[str]
+    values: np.ndarray
+    
+    @classmethod
+    def from_periods(
+        cls,
+        data: Dict[str, List[Dict[str, Any]]],
+        metrics: Optional[List[str]] = None
+    ) -> 'FinancialPanel':
+        """
+        Build a panel from per-entity lists of period dicts
+        
+        Metric names are resolved through the statement field aliases, so
+        raw FMP statements (e.g. costOfRevenue) work as well as snake_case dicts.
+        
+        Args:
+            data: Mapping of entity (e.g. ticker) to its financial statements
+            metrics: Metrics to extract (defaults to KEY_METRICS)
+        """
+        metrics = list(metrics or KEY_METRICS)
+        entities = list(data.keys())
+        n_periods = max((len(periods) for periods in data.values()), default=0)
+        values = np.full((len(entities), n_periods, len(metrics)), np.nan)
+        for e, entity in enumerate(entities):
+            table = StatementTable(data[entity])
+            for k, metric in enumerate(metrics):
+                values[e, :len(table), k] = table.column(metric)
+        return cls(entities, metrics, values)
+        
+    @property
+    def n_periods(self) -> int:
+        return self.values.shape[1]
+        
+    def column(self, metric: str) -> np.ndarray:
+        """(entities x periods) slice for one metric, all-NaN if absent"""
+        if metric in self.metrics:
+            return self.values[:, :, self.metrics.index(metric)]
+        return np.full(self.values.shape[:2], np.nan)
+        
+    def ratios(self, relationships: List[Dict[str, str]]) -> np.ndarray:
+        """(entities x periods x relationships) ratios, NaN where undefined"""
+        ratios = np.full(self.values.shape[:2] + (len(relationships),), np.nan)
+        for r, relationship in enumerate(relationships):
+            num = self.column(relationship['numerator'])
+            denom = self.column(relationship['denominator'])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios[:, :, r] = np.where(denom != 0, num / denom, np.nan)
+        return ratios
+
+
+@dataclass
+class BaselineStats:
+    """
+    Per-entity baseline statistics, each an (entities x features) array
+    
+    count/mean/m2 are Welford accumulators so new periods can be folded in
+    without revisiting history; median and MAD are recomputed per entity.
+    """
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    median: np.ndarray
+    mad: np.ndarray
+    
+    @classmethod
+    def from_history(cls, history: np.ndarray) -> 'BaselineStats':
+        """Summarize an (entities x periods x features) array over periods"""
+        observed = ~np.isnan(history)
+        count = observed.sum(axis=1).astype(float)
+        mean = np.where(count > 0, np.nansum(history, axis=1) / np.maximum(count, 1), np.nan)
+        deviations = np.where(observed, history - mean[:, None, :], 0.0)
+        m2 = (deviations ** 2).sum(axis=1)
+        median, mad = _median_mad(history)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            minimum = np.nanmin(history, axis=1) if history.shape[1] else np.full(count.shape, np.nan)
+            maximum = np.nanmax(history, axis=1) if history.shape[1] else np.full(count.shape, np.nan)
+        return cls(count, mean, m2, minimum, maximum, median, mad)
+        
+    @property
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (0 with fewer than two observations)"""
+        return np.sqrt(np.where(self.count > 1, self.m2 / np.maximum(self.count - 1, 1), 0.0))
+        
+    def effective_std(self, zero_std_floor: float) -> np.ndarray:
+        """Std used for scoring: constant series fall back to 10% of the mean"""
+        std = self.std
+        fallback = np.where(self.mean != 0, np.abs(self.mean) * 0.1, zero_std_floor)
+        return np.where(std == 0, fallback, std)
+        
+    def valid(self, min_periods: int = MIN_TRAINING_PERIODS) -> np.ndarray:
+        return self.count >= min_periods
+        
+    def grow(self, n_entities: int):
+        """Add empty rows for newly seen entities"""
+        extra = n_entities - self.count.shape[0]
+        if extra <= 0:
+            return
+        width = self.count.shape[1]
+        for name in ('count', 'm2'):
+            setattr(self, name, np.vstack([getattr(self, name), np.zeros((extra, width))]))
+        for name in ('mean', 'minimum', 'maximum', 'median', 'mad'):
+            setattr(self, name, np.vstack([getattr(self, name), np.full((extra, width), np.nan)]))
+            
+    def update(self, rows: np.ndarray, entity_idx: np.ndarray, history: np.ndarray):
+        """
+        Fold one new period per entity into the accumulators
+        
+        Args:
+            rows: (n x features) new observations, NaN where missing
+            entity_idx: Entity row for each observation
+            history: Full (entities x periods x features) history including the new rows
+        """
+        observed = ~np.isnan(rows)
+        count = self.count[entity_idx] + observed
+        mean = np.where(np.isnan(self.mean[entity_idx]), 0.0, self.mean[entity_idx])
+        delta = np.where(observed, rows - mean, 0.0)
+        new_mean = mean + np.where(observed, delta / np.maximum(count, 1), 0.0)
+        self.m2[entity_idx] += np.where(observed, delta * (rows - new_mean), 0.0)
+        self.mean[entity_idx] = np.where(count > 0, new_mean, np.nan)
+        self.count[entity_idx] = count
+        self.minimum[entity_idx] = np.fmin(self.minimum[entity_idx], rows)
+        self.maximum[entity_idx] = np.fmax(self.maximum[entity_idx], rows)
+        self.median[entity_idx], self.mad[entity_idx] = _median_mad(history[entity_idx])
+        
+    def entity_dict(self, e: int, names: List[str], min_periods: int = MIN_TRAINING_PERIODS) -> Dict[str, Dict[str, Any]]:
+        """Baselines of one entity as {feature: {mean, std, ...}}"""
+        std = self.std
+        return {
+            name: {
+                'mean': float(self.mean[e, k]),
+                'std': float(std[e, k]),
+                'min': float(self.minimum[e, k]),
+                'max': float(self.maximum[e, k]),
+                'median': float(self.median[e, k]),
+                'mad': float(self.mad[e, k]),
+                'sample_size': int(self.count[e, k])
+            }
+            for k, name in enumerate(names)
+            if self.count[e, k] >= min_periods
+        }
+
+
+def _median_mad(history: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Median and median absolute deviation over the period axis"""
+    if history.shape[1] == 0:
+        empty = np.full((history.shape[0], history.shape[2]), np.nan)
+        return empty, empty.copy()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        median = np.nanmedian(history, axis=1)
+        mad = np.nanmedian(np.abs(history - median[:, None, :]), axis=1)
+    return median, mad
+
+
+def _robust_z(values: np.ndarray, median: np.ndarray, mad: np.ndarray) -> np.ndarray:
+    """Robust z-score; NaN where the MAD is zero or undefined"""
+    scale = mad * MAD_SCALE
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(scale > 0, (values - median) / scale, np.nan)
+
+
+@dataclass
+class PanelScores:
+    """
+    Anomaly scores for every entity, period and metric of a panel
+    
+    Arrays are (entities x periods x metrics) or (entities x periods x
+    relationships); entries without a trained baseline are NaN.
+    """
+    entities: List[str]
+    metrics: List[str]
+    relationships: List[Dict[str, str]]
+    values: np.ndarray
+    z: np.ndarray
+    robust_z: np.ndarray
+    ratios: np.ndarray
+    ratio_z: np.ndarray
+    threshold: float
+    
+    def metric_flags(self, method: str = 'zscore') -> np.ndarray:
+        """
+        Boolean anomaly mask for metrics
+        
+        Args:
+            method: 'zscore', 'mad' or 'either'
+        """
+        with np.errstate(invalid='ignore'):
+            z_flags = np.abs(self.z) > self.threshold
+            mad_flags = np.abs(self.robust_z) > self.threshold
+        if method == 'zscore':
+            return z_flags
+        if method == 'mad':
+            return mad_flags
+        if method == 'either':
+            return z_flags | mad_flags
+        raise ValueError(f"Unknown scoring method: {method}")
+        
+    def ratio_flags(self) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            return np.abs(self.ratio_z) > self.threshold
+            
+    def anomalies(self, method: str = 'zscore') -> List[Dict[str, Any]]:
+        """Flagged metric observations, largest |z| first"""
+        found = []
+        for e, t, m in zip(*np.nonzero(self.metric_flags(method))):
+            found.append({
+                'entity': self.entities[e],
+                'period_index': int(t),
+                'metric': self.metrics[m],
+                'value': float(self.values[e, t, m]),
+                'z_score': float(self.z[e, t, m]),
+                'robust_z_score': None if np.isnan(self.robust_z[e, t, m]) else float(self.robust_z[e, t, m])
+            })
+        return sorted(found, key=lambda a: abs(a['z_score']), reverse=True)
+        
+    def relationship_violations(self) -> List[Dict[str, Any]]:
+        """Flagged ratio observations, most severe first"""
+        found = []
+        for e, t, r in zip(*np.nonzero(self.ratio_flags())):
+            found.append({
+                'entity': self.entities[e],
+                'period_index': int(t),
+                'relationship': self.relationships[r]['name'],
+                'description': self.relationships[r]['description'],
+                'current_ratio': float(self.ratios[e, t, r]),
+                'z_score': float(self.ratio_z[e, t, r]),
+                'severity': float(abs(self.ratio_z[e, t, r]))
+            })
+        return sorted(found, key=lambda v: v['severity'], reverse=True)
+        
+    def entity_summary(self, period_index: int = -1, method: str = 'zscore') -> Dict[str, Dict[str, Any]]:
+        """
+        Per-entity screen for one period (default: the last scored period)
+        
+        Uses the same scoring as AnomalyDetector.detect_anomalies: the overall
+        score is the mean |z| of flagged metrics and relationships.
+        """
+        summary = {}
+        if not self.z.shape[1]:
+            return summary
+        metric_flags = self.metric_flags(method)[:, period_index]
+        ratio_flags = self.ratio_flags()[:, period_index]
+        abs_z = np.abs(np.nan_to_num(self.z[:, period_index]))
+        abs_ratio_z = np.abs(np.nan_to_num(self.ratio_z[:, period_index]))
+        for e, entity in enumerate(self.entities):
+            scores = np.concatenate([abs_z[e][metric_flags[e]], abs_ratio_z[e][ratio_flags[e]]])
+            summary[entity] = {
+                'anomaly_count': int(metric_flags[e].sum()),
+                'violation_count': int(ratio_flags[e].sum()),
+                'overall_anomaly_score': float(scores.mean()) if scores.size else 0.0,
+                'flagged_metrics': [self.metrics[m] for m in np.nonzero(metric_flags[e])[0]],
+                'flagged_relationships': [self.relationships[r]['name'] for r in np.nonzero(ratio_flags[e])[0]]
+            }
+        return summary
+
 
 class AnomalyDetector:
     """
     Machine learning-based anomaly detection for financial metrics.
     
     This system learns historical patterns and identifies deviations that may
-    indicate operational issues, fraud, or other concerns.
+    indicate operational issues, fraud, or other concerns. Baselines are kept
+    per entity, so one detector can screen a whole peer set or watchlist.
     """
     
-    def __init__(self):
-        self.baseline_patterns = {}
-        self.metric_relationships = {}
+    def __init__(
+        self,
+        metrics: Optional[List[str]] = None,
+        relationships: Optional[List[Dict[str, str]]] = None,
+        min_periods: int = MIN_TRAINING_PERIODS
+    ):
+        self.metrics = list(metrics or KEY_METRICS)
+        self.relationships = list(relationships or METRIC_RELATIONSHIPS)
+        self.min_periods = min_periods
+        self.entities: List[str] = []
+        self.history: Optional[FinancialPanel] = None
+        self.lengths = np.zeros(0, dtype=int)
+        self.metric_stats: Optional[BaselineStats] = None
+        self.ratio_stats: Optional[BaselineStats] = None
         self.trained = False
         
+    @property
+    def baseline_patterns(self) -> Dict[str, Dict[str, Any]]:
+        """Metric baselines of the single-company (first) entity"""
+        if not self.trained:
+            return {}
+        return self.metric_stats.entity_dict(0, self.metrics, self.min_periods)
+        
+    @property
+    def metric_relationships(self) -> Dict[str, Dict[str, Any]]:
+        """Relationship baselines of the single-company (first) entity"""
+        if not self.trained:
+            return {}
+        baselines = self.ratio_stats.entity_dict(0, [r['name'] for r in self.relationships], self.min_periods)
+        by_name = {r['name']: r for r in self.relationships}
+        return {
+            name: {
+                'numerator': by_name[name]['numerator'],
+                'denominator': by_name[name]['denominator'],
+                'description': by_name[name]['description'],
+                **stats
+            }
+            for name, stats in baselines.items()
+        }
+        
     def train(self, historical_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Train the anomaly detector on historical financial data.
@@ -46,25 +421,148 @@ class AnomalyDetector:
                 'success': False,
                 'message': 'Insufficient historical data for training (need at least 4 periods)'
             }
+            
+        self.fit(FinancialPanel.from_periods({DEFAULT_ENTITY: historical_data}, self.metrics))
         
-        # Learn baseline patterns for key metrics
-        self._learn_baseline_patterns(historical_data)
+        return {
+            'success': True,
+            'periods_analyzed': len(historical_data),
+            'metrics_profiled': len(self.baseline_patterns),
+            'relationships_learned': len(self.metric_relationships),
+            'timestamp': datetime.now().isoformat()
+        }
         
-        # Learn relationships between metrics
-        self._learn_metric_relationships(historical_data)
+    def fit(self, panel: FinancialPanel) -> Dict[str, Any]:
+        """
+        Learn baselines for every entity of a panel in one pass.
         
+        Args:
+            panel: Historical data (entities x periods x metrics)
+            
+        Returns:
+            Training summary
+        """
+        panel = self._align(panel)
+        self.entities = list(panel.entities)
+        self.history = panel
+        self.lengths = (~np.isnan(panel.values).all(axis=2)).sum(axis=1) if panel.n_periods else np.zeros(len(panel.entities), dtype=int)
+        self.metric_stats = BaselineStats.from_history(panel.values)
+        self.ratio_stats = BaselineStats.from_history(panel.ratios(self.relationships))
         self.trained = True
         
         return {
             'success': True,
-            'periods_analyzed': len(historical_data),
-            'metrics_profiled': len(self.baseline_patterns),
-            'relationships_learned': len(self.metric_relationships),
+            'entities': len(self.entities),
+            'periods_analyzed': panel.n_periods,
+            'baselines_learned': int(self.metric_stats.valid(self.min_periods).sum()),
+            'relationship_baselines_learned': int(self.ratio_stats.valid(self.min_periods).sum()),
             'timestamp': datetime.now().isoformat()
         }
         
+    def update(self, new_periods: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fold a new period (e.g. the latest quarter) into the baselines.
+        
+        Means and standard deviations are updated incrementally; entities not
+        seen during training are added with empty baselines.
+        
+        Args:
+            new_periods: Mapping of entity to its new period's financial data
+            
+        Returns:
+            Update summary
+        """
+        if not self.trained:
+            self.fit(FinancialPanel.from_periods({e: [p] for e, p in new_periods.items()}, self.metrics))
+            return {'success': True, 'entities_updated': len(new_periods), 'new_entities': len(new_periods)}
+            
+        new_entities = [e for e in new_periods if e not in self.entities]
+        if new_entities:
+            self.entities.extend(new_entities)
+            pad = np.full((len(new_entities),) + self.history.values.shape[1:], np.nan)
+            self.history.values = np.concatenate([self.history.values, pad])
+            self.history.entities = self.entities
+            self.lengths = np.concatenate([self.lengths, np.zeros(len(new_entities), dtype=int)])
+            self.metric_stats.grow(len(self.entities))
+            self.ratio_stats.grow(len(self.entities))
+            
+        entity_idx = np.array([self.entities.index(e) for e in new_periods], dtype=int)
+        if self.lengths[entity_idx].max(initial=0) >= self.history.n_periods:
+            pad = np.full((len(self.entities), 1, len(self.metrics)), np.nan)
+            self.history.values = np.concatenate([self.history.values, pad], axis=1)
+            
+        rows = FinancialPanel.from_periods({e: [p] for e, p in new_periods.items()}, self.metrics).values[:, 0, :]
+        self.history.values[entity_idx, self.lengths[entity_idx]] = rows
+        self.lengths[entity_idx] += 1
+        
+        row_panel = FinancialPanel(list(new_periods), self.metrics, rows[:, None, :])
+        ratio_rows = row_panel.ratios(self.relationships)[:, 0, :]
+        self.metric_stats.update(rows, entity_idx, self.history.values)
+        self.ratio_stats.update(ratio_rows, entity_idx, self.history.ratios(self.relationships))
+        
+        return {
+            'success': True,
+            'entities_updated': len(entity_idx),
+            'new_entities': len(new_entities),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+    def score(self, panel: FinancialPanel, threshold: float = 2.0) -> PanelScores:
+        """
+        Score every period of every entity in a panel against its baseline.
+        
+        Args:
+            panel: Data to score; entities must have been trained
+            threshold: Number of standard deviations for anomaly threshold
+            
+        Returns:
+            PanelScores (entities without a baseline score as NaN)
+        """
+        if not self.trained:
+            raise RuntimeError('Detector not trained. Call fit() or train() first.')
+            
+        panel = self._align(panel)
+        idx = np.array([self.entities.index(e) if e in self.entities else -1 for e in panel.entities], dtype=int)
+        known = (idx >= 0)[:, None]
+        
+        def gather(stats: np.ndarray) -> np.ndarray:
+            return np.where(known, stats[np.maximum(idx, 0)], np.nan)[:, None, :]
+            
+        metric_valid = gather(np.where(self.metric_stats.valid(self.min_periods), 1.0, np.nan))
+        metric_mean = gather(self.metric_stats.mean) * metric_valid
+        metric_std = gather(self.metric_stats.effective_std(1.0))
+        z = (panel.values - metric_mean) / metric_std
+        robust_z = _robust_z(panel.values, gather(self.metric_stats.median), gather(self.metric_stats.mad)) * metric_valid
+        
+        ratios = panel.ratios(self.relationships)
+        ratio_valid = gather(np.where(self.ratio_stats.valid(self.min_periods), 1.0, np.nan))
+        ratio_mean = gather(self.ratio_stats.mean) * ratio_valid
+        ratio_z = (ratios - ratio_mean) / gather(self.ratio_stats.effective_std(0.1))
+        
+        return PanelScores(
+            entities=list(panel.entities),
+            metrics=self.metrics,
+            relationships=self.relationships,
+            values=panel.values,
+            z=z,
+            robust_z=robust_z,
+            ratios=ratios,
+            ratio_z=ratio_z,
+            threshold=threshold
+        )
+        
+    def _align(self, panel: FinancialPanel) -> FinancialPanel:
+        """Reorder a panel's metric axis to the detector's metrics"""
+        if panel.metrics == self.metrics:
+            return panel
+        values = np.full(panel.values.shape[:2] + (len(self.metrics),), np.nan)
+        for k, metric in enumerate(self.metrics):
+            if metric in panel.metrics:
+                values[:, :, k] = panel.column(metric)
+        return FinancialPanel(list(panel.entities), self.metrics, values)
+        
     def detect_anomalies(
-        self, 
+        self,
         current_data: Dict[str, Any],
         threshold: float = 2.0
     ) -> Dict[str, Any]:
@@ -82,7 +580,7 @@ class AnomalyDetector:
             return {
                 'error': 'Detector not trained. Call train() first.'
             }
-        
+            
         results = {
             'anomalies_detected': [],
             'relationship_violations': [],
@@ -91,30 +589,60 @@ class AnomalyDetector:
             'timestamp': datetime.now().isoformat()
         }
         
+        entity = self.entities[0]
+        scores = self.score(
+            FinancialPanel.from_periods({entity: [current_data]}, self.metrics),
+            threshold
+        )
+        metric_flags = scores.metric_flags()[0, 0]
+        ratio_flags = scores.ratio_flags()[0, 0]
+        
         # Check each metric for anomalies
         metric_scores = []
-        for metric_name, baseline in self.baseline_patterns.items():
-            if metric_name in current_data:
-                current_value = current_data[metric_name]
-                anomaly_info = self._check_metric_anomaly(
-                    metric_name, current_value, baseline, threshold
-                )
-                
-                if anomaly_info['is_anomaly']:
-                    results['anomalies_detected'].append(anomaly_info)
-                    metric_scores.append(abs(anomaly_info['z_score']))
-        
+        metric_std = self.metric_stats.effective_std(1.0)[0]
+        for k in np.nonzero(metric_flags)[0]:
+            anomaly_info = self._describe_metric_anomaly(
+                self.metrics[k],
+                float(scores.values[0, 0, k]),
+                float(self.metric_stats.mean[0, k]),
+                float(metric_std[k]),
+                float(scores.z[0, 0, k]),
+                scores.robust_z[0, 0, k],
+                threshold
+            )
+            results['anomalies_detected'].append(anomaly_info)
+            metric_scores.append(abs(anomaly_info['z_score']))
+            
         # Check relationship violations
-        relationship_violations = self._check_relationship_violations(
-            current_data, threshold
-        )
-        results['relationship_violations'] = relationship_violations
-        
+        ratio_std = self.ratio_stats.effective_std(0.1)[0]
+        relationship_info = self.metric_relationships
+        for r in np.nonzero(ratio_flags)[0]:
+            rel_name = self.relationships[r]['name']
+            current_ratio = float(scores.ratios[0, 0, r])
+            expected_mean = float(self.ratio_stats.mean[0, r])
+            expected_std = float(ratio_std[r])
+            z_score = float(scores.ratio_z[0, 0, r])
+            results['relationship_violations'].append({
+                'relationship': rel_name,
+                'description': self.relationships[r]['description'],
+                'current_ratio': current_ratio,
+                'expected_ratio': expected_mean,
+                'expected_range': (
+                    expected_mean - 2*expected_std,
+                    expected_mean + 2*expected_std
+                ),
+                'z_score': z_score,
+                'severity': abs(z_score),
+                'interpretation': self._interpret_relationship_violation(
+                    rel_name, relationship_info[rel_name], current_ratio, expected_mean, z_score
+                )
+            })
+            
         # Calculate overall anomaly score
-        all_scores = metric_scores + [v['severity'] for v in relationship_violations]
+        all_scores = metric_scores + [v['severity'] for v in results['relationship_violations']]
         if all_scores:
             results['overall_anomaly_score'] = statistics.mean(all_scores)
-        
+            
         # Determine risk level
         results['risk_level'] = self._assess_risk_level(
             results['overall_anomaly_score'],
@@ -124,107 +652,17 @@ class AnomalyDetector:
         
         return results
         
-    def _learn_baseline_patterns(self, historical_data: List[Dict[str, Any]]):
-        """Learn normal patterns for each financial metric."""
-        key_metrics = [
-            'revenue', 'cost_of_revenue', 'gross_profit', 'operating_expenses',
-            'operating_income', 'net_income', 'total_assets', 'total_liabilities',
-            'total_equity', 'cash', 'inventory', 'accounts_receivable',
-            'accounts_payable', 'operating_cash_flow'
-        ]
-        
-        for metric in key_metrics:
-            values = []
-            for period in historical_data:
-                if metric in period and period[metric] is not None:
-                    values.append(float(period[metric]))
-            
-            if len(values) >= 4:
-                self.baseline_patterns[metric] = {
-                    'mean': statistics.mean(values),
-                    'std': statistics.stdev(values) if len(values) > 1 else 0,
-                    'min': min(values),
-                    'max': max(values),
-                    'median': statistics.median(values),
-                    'sample_size': len(values)
-                }
-        
-    def _learn_metric_relationships(self, historical_data: List[Dict[str, Any]]):
-        """Learn typical relationships between financial metrics."""
-        # Define key relationships to monitor
-        relationships = [
-            {
-                'name': 'inventory_revenue_relationship',
-                'numerator': 'inventory',
-                'denominator': 'revenue',
-                'description': 'Inventory as % of revenue'
-            },
-            {
-                'name': 'ar_revenue_relationship',
-                'numerator': 'accounts_receivable',
-                'denominator': 'revenue',
-                'description': 'AR as % of revenue (DSO proxy)'
-            },
-            {
-                'name': 'cogs_revenue_relationship',
-                'numerator': 'cost_of_revenue',
-                'denominator': 'revenue',
-                'description': 'COGS as % of revenue (gross margin inverse)'
-            },
-            {
-                'name': 'opex_revenue_relationship',
-                'numerator': 'operating_expenses',
-                'denominator': 'revenue',
-                'description': 'OpEx as % of revenue'
-            },
-            {
-                'name': 'cash_assets_relationship',
-                'numerator': 'cash',
-                'denominator': 'total_assets',
-                'description': 'Cash as % of assets'
-            }
-        ]
-        
-        for relationship in relationships:
-            ratios = []
-            for period in historical_data:
-                num = period.get(relationship['numerator'])
-                denom = period.get(relationship['denominator'])
-                
-                if num is not None and denom is not None and denom != 0:
-                    ratio = float(num) / float(denom)
-                    ratios.append(ratio)
-            
-            if len(ratios) >= 4:
-                self.metric_relationships[relationship['name']] = {
-                    'numerator': relationship['numerator'],
-                    'denominator': relationship['denominator'],
-                    'description': relationship['description'],
-                    'mean': statistics.mean(ratios),
-                    'std': statistics.stdev(ratios) if len(ratios) > 1 else 0,
-                    'min': min(ratios),
-                    'max': max(ratios),
-                    'sample_size': len(ratios)
-                }
-        
-    def _check_metric_anomaly(
+    def _describe_metric_anomaly(
         self,
         metric_name: str,
         current_value: float,
-        baseline: Dict[str, Any],
+        mean: float,
+        std: float,
+        z_score: float,
+        robust_z: float,
         threshold: float
     ) -> Dict[str, Any]:
-        """Check if a metric value is anomalous."""
-        mean = baseline['mean']
-        std = baseline['std']
-        
-        # Handle zero std (constant values)
-        if std == 0:
-            std = abs(mean) * 0.1 if mean != 0 else 1.0
-        
-        # Calculate z-score
-        z_score = (current_value - mean) / std if std > 0 else 0
-        
+        """Describe a scored metric value."""
         is_anomaly = abs(z_score) > threshold
         
         # Determine direction and severity
@@ -237,13 +675,14 @@ class AnomalyDetector:
         else:
             direction = 'normal'
             severity = 'Low'
-        
+            
         anomaly_info = {
             'metric': metric_name,
             'current_value': current_value,
             'expected_mean': mean,
             'expected_range': (mean - 2*std, mean + 2*std),
             'z_score': z_score,
+            'robust_z_score': None if np.isnan(robust_z) else float(robust_z),
             'is_anomaly': is_anomaly,
             'direction': direction,
             'severity': severity,
@@ -253,51 +692,7 @@ class AnomalyDetector:
         }
         
         return anomaly_info
-        
-    def _check_relationship_violations(
-        self,
-        current_data: Dict[str, Any],
-        threshold: float
-    ) -> List[Dict[str, Any]]:
-        """Check for violations of learned metric relationships."""
-        violations = []
-        
-        for rel_name, rel_info in self.metric_relationships.items():
-            num = current_data.get(rel_info['numerator'])
-            denom = current_data.get(rel_info['denominator'])
-            
-            if num is not None and denom is not None and denom != 0:
-                current_ratio = float(num) / float(denom)
-                expected_mean = rel_info['mean']
-                expected_std = rel_info['std']
-                
-                # Handle zero std
-                if expected_std == 0:
-                    expected_std = abs(expected_mean) * 0.1 if expected_mean != 0 else 0.1
-                
-                # Calculate z-score for relationship
-                z_score = (current_ratio - expected_mean) / expected_std if expected_std > 0 else 0
-                
-                if abs(z_score) > threshold:
-                    violation = {
-                        'relationship': rel_name,
-                        'description': rel_info['description'],
-                        'current_ratio': current_ratio,
-                        'expected_ratio': expected_mean,
-                        'expected_range': (
-                            expected_mean - 2*expected_std,
-                            expected_mean + 2*expected_std
-                        ),
-                        'z_score': z_score,
-                        'severity': abs(z_score),
-                        'interpretation': self._interpret_relationship_violation(
-                            rel_name, rel_info, current_ratio, expected_mean, z_score
-                        )
-                    }
-                    violations.append(violation)
-        
-        return violations
-        
+
     def _interpret_metric_anomaly(
         self,
         metric_name: str,
@@ -485,3 +880,117 @@ class AnomalyDetector:
             ]
         
         return report
+
+
+def screen_watchlist(
+    histories: Dict[str, List[Dict[str, Any]]],
+    threshold: float = 2.0,
+    newest_first: bool = True,
+    method: str = 'zscore'
+) -> Dict[str, Any]:
+    """
+    Screen the latest period of many companies against their own history.
+    
+    Trains one detector on every company's prior periods and scores all
+    latest periods in a single vectorized pass.
+    
+    Args:
+        histories: Mapping of ticker to its financial statements
+        threshold: Number of standard deviations for anomaly threshold
+        newest_first: Whether statements are ordered newest first (FMP order)
+        method: 'zscore', 'mad' or 'either'
+        
+    Returns:
+        Per-company summaries and the flagged observations
+    """
+    training = {}
+    latest = {}
+    for ticker, periods in histories.items():
+        ordered = list(periods) if newest_first else list(reversed(periods))
+        if len(ordered) < MIN_TRAINING_PERIODS + 1:
+            continue
+        latest[ticker] = [ordered[0]]
+        training[ticker] = ordered[1:]
+        
+    if not training:
+        return {
+            'companies_screened': 0,
+            'summary': {},
+            'anomalies': [],
+            'relationship_violations': [],
+            'note': f'Need at least {MIN_TRAINING_PERIODS + 1} periods per company'
+        }
+        
+    detector = AnomalyDetector()
+    detector.fit(FinancialPanel.from_periods(training))
+    scores = detector.score(FinancialPanel.from_periods(latest), threshold)
+    summary = scores.entity_summary(method=method)
+    for ticker, entry in summary.items():
+        entry['risk_level'] = detector._assess_risk_level(
+            entry['overall_anomaly_score'], entry['anomaly_count'], entry['violation_count']
+        )
+        
+    return {
+        'companies_screened': len(latest),
+        'summary': summary,
+        'anomalies': scores.anomalies(method),
+        'relationship_violations': scores.relationship_violations(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def screen_peer_outliers(
+    entity_metrics: Dict[str, Dict[str, Any]],
+    metrics: Optional[List[str]] = None,
+    threshold: float = 3.0
+) -> Dict[str, Any]:
+    """
+    Cross-sectional outlier screen across a peer set.
+    
+    Scores each company's metrics against the peer-set median using robust
+    (MAD) z-scores, so a single extreme peer does not mask the others.
+    
+    Args:
+        entity_metrics: Mapping of ticker to a flat metrics dict
+        metrics: Metrics to screen (defaults to every numeric metric present)
+        threshold: Robust z-score threshold
+        
+    Returns:
+        Outliers sorted by severity, plus the peer medians used
+    """
+    entities = list(entity_metrics.keys())
+    if metrics is None:
+        metrics = sorted({
+            key for values in entity_metrics.values() for key, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        })
+        
+    result = {
+        'entities_screened': len(entities),
+        'metrics_screened': list(metrics),
+        'outliers': [],
+        'peer_medians': {}
+    }
+    if len(entities) < MIN_TRAINING_PERIODS or not metrics:
+        result['note'] = f'Need at least {MIN_TRAINING_PERIODS} companies for a peer screen'
+        return result
+        
+    values = np.array([[_to_float(entity_metrics[e].get(m)) for m in metrics] for e in entities])
+    median, mad = _median_mad(values[None])
+    median, mad = median[0], mad[0]
+    robust_z = _robust_z(values, median, mad)
+    
+    with np.errstate(invalid='ignore'):
+        flagged = np.abs(robust_z) > threshold
+    for e, m in zip(*np.nonzero(flagged)):
+        result['outliers'].append({
+            'entity': entities[e],
+            'metric': metrics[m],
+            'value': float(values[e, m]),
+            'peer_median': float(median[m]),
+            'robust_z_score': float(robust_z[e, m]),
+            'direction': 'above_peers' if robust_z[e, m] > 0 else 'below_peers'
+        })
+    result['outliers'].sort(key=lambda o: abs(o['robust_z_score']), reverse=True)
+    result['peer_medians'] = {m: float(median[k]) for k, m in enumerate(metrics) if not np.isnan(median[k])}
+    return result
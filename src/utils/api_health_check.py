@@ -2,24 +2,27 @@
 API Health Check System
 Validates all API credentials and connectivity before workflow execution
 Prevents wasted time on failed runs due to API issues
+
+APIHealthMonitor keeps a cached, TTL-bound view of provider health that is
+refreshed by background probes and passively updated from real call outcomes,
+so jobs can check health in O(1) instead of probing every provider per job.
 """
+import importlib.util
 import os
+import time
 import asyncio
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Optional, Any
 from loguru import logger
 from datetime import datetime
 
-try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+# Background monitor configuration
+HEALTH_PROBE_INTERVAL_SECONDS = int(os.getenv("API_HEALTH_PROBE_INTERVAL", "300"))
+HEALTH_STATUS_TTL_SECONDS = int(os.getenv("API_HEALTH_STATUS_TTL", "900"))
+HEALTH_FAILURE_THRESHOLD = int(os.getenv("API_HEALTH_FAILURE_THRESHOLD", "3"))
 
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# The LLM SDKs are slow to import; they are loaded when a check first runs
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
 try:
     import requests
@@ -37,10 +40,13 @@ class APIHealthChecker:
         self.critical_apis = ['anthropic', 'fmp']  # Must have these
         self.optional_apis = ['google', 'openai', 'tavily']  # Nice to have
         
-    async def check_all_apis(self) -> Dict[str, any]:
+    async def check_all_apis(self, display: bool = True) -> Dict[str, any]:
         """
         Check all configured APIs
         
+        Args:
+            display: Whether to print the results table
+        
         Returns:
             Dictionary with health status for each API
         """
@@ -67,7 +73,8 @@ class APIHealthChecker:
             'overall_status': self._determine_overall_status()
         }
         
-        self._display_results()
+        if display:
+            self._display_results()
         
         return self.results
     
@@ -82,15 +89,13 @@ class APIHealthChecker:
             if not ANTHROPIC_AVAILABLE:
                 return {'status': 'error', 'message': 'anthropic package not installed'}
             
-            # Test API with minimal request
+            import anthropic
+            
+            # Test API with a models listing (authenticated, no tokens billed)
             client = anthropic.Anthropic(api_key=api_key)
             
-            # Quick test with very short message
-            message = client.messages.create(
-                model="claude-sonnet-4-5",
-                max_tokens=10,
-                messages=[{"role": "user", "content": "Hi"}]
-            )
+            # Run the blocking SDK call off the event loop
+            await asyncio.to_thread(client.models.list, limit=1)
             
             return {
                 'status': 'healthy',
@@ -119,9 +124,8 @@ class APIHealthChecker:
                 # Configure and test
                 genai.configure(api_key=api_key)
                 
-                # Test with minimal request
-                model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                response = model.generate_content("Hi", generation_config={'max_output_tokens': 10})
+                # Test with model metadata lookup (no tokens billed), off the event loop
+                await asyncio.to_thread(genai.get_model, 'models/gemini-2.0-flash-exp')
                 
                 return {
                     'status': 'healthy',
@@ -148,15 +152,13 @@ class APIHealthChecker:
             if not OPENAI_AVAILABLE:
                 return {'status': 'warning', 'message': 'openai package not installed (optional)'}
             
+            import openai
+            
             # Test connection
             client = openai.OpenAI(api_key=api_key)
             
-            # Minimal test
-            response = client.chat.completions.create(
-                model="gpt-5",
-                messages=[{"role": "user", "content": "Hi"}],
-                max_tokens=10
-            )
+            # Minimal test (model lookup, no tokens billed), off the event loop
+            await asyncio.to_thread(client.models.retrieve, "gpt-5")
             
             return {
                 'status': 'healthy',
@@ -183,7 +185,7 @@ class APIHealthChecker:
             
             # Test with profile endpoint (lightweight)
             url = f"https://financialmodelingprep.com/api/v3/profile/AAPL?apikey={api_key}"
-            response = requests.get(url, timeout=10)
+            response = await asyncio.to_thread(requests.get, url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -239,8 +241,9 @@ class APIHealthChecker:
                 
                 client = TavilyClient(api_key=api_key)
                 
-                # Perform minimal test search
-                test_result = client.search(
+                # Perform minimal test search (off the event loop)
+                test_result = await asyncio.to_thread(
+                    client.search,
                     query="test",
                     search_depth="basic",
                     max_results=1
@@ -357,6 +360,276 @@ class APIHealthChecker:
         return unhealthy
 
 
+class APIHealthMonitor:
+    """
+    Cached, background API health monitor
+    
+    Features:
+    - Periodic background probes (via APIHealthChecker) on an interval
+    - TTL-bound cached status per provider
+    - Passive updates from real call outcomes (LLM calls, FMP requests)
+    - O(1) health lookups for the orchestrator
+    """
+    
+    def __init__(
+        self,
+        probe_interval: int = HEALTH_PROBE_INTERVAL_SECONDS,
+        status_ttl: int = HEALTH_STATUS_TTL_SECONDS,
+        failure_threshold: int = HEALTH_FAILURE_THRESHOLD
+    ):
+        """
+        Initialize health monitor
+        
+        Args:
+            probe_interval: Seconds between background probes
+            status_ttl: Seconds after which a provider status is considered stale
+            failure_threshold: Consecutive real-call failures before a confirming probe is run
+        """
+        self.probe_interval = probe_interval
+        self.status_ttl = status_ttl
+        self.failure_threshold = failure_threshold
+        self.critical_apis = ['anthropic', 'fmp']
+        
+        # provider -> {'status', 'message', 'updated_at', 'source', 'consecutive_failures', 'last_latency_ms'}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._unhealthy_critical: set = set()
+        self._last_probe: float = 0.0
+        self._probe_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Start the background probe loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._probe_loop())
+        logger.info(f"API health monitor started (interval={self.probe_interval}s, ttl={self.status_ttl}s)")
+    
+    async def stop(self):
+        """Stop the background probe loop"""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("API health monitor stopped")
+    
+    async def _probe_loop(self):
+        """Probe all providers on an interval"""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Background API health probe failed: {e}")
+            await asyncio.sleep(self.probe_interval)
+    
+    async def refresh(self) -> Dict[str, Any]:
+        """
+        Run active probes for all providers and update the cache
+        
+        Concurrent callers share a single in-flight probe.
+        
+        Returns:
+            Snapshot of cached provider statuses
+        """
+        if self._probe_lock is None:
+            self._probe_lock = asyncio.Lock()
+        
+        if self._probe_lock.locked():
+            # Another probe is in flight - wait for it instead of probing again
+            async with self._probe_lock:
+                return self.snapshot()
+        
+        async with self._probe_lock:
+            checker = APIHealthChecker()
+            results = await checker.check_all_apis(display=False)
+            now = time.time()
+            
+            for api in checker.critical_apis + checker.optional_apis:
+                result = results.get(api)
+                if isinstance(result, Exception):
+                    result = {'status': 'error', 'message': f'Probe failed: {str(result)[:100]}'}
+                if not isinstance(result, dict):
+                    continue
+                entry = self._status.setdefault(api, {'consecutive_failures': 0})
+                entry.update(result)
+                entry['updated_at'] = now
+                entry['source'] = 'probe'
+                entry['consecutive_failures'] = 0 if result.get('status') == 'healthy' else entry.get('consecutive_failures', 0)
+                self._update_critical(api)
+            
+            self._last_probe = now
+            logger.debug(f"API health probe complete: {'healthy' if self.is_healthy() else 'unhealthy'}")
+            return self.snapshot()
+    
+    def record_success(self, provider: str, latency: Optional[float] = None):
+        """
+        Passively mark a provider healthy after a successful real call
+        
+        Args:
+            provider: Provider key (anthropic, google, openai, xai, fmp, tavily)
+            latency: Call latency in seconds
+        """
+        entry = self._status.setdefault(provider, {'consecutive_failures': 0})
+        entry['status'] = 'healthy'
+        entry['message'] = 'Recent call succeeded'
+        entry['updated_at'] = time.time()
+        entry['source'] = 'passive'
+        entry['consecutive_failures'] = 0
+        if latency is not None:
+            entry['last_latency_ms'] = round(latency * 1000, 1)
+        self._update_critical(provider)
+    
+    def record_failure(self, provider: str, error: str = "", rate_limited: bool = False):
+        """
+        Passively record a failed real call
+        
+        Failures (timeouts, 5xx, rate limits) only mark a provider 'warning'
+        (degraded): one slow upstream must not fail every new job. After
+        failure_threshold consecutive failures a background probe runs, and
+        only a probe can mark a provider 'missing' / 'error'.
+        
+        Args:
+            provider: Provider key
+            error: Error description
+            rate_limited: Whether the failure was an HTTP 429 / rate limit
+        """
+        entry = self._status.setdefault(provider, {'consecutive_failures': 0, 'status': 'healthy'})
+        entry['consecutive_failures'] = entry.get('consecutive_failures', 0) + 1
+        entry['updated_at'] = time.time()
+        entry['source'] = 'passive'
+        entry['message'] = str(error)[:100]
+        
+        if entry.get('status') not in ['missing', 'error']:
+            entry['status'] = 'warning'
+        if not rate_limited and entry['consecutive_failures'] == self.failure_threshold:
+            self._refresh_in_background()
+        self._update_critical(provider)
+    
+    def _refresh_in_background(self):
+        """Start a probe unless one is running (keeps a reference to the task)"""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        if self._probe_lock and self._probe_lock.locked():
+            return
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_quietly())
+        except RuntimeError:
+            pass  # No event loop (sync caller): the next scheduled probe confirms
+    
+    async def _refresh_quietly(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Background API health probe failed: {e}")
+    
+    def _update_critical(self, provider: str):
+        """Maintain the unhealthy-critical set so is_healthy() stays O(1)"""
+        if provider not in self.critical_apis:
+            return
+        if self._status.get(provider, {}).get('status') in ['missing', 'error']:
+            self._unhealthy_critical.add(provider)
+        else:
+            self._unhealthy_critical.discard(provider)
+    
+    def is_stale(self) -> bool:
+        """Whether the cached status is older than the TTL (or was never populated)"""
+        return not self._last_probe or time.time() - self._last_probe > self.status_ttl
+    
+    def is_healthy(self) -> bool:
+        """O(1) check that no critical API is known to be unhealthy"""
+        return not self._unhealthy_critical
+    
+    def get_unhealthy_apis(self) -> List[str]:
+        """Get list of unhealthy critical APIs"""
+        return sorted(self._unhealthy_critical)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get cached provider statuses in the same shape as APIHealthChecker results
+        
+        Returns:
+            Dictionary with status per provider plus timestamp and overall_status
+        """
+        results = {api: dict(entry) for api, entry in self._status.items()}
+        results['timestamp'] = datetime.fromtimestamp(self._last_probe).isoformat() if self._last_probe else None
+        results['overall_status'] = 'healthy' if self.is_healthy() else 'unhealthy'
+        return results
+    
+    async def get_status(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Get cached health without probing on the request path
+        
+        Only the very first call (empty cache) waits for a probe; stale
+        caches trigger a background refresh and return immediately.
+        
+        Returns:
+            Tuple of (is_healthy, results_dict)
+        """
+        if not self._last_probe:
+            await self.refresh()
+        elif self.is_stale():
+            self._refresh_in_background()
+        
+        return self.is_healthy(), self.snapshot()
+
+
+# Global health monitor instance
+_health_monitor: Optional[APIHealthMonitor] = None
+
+
+def get_health_monitor() -> APIHealthMonitor:
+    """Get global API health monitor instance"""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = APIHealthMonitor()
+    return _health_monitor
+
+
+def record_api_success(provider: str, latency: Optional[float] = None):
+    """Record a successful real API call with the global health monitor"""
+    try:
+        get_health_monitor().record_success(provider, latency)
+    except Exception as e:
+        logger.debug(f"Health monitor update failed: {e}")
+
+
+def record_api_failure(provider: str, error: str = "", rate_limited: bool = False):
+    """Record a failed real API call with the global health monitor"""
+    try:
+        get_health_monitor().record_failure(provider, error, rate_limited)
+    except Exception as e:
+        logger.debug(f"Health monitor update failed: {e}")
+
+
+def get_llm_provider(llm: Any) -> str:
+    """
+    Map an LLM instance to its health-monitor provider key
+    
+    Args:
+        llm: LangChain chat model instance
+    
+    Returns:
+        Provider key (anthropic, google, xai, openai, unknown)
+    """
+    class_name = type(llm).__name__
+    if 'Anthropic' in class_name:
+        return 'anthropic'
+    if 'Google' in class_name or 'Gemini' in class_name:
+        return 'google'
+    if 'OpenAI' in class_name:
+        base_url = str(getattr(llm, 'openai_api_base', '') or '')
+        return 'xai' if 'x.ai' in base_url else 'openai'
+    return 'unknown'
+
+
 async def run_health_check() -> Tuple[bool, Dict]:
     """
     Convenience function to run health check
@@ -13,6 +13,9 @@ from loguru import logger
 import pickle
 from pathlib import Path
 
+from .metrics import record_cache_lookup
+from .tracing import start_span
+
 
 @dataclass
 class CacheEntry:
@@ -100,23 +103,27 @@ class CacheManager:
         Returns:
             Cached value or None if not found/expired
         """
-        if key not in self._cache:
-            self._statistics["misses"] += 1
-            return None
-        
-        entry = self._cache[key]
-        
-        # Check if expired
-        if time.time() - entry.timestamp > entry.ttl_seconds:
-            del self._cache[key]
-            self._statistics["misses"] += 1
-            return None
-        
-        # Update hit count
-        entry.hit_count += 1
-        self._statistics["hits"] += 1
-        
-        return entry.value
+        with start_span("cache.lookup", {'cache.name': 'cache_manager', 'cache.key': key}) as span:
+            if key not in self._cache:
+                self._statistics["misses"] += 1
+                span.set_attribute('cache.hit', False)
+                return None
+            
+            entry = self._cache[key]
+            
+            # Check if expired
+            if time.time() - entry.timestamp > entry.ttl_seconds:
+                del self._cache[key]
+                self._statistics["misses"] += 1
+                span.set_attributes({'cache.hit': False, 'cache.expired': True})
+                return None
+            
+            # Update hit count
+            entry.hit_count += 1
+            self._statistics["hits"] += 1
+            span.set_attribute('cache.hit', True)
+            
+            return entry.value
     
     def set(
         self,
@@ -272,7 +279,9 @@ class LLMResponseCache:
             max_tokens=max_tokens
         )
         
-        return self.cache.get(key)
+        response = self.cache.get(key)
+        record_cache_lookup('llm_response', response is not None)
+        return response
     
     def cache_response(
         self,
@@ -341,7 +350,9 @@ class FinancialCalculationCache:
             **params
         )
         
-        return self.cache.get(key)
+        result = self.cache.get(key)
+        record_cache_lookup('calculation', result is not None)
+        return result
     
     def cache_calculation(
         self,
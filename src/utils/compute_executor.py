@@ -0,0 +1,406 @@
+"""
+Compute Executor - Process-pool offload for CPU-heavy analysis
+
+Valuation (DCF, sensitivity, Monte Carlo, LBO, library integrations) and
+statement normalization are pure CPU work. Run inline inside an async agent
+they hold the one event loop that also serves the API and websockets, so
+concurrent jobs queue behind each other on a single core.
+
+The executor runs such work in a pool of warm worker processes:
+- Workers import numpy/pandas and the valuation modules once at start-up
+- Each job gets a CPU-seconds budget (RLIMIT_CPU) and a wall-clock timeout
+- Cancelling the awaiting task cancels a queued job or interrupts a running one
+- Task functions and their inputs must be picklable (see compute_tasks.py)
+"""
+import asyncio
+import importlib
+import itertools
+import math
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+from loguru import logger
+
+from .tracing import attach_context, inject_context, setup_tracing, start_span
+
+try:
+    import resource
+    HAS_RLIMIT_CPU = hasattr(resource, 'RLIMIT_CPU')
+except ImportError:  # Windows
+    HAS_RLIMIT_CPU = False
+
+HAS_CANCEL_SIGNAL = hasattr(signal, 'SIGUSR1')
+
+
+# Configuration (overridable via environment)
+COMPUTE_MAX_WORKERS = int(os.getenv("COMPUTE_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+COMPUTE_CPU_BUDGET_SECONDS = float(os.getenv("COMPUTE_CPU_BUDGET_SECONDS", "120"))
+COMPUTE_TIMEOUT_SECONDS = float(os.getenv("COMPUTE_TIMEOUT_SECONDS", "300"))
+COMPUTE_START_METHOD = os.getenv("COMPUTE_START_METHOD", "spawn")
+
+# Imported by every worker at start-up so the first job doesn't pay for it
+WARM_MODULES = (
+    'numpy',
+    'pandas',
+    f'{__package__}.advanced_valuation',
+    f'{__package__}.enhanced_valuation_engine',
+    f'{__package__}.financial_normalizer',
+    f'{__package__}.compute_tasks',
+)
+
+# Recently cancelled job ids, shared with the workers
+CANCEL_RING_SIZE = 256
+
+
+class ComputeTimeout(RuntimeError):
+    """A compute job did not finish within its wall-clock timeout"""
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+class _Interrupted(BaseException):
+    """Raised inside a worker by the cancel / CPU-limit signal handlers"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+_worker_slot = 0
+_running_jobs = None  # Array: job id running in each worker slot (0 = idle)
+_worker_pids = None  # Array: pid of each worker slot
+_cancelled_jobs = None  # Array: ring of cancelled job ids
+_current_job = 0
+
+
+def _init_worker(slot_counter, running_jobs, worker_pids, cancelled_jobs, warm_modules):
+    """Pool initializer: claim a slot, install signal handlers, warm imports"""
+    global _worker_slot, _running_jobs, _worker_pids, _cancelled_jobs
+    with slot_counter.get_lock():
+        _worker_slot = slot_counter.value % len(running_jobs)
+        slot_counter.value += 1
+    _running_jobs = running_jobs
+    _worker_pids = worker_pids
+    _cancelled_jobs = cancelled_jobs
+    _worker_pids[_worker_slot] = os.getpid()
+
+    # Ctrl+C goes to the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if HAS_CANCEL_SIGNAL:
+        signal.signal(signal.SIGUSR1, _on_cancel_signal)
+    if HAS_RLIMIT_CPU:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit_signal)
+
+    # Same exporter as the parent (from the environment), so worker spans join the job's trace
+    setup_tracing()
+
+    for module in warm_modules:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            logger.warning(f"Compute worker could not pre-import {module}: {e}")
+
+
+def _is_cancelled(job_id: int) -> bool:
+    # Lock-free read: this also runs inside signal handlers
+    return job_id in _cancelled_jobs[:]
+
+
+def _on_cancel_signal(signum, frame):
+    if _current_job and _is_cancelled(_current_job):
+        raise _Interrupted('cancelled')
+
+
+def _on_cpu_limit_signal(signum, frame):
+    if _current_job:
+        raise _Interrupted('cpu_budget')
+
+
+def _set_cpu_budget(cpu_budget: Optional[float]) -> Optional[Tuple[int, int]]:
+    """Lower RLIMIT_CPU to `cpu_budget` seconds beyond this worker's current usage"""
+    if not HAS_RLIMIT_CPU or not cpu_budget:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_budget)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    return soft, hard
+
+
+def _run_job(
+    job_id: int,
+    name: str,
+    cpu_budget: Optional[float],
+    fn: Callable,
+    args: tuple,
+    kwargs: dict,
+    trace_context: Optional[Dict[str, str]] = None
+):
+    """Execute one job inside a worker; returns (status, value, cpu_seconds)"""
+    global _current_job
+    if _is_cancelled(job_id):
+        return 'cancelled', None, 0.0
+
+    with attach_context(trace_context), start_span(f"compute.worker {name}", {'compute.job_id': job_id}) as span:
+        previous_limit = None
+        cpu_start = time.process_time()
+        status = 'ok'
+        _current_job = job_id
+        _running_jobs[_worker_slot] = job_id
+        try:
+            previous_limit = _set_cpu_budget(cpu_budget)
+            result = fn(*args, **kwargs)
+            return 'ok', result, time.process_time() - cpu_start
+        except _Interrupted as e:
+            status = e.reason
+            return e.reason, None, time.process_time() - cpu_start
+        finally:
+            _current_job = 0
+            _running_jobs[_worker_slot] = 0
+            if previous_limit is not None:
+                resource.setrlimit(resource.RLIMIT_CPU, previous_limit)
+            span.set_attributes({'compute.status': status, 'compute.cpu_seconds': time.process_time() - cpu_start})
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# ============================================================================
+# PARENT SIDE
+# ============================================================================
+
+class ComputeExecutor:
+    """
+    Process pool for CPU-heavy agent work
+
+    Usage:
+        executor = get_compute_executor()
+        dcf = await executor.run(compute_tasks.valuation_task, 'run_multi_scenario_dcf',
+                                 inputs, profile, name='DCF')
+
+    With max_workers=0 jobs run on a thread instead (no CPU budget, no
+    interruption), which keeps the event loop free on platforms where a
+    process pool is unavailable.
+
+    Other CPU-heavy stages can run their own pool (see the report pipeline),
+    with their own limits and warm_modules.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = COMPUTE_MAX_WORKERS,
+        cpu_budget: float = COMPUTE_CPU_BUDGET_SECONDS,
+        timeout: float = COMPUTE_TIMEOUT_SECONDS,
+        start_method: str = COMPUTE_START_METHOD,
+        warm_modules: Tuple[str, ...] = WARM_MODULES,
+        name: str = "Compute"
+    ):
+        self.max_workers = max_workers
+        self.cpu_budget = cpu_budget
+        self.timeout = timeout
+        self.start_method = start_method
+        self.warm_modules = warm_modules
+        self.name = name
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._job_ids = itertools.count(1)
+        self._cancel_cursor = 0
+        self._running_jobs = None
+        self._worker_pids = None
+        self._cancelled_jobs = None
+        self.active_jobs = 0
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'cpu_budget_exceeded': 0,
+            'timed_out': 0,
+            'pool_restarts': 0,
+            'cpu_seconds': 0.0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether jobs run in worker processes"""
+        return self.max_workers > 0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._running_jobs = context.Array('q', self.max_workers, lock=False)
+            self._worker_pids = context.Array('q', self.max_workers, lock=False)
+            self._cancelled_jobs = context.Array('q', CANCEL_RING_SIZE, lock=False)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(
+                    context.Value('i', 0),
+                    self._running_jobs,
+                    self._worker_pids,
+                    self._cancelled_jobs,
+                    self.warm_modules
+                )
+            )
+            logger.info(f"{self.name} executor started: {self.max_workers} worker processes ({self.start_method})")
+        return self._pool
+
+    async def warm_up(self):
+        """Start every worker now so the first analysis doesn't pay for process start-up"""
+        if not self.enabled:
+            return
+        pool = self._ensure_pool()
+        start = time.perf_counter()
+        pids = await asyncio.gather(*[
+            asyncio.wrap_future(pool.submit(_ping)) for _ in range(self.max_workers)
+        ])
+        logger.info(
+            f"{self.name} executor warm: {len(set(pids))} workers ready in "
+            f"{(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        name: Optional[str] = None,
+        cpu_budget: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Run fn(*args, **kwargs) in a worker process and await its result.
+
+        Args:
+            fn: Module-level (picklable) function
+            name: Job name for logging
+            cpu_budget: CPU seconds the job may use (default COMPUTE_CPU_BUDGET_SECONDS)
+            timeout: Wall-clock seconds to wait (default COMPUTE_TIMEOUT_SECONDS)
+
+        Returns:
+            The function's return value
+
+        Raises:
+            ComputeTimeout: If the job exceeds its wall-clock timeout
+            RuntimeError: If the job exceeds its CPU budget or the pool breaks
+            asyncio.CancelledError: If the awaiting task is cancelled
+        """
+        name = name or getattr(fn, '__name__', 'compute job')
+        timeout = timeout or self.timeout
+        self.stats['submitted'] += 1
+
+        with start_span(f"compute {name}", {
+            'compute.name': name,
+            'compute.mode': 'process' if self.enabled else 'thread',
+            'compute.timeout_seconds': timeout
+        }) as span:
+            if not self.enabled:
+                try:
+                    return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+                except asyncio.TimeoutError:
+                    self.stats['timed_out'] += 1
+                    raise ComputeTimeout(f"{name} exceeded its {timeout:g}s compute timeout")
+
+            job_id = next(self._job_ids)
+            pool = self._ensure_pool()
+            future = pool.submit(
+                _run_job, job_id, name, cpu_budget or self.cpu_budget, fn, args, kwargs, inject_context()
+            )
+            span.set_attribute('compute.job_id', job_id)
+            self.active_jobs += 1
+            try:
+                status, value, cpu_seconds = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except asyncio.TimeoutError:
+                self.stats['timed_out'] += 1
+                self._cancel(job_id, future)
+                raise ComputeTimeout(f"{name} exceeded its {timeout:g}s compute timeout")
+            except asyncio.CancelledError:
+                self.stats['cancelled'] += 1
+                self._cancel(job_id, future)
+                raise
+            except BrokenProcessPool as e:
+                self.stats['failed'] += 1
+                self._restart_pool(pool)
+                raise RuntimeError(f"{name} failed: compute worker died ({e})")
+            except Exception:
+                self.stats['failed'] += 1
+                raise
+            finally:
+                self.active_jobs -= 1
+
+            self.stats['cpu_seconds'] += cpu_seconds
+            span.set_attributes({'compute.status': status, 'compute.cpu_seconds': cpu_seconds})
+            if status == 'cpu_budget':
+                self.stats['cpu_budget_exceeded'] += 1
+                raise RuntimeError(f"{name} exceeded its {cpu_budget or self.cpu_budget:g}s CPU budget")
+            if status == 'cancelled':
+                self.stats['cancelled'] += 1
+                raise asyncio.CancelledError()
+
+            self.stats['completed'] += 1
+            logger.debug(f"Compute job {name} finished ({cpu_seconds:.2f} CPU s)")
+            return value
+
+    def _cancel(self, job_id: int, future: Future):
+        """Cancel a queued job, or interrupt it if a worker is already running it"""
+        if future.cancel():
+            return
+
+        self._cancelled_jobs[self._cancel_cursor % CANCEL_RING_SIZE] = job_id
+        self._cancel_cursor += 1
+        if not HAS_CANCEL_SIGNAL:
+            return
+        for slot, running in enumerate(self._running_jobs[:]):
+            if running == job_id:
+                try:
+                    os.kill(self._worker_pids[slot], signal.SIGUSR1)
+                except OSError as e:
+                    logger.debug(f"Could not signal compute worker: {e}")
+                return
+
+    def _restart_pool(self, pool: ProcessPoolExecutor):
+        if self._pool is pool:
+            self._pool = None
+            self.stats['pool_restarts'] += 1
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.warning(f"{self.name} worker pool broke - a new pool will be started on the next job")
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+            logger.info(f"{self.name} executor stopped")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Executor statistics"""
+        return {
+            'enabled': self.enabled,
+            'max_workers': self.max_workers,
+            'pool_started': self._pool is not None,
+            'active_jobs': self.active_jobs,
+            'cpu_budget_seconds': self.cpu_budget,
+            'timeout_seconds': self.timeout,
+            **self.stats
+        }
+
+
+# Global executor instance
+_compute_executor: Optional[ComputeExecutor] = None
+
+
+def get_compute_executor() -> ComputeExecutor:
+    """Get global compute executor instance"""
+    global _compute_executor
+    if _compute_executor is None:
+        _compute_executor = ComputeExecutor()
+    return _compute_executor
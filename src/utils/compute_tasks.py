@@ -0,0 +1,72 @@
+"""
+Compute Tasks - Picklable entry points for the compute executor
+
+Each function here runs inside a worker process: it receives plain dicts,
+builds the engine it needs locally and returns a plain dict, so nothing
+bound to the parent process (clients, locks, loggers) crosses the pool.
+"""
+from typing import Any, Dict, List, Optional
+
+from .advanced_valuation import AdvancedValuationEngine
+from .enhanced_valuation_engine import EnhancedValuationEngine
+from .financial_normalizer import FinancialNormalizer
+
+
+# financial_data keys the valuation engines read - everything else stays in the parent
+VALUATION_INPUT_KEYS = ('income_statement', 'balance_sheet', 'cash_flow', 'income_as_reported', 'target_ticker')
+
+VALUATION_METHODS = {
+    'run_multi_scenario_dcf',
+    'run_sensitivity_analysis',
+    'run_monte_carlo_valuation',
+    'run_lbo_analysis',
+    'run_full_valuation_suite',
+}
+
+
+def valuation_inputs(financial_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim financial_data to what the valuation engines use, to keep job payloads small"""
+    return {key: financial_data[key] for key in VALUATION_INPUT_KEYS if key in financial_data}
+
+
+def valuation_task(
+    method: str,
+    financial_data: Dict[str, Any],
+    company_profile: Dict[str, Any],
+    enhanced: bool = False,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Run one valuation engine method in a worker
+
+    Args:
+        method: Engine method name (see VALUATION_METHODS)
+        financial_data: Output of valuation_inputs()
+        company_profile: Company profile dict
+        enhanced: Use EnhancedValuationEngine (financetoolkit / finmodels) instead of the base engine
+        **kwargs: Extra method arguments (e.g. num_simulations)
+    """
+    if method not in VALUATION_METHODS:
+        raise ValueError(f"Unsupported valuation method: {method}")
+    engine = EnhancedValuationEngine() if enhanced else AdvancedValuationEngine()
+    return getattr(engine, method)(financial_data, company_profile, **kwargs)
+
+
+def normalization_task(
+    income_statements: List[Dict[str, Any]],
+    balance_sheets: List[Dict[str, Any]],
+    cash_flows: List[Dict[str, Any]],
+    income_as_reported: Optional[List[Dict[str, Any]]] = None,
+    company_info: Optional[Dict[str, Any]] = None,
+    llm_insights: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Rule-based statement normalization in a worker (the LLM step runs in the parent)"""
+    normalizer = FinancialNormalizer(use_llm_intelligence=False)
+    return normalizer.normalize_financial_statements(
+        income_statements,
+        balance_sheets,
+        cash_flows,
+        income_as_reported=income_as_reported,
+        company_info=company_info,
+        llm_insights=llm_insights
+    )
@@ -9,6 +9,8 @@ import numpy as np
 from loguru import logger
 from datetime import datetime
 
+from .financial_statements import get_financial_statements
+
 
 @dataclass
 class ValidationResult:
@@ -394,53 +396,50 @@ class FinancialDataValidator:
         """Detect statistical outliers in financial ratios"""
         outliers = []
         
-        income = data.get('income_statement', [])
-        balance = data.get('balance_sheet', [])
+        statements = get_financial_statements(data)
+        income = statements.income
         
-        if not (income and balance):
+        if not (len(income) and len(statements.balance)):
             return outliers
         
-        # Calculate ratios for outlier detection
-        for i in range(min(5, len(income))):  # Last 5 years
-            inc = income[i]
-            year = inc.get('date', f'Year {i}')
+        # Ratios for the last 5 years, balance sheet matched to income by period date
+        n = min(5, len(income))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            revenue = np.nan_to_num(income.column('revenue')[:n])
+            net_income = np.nan_to_num(income.column('net_income')[:n])
+            margins = {
+                'gross_margin': np.nan_to_num(income.column('gross_profit')[:n]) / revenue,
+                'operating_margin': np.nan_to_num(income.column('operating_income')[:n]) / revenue,
+                'net_margin': net_income / revenue
+            }
             
-            revenue = inc.get('revenue', 0)
-            gross_profit = inc.get('grossProfit', 0)
-            operating_income = inc.get('operatingIncome', 0)
-            net_income = inc.get('netIncome', 0)
+            current_assets = np.nan_to_num(statements.aligned('total_current_assets')[:n])
+            current_liabilities = np.nan_to_num(statements.aligned('total_current_liabilities')[:n], nan=1.0)
+            total_debt = np.nan_to_num(statements.aligned('total_debt')[:n])
+            total_equity = np.nan_to_num(statements.aligned('total_equity')[:n], nan=1.0)
             
-            if revenue > 0:
-                # Calculate margins
-                gross_margin = gross_profit / revenue
-                operating_margin = operating_income / revenue
-                net_margin = net_income / revenue
-                
-                # Check against ranges
-                self._check_ratio_range('gross_margin', gross_margin, year, outliers, warnings)
-                self._check_ratio_range('operating_margin', operating_margin, year, outliers, warnings)
-                self._check_ratio_range('net_margin', net_margin, year, outliers, warnings)
+            current_ratio = current_assets / current_liabilities
+            debt_to_equity = np.where(total_equity > 0, total_debt / total_equity, 999)
+            roe = net_income / total_equity
+        
+        balance_dates = set(statements.balance.dates)
+        for i in range(n):
+            year = income.records[i].get('date', f'Year {i}')
+            
+            if revenue[i] > 0:
+                for ratio_name, values in margins.items():
+                    self._check_ratio_range(ratio_name, float(values[i]), year, outliers, warnings)
             
             # Balance sheet ratios
-            if i < len(balance):
-                bal = balance[i]
-                
-                current_assets = bal.get('totalCurrentAssets', 0)
-                current_liabilities = bal.get('totalCurrentLiabilities', 1)
-                total_debt = bal.get('totalDebt', 0)
-                total_equity = bal.get('totalEquity', 1)
-                
-                if current_liabilities > 0:
-                    current_ratio = current_assets / current_liabilities
-                    self._check_ratio_range('current_ratio', current_ratio, year, outliers, warnings)
+            if income.dates[i] in balance_dates:
+                if current_liabilities[i] > 0:
+                    self._check_ratio_range('current_ratio', float(current_ratio[i]), year, outliers, warnings)
                 
-                if total_equity != 0:
-                    debt_to_equity = total_debt / total_equity if total_equity > 0 else 999
-                    self._check_ratio_range('debt_to_equity', debt_to_equity, year, outliers, warnings)
+                if total_equity[i] != 0:
+                    self._check_ratio_range('debt_to_equity', float(debt_to_equity[i]), year, outliers, warnings)
                     
-                    if net_income != 0:
-                        roe = net_income / total_equity
-                        self._check_ratio_range('roe', roe, year, outliers, warnings)
+                    if net_income[i] != 0:
+                        self._check_ratio_range('roe', float(roe[i]), year, outliers, warnings)
         
         return outliers
     
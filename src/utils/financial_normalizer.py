@@ -10,6 +10,7 @@ Handles:
 - R&D capitalization adjustments
 - Historical data normalization and trend analysis
 """
+import asyncio
 import re
 from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
@@ -17,6 +18,9 @@ import numpy as np
 from datetime import datetime
 from loguru import logger
 
+from .financial_statements import FinancialStatements
+from .llm_gateway import get_llm_gateway, ANTHROPIC_AVAILABLE as LLM_GATEWAY_AVAILABLE
+
 
 class FinancialNormalizer:
     """
@@ -52,27 +56,65 @@ class FinancialNormalizer:
         self.llm = None
         
         if use_llm_intelligence:
-            try:
-                from anthropic import Anthropic
-                import os
-                api_key = os.getenv('ANTHROPIC_API_KEY')
-                if api_key:
-                    self.llm = Anthropic(api_key=api_key)
-                    logger.info("✓ LLM-powered normalization ENABLED (Senior IB Intelligence)")
-                else:
-                    logger.warning("⚠️ ANTHROPIC_API_KEY not found - falling back to rule-based normalization")
-                    self.use_llm_intelligence = False
-            except ImportError:
+            gateway = get_llm_gateway()
+            if gateway.available:
+                # Shared async gateway - LLM calls never block the event loop
+                self.llm = gateway
+                logger.info("✓ LLM-powered normalization ENABLED (Senior IB Intelligence)")
+            elif not LLM_GATEWAY_AVAILABLE:
                 logger.warning("⚠️ Anthropic library not available - falling back to rule-based normalization")
                 self.use_llm_intelligence = False
+            else:
+                logger.warning("⚠️ ANTHROPIC_API_KEY not found - falling back to rule-based normalization")
+                self.use_llm_intelligence = False
     
-    def normalize_financial_statements(
+    async def normalize_financial_statements_async(
         self,
         income_statements: List[Dict[str, Any]],
         balance_sheets: List[Dict[str, Any]],
         cash_flows: List[Dict[str, Any]],
         income_as_reported: Optional[List[Dict[str, Any]]] = None,
         company_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of normalize_financial_statements for use inside the agent pipeline
+        
+        Awaits the LLM pre-analysis through the shared gateway, so other jobs keep
+        running while Claude responds, then performs the rule-based normalization
+        on the compute executor's worker processes.
+        
+        Returns:
+            Normalized financial data with adjustments
+        """
+        from .compute_executor import get_compute_executor
+        from .compute_tasks import normalization_task
+        
+        llm_insights = None
+        if self.use_llm_intelligence and self.llm:
+            logger.info("Step 0: Running LLM-powered pre-analysis (Senior IB perspective)...")
+            llm_insights = await self._llm_analyze_financial_quality(
+                income_statements, balance_sheets, cash_flows, company_info
+            )
+        
+        return await get_compute_executor().run(
+            normalization_task,
+            income_statements,
+            balance_sheets,
+            cash_flows,
+            income_as_reported=income_as_reported,
+            company_info=company_info,
+            llm_insights=llm_insights,
+            name="Financial normalization"
+        )
+    
+    def normalize_financial_statements(
+        self,
+        income_statements: List[Dict[str, Any]],
+        balance_sheets: List[Dict[str, Any]],
+        cash_flows: List[Dict[str, Any]],
+        income_as_reported: Optional[List[Dict[str, Any]]] = None,
+        company_info: Optional[Dict[str, Any]] = None,
+        llm_insights: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Perform comprehensive normalization of financial statements with LLM-powered intelligence
@@ -83,6 +125,7 @@ class FinancialNormalizer:
             cash_flows: List of annual cash flow statements
             income_as_reported: As-reported income statements for GAAP comparison
             company_info: Company profile information
+            llm_insights: Pre-computed LLM pre-analysis (from normalize_financial_statements_async)
         
         Returns:
             Normalized financial data with adjustments
@@ -107,11 +150,11 @@ class FinancialNormalizer:
         }
         
         # STEP 0: LLM-Powered Pre-Analysis (Senior IB Intelligence)
-        if self.use_llm_intelligence and self.llm:
-            logger.info("Step 0: Running LLM-powered pre-analysis (Senior IB perspective)...")
-            llm_insights = self._llm_analyze_financial_quality(
+        if llm_insights is None and self.use_llm_intelligence and self.llm:
+            llm_insights = self._run_llm_pre_analysis(
                 income_statements, balance_sheets, cash_flows, company_info
             )
+        if llm_insights is not None:
             normalized_data['llm_insights'] = llm_insights
             logger.info(f"✓ LLM Analysis Complete: {llm_insights.get('confidence', 'Unknown')} confidence")
         
@@ -192,24 +235,24 @@ class FinancialNormalizer:
         logger.info(f"✓ Populated normalized arrays: {len(normalized_data['income_statement'])} income, "
                    f"{len(normalized_data['balance_sheet'])} balance, {len(normalized_data['cash_flow'])} cash flow statements")
         
-        # Step 6: Calculate normalized trends and CAGRs WITH RECENCY WEIGHTING
-        normalized_data['trends'] = self._calculate_trends(normalized_data['normalized_income'])
-        normalized_data['cagr_analysis'] = self._calculate_cagrs_with_recency_weighting(
-            normalized_data['normalized_income']
-        )
-        
-        # Step 7: Detect accounting irregularities
-        normalized_data['red_flags'] = self._detect_accounting_irregularities(
+        # Columnar view of the normalized statements, shared by steps 6-8.
+        # Statements are matched by period date, so years excluded above do not
+        # shift income out of line with the balance sheet and cash flow.
+        statements = FinancialStatements(
             normalized_data['normalized_income'],
             normalized_data['normalized_balance'],
             normalized_data['normalized_cash_flow']
         )
         
+        # Step 6: Calculate normalized trends and CAGRs WITH RECENCY WEIGHTING
+        normalized_data['trends'] = self._calculate_trends(statements)
+        normalized_data['cagr_analysis'] = self._calculate_cagrs_with_recency_weighting(statements)
+        
+        # Step 7: Detect accounting irregularities
+        normalized_data['red_flags'] = self._detect_accounting_irregularities(statements)
+        
         # Step 8: Calculate earnings quality score
-        normalized_data['quality_score'] = self._calculate_earnings_quality(
-            normalized_data['normalized_income'],
-            normalized_data['normalized_cash_flow']
-        )
+        normalized_data['quality_score'] = self._calculate_earnings_quality(statements)
         
         # Step 9: Compile all adjustments made
         normalized_data['adjustments'] = self.adjustments_log
@@ -488,11 +531,12 @@ class FinancialNormalizer:
         
         return normalized
     
-    def _calculate_trends(self, normalized_income: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_trends(self, statements: FinancialStatements) -> Dict[str, Any]:
         """
         Calculate key financial trends
         """
-        if len(normalized_income) < 2:
+        income = statements.income
+        if len(income) < 2:
             return {}
         
         trends = {
@@ -502,59 +546,47 @@ class FinancialNormalizer:
         }
         
         # Revenue trend
-        for i in range(len(normalized_income) - 1):
-            current = normalized_income[i].get('revenue', 0)
-            prior = normalized_income[i + 1].get('revenue', 1)
-            
-            if prior > 0:
-                growth = (current - prior) / prior
-                trends['revenue_trend'].append({
-                    'date': normalized_income[i].get('date'),
-                    'growth_rate': growth
-                })
+        growth = statements.growth('revenue')
+        for i in np.flatnonzero(~np.isnan(growth)):
+            trends['revenue_trend'].append({
+                'date': income.records[i].get('date'),
+                'growth_rate': float(growth[i])
+            })
         
         # Margin trend
-        for stmt in normalized_income:
+        net_margins = np.nan_to_num(income.column('normalized_net_margin'))
+        operating_margins = np.nan_to_num(income.column('operating_margin'))
+        for i, stmt in enumerate(income.records):
             trends['margin_trend'].append({
                 'date': stmt.get('date'),
-                'net_margin': stmt.get('normalized_net_margin', 0),
-                'operating_margin': stmt.get('operating_margin', 0)
+                'net_margin': float(net_margins[i]),
+                'operating_margin': float(operating_margins[i])
             })
         
         return trends
     
-    def _calculate_cagrs_with_recency_weighting(self, normalized_income: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_cagrs_with_recency_weighting(self, statements: FinancialStatements) -> Dict[str, Any]:
         """
         Calculate CAGRs with RECENCY WEIGHTING
         Recent years weighted higher as they're more predictive of future performance
         """
-        if len(normalized_income) < 2:
+        if len(statements.income) < 2:
             return {}
         
         # Standard CAGR calculation
-        standard_cagrs = self._calculate_cagrs(normalized_income)
-        
-        # RECENCY-WEIGHTED Growth Calculation
-        revenue_values = [stmt.get('revenue', 0) for stmt in normalized_income]
+        standard_cagrs = self._calculate_cagrs(statements)
         
-        # Create exponential recency weights (most recent = highest)
-        weights = []
-        for i in range(len(revenue_values)):
-            recency_factor = 0.85 ** i  # 15% decay per year back
-            weights.append(recency_factor)
+        # Create exponential recency weights (most recent = highest), 15% decay per year back
+        weights = 0.85 ** np.arange(len(statements.income))
         
         # Normalize to sum to 1
-        total_weight = sum(weights)
-        weights = [w / total_weight for w in weights]
+        weights = weights / weights.sum()
         
         # Calculate weighted growth rates
-        growth_rates = []
-        for i in range(len(revenue_values) - 1):
-            if revenue_values[i+1] > 0:
-                growth = (revenue_values[i] - revenue_values[i+1]) / revenue_values[i+1]
-                growth_rates.append(growth)
+        growth_rates = statements.growth('revenue')
+        growth_rates = growth_rates[~np.isnan(growth_rates)]
         
-        weighted_growth = sum(g * weights[i] for i, g in enumerate(growth_rates)) if growth_rates else 0
+        weighted_growth = float(np.dot(growth_rates, weights[:len(growth_rates)])) if growth_rates.size else 0
         
         logger.info(f"📊 Growth: Standard CAGR {standard_cagrs.get('revenue_cagr', 0):.2%}, "
                    f"Recency-Weighted {weighted_growth:.2%} (emphasizes recent years)")
@@ -563,124 +595,130 @@ class FinancialNormalizer:
         result = standard_cagrs.copy()
         result['revenue_cagr_recency_weighted'] = weighted_growth
         result['recency_weights'] = {
-            'most_recent_year': weights[0] if weights else 0,
-            'oldest_year': weights[-1] if weights else 0,
+            'most_recent_year': float(weights[0]),
+            'oldest_year': float(weights[-1]),
             'methodology': 'Exponential decay (0.85^years_back)'
         }
         result['recommendation'] = 'Use recency-weighted growth for DCF projections'
         
         return result
     
-    def _calculate_cagrs(self, normalized_income: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_cagrs(self, statements: FinancialStatements) -> Dict[str, Any]:
         """
         Calculate standard Compound Annual Growth Rates (equal weighting)
         """
-        if len(normalized_income) < 2:
+        income = statements.income
+        if len(income) < 2:
             return {}
         
-        def calc_cagr(start_val: float, end_val: float, periods: int) -> float:
-            if start_val <= 0 or end_val <= 0:
+        def calc_cagr(values: np.ndarray) -> float:
+            # Values are newest first, oldest last
+            start_val, end_val = values[-1], values[0]
+            if np.isnan(start_val) or np.isnan(end_val) or start_val <= 0 or end_val <= 0:
                 return 0.0
-            return (end_val / start_val) ** (1 / periods) - 1
-        
-        periods = len(normalized_income) - 1
-        
-        # Get values (newest first, oldest last)
-        revenue_start = normalized_income[-1].get('revenue', 0)
-        revenue_end = normalized_income[0].get('revenue', 0)
+            return float((end_val / start_val) ** (1 / periods) - 1)
         
-        ni_start = normalized_income[-1].get('normalized_net_income', 
-                   normalized_income[-1].get('netIncome', 0))
-        ni_end = normalized_income[0].get('normalized_net_income',
-                 normalized_income[0].get('netIncome', 0))
-        
-        ebitda_start = normalized_income[-1].get('ebitda', 0)
-        ebitda_end = normalized_income[0].get('ebitda', 0)
+        periods = len(income) - 1
         
         return {
-            'revenue_cagr': calc_cagr(revenue_start, revenue_end, periods),
-            'net_income_cagr': calc_cagr(ni_start, ni_end, periods),
-            'ebitda_cagr': calc_cagr(ebitda_start, ebitda_end, periods),
+            'revenue_cagr': calc_cagr(income.column('revenue')),
+            'net_income_cagr': calc_cagr(statements.coalesce('normalized_net_income', 'net_income')),
+            'ebitda_cagr': calc_cagr(income.column('ebitda')),
             'periods': periods,
-            'start_date': normalized_income[-1].get('date'),
-            'end_date': normalized_income[0].get('date')
+            'start_date': income.records[-1].get('date'),
+            'end_date': income.records[0].get('date')
         }
     
-    def _detect_accounting_irregularities(
-        self,
-        income: List[Dict[str, Any]],
-        balance: List[Dict[str, Any]],
-        cash_flow: List[Dict[str, Any]]
-    ) -> List[str]:
+    def _detect_accounting_irregularities(self, statements: FinancialStatements) -> List[str]:
         """
         Detect potential accounting red flags
         """
         red_flags = []
         
-        if not income or not cash_flow:
+        income = statements.income
+        if not len(income) or not len(statements.cash_flow):
             return red_flags
         
+        dates = income.dates
+        net_income = statements.coalesce('normalized_net_income', 'net_income')
+        
         # Check 1: Net income significantly exceeds operating cash flow
-        for i in range(min(len(income), len(cash_flow))):
-            ni = income[i].get('normalized_net_income', income[i].get('netIncome', 0))
-            ocf = cash_flow[i].get('operatingCashFlow', 0)
-            date = income[i].get('date', 'Unknown')
-            
-            if ni > 0 and ocf > 0:
-                if ni / ocf > 1.5:
-                    red_flags.append(
-                        f"[{date}] Net income ({ni:,.0f}) significantly exceeds operating cash flow ({ocf:,.0f}) - "
-                        f"Ratio: {ni/ocf:.2f}x. Potential earnings quality issue."
-                    )
+        ocf = statements.aligned('operating_cash_flow', statement='cash_flow')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            flagged = (net_income > 0) & (ocf > 0) & (net_income / ocf > 1.5)
+        for i in np.flatnonzero(flagged):
+            ni, cf = net_income[i], ocf[i]
+            red_flags.append(
+                f"[{dates[i]}] Net income ({ni:,.0f}) significantly exceeds operating cash flow ({cf:,.0f}) - "
+                f"Ratio: {ni/cf:.2f}x. Potential earnings quality issue."
+            )
         
         # Check 2: Declining margins
         if len(income) >= 3:
-            margins = [stmt.get('normalized_net_margin', 0) for stmt in income[:3]]
+            margins = np.nan_to_num(income.column('normalized_net_margin')[:3])
             if margins[0] < margins[1] < margins[2]:
                 red_flags.append(
                     f"Declining profit margins over 3 years: {margins[2]:.1%} -> {margins[1]:.1%} -> {margins[0]:.1%}"
                 )
         
+        if len(income) < 2 or len(statements.balance) < 2:
+            return red_flags
+        
+        revenue = income.column('revenue')[:2]
+        receivables = statements.aligned('accounts_receivable', statement='balance_sheet')[:2]
+        
         # Check 3: Revenue vs Accounts Receivable growth
-        if len(income) >= 2 and len(balance) >= 2:
-            rev_current = income[0].get('revenue', 0)
-            rev_prior = income[1].get('revenue', 1)
-            ar_current = balance[0].get('netReceivables', 0)
-            ar_prior = balance[1].get('netReceivables', 1)
+        rev_growth = statements.growth('revenue')[0]
+        if receivables[1] > 0 and not np.isnan(rev_growth):
+            ar_growth = (np.nan_to_num(receivables[0]) - receivables[1]) / receivables[1]
             
-            if ar_prior > 0 and rev_prior > 0:
-                ar_growth = (ar_current - ar_prior) / ar_prior
-                rev_growth = (rev_current - rev_prior) / rev_prior
-                
-                if ar_growth > rev_growth * 1.5:
-                    red_flags.append(
-                        f"Accounts receivable growing ({ar_growth:.1%}) faster than revenue ({rev_growth:.1%}) - "
-                        f"Potential revenue recognition issue"
-                    )
+            if ar_growth > rev_growth * 1.5:
+                red_flags.append(
+                    f"Accounts receivable growing ({ar_growth:.1%}) faster than revenue ({rev_growth:.1%}) - "
+                    f"Potential revenue recognition issue"
+                )
         
         # Check 4: DSO (Days Sales Outstanding) increasing
-        if len(income) >= 2 and len(balance) >= 2:
-            for i in range(min(2, len(income))):
-                revenue = income[i].get('revenue', 0)
-                ar = balance[i].get('netReceivables', 0)
-                
-                if revenue > 0:
-                    dso = (ar / revenue) * 365
-                    if i == 0:
-                        current_dso = dso
-                    else:
-                        prior_dso = dso
-            
-            if 'current_dso' in locals() and 'prior_dso' in locals():
-                if current_dso > prior_dso * 1.2:
-                    red_flags.append(
-                        f"Days Sales Outstanding increased from {prior_dso:.0f} to {current_dso:.0f} days - "
-                        f"Potential collection issues"
-                    )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dso = np.where(revenue > 0, np.nan_to_num(receivables) / revenue * 365, np.nan)
+        current_dso, prior_dso = dso[0], dso[1]
+        if not np.isnan(current_dso) and not np.isnan(prior_dso) and current_dso > prior_dso * 1.2:
+            red_flags.append(
+                f"Days Sales Outstanding increased from {prior_dso:.0f} to {current_dso:.0f} days - "
+                f"Potential collection issues"
+            )
         
         return red_flags
     
-    def _llm_analyze_financial_quality(
+    def _run_llm_pre_analysis(
+        self,
+        income_statements: List[Dict[str, Any]],
+        balance_sheets: List[Dict[str, Any]],
+        cash_flows: List[Dict[str, Any]],
+        company_info: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run the LLM pre-analysis from synchronous code
+        
+        Drives the gateway on a private event loop. Inside a running loop a blocking
+        call would stall every other job, so the step is skipped there - async callers
+        should use normalize_financial_statements_async instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.info("Step 0: Running LLM-powered pre-analysis (Senior IB perspective)...")
+            return asyncio.run(self._llm_analyze_financial_quality(
+                income_statements, balance_sheets, cash_flows, company_info
+            ))
+        
+        logger.warning(
+            "Skipping LLM pre-analysis: sync normalization called inside an event loop "
+            "(use normalize_financial_statements_async)"
+        )
+        return None
+    
+    async def _llm_analyze_financial_quality(
         self,
         income_statements: List[Dict[str, Any]],
         balance_sheets: List[Dict[str, Any]],
@@ -757,18 +795,14 @@ As a senior IB analyst, provide:
 Provide your analysis as a senior banker would - concise, focused on M&A implications, and actionable."""
 
             # Call Claude for analysis
-            message = self.llm.messages.create(
+            analysis_text = await self.llm.complete(
+                prompt,
                 model="claude-sonnet-4-20250514",
                 max_tokens=4000,
                 temperature=0.2,  # Low temperature for consistent IB analysis
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
+                context="Financial quality pre-analysis"
             )
             
-            analysis_text = message.content[0].text
-            
             # Parse LLM response into structured format
             return {
                 'available': True,
@@ -942,31 +976,24 @@ Provide your analysis as a senior banker would - concise, focused on M&A implica
         logger.info(f"Using industry median margin for {sector}: {margin:.1%}")
         return margin
     
-    def _calculate_earnings_quality(
-        self,
-        income: List[Dict[str, Any]],
-        cash_flow: List[Dict[str, Any]]
-    ) -> int:
+    def _calculate_earnings_quality(self, statements: FinancialStatements) -> int:
         """
         Calculate earnings quality score (0-100)
         """
-        if not income or not cash_flow:
+        if not len(statements.income) or not len(statements.cash_flow):
             return 0
         
         score = 100
         factors = []
         
-        # Factor 1: Cash conversion (30 points)
-        conversions = []
-        for i in range(min(len(income), len(cash_flow))):
-            ni = income[i].get('normalized_net_income', income[i].get('netIncome', 0))
-            ocf = cash_flow[i].get('operatingCashFlow', 0)
-            
-            if ni > 0:
-                ratio = ocf / ni
-                conversions.append(ratio)
+        # Factor 1: Cash conversion (30 points), over periods present in both statements
+        net_income = statements.coalesce('normalized_net_income', 'net_income')
+        ocf = statements.aligned('operating_cash_flow', statement='cash_flow')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            conversions = np.where(net_income > 0, np.nan_to_num(ocf) / net_income, np.nan)
+        conversions = conversions[~np.isnan(conversions) & ~np.isnan(ocf)]
         
-        if conversions:
+        if conversions.size:
             avg_conversion = np.mean(conversions)
             if avg_conversion >= 1.0:
                 factors.append("Strong cash conversion")
@@ -1001,14 +1028,11 @@ Provide your analysis as a senior banker would - concise, focused on M&A implica
             factors.append(f"GAAP/non-GAAP differences ({gaap_adj_count} periods)")
         
         # Factor 4: Trend stability (25 points)
-        if len(income) >= 3:
-            revenues = [stmt.get('revenue', 0) for stmt in income[:3]]
-            growth_rates = []
-            for i in range(len(revenues) - 1):
-                if revenues[i+1] > 0:
-                    growth_rates.append((revenues[i] - revenues[i+1]) / revenues[i+1])
+        if len(statements.income) >= 3:
+            growth_rates = statements.growth('revenue')[:2]
+            growth_rates = growth_rates[~np.isnan(growth_rates)]
             
-            if growth_rates:
+            if growth_rates.size:
                 volatility = np.std(growth_rates)
                 if volatility < 0.1:
                     factors.append("Stable revenue trends")
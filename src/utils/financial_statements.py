@@ -0,0 +1,408 @@
+"""
+Financial Statements - Columnar, period-indexed statement container
+
+FMP statements arrive as lists of per-period dicts (newest first). This
+module converts them once per company per job into NumPy columns keyed by
+field, resolves FMP / as-reported / normalized field names through a
+single alias table, and caches derived series (growth, margins, ratios)
+on the container so every consumer reads the same numbers.
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+import numpy as np
+
+from .metrics import record_cache_lookup
+
+
+# Canonical field -> source field names, in lookup order. The canonical
+# name itself and the listed names are matched exactly first, then
+# case-insensitively (FMP as-reported keys are lowercased XBRL tags).
+FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    # Income statement
+    'revenue': ('revenue', 'totalRevenue', 'revenues', 'RevenueFromContractWithCustomerExcludingAssessedTax', 'SalesRevenueNet'),
+    'cost_of_revenue': ('costOfRevenue', 'CostOfGoodsAndServicesSold', 'CostOfRevenue'),
+    'gross_profit': ('grossProfit', 'GrossProfit'),
+    'operating_expenses': ('operatingExpenses', 'OperatingExpenses'),
+    'operating_income': ('operatingIncome', 'OperatingIncomeLoss'),
+    'ebitda': ('ebitda',),
+    'net_income': ('netIncome', 'NetIncomeLoss'),
+    'interest_expense': ('interestExpense', 'InterestExpense'),
+    'income_tax_expense': ('incomeTaxExpense', 'IncomeTaxExpenseBenefit'),
+    'depreciation_and_amortization': ('depreciationAndAmortization', 'DepreciationDepletionAndAmortization'),
+    'research_and_development': ('researchAndDevelopmentExpenses', 'ResearchAndDevelopmentExpense'),
+    'eps': ('eps', 'EarningsPerShareBasic'),
+    'eps_diluted': ('epsdiluted', 'epsDiluted', 'EarningsPerShareDiluted'),
+    # Balance sheet
+    'cash': ('cashAndCashEquivalents', 'cash', 'CashAndCashEquivalentsAtCarryingValue'),
+    'accounts_receivable': ('netReceivables', 'accountsReceivable', 'AccountsReceivableNetCurrent'),
+    'inventory': ('inventory', 'InventoryNet'),
+    'accounts_payable': ('accountPayables', 'accountsPayable', 'AccountsPayableCurrent'),
+    'total_current_assets': ('totalCurrentAssets', 'AssetsCurrent'),
+    'total_current_liabilities': ('totalCurrentLiabilities', 'LiabilitiesCurrent'),
+    'total_assets': ('totalAssets', 'Assets'),
+    'total_liabilities': ('totalLiabilities', 'Liabilities'),
+    'total_equity': ('totalEquity', 'totalStockholdersEquity', 'StockholdersEquity'),
+    'total_debt': ('totalDebt',),
+    'net_debt': ('netDebt',),
+    'market_cap': ('marketCap',),
+    # Cash flow
+    'operating_cash_flow': ('operatingCashFlow', 'netCashProvidedByOperatingActivities', 'NetCashProvidedByUsedInOperatingActivities'),
+    'capital_expenditure': ('capitalExpenditure', 'PaymentsToAcquirePropertyPlantAndEquipment'),
+    'free_cash_flow': ('freeCashFlow',),
+    'dividends_paid': ('dividendsPaid', 'PaymentsOfDividends'),
+    'stock_based_compensation': ('stockBasedCompensation', 'ShareBasedCompensation'),
+}
+
+# Statement keys in the order fields are looked up
+STATEMENT_KEYS = ('income_statement', 'balance_sheet', 'cash_flow', 'income_as_reported')
+
+# Derived ratio series: name -> (numerator, denominator); both aligned on the numerator's periods
+DERIVED_RATIOS: Dict[str, Tuple[str, str]] = {
+    'gross_margin': ('gross_profit', 'revenue'),
+    'operating_margin': ('operating_income', 'revenue'),
+    'ebitda_margin': ('ebitda', 'revenue'),
+    'net_margin': ('net_income', 'revenue'),
+    'fcf_margin': ('free_cash_flow', 'revenue'),
+    'current_ratio': ('total_current_assets', 'total_current_liabilities'),
+    'debt_to_equity': ('total_debt', 'total_equity'),
+    'cash_conversion': ('operating_cash_flow', 'net_income'),
+}
+
+STATEMENT_CACHE_SIZE = int(os.getenv("STATEMENT_CACHE_SIZE", "64"))
+
+
+def _to_float(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class StatementTable:
+    """
+    One statement type as period-indexed NumPy columns
+
+    Periods keep the source order (FMP: newest first). Every numeric field
+    present in any period becomes a float column, NaN where missing.
+    """
+
+    def __init__(self, records: Optional[List[Dict[str, Any]]]):
+        self.records = [r for r in (records or []) if isinstance(r, dict)]
+        self.dates = [str(r.get('date') or f'period_{i}') for i, r in enumerate(self.records)]
+        self.columns: Dict[str, np.ndarray] = {}
+        self._lower: Dict[str, str] = {}
+
+        n = len(self.records)
+        for i, record in enumerate(self.records):
+            for key, value in record.items():
+                number = _to_float(value)
+                if np.isnan(number):
+                    continue
+                column = self.columns.get(key)
+                if column is None:
+                    column = self.columns[key] = np.full(n, np.nan)
+                    self._lower.setdefault(key.lower(), key)
+                column[i] = number
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def resolve(self, field: str) -> Optional[str]:
+        """Source column for a canonical or source field name, or None"""
+        candidates = (field,) + FIELD_ALIASES.get(field, ())
+        for name in candidates:
+            if name in self.columns:
+                return name
+        for name in candidates:
+            key = self._lower.get(name.lower())
+            if key:
+                return key
+        return None
+
+    def has(self, field: str) -> bool:
+        return self.resolve(field) is not None
+
+    def column(self, field: str) -> np.ndarray:
+        """Field values by period (all-NaN when the field is absent)"""
+        key = self.resolve(field)
+        if key is None:
+            return np.full(len(self.records), np.nan)
+        return self.columns[key]
+
+    def latest(self, field: str, default: float = 0.0) -> float:
+        """Most recent period's value, or default when missing"""
+        if not self.records:
+            return default
+        value = self.column(field)[0]
+        return default if np.isnan(value) else float(value)
+
+
+class FinancialStatements:
+    """
+    Columnar financial statements for one company
+
+    Series returned by ``series`` are on the owning statement's own periods
+    (positional, newest first); ``aligned`` reindexes a field by date onto
+    another statement's periods for cross-statement ratios. Derived series
+    are computed once, vectorized, and cached on the instance; treat
+    returned arrays as read-only.
+    """
+
+    def __init__(
+        self,
+        income_statement: Optional[List[Dict[str, Any]]] = None,
+        balance_sheet: Optional[List[Dict[str, Any]]] = None,
+        cash_flow: Optional[List[Dict[str, Any]]] = None,
+        income_as_reported: Optional[List[Dict[str, Any]]] = None,
+        symbol: Optional[str] = None,
+        period: str = 'annual'
+    ):
+        self.symbol = symbol
+        self.period = period
+        self.tables: Dict[str, StatementTable] = {
+            'income_statement': StatementTable(income_statement),
+            'balance_sheet': StatementTable(balance_sheet),
+            'cash_flow': StatementTable(cash_flow),
+            'income_as_reported': StatementTable(income_as_reported),
+        }
+        self._cache: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_financial_data(
+        cls,
+        financial_data: Dict[str, Any],
+        symbol: Optional[str] = None,
+        period: str = 'annual'
+    ) -> 'FinancialStatements':
+        """
+        Build from an FMP financial_data dict (or the smart accessor's dict)
+
+        Args:
+            financial_data: Dict with income_statement / balance_sheet / cash_flow lists
+            symbol: Ticker, for logging
+            period: 'annual' or 'quarter' (reads the *_quarterly lists)
+        """
+        suffix = '_quarterly' if period == 'quarter' else ''
+        return cls(
+            income_statement=financial_data.get(f'income_statement{suffix}'),
+            balance_sheet=financial_data.get(f'balance_sheet{suffix}'),
+            cash_flow=financial_data.get(f'cash_flow{suffix}'),
+            income_as_reported=financial_data.get('income_as_reported') if not suffix else None,
+            symbol=symbol,
+            period=period
+        )
+
+    @property
+    def income(self) -> StatementTable:
+        return self.tables['income_statement']
+
+    @property
+    def balance(self) -> StatementTable:
+        return self.tables['balance_sheet']
+
+    @property
+    def cash_flow(self) -> StatementTable:
+        return self.tables['cash_flow']
+
+    def table_for(self, field: str, statement: Optional[str] = None) -> StatementTable:
+        """Statement that supplies a field (first statement that has it)"""
+        if statement:
+            return self.tables[statement]
+        for key in STATEMENT_KEYS:
+            if self.tables[key].has(field):
+                return self.tables[key]
+        return self.income
+
+    def series(self, field: str, statement: Optional[str] = None) -> np.ndarray:
+        """Field values on its statement's own periods (newest first)"""
+        return self.table_for(field, statement).column(field)
+
+    def dates(self, field: str, statement: Optional[str] = None) -> List[str]:
+        """Period labels matching ``series(field)``"""
+        return self.table_for(field, statement).dates
+
+    def latest(self, field: str, default: float = 0.0, statement: Optional[str] = None) -> float:
+        """Most recent value of a field, or default when missing"""
+        return self.table_for(field, statement).latest(field, default)
+
+    def coalesce(self, *fields: str, statement: Optional[str] = None) -> np.ndarray:
+        """
+        Per-period first available value among several fields
+
+        All fields are read from one statement (the first field's unless
+        ``statement`` is given), e.g. coalesce('normalized_net_income', 'net_income').
+        """
+        key = ('coalesce', fields, statement)
+        if key not in self._cache:
+            table = self.table_for(fields[0], statement)
+            values = table.column(fields[0]).copy()
+            for field in fields[1:]:
+                values = np.where(np.isnan(values), table.column(field), values)
+            self._cache[key] = values
+        return self._cache[key]
+
+    def aligned(self, field: str, on: str = 'income_statement', statement: Optional[str] = None) -> np.ndarray:
+        """
+        Field values reindexed by period date onto another statement's periods
+
+        Args:
+            field: Field to read
+            on: Statement whose periods define the index
+            statement: Statement to read the field from (default: first that has it)
+        """
+        key = ('aligned', field, on, statement)
+        if key not in self._cache:
+            source = self.table_for(field, statement)
+            target = self.tables[on]
+            values = source.column(field)
+            if source.dates == target.dates:
+                self._cache[key] = values
+            else:
+                position = {date: i for i, date in enumerate(source.dates)}
+                index = np.array([position.get(date, -1) for date in target.dates], dtype=int)
+                self._cache[key] = np.where(index >= 0, values[np.maximum(index, 0)] if len(values) else np.nan, np.nan)
+        return self._cache[key]
+
+    def growth(self, field: str, statement: Optional[str] = None) -> np.ndarray:
+        """
+        Period-over-period growth, newest first
+
+        Element i is growth from period i+1 to period i; NaN where either
+        value is missing or the prior value is not positive.
+        """
+        key = ('growth', field, statement)
+        if key not in self._cache:
+            values = self.series(field, statement)
+            current, prior = values[:-1], values[1:]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._cache[key] = np.where(prior > 0, (current - prior) / prior, np.nan)
+        return self._cache[key]
+
+    def cagr(self, field: str, periods: Optional[int] = None, statement: Optional[str] = None) -> float:
+        """
+        Compound growth from the oldest (or ``periods`` back) to the latest value
+
+        Returns 0.0 when either endpoint is missing or not positive.
+        """
+        values = self.series(field, statement)
+        if len(values) < 2:
+            return 0.0
+        span = min(periods or len(values) - 1, len(values) - 1)
+        start, end = values[span], values[0]
+        if np.isnan(start) or np.isnan(end) or start <= 0 or end <= 0:
+            return 0.0
+        return float((end / start) ** (1 / span) - 1)
+
+    def ratio(self, numerator: str, denominator: str, on: Optional[str] = None) -> np.ndarray:
+        """
+        numerator / denominator by period, NaN where the denominator is not positive
+
+        Both fields are aligned onto ``on`` (default: the numerator's statement).
+        """
+        on = on or self._statement_key(numerator)
+        key = ('ratio', numerator, denominator, on)
+        if key not in self._cache:
+            num = self.aligned(numerator, on)
+            denom = self.aligned(denominator, on)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self._cache[key] = np.where(denom > 0, num / denom, np.nan)
+        return self._cache[key]
+
+    def derived(self, name: str, on: Optional[str] = None) -> np.ndarray:
+        """A named ratio from DERIVED_RATIOS"""
+        numerator, denominator = DERIVED_RATIOS[name]
+        return self.ratio(numerator, denominator, on)
+
+    def _statement_key(self, field: str) -> str:
+        table = self.table_for(field)
+        return next(key for key, value in self.tables.items() if value is table)
+
+    def to_frame(self, fields: Optional[List[str]] = None, on: str = 'income_statement'):
+        """
+        pandas DataFrame of canonical fields and derived ratios, indexed by period
+
+        Args:
+            fields: Canonical fields to include (default: every aliased field present)
+            on: Statement whose periods form the index
+        """
+        import pandas as pd
+
+        fields = fields or [f for f in FIELD_ALIASES if any(t.has(f) for t in self.tables.values())]
+        columns = {field: self.aligned(field, on) for field in fields}
+        for name in DERIVED_RATIOS:
+            columns[name] = self.derived(name, on)
+        return pd.DataFrame(columns, index=pd.Index(self.tables[on].dates, name='date'))
+
+
+_statement_cache: "OrderedDict[Tuple, FinancialStatements]" = OrderedDict()
+
+
+# Fields identifying one statement period: company, filing and headline values
+_IDENTITY_FIELDS = (
+    'symbol', 'date', 'period', 'fillingDate', 'filingDate', 'acceptedDate',
+    'revenue', 'ebitda', 'operatingIncome', 'netIncome', 'eps',
+    'totalAssets', 'totalLiabilities', 'totalEquity', 'totalDebt', 'cashAndCashEquivalents',
+    'operatingCashFlow', 'capitalExpenditure', 'freeCashFlow'
+)
+
+
+def _period_identity(record: Any) -> Tuple:
+    """Filing and headline values of one statement record"""
+    if not isinstance(record, dict):
+        return ()
+    return tuple(map(record.get, _IDENTITY_FIELDS))
+
+
+def _fingerprint(financial_data: Dict[str, Any], symbol: Optional[str], period: str) -> Tuple:
+    """
+    Identity of the statement lists a container is built from
+
+    Symbol, period and, per statement, each period's filing (symbol, date,
+    filing date) and headline values. That tells companies, filings and raw
+    vs normalized lists apart from a few lookups per period instead of
+    encoding every record, and - unlike the lists' ids, which other jobs
+    reuse once they are freed - never matches another job's statements.
+    """
+    suffix = '_quarterly' if period == 'quarter' else ''
+    parts = [symbol, period]
+    for key in STATEMENT_KEYS:
+        records = financial_data.get(key + suffix) if key != 'income_as_reported' or not suffix else None
+        if records:
+            parts.append((key, tuple(map(_period_identity, records))))
+        else:
+            parts.append((key, None))
+    return tuple(parts)
+
+
+def get_financial_statements(
+    financial_data: Dict[str, Any],
+    symbol: Optional[str] = None,
+    period: str = 'annual'
+) -> FinancialStatements:
+    """
+    Columnar statements for a financial_data dict, built once and reused
+
+    Agents in the same job pass the same statement lists, so they share one
+    container (and its cached derived series).
+    """
+    key = _fingerprint(financial_data or {}, symbol, period)
+    statements = _statement_cache.get(key)
+    record_cache_lookup('financial_statements', statements is not None)
+    if statements is not None:
+        _statement_cache.move_to_end(key)
+        return statements
+
+    statements = FinancialStatements.from_financial_data(financial_data or {}, symbol, period)
+    _statement_cache[key] = statements
+    while len(_statement_cache) > STATEMENT_CACHE_SIZE:
+        _statement_cache.popitem(last=False)
+    logger.debug(
+        f"Built columnar statements for {symbol or 'company'} ({period}): "
+        f"{len(statements.income)} income, {len(statements.balance)} balance, "
+        f"{len(statements.cash_flow)} cash flow periods"
+    )
+    return statements
@@ -0,0 +1,221 @@
+"""
+Fundamentals Store - Filed statements shared by every job, synced by fiscal period
+
+An annual or quarterly statement does not change once it is filed, so each
+one is fetched from FMP only once. Records are keyed by (symbol, statement,
+period, fiscal date) and stored as data/fundamentals/<SYMBOL>/<statement>-<period>.json.
+
+A sync looks at the newest stored fiscal date. If the company's fiscal
+calendar says no newer period can have ended yet, it makes no call. Otherwise
+it makes one "anything new?" call per symbol and period type: the latest
+income statement, checked at most every FUNDAMENTALS_CHECK_SECONDS. Only when
+that call shows a newer period does it fetch the missing periods, for every
+statement series. Records are refetched in full after FUNDAMENTALS_MAX_AGE_DAYS
+to pick up restatements.
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+from .metrics import record_cache_lookup
+
+
+# Configuration (overridable via environment)
+FUNDAMENTALS_STORE_DIR = os.getenv("FUNDAMENTALS_STORE_DIR", "data/fundamentals")
+FUNDAMENTALS_STORE_ENABLED = os.getenv("FUNDAMENTALS_STORE_ENABLED", "true").lower() == "true"
+FUNDAMENTALS_CHECK_SECONDS = int(os.getenv("FUNDAMENTALS_CHECK_SECONDS", "21600"))  # "anything new?" at most this often
+FUNDAMENTALS_MAX_AGE_DAYS = int(os.getenv("FUNDAMENTALS_MAX_AGE_DAYS", "90"))  # full refetch (restatements)
+
+# Statement series -> FMPClient method (all take symbol, period, limit)
+STATEMENTS = {
+    'income_statement': 'get_income_statement',
+    'balance_sheet': 'get_balance_sheet',
+    'cash_flow': 'get_cash_flow_statement',
+    'key_metrics': 'get_key_metrics',
+    'ratios': 'get_financial_ratios',
+    'enterprise_value': 'get_enterprise_value',
+    'financial_growth': 'get_financial_growth',
+    'income_growth': 'get_income_growth',
+    'balance_sheet_growth': 'get_balance_sheet_growth',
+    'cash_flow_growth': 'get_cash_flow_growth',
+    'income_as_reported': 'get_income_statement_as_reported',
+    'balance_as_reported': 'get_balance_sheet_as_reported',
+    'cash_flow_as_reported': 'get_cash_flow_as_reported'
+}
+
+PERIOD_DAYS = {'annual': 365, 'quarter': 91}
+DATE_TOLERANCE_DAYS = 14  # 52/53-week fiscal years end a few days either side of the nominal date
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_date(record: Dict[str, Any]) -> Optional[str]:
+    """Fiscal date of a statement record (as-reported series use 'date' too)"""
+    return str(record.get('date'))[:10] if record.get('date') else None
+
+
+class FundamentalsStore:
+    """Per-symbol statement files, synced incrementally from FMP"""
+
+    def __init__(
+        self,
+        root: str = FUNDAMENTALS_STORE_DIR,
+        enabled: bool = FUNDAMENTALS_STORE_ENABLED,
+        check_seconds: int = FUNDAMENTALS_CHECK_SECONDS,
+        max_age_days: int = FUNDAMENTALS_MAX_AGE_DAYS
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.enabled = enabled
+        self.check_seconds = check_seconds
+        self.max_age = max_age_days * 86400
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    def _path(self, symbol: str, statement: str, period: str) -> Path:
+        return self.root / symbol.upper() / f"{statement}-{period}.json"
+
+    def _read(self, path: Path) -> Dict[str, Any]:
+        if not path.exists():
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fundamentals file {path}: {e}")
+            return {}
+
+    def _write(self, path: Path, data: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    def stored(self, symbol: str, statement: str, period: str = 'annual', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Stored records of a series, newest first (never fetches)"""
+        records = self._read(self._path(symbol, statement, period)).get('records', {})
+        ordered = [records[key] for key in sorted(records, reverse=True)]
+        return ordered[:limit] if limit else ordered
+
+    def _period_may_be_new(self, latest: Optional[date], period: str, most_recent_fy_end: Optional[str]) -> bool:
+        """Whether a period newer than `latest` can have ended by today"""
+        if latest is None:
+            return True
+        tolerance = timedelta(days=DATE_TOLERANCE_DAYS)
+        if period == 'annual':
+            fy_end = _parse_date(most_recent_fy_end)
+            if fy_end is not None:
+                return latest + tolerance < fy_end
+        return date.today() >= latest + timedelta(days=PERIOD_DAYS.get(period, 91)) - tolerance
+
+    async def _latest_period(self, client: Any, symbol: str, period: str) -> Optional[str]:
+        """
+        Newest filed fiscal date on FMP (the "anything new?" call)
+
+        Cached in <SYMBOL>/_checks.json for check_seconds, shared by every
+        series and every process using the store.
+        """
+        path = self.root / symbol.upper() / "_checks.json"
+        async with self._lock(f"{symbol}:check"):
+            checks = self._read(path)
+            check = checks.get(period)
+            if check and time.time() - check['checked_at'] < self.check_seconds:
+                return check['latest']
+            latest_statements = await client.get_income_statement(symbol, period=period, limit=1)
+            latest = _record_date(latest_statements[0]) if isinstance(latest_statements, list) and latest_statements else None
+            checks[period] = {'checked_at': time.time(), 'latest': latest}
+            self._write(path, checks)
+            return latest
+
+    async def statements(
+        self,
+        client: Any,
+        symbol: str,
+        statement: str,
+        period: str = 'annual',
+        limit: int = 5,
+        most_recent_fy_end: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        The newest `limit` records of a statement series, synced first if needed
+
+        Args:
+            client: Open FMPClient
+            symbol: Ticker symbol
+            statement: Series name (key of STATEMENTS)
+            period: 'annual' or 'quarter'
+            limit: Number of periods
+            most_recent_fy_end: Last fiscal year end (YYYY-MM-DD); lets an annual
+                sync skip the check call until a new fiscal year has ended
+
+        Returns:
+            Records, newest first (same shape as the FMP response)
+        """
+        fetch = getattr(client, STATEMENTS[statement])
+        if not self.enabled:
+            return await fetch(symbol, period=period, limit=limit)
+
+        symbol = symbol.upper()
+        path = self._path(symbol, statement, period)
+        async with self._lock(f"{symbol}:{statement}:{period}"):
+            data = self._read(path)
+            records: Dict[str, Dict[str, Any]] = data.get('records', {})
+            stored_dates = sorted(records, reverse=True)
+            expired = time.time() - data.get('fetched_at', 0) > self.max_age
+            # Fewer records than asked for and FMP had more last time -> fetch the full depth
+            shallow = len(records) < limit and not data.get('complete', False)
+
+            fetch_limit = 0
+            if expired or shallow:
+                fetch_limit = max(limit, len(records))
+            elif self._period_may_be_new(_parse_date(stored_dates[0]) if stored_dates else None, period, most_recent_fy_end):
+                latest = await self._latest_period(client, symbol, period)
+                latest_date, stored_latest = _parse_date(latest), _parse_date(stored_dates[0]) if stored_dates else None
+                if latest_date and (stored_latest is None or latest_date > stored_latest + timedelta(days=DATE_TOLERANCE_DAYS)):
+                    missing = (latest_date - stored_latest).days // PERIOD_DAYS.get(period, 91) if stored_latest else limit
+                    fetch_limit = max(missing + 1, 2)
+
+            record_cache_lookup('fundamentals', not fetch_limit)
+            if fetch_limit:
+                fetched = await fetch(symbol, period=period, limit=fetch_limit)
+                if isinstance(fetched, list):
+                    for record in fetched:
+                        key = _record_date(record) if isinstance(record, dict) else None
+                        if key:
+                            records[key] = record
+                    update = {'records': records}
+                    if expired or shallow:
+                        update['fetched_at'] = time.time()
+                        update['complete'] = len(fetched) < fetch_limit
+                    else:
+                        update['fetched_at'] = data.get('fetched_at', time.time())
+                        update['complete'] = data.get('complete', False)
+                    self._write(path, update)
+                    logger.debug(f"Fundamentals store: {symbol} {statement}/{period} fetched {len(fetched)} record(s)")
+
+        return [records[key] for key in sorted(records, reverse=True)][:limit]
+
+
+# Global fundamentals store instance
+_fundamentals_store: Optional[FundamentalsStore] = None
+
+
+def get_fundamentals_store() -> FundamentalsStore:
+    """Get global fundamentals store instance"""
+    global _fundamentals_store
+    if _fundamentals_store is None:
+        _fundamentals_store = FundamentalsStore()
+    return _fundamentals_store
@@ -3,13 +3,31 @@ Knowledge Graph Utilities for M&A Copilot
 
 Provides graph-based querying capabilities for relationship-based questions
 about the analysis data.
+
+Nodes are addressed by string IDs externally and by dense integer IDs
+internally. Edges are kept in CSR (compressed sparse row) form for both
+directions, with secondary indexes on node type and relationship, so
+neighbor lookups, type queries and BFS do not scan the whole graph.
 """
 
 from typing import Dict, Any, List, Optional, Set, Tuple
-from collections import defaultdict
+from collections import defaultdict, deque
+from pathlib import Path
 import json
+import os
+import numpy as np
 from loguru import logger
 
+from .metrics import record_cache_lookup
+from .tracing import start_span
+
+
+# Bump when the graph layout or builder changes so persisted graphs are rebuilt
+GRAPH_SCHEMA_VERSION = 2
+KNOWLEDGE_GRAPH_DIR = os.getenv("KNOWLEDGE_GRAPH_DIR", "data/knowledge_graphs")
+
+DIRECTIONS = ('out', 'in', 'both')
+
 
 class KnowledgeGraph:
     """
@@ -20,25 +38,206 @@ class KnowledgeGraph:
     """
     
     def __init__(self):
-        self.nodes = {}  # id -> {type, data, metadata}
-        self.edges = []  # [(source, target, relationship, metadata)]
-        self.relationships = defaultdict(list)  # source_id -> [(target_id, relationship)]
+        self.nodes = {}  # id -> {id, type, data, metadata}
+        
+        # Integer node IDs
+        self._index: Dict[str, int] = {}  # node id -> int id
+        self._keys: List[str] = []  # int id -> node id
+        
+        # Edge list (append-only); CSR arrays are rebuilt from it lazily
+        self._src: List[int] = []
+        self._dst: List[int] = []
+        self._rel: List[int] = []
+        self._edge_metadata: List[Dict[str, Any]] = []
+        self._rel_codes: Dict[str, int] = {}
+        self._rel_names: List[str] = []
+        
+        # Secondary indexes
+        self._type_index: Dict[str, Set[int]] = defaultdict(set)  # node type -> int ids
+        self._rel_index: Dict[int, List[int]] = defaultdict(list)  # relationship code -> edge ids
+        
+        self._csr_dirty = True
+        self._out_ptr = self._out_edges = None
+        self._in_ptr = self._in_edges = None
+    
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    
+    def _node_int(self, node_id: str) -> int:
+        """Integer ID for a node, registering a placeholder if unseen"""
+        idx = self._index.get(node_id)
+        if idx is None:
+            idx = len(self._keys)
+            self._index[node_id] = idx
+            self._keys.append(node_id)
+            self._csr_dirty = True
+        return idx
         
     def add_node(self, node_id: str, node_type: str, data: Dict[str, Any], metadata: Optional[Dict] = None):
         """Add a node to the graph."""
+        idx = self._node_int(node_id)
+        previous = self.nodes.get(node_id)
+        if previous and previous['type'] != node_type:
+            self._type_index[previous['type']].discard(idx)
+        
         self.nodes[node_id] = {
             'id': node_id,
             'type': node_type,
             'data': data,
             'metadata': metadata or {}
         }
+        self._type_index[node_type].add(idx)
         
     def add_edge(self, source_id: str, target_id: str, relationship: str, metadata: Optional[Dict] = None):
         """Add an edge (relationship) to the graph."""
-        self.edges.append((source_id, target_id, relationship, metadata or {}))
-        self.relationships[source_id].append((target_id, relationship))
+        rel = self._rel_codes.get(relationship)
+        if rel is None:
+            rel = len(self._rel_names)
+            self._rel_codes[relationship] = rel
+            self._rel_names.append(relationship)
+        
+        edge_id = len(self._src)
+        self._src.append(self._node_int(source_id))
+        self._dst.append(self._node_int(target_id))
+        self._rel.append(rel)
+        self._edge_metadata.append(metadata or {})
+        self._rel_index[rel].append(edge_id)
+        self._csr_dirty = True
+    
+    @property
+    def edges(self) -> List[Tuple[str, str, str, Dict]]:
+        """All edges as (source, target, relationship, metadata) tuples"""
+        return [
+            (self._keys[s], self._keys[d], self._rel_names[r], m)
+            for s, d, r, m in zip(self._src, self._dst, self._rel, self._edge_metadata)
+        ]
+    
+    @property
+    def edge_count(self) -> int:
+        return len(self._src)
+    
+    # ------------------------------------------------------------------
+    # CSR adjacency
+    # ------------------------------------------------------------------
+    
+    def _build_csr(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Row pointers and edge ids sorted by `keys` (stable, so insertion order is kept)"""
+        order = np.argsort(keys, kind='stable')
+        counts = np.bincount(keys, minlength=len(self._keys))
+        ptr = np.zeros(len(self._keys) + 1, dtype=np.int64)
+        np.cumsum(counts, out=ptr[1:])
+        return ptr, order
+    
+    def _ensure_csr(self):
+        if not self._csr_dirty:
+            return
+        src = np.asarray(self._src, dtype=np.int64)
+        dst = np.asarray(self._dst, dtype=np.int64)
+        self._out_ptr, self._out_edges = self._build_csr(src)
+        self._in_ptr, self._in_edges = self._build_csr(dst)
+        self._src_arr, self._dst_arr = src, dst
+        self._rel_arr = np.asarray(self._rel, dtype=np.int64)
+        self._csr_dirty = False
+    
+    def _adjacent(self, idx: int, direction: str = 'out', rel: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """(neighbor int id, relationship code, edge id) triples for a node"""
+        self._ensure_csr()
+        result = []
+        if direction in ('out', 'both'):
+            for e in self._out_edges[self._out_ptr[idx]:self._out_ptr[idx + 1]]:
+                if rel is None or self._rel_arr[e] == rel:
+                    result.append((int(self._dst_arr[e]), int(self._rel_arr[e]), int(e)))
+        if direction in ('in', 'both'):
+            for e in self._in_edges[self._in_ptr[idx]:self._in_ptr[idx + 1]]:
+                if rel is None or self._rel_arr[e] == rel:
+                    result.append((int(self._src_arr[e]), int(self._rel_arr[e]), int(e)))
+        return result
+    
+    def _rel_filter(self, relationship_type: Optional[str]) -> Tuple[bool, Optional[int]]:
+        """Resolve a relationship name; returns (known, code)"""
+        if relationship_type is None:
+            return True, None
+        code = self._rel_codes.get(relationship_type)
+        return code is not None, code
+    
+    def neighbors(
+        self,
+        node_id: str,
+        relationship_type: Optional[str] = None,
+        direction: str = 'out'
+    ) -> List[Tuple[str, str]]:
+        """
+        Direct neighbors of a node.
+        
+        Args:
+            node_id: Node ID
+            relationship_type: Optional relationship filter
+            direction: 'out' (edges from node), 'in' (edges to node) or 'both'
         
-    def find_related_nodes(self, node_id: str, relationship_type: Optional[str] = None, max_depth: int = 2) -> List[Dict]:
+        Returns:
+            List of (neighbor_id, relationship) tuples
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        idx = self._index.get(node_id)
+        known, rel = self._rel_filter(relationship_type)
+        if idx is None or not known:
+            return []
+        return [(self._keys[n], self._rel_names[r]) for n, r, _ in self._adjacent(idx, direction, rel)]
+    
+    # ------------------------------------------------------------------
+    # Traversal
+    # ------------------------------------------------------------------
+    
+    def _bfs(
+        self,
+        start: int,
+        max_depth: Optional[int],
+        rel: Optional[int],
+        direction: str,
+        target: Optional[int] = None
+    ) -> Tuple[Dict[int, Tuple[int, int, int]], Dict[int, int]]:
+        """
+        Breadth-first search recording parent pointers
+        
+        Returns:
+            (parents, depths) where parents[node] = (parent node, relationship code, edge id)
+        """
+        parents: Dict[int, Tuple[int, int, int]] = {}
+        depths = {start: 0}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            if max_depth is not None and depths[current] >= max_depth:
+                continue
+            for neighbor, rel_code, edge in self._adjacent(current, direction, rel):
+                if neighbor in depths:
+                    continue
+                depths[neighbor] = depths[current] + 1
+                parents[neighbor] = (current, rel_code, edge)
+                queue.append(neighbor)
+        return parents, depths
+    
+    def _trace(self, parents: Dict[int, Tuple[int, int, int]], node: int) -> List[Tuple[int, int, int]]:
+        """Walk parent pointers back to the start: [(from, relationship, to), ...] in traversal order"""
+        path = []
+        while node in parents:
+            parent, rel_code, _ = parents[node]
+            path.append((parent, rel_code, node))
+            node = parent
+        path.reverse()
+        return path
+    
+    def find_related_nodes(
+        self,
+        node_id: str,
+        relationship_type: Optional[str] = None,
+        max_depth: int = 2,
+        direction: str = 'out'
+    ) -> List[Dict]:
         """
         Find all nodes related to a given node.
         
@@ -46,88 +245,221 @@ class KnowledgeGraph:
             node_id: Starting node ID
             relationship_type: Optional filter for relationship type
             max_depth: Maximum traversal depth
+            direction: 'out', 'in' or 'both'
             
         Returns:
-            List of related nodes with their relationships
+            List of related nodes (nearest first) with their relationships
         """
-        visited = set()
-        results = []
+        start = self._index.get(node_id)
+        known, rel = self._rel_filter(relationship_type)
+        if start is None or not known:
+            return []
         
-        def traverse(current_id: str, depth: int, path: List[Tuple[str, str]]):
-            if depth > max_depth or current_id in visited:
-                return
-                
-            visited.add(current_id)
-            
-            for target_id, rel_type in self.relationships.get(current_id, []):
-                if relationship_type and rel_type != relationship_type:
-                    continue
-                    
-                if target_id in self.nodes:
-                    results.append({
-                        'node': self.nodes[target_id],
-                        'relationship': rel_type,
-                        'path': path + [(current_id, rel_type)],
-                        'depth': depth + 1
-                    })
-                    
-                    traverse(target_id, depth + 1, path + [(current_id, rel_type)])
-        
-        traverse(node_id, 0, [])
+        parents, depths = self._bfs(start, max_depth, rel, direction)
+        results = []
+        for node in sorted(parents, key=lambda n: depths[n]):
+            key = self._keys[node]
+            if key not in self.nodes:
+                continue
+            path = self._trace(parents, node)
+            results.append({
+                'node': self.nodes[key],
+                'relationship': self._rel_names[path[-1][1]],
+                'path': [(self._keys[src], self._rel_names[r]) for src, r, _ in path],
+                'depth': depths[node]
+            })
         return results
     
-    def find_path(self, source_id: str, target_id: str) -> Optional[List[Tuple[str, str, str]]]:
+    def find_path(
+        self,
+        source_id: str,
+        target_id: str,
+        relationship_type: Optional[str] = None,
+        direction: str = 'out'
+    ) -> Optional[List[Tuple[str, str, str]]]:
         """
         Find shortest path between two nodes.
         
+        Args:
+            direction: 'out' follows edges forward; 'in' or 'both' may traverse
+                edges backwards, in which case each step is still reported in
+                the edge's own (source, relationship, target) orientation
+        
         Returns:
             List of (node_id, relationship, next_node_id) tuples
         """
-        from collections import deque
-        
         if source_id not in self.nodes or target_id not in self.nodes:
             return None
+        known, rel = self._rel_filter(relationship_type)
+        if not known:
+            return None
             
-        queue = deque([(source_id, [])])
-        visited = set()
+        start, goal = self._index[source_id], self._index[target_id]
+        if start == goal:
+            return []
+        parents, _ = self._bfs(start, None, rel, direction, target=goal)
+        if goal not in parents:
+            return None
         
-        while queue:
-            current_id, path = queue.popleft()
+        path = []
+        node = goal
+        while node in parents:
+            parent, rel_code, edge = parents[node]
+            path.append((self._keys[self._src[edge]], self._rel_names[rel_code], self._keys[self._dst[edge]]))
+            node = parent
+        path.reverse()
+        return path
+        
+    def match_pattern(self, pattern: List[Optional[str]], limit: int = 100) -> List[List[str]]:
+        """
+        Multi-hop pattern query.
             
-            if current_id == target_id:
-                return path
+        The pattern alternates node types and relationships, with None as a
+        wildcard, e.g. ['company', 'competes_with', 'competitor', 'included_in', None].
                 
-            if current_id in visited:
-                continue
+        Returns:
+            Up to `limit` matches, each a list of node IDs (one per node position)
+        """
+        if not pattern or len(pattern) % 2 == 0:
+            raise ValueError("pattern must alternate node types and relationships: [type, rel, type, ...]")
+        
+        first_type = pattern[0]
+        if first_type is None:
+            frontier = [[self._index[k]] for k in self.nodes]
+        else:
+            frontier = [[i] for i in sorted(self._type_index.get(first_type, ()))]
+        
+        for hop in range(1, len(pattern), 2):
+            known, rel = self._rel_filter(pattern[hop])
+            if not known:
+                return []
+            node_type = pattern[hop + 1]
+            allowed = self._type_index.get(node_type, set()) if node_type is not None else None
+            is_last = hop + 2 >= len(pattern)
+            next_frontier = []
+            for path in frontier:
+                for neighbor, _, _ in self._adjacent(path[-1], 'out', rel):
+                    if allowed is not None and neighbor not in allowed:
+                        continue
+                    if neighbor in path:
+                        continue
+                    next_frontier.append(path + [neighbor])
+                    if is_last and len(next_frontier) >= limit:
+                        break
+                if is_last and len(next_frontier) >= limit:
+                    break
+            frontier = next_frontier
+            if not frontier:
+                return []
                 
-            visited.add(current_id)
+        return [[self._keys[i] for i in path] for path in frontier[:limit]]
             
-            for next_id, relationship in self.relationships.get(current_id, []):
-                new_path = path + [(current_id, relationship, next_id)]
-                queue.append((next_id, new_path))
-        
-        return None
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
     
     def query_by_type(self, node_type: str) -> List[Dict]:
         """Get all nodes of a specific type."""
-        return [node for node in self.nodes.values() if node['type'] == node_type]
+        return [self.nodes[self._keys[i]] for i in sorted(self._type_index.get(node_type, ()))]
+    
+    def query_by_relationship(self, relationship: str) -> List[Dict[str, Any]]:
+        """Get all edges with a specific relationship."""
+        code = self._rel_codes.get(relationship)
+        if code is None:
+            return []
+        return [
+            {
+                'source': self._keys[self._src[e]],
+                'target': self._keys[self._dst[e]],
+                'relationship': relationship,
+                'metadata': self._edge_metadata[e]
+            }
+            for e in self._rel_index[code]
+        ]
+    
+    def node_types(self) -> List[str]:
+        """Node types present in the graph"""
+        return [t for t, ids in self._type_index.items() if ids]
     
     def get_node(self, node_id: str) -> Optional[Dict]:
         """Get a specific node by ID."""
         return self.nodes.get(node_id)
     
-    def get_connections(self, node_id: str) -> List[Tuple[str, str, Dict]]:
+    def get_connections(self, node_id: str, direction: str = 'out') -> List[Tuple[str, str, Dict]]:
         """
         Get all direct connections for a node.
         
         Returns:
             List of (target_id, relationship, target_node) tuples
         """
-        connections = []
-        for target_id, relationship in self.relationships.get(node_id, []):
-            if target_id in self.nodes:
-                connections.append((target_id, relationship, self.nodes[target_id]))
-        return connections
+        return [
+            (neighbor_id, relationship, self.nodes[neighbor_id])
+            for neighbor_id, relationship in self.neighbors(node_id, direction=direction)
+            if neighbor_id in self.nodes
+        ]
+    
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize graph to a JSON-compatible dictionary"""
+        return {
+            'schema_version': GRAPH_SCHEMA_VERSION,
+            'node_ids': self._keys,
+            'nodes': [self.nodes.get(key) for key in self._keys],
+            'relationships': self._rel_names,
+            'edges': [
+                [s, d, r, m] for s, d, r, m in zip(self._src, self._dst, self._rel, self._edge_metadata)
+            ]
+        }
+    
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'KnowledgeGraph':
+        """Rebuild a graph (including indexes) from to_dict output"""
+        graph = cls()
+        for key, node in zip(payload['node_ids'], payload['nodes']):
+            if node is None:
+                graph._node_int(key)
+            else:
+                graph.add_node(key, node['type'], node['data'], node.get('metadata'))
+        names = payload['relationships']
+        keys = payload['node_ids']
+        for s, d, r, m in payload['edges']:
+            graph.add_edge(keys[s], keys[d], names[r], m)
+        return graph
+    
+    def save(self, path: Path, fingerprint: str = ""):
+        """Persist graph as JSON"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = self.to_dict()
+        payload['fingerprint'] = fingerprint
+        with open(path, 'w') as f:
+            json.dump(payload, f, default=str)
+    
+    @classmethod
+    def load(cls, path: Path, fingerprint: Optional[str] = None) -> Optional['KnowledgeGraph']:
+        """
+        Load a persisted graph
+        
+        Returns:
+            KnowledgeGraph, or None if missing, stale (schema or fingerprint) or unreadable
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read knowledge graph {path}: {e}")
+            return None
+        if payload.get('schema_version') != GRAPH_SCHEMA_VERSION:
+            return None
+        if fingerprint is not None and payload.get('fingerprint') != fingerprint:
+            return None
+        return cls.from_dict(payload)
 
 
 def build_knowledge_graph_from_state(state: Dict[str, Any]) -> KnowledgeGraph:
@@ -246,7 +578,7 @@ def build_knowledge_graph_from_state(state: Dict[str, Any]) -> KnowledgeGraph:
             )
             graph.add_edge('company:main', 'plan:integration', 'has_integration_plan')
         
-        logger.info(f"Built knowledge graph with {len(graph.nodes)} nodes and {len(graph.edges)} edges")
+        logger.info(f"Built knowledge graph with {len(graph.nodes)} nodes and {graph.edge_count} edges")
         
     except Exception as e:
         logger.error(f"Error building knowledge graph: {e}")
@@ -254,6 +586,74 @@ def build_knowledge_graph_from_state(state: Dict[str, Any]) -> KnowledgeGraph:
     return graph
 
 
+def _state_fingerprint(state: Dict[str, Any]) -> str:
+    """Identify the analysis run a persisted graph was built from"""
+    return f"{state.get('target_ticker', '')}|{state.get('workflow_completed') or ''}"
+
+
+def load_or_build_knowledge_graph(
+    job_id: str,
+    state: Dict[str, Any],
+    graph_dir: str = KNOWLEDGE_GRAPH_DIR
+) -> KnowledgeGraph:
+    """
+    Load the job's persisted knowledge graph, building and saving it if missing or stale.
+    
+    Args:
+        job_id: Analysis job ID
+        state: Complete analysis state (used to build and fingerprint the graph)
+        graph_dir: Directory holding persisted graphs
+    
+    Returns:
+        KnowledgeGraph instance
+    """
+    path = Path(graph_dir) / f"{job_id}.json"
+    fingerprint = _state_fingerprint(state)
+    
+    with start_span("cache.lookup", {'cache.name': 'knowledge_graph', 'job.id': job_id}) as span:
+        graph = KnowledgeGraph.load(path, fingerprint)
+        span.set_attribute('cache.hit', graph is not None)
+    record_cache_lookup('knowledge_graph', graph is not None)
+    if graph is not None:
+        logger.info(f"Loaded persisted knowledge graph for job {job_id}")
+        return graph
+    
+    with start_span("knowledge_graph.build", {'job.id': job_id}):
+        graph = build_knowledge_graph_from_state(state)
+        try:
+            graph.save(path, fingerprint)
+        except OSError as e:
+            logger.warning(f"Could not persist knowledge graph for job {job_id}: {e}")
+    return graph
+
+
+# Query words mapped to the node types they refer to
+QUERY_TYPE_KEYWORDS = {
+    'risk': 'risk',
+    'competitor': 'competitor',
+    'peer': 'competitor',
+    'opportunit': 'opportunity',
+    'scenario': 'scenario',
+    'valuation': 'valuation',
+    'integration': 'integration_plan',
+    'macro': 'macroeconomic_analysis',
+    'econom': 'macroeconomic_analysis',
+    'competitive': 'competitive_analysis',
+    'ratio': 'financial_metric',
+    'metric': 'financial_metric',
+}
+
+
+def _mentioned_types(graph: KnowledgeGraph, query_lower: str) -> List[str]:
+    """Node types referenced in the query, in order of first mention"""
+    positions = {}
+    for keyword, node_type in QUERY_TYPE_KEYWORDS.items():
+        pos = query_lower.find(keyword)
+        if pos >= 0 and graph.query_by_type(node_type):
+            positions[node_type] = min(pos, positions.get(node_type, pos))
+    return sorted(positions, key=positions.get)
+
+
 def query_knowledge_graph(graph: KnowledgeGraph, query: str, context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Query the knowledge graph based on natural language query.
@@ -276,9 +676,29 @@ def query_knowledge_graph(graph: KnowledgeGraph, query: str, context: Dict[str,
     try:
         # Detect query type
         if 'connect' in query_lower or 'relationship' in query_lower or 'between' in query_lower:
-            # Relationship query
+            # Relationship query: shortest undirected paths between the entity types mentioned
             results['query_type'] = 'relationship'
-            results['nodes'] = list(graph.nodes.values())[:10]
+            mentioned = _mentioned_types(graph, query_lower)
+            if len(mentioned) >= 2:
+                source = graph.query_by_type(mentioned[0])[0]['id']
+                paths = []
+                for node in graph.query_by_type(mentioned[1])[:5]:
+                    path = graph.find_path(source, node['id'], direction='both')
+                    if path:
+                        paths.append(path)
+                results['paths'] = paths
+                node_ids = {step[0] for path in paths for step in path} | {step[2] for path in paths for step in path}
+                results['nodes'] = [graph.get_node(n) for n in node_ids if graph.get_node(n)]
+                steps = dict.fromkeys(step for path in paths for step in path)
+                results['relationships'] = [
+                    {'source': a, 'relationship': rel, 'target': b}
+                    for a, rel, b in steps
+                ]
+                results['insights'].append(
+                    f"Found {len(paths)} connection path(s) between {mentioned[0]} and {mentioned[1]} nodes"
+                )
+            else:
+                results['nodes'] = list(graph.nodes.values())[:10]
             
         elif 'risk' in query_lower:
             # Risk query
@@ -309,6 +729,7 @@ def query_knowledge_graph(graph: KnowledgeGraph, query: str, context: Dict[str,
             results['query_type'] = 'scenario'
             scenarios = graph.query_by_type('scenario')
             results['nodes'] = scenarios
+            results['relationships'] = graph.query_by_relationship('includes_scenario')
             
         else:
             # General query - return company node and its connections
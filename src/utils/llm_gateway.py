@@ -0,0 +1,271 @@
+"""
+LLM Gateway - Shared non-blocking access to the Anthropic API
+
+Modules that talk to the Anthropic SDK directly (rather than through a
+LangChain model) route their calls through this gateway so a slow response
+never blocks the event loop. Calls get a per-attempt timeout, retries with
+exponential backoff, a process-wide concurrency limit and the same
+primary → Claude 4.5 fallback chain as llm_call_with_retry.
+"""
+import asyncio
+import importlib.util
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+
+from .api_health_check import record_api_success, record_api_failure
+from .metrics import observe_llm_request, record_llm_fallback, record_llm_retry, record_llm_tokens
+from .tracing import add_span_event, current_span, set_span_attributes, start_span
+
+# The SDK is imported when the gateway first creates a client, not at server start
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+
+
+# Configuration (overridable via environment)
+LLM_GATEWAY_MAX_CONCURRENCY = int(os.getenv("LLM_GATEWAY_MAX_CONCURRENCY", "8"))
+LLM_GATEWAY_TIMEOUT = int(os.getenv("LLM_GATEWAY_TIMEOUT", "120"))
+LLM_GATEWAY_MAX_RETRIES = int(os.getenv("LLM_GATEWAY_MAX_RETRIES", "3"))
+LLM_GATEWAY_MODEL = os.getenv("LLM_GATEWAY_MODEL", "claude-sonnet-4-20250514")
+LLM_GATEWAY_FALLBACK_MODEL = os.getenv("LLM_GATEWAY_FALLBACK_MODEL", "claude-sonnet-4-5")
+
+PROVIDER = 'anthropic'
+
+
+class LLMGateway:
+    """
+    Async Anthropic client shared across jobs
+
+    The SDK client and the concurrency semaphore are bound to an event loop,
+    so one of each is kept per loop; sync callers that drive their own loop
+    with asyncio.run() get a fresh pair instead of a stale one.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = LLM_GATEWAY_MAX_CONCURRENCY
+    ):
+        self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        self.max_concurrency = max_concurrency
+        self._loop_resources_by_id: Dict[int, Tuple[asyncio.AbstractEventLoop, Any, asyncio.Semaphore]] = {}
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether the SDK is installed and an API key is configured"""
+        return ANTHROPIC_AVAILABLE and bool(self.api_key)
+
+    def _loop_resources(self):
+        loop = asyncio.get_running_loop()
+        resources = self._loop_resources_by_id.get(id(loop))
+        if resources is None or resources[0] is not loop:
+            # Drop resources of loops that have since closed
+            self._loop_resources_by_id = {
+                key: value for key, value in self._loop_resources_by_id.items() if not value[0].is_closed()
+            }
+            from anthropic import AsyncAnthropic
+            resources = (loop, AsyncAnthropic(api_key=self.api_key), asyncio.Semaphore(self.max_concurrency))
+            self._loop_resources_by_id[id(loop)] = resources
+        return resources[1], resources[2]
+
+    async def complete(
+        self,
+        prompt: str,
+        model: str = LLM_GATEWAY_MODEL,
+        max_tokens: int = 4000,
+        temperature: float = 0.2,
+        timeout: int = LLM_GATEWAY_TIMEOUT,
+        max_retries: int = LLM_GATEWAY_MAX_RETRIES,
+        context: str = "LLM call",
+        stream: bool = False,
+        enable_fallback: bool = True
+    ) -> str:
+        """
+        Send a single-turn prompt and return the response text.
+
+        Args:
+            prompt: User message content
+            model: Primary model
+            max_tokens: Maximum output tokens
+            temperature: Sampling temperature
+            timeout: Timeout per attempt in seconds
+            max_retries: Attempts per model
+            context: Description of the call (for logging)
+            stream: Stream the response (required for very long outputs)
+            enable_fallback: Retry on LLM_GATEWAY_FALLBACK_MODEL if the primary fails
+
+        Returns:
+            Response text
+
+        Raises:
+            RuntimeError: If the gateway is unavailable or all models fail
+        """
+        if not self.available:
+            raise RuntimeError(f"{context}: Anthropic client not available")
+
+        request = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'messages': [{'role': 'user', 'content': prompt}]
+        }
+        with start_span("llm.gateway", {
+            'llm.context': context,
+            'gen_ai.system': PROVIDER,
+            'gen_ai.request.model': model,
+            'gen_ai.request.max_tokens': max_tokens,
+            'gen_ai.request.temperature': temperature,
+            'llm.stream': stream
+        }) as span:
+            try:
+                return await self._complete_with_retries(request, stream, timeout, max_retries, context, "Primary")
+            except RuntimeError as primary_error:
+                if not enable_fallback or model == LLM_GATEWAY_FALLBACK_MODEL:
+                    raise
+
+                logger.warning(f"{context}: Primary model failed, switching to {LLM_GATEWAY_FALLBACK_MODEL} fallback...")
+                self.fallbacks += 1
+                record_llm_fallback(PROVIDER)
+                span.set_attribute('llm.fallback_model', LLM_GATEWAY_FALLBACK_MODEL)
+                add_span_event('llm.fallback', {'error': str(primary_error)})
+                try:
+                    text = await self._complete_with_retries(
+                        {**request, 'model': LLM_GATEWAY_FALLBACK_MODEL},
+                        stream, max(timeout, LLM_GATEWAY_TIMEOUT), max_retries, context, "Fallback (Claude 4.5)"
+                    )
+                    logger.info(f"{context}: Successfully completed using Claude 4.5 fallback")
+                    return text
+                except RuntimeError as fallback_error:
+                    logger.error(f"CRITICAL FAILURE: {context} failed on both primary and fallback models")
+                    raise RuntimeError(
+                        f"Critical: {context} failed on all models - "
+                        f"Primary: {primary_error}, Fallback: {fallback_error}"
+                    )
+
+    async def _complete_with_retries(
+        self,
+        request: Dict[str, Any],
+        stream: bool,
+        timeout: int,
+        max_retries: int,
+        context: str,
+        model_name: str
+    ) -> str:
+        client, semaphore = self._loop_resources()
+
+        for attempt in range(max_retries):
+            logger.debug(f"{context} [{model_name}]: Attempt {attempt + 1}/{max_retries}")
+            try:
+                async with semaphore:
+                    self.calls += 1
+                    self.in_flight += 1
+                    call_start = time.perf_counter()
+                    try:
+                        with start_span("llm.request", {
+                            'gen_ai.system': PROVIDER,
+                            'gen_ai.request.model': request['model'],
+                            'llm.attempt': attempt + 1
+                        }, kind='client'):
+                            text = await asyncio.wait_for(self._request(client, request, stream), timeout=timeout)
+                    finally:
+                        self.in_flight -= 1
+                latency = time.perf_counter() - call_start
+                self.total_latency += latency
+                record_api_success(PROVIDER, latency)
+                observe_llm_request(PROVIDER, request['model'], latency)
+
+                if attempt > 0:
+                    logger.info(f"{context} [{model_name}]: Succeeded on attempt {attempt + 1}")
+                current_span().set_attribute('llm.attempts', attempt + 1)
+                return text
+
+            except asyncio.TimeoutError:
+                self.failures += 1
+                record_api_failure(PROVIDER, f"Timeout after {timeout}s")
+                observe_llm_request(PROVIDER, request['model'], time.perf_counter() - call_start, outcome='timeout')
+                if attempt == max_retries - 1:
+                    error_msg = f"{model_name} timed out after {max_retries} attempts ({timeout}s each)"
+                    logger.error(f"{context}: {error_msg}")
+                    raise RuntimeError(error_msg)
+                wait_time = 2 ** attempt  # 1s, 2s, 4s
+                logger.info(f"{context} [{model_name}]: Timeout on attempt {attempt + 1}, retrying in {wait_time}s...")
+                record_llm_retry(PROVIDER)
+                await asyncio.sleep(wait_time)
+
+            except Exception as e:
+                self.failures += 1
+                error_type = type(e).__name__
+                error_msg = str(e) or "No error message provided"
+                rate_limited = '429' in error_msg or 'RateLimit' in error_type
+                record_api_failure(PROVIDER, f"{error_type}: {error_msg}", rate_limited=rate_limited)
+                observe_llm_request(
+                    PROVIDER, request['model'], time.perf_counter() - call_start,
+                    outcome='rate_limited' if rate_limited else 'error'
+                )
+                if attempt == max_retries - 1:
+                    full_error = f"{model_name} failed - {error_type}: {error_msg}"
+                    logger.error(f"{context}: {full_error}")
+                    raise RuntimeError(full_error)
+                wait_time = 2 ** attempt
+                logger.info(f"{context} [{model_name}]: {error_type} on attempt {attempt + 1}, retrying in {wait_time}s...")
+                record_llm_retry(PROVIDER)
+                await asyncio.sleep(wait_time)
+
+        raise RuntimeError(f"Retry logic error in {model_name}")
+
+    @staticmethod
+    async def _request(client: Any, request: Dict[str, Any], stream: bool) -> str:
+        if stream:
+            parts = []
+            async with client.messages.stream(**request) as response:
+                async for text in response.text_stream:
+                    parts.append(text)
+                LLMGateway._record_usage(await response.get_final_message(), request['model'])
+            return "".join(parts)
+
+        message = await client.messages.create(**request)
+        LLMGateway._record_usage(message, request['model'])
+        return "".join(block.text for block in message.content if getattr(block, 'type', None) == 'text')
+
+    @staticmethod
+    def _record_usage(message: Any, model: str):
+        """Record the response's token usage (current llm.request span and token counters)"""
+        usage = getattr(message, 'usage', None)
+        input_tokens = getattr(usage, 'input_tokens', None)
+        output_tokens = getattr(usage, 'output_tokens', None)
+        set_span_attributes(current_span(), {
+            'gen_ai.response.model': getattr(message, 'model', None),
+            'gen_ai.usage.input_tokens': input_tokens,
+            'gen_ai.usage.output_tokens': output_tokens
+        })
+        record_llm_tokens(PROVIDER, model, input_tokens, output_tokens)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gateway statistics"""
+        return {
+            'available': self.available,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'calls': self.calls,
+            'failures': self.failures,
+            'fallbacks': self.fallbacks,
+            'avg_latency_seconds': self.total_latency / (self.calls - self.failures)
+            if self.calls > self.failures else 0.0
+        }
+
+
+# Global gateway instance
+_llm_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get global LLM gateway instance"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
@@ -5,10 +5,15 @@ Provides robust retry logic with exponential backoff and intelligent fallbacks.
 Primary: Agent's configured LLM (3 retries) → Fallback: Claude 4.5 (3 retries)
 """
 import asyncio
+import time
 import traceback
 from typing import Any, Optional, List
 from loguru import logger
 
+from .api_health_check import record_api_success, record_api_failure, get_llm_provider
+from .metrics import record_llm_fallback, record_llm_retry
+from .tracing import add_span_event, current_span, start_span
+
 
 async def llm_call_with_retry(
     llm: Any,
@@ -41,6 +46,20 @@ async def llm_call_with_retry(
     Raises:
         RuntimeError: If all models fail after retries
     """
+    # One llm.call span per logical call; each attempt's llm.chat span nests under it
+    with start_span("llm.call", {'llm.context': context, 'gen_ai.system': get_llm_provider(llm)}):
+        return await _llm_call_with_fallback(llm, messages, max_retries, timeout, context, enable_fallback)
+
+
+async def _llm_call_with_fallback(
+    llm: Any,
+    messages: Any,
+    max_retries: int,
+    timeout: int,
+    context: str,
+    enable_fallback: bool
+) -> Any:
+    """Primary model with retries, then the Claude 4.5 fallback (see llm_call_with_retry)"""
     # Try primary LLM (agent's configured model)
     try:
         return await _try_llm_with_retries(
@@ -56,6 +75,9 @@ async def llm_call_with_retry(
             raise
         
         logger.warning(f"{context}: Primary model failed, switching to Claude 4.5 fallback...")
+        current_span().set_attribute('llm.fallback', True)
+        record_llm_fallback(get_llm_provider(llm))
+        add_span_event('llm.fallback', {'error': str(primary_error)})
         
         # Try Claude 4.5 fallback
         try:
@@ -110,21 +132,30 @@ async def _try_llm_with_retries(
     Raises:
         RuntimeError: If all retries fail
     """
+    provider = get_llm_provider(llm)
+    
     for attempt in range(max_retries):
         try:
             logger.debug(f"{context} [{model_name}]: Attempt {attempt + 1}/{max_retries}")
             
+            call_start = time.perf_counter()
             response = await asyncio.wait_for(
                 llm.ainvoke(messages),
                 timeout=timeout
             )
             
+            # Passive health update from the real call outcome
+            record_api_success(provider, time.perf_counter() - call_start)
+            
             if attempt > 0:
                 logger.info(f"{context} [{model_name}]: Succeeded on attempt {attempt + 1}")
+            current_span().set_attribute('llm.attempts', attempt + 1)
             
             return response
             
         except asyncio.TimeoutError:
+            record_api_failure(provider, f"Timeout after {timeout}s")
+            
             if attempt == max_retries - 1:
                 error_msg = f"{model_name} timed out after {max_retries} attempts ({timeout}s each)"
                 logger.error(f"{context}: {error_msg}")
@@ -132,11 +163,18 @@ async def _try_llm_with_retries(
             
             wait_time = 2 ** attempt  # 1s, 2s, 4s
             logger.info(f"{context} [{model_name}]: Timeout on attempt {attempt + 1}, retrying in {wait_time}s...")
+            add_span_event('llm.retry', {'llm.model_role': model_name, 'llm.attempt': attempt + 1, 'error': 'timeout'})
+            record_llm_retry(provider)
             await asyncio.sleep(wait_time)
             
         except Exception as e:
             error_type = type(e).__name__
             error_msg = str(e) if str(e) else "No error message provided"
+            record_api_failure(
+                provider,
+                f"{error_type}: {error_msg}",
+                rate_limited='429' in error_msg or 'RateLimit' in error_type
+            )
             
             if attempt == max_retries - 1:
                 full_error = f"{model_name} failed - {error_type}: {error_msg}"
@@ -145,6 +183,8 @@ async def _try_llm_with_retries(
             
             wait_time = 2 ** attempt
             logger.info(f"{context} [{model_name}]: {error_type} on attempt {attempt + 1}, retrying in {wait_time}s...")
+            add_span_event('llm.retry', {'llm.model_role': model_name, 'llm.attempt': attempt + 1, 'error': error_type})
+            record_llm_retry(provider)
             await asyncio.sleep(wait_time)
     
     # Should never reach here
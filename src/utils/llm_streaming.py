@@ -0,0 +1,194 @@
+"""
+LLM Streaming - Token-level streaming with latency metrics
+
+Wraps LangChain's ``astream`` so copilot responses reach the client as the
+model generates them, and records time-to-first-token (TTFT) and tokens/sec
+for each message.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Any, Optional, AsyncGenerator
+from loguru import logger
+
+
+# Rough characters-per-token ratio used when the provider reports no usage
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class StreamMetrics:
+    """Latency and throughput metrics for one streamed LLM response"""
+    model: str = "unknown"
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    chunk_count: int = 0
+    char_count: int = 0
+    output_tokens: Optional[int] = None  # Provider-reported, when available
+    cancelled: bool = False
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        """Time to first token in milliseconds"""
+        if self.first_token_at is None:
+            return None
+        return (self.first_token_at - self.started_at) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        """Total stream duration in milliseconds"""
+        end = self.finished_at or time.perf_counter()
+        return (end - self.started_at) * 1000
+
+    @property
+    def token_count(self) -> int:
+        """Output tokens (provider-reported, or estimated from characters)"""
+        if self.output_tokens:
+            return self.output_tokens
+        return max(1, self.char_count // CHARS_PER_TOKEN) if self.char_count else 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generation throughput measured from the first token"""
+        if self.first_token_at is None:
+            return 0.0
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.first_token_at
+        return self.token_count / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable summary for response metadata"""
+        return {
+            'model': self.model,
+            'ttft_ms': round(self.ttft_ms, 1) if self.ttft_ms is not None else None,
+            'total_ms': round(self.total_ms, 1),
+            'tokens': self.token_count,
+            'tokens_estimated': not self.output_tokens,
+            'tokens_per_second': round(self.tokens_per_second, 1),
+            'chunks': self.chunk_count,
+            'cancelled': self.cancelled
+        }
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Extract text from a LangChain message chunk (string or content blocks)"""
+    content = chunk.content if hasattr(chunk, 'content') else chunk
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get('text', '') if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return str(content) if content is not None else ""
+
+
+def _model_name(llm: Any) -> str:
+    """Best-effort model name for metrics"""
+    for attr in ('model_name', 'model'):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return llm.__class__.__name__
+
+
+async def stream_llm_text(
+    llm: Any,
+    prompt: Any,
+    metrics: Optional[StreamMetrics] = None
+) -> AsyncGenerator[str, None]:
+    """
+    Stream text deltas from an LLM as they are generated
+
+    Pulls one chunk at a time from ``llm.astream`` so a slow consumer
+    naturally applies backpressure. Closing this generator (e.g. when the
+    client disconnects) closes the underlying provider stream.
+
+    Args:
+        llm: LangChain chat model
+        prompt: Prompt string or message list
+        metrics: Optional StreamMetrics to populate
+
+    Yields:
+        Non-empty text fragments
+    """
+    metrics = metrics if metrics is not None else StreamMetrics()
+    metrics.model = _model_name(llm)
+    metrics.started_at = time.perf_counter()
+
+    if not hasattr(llm, 'astream'):
+        # Non-streaming model: deliver the full answer as one fragment
+        response = await llm.ainvoke(prompt)
+        text = _chunk_text(response)
+        metrics.first_token_at = time.perf_counter()
+        metrics.chunk_count = 1
+        metrics.char_count = len(text)
+        metrics.finished_at = metrics.first_token_at
+        if text:
+            yield text
+        return
+
+    stream = llm.astream(prompt)
+    try:
+        async for chunk in stream:
+            usage = getattr(chunk, 'usage_metadata', None)
+            if usage and usage.get('output_tokens'):
+                metrics.output_tokens = max(metrics.output_tokens or 0, usage['output_tokens'])
+
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if metrics.first_token_at is None:
+                metrics.first_token_at = time.perf_counter()
+            metrics.chunk_count += 1
+            metrics.char_count += len(text)
+            yield text
+    except (asyncio.CancelledError, GeneratorExit):
+        metrics.cancelled = True
+        raise
+    finally:
+        metrics.finished_at = time.perf_counter()
+        if hasattr(stream, 'aclose'):
+            await stream.aclose()
+        summary = metrics.to_dict()
+        logger.info(
+            f"LLM stream {'cancelled' if metrics.cancelled else 'complete'} ({summary['model']}): "
+            f"TTFT {summary['ttft_ms']}ms, {summary['tokens']} tokens, "
+            f"{summary['tokens_per_second']} tok/s"
+        )
+
+
+async def stream_llm_events(
+    llm: Any,
+    prompt: Any,
+    metrics: StreamMetrics,
+    metadata: Optional[Dict[str, Any]] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Stream an LLM response as copilot ``content`` events
+
+    Args:
+        llm: LangChain chat model
+        prompt: Prompt string or message list
+        metrics: StreamMetrics populated while streaming
+        metadata: Optional metadata attached to each event
+
+    Yields:
+        {"type": "content", "content": ..., "timestamp": ...} events
+    """
+    texts = stream_llm_text(llm, prompt, metrics)
+    try:
+        async for text in texts:
+            event = {
+                "type": "content",
+                "content": text,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+            if metadata:
+                event["metadata"] = metadata
+            yield event
+    finally:
+        # Close the provider stream right away rather than at garbage collection
+        await texts.aclose()
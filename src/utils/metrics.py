@@ -0,0 +1,276 @@
+"""
+Prometheus Metrics - Job, agent, provider, cache and delivery performance
+
+Instrumented code calls the small record/observe functions below; the API
+serves everything at /metrics in the Prometheus text format. Live values
+that already exist as statistics (compute executor, LLM gateway, caches,
+websocket connections) are read at scrape time by a collector rather than
+duplicated into gauges.
+
+Without prometheus-client installed every function is a no-op and
+/metrics answers 503.
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from loguru import logger
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest, start_http_server
+    from prometheus_client.core import GaugeMetricFamily
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    logger.warning("prometheus-client not available - /metrics disabled. Install with: pip install prometheus-client")
+
+
+NAMESPACE = "aimadds"
+
+# Bucket boundaries (seconds) sized for each kind of operation
+JOB_BUCKETS = (30, 60, 120, 300, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200)
+AGENT_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 300, 600)
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class _NoopMetric:
+    """Stand-in metric when prometheus-client is not installed"""
+
+    def labels(self, *args, **kwargs) -> '_NoopMetric':
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+
+def _histogram(name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = FAST_BUCKETS):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, namespace=NAMESPACE, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...] = ()):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Counter(name, documentation, labels, namespace=NAMESPACE)
+
+
+def _gauge(name: str, documentation: str, labels: Tuple[str, ...] = ()):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Gauge(name, documentation, labels, namespace=NAMESPACE)
+
+
+# Jobs and agents
+JOB_DURATION = _histogram('job_duration_seconds', "Analysis job wall time", ('status',), JOB_BUCKETS)
+JOB_QUEUE_WAIT = _histogram('job_queue_wait_seconds', "Time from job creation to the start of its run", (), HTTP_BUCKETS + (120, 300, 600, 1800))
+JOBS_IN_PROGRESS = _gauge('jobs_in_progress', "Analysis jobs currently running")
+AGENT_DURATION = _histogram('agent_duration_seconds', "Agent execute() wall time", ('agent', 'status'), AGENT_BUCKETS)
+
+# LLM calls (one observation per request attempt)
+LLM_DURATION = _histogram('llm_request_duration_seconds', "LLM request latency", ('provider', 'model', 'outcome'), LLM_BUCKETS)
+LLM_TOKENS = _counter('llm_tokens', "LLM tokens consumed", ('provider', 'model', 'direction'))
+LLM_RETRIES = _counter('llm_retries', "LLM request retries", ('provider',))
+LLM_FALLBACKS = _counter('llm_fallbacks', "Calls that switched to the fallback model", ('provider',))
+
+# External data APIs (FMP, SEC EDGAR, Tavily)
+EXTERNAL_DURATION = _histogram('external_request_duration_seconds', "External API request latency", ('service', 'outcome'), HTTP_BUCKETS)
+EXTERNAL_ERRORS = _counter('external_request_errors', "Failed external API requests", ('service', 'reason'))
+
+# Caches, state persistence and delivery
+CACHE_LOOKUPS = _counter('cache_lookups', "Cache lookups", ('cache', 'result'))
+STATE_SAVE_DURATION = _histogram('state_save_duration_seconds', "Job state save time", (), FAST_BUCKETS)
+STATE_SAVE_BYTES = _histogram('state_save_bytes', "Size of saved job state", (), (1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8))
+WEBSOCKET_FANOUT = _histogram('websocket_fanout_seconds', "Time to deliver one update to every subscriber", ('message_type',), FAST_BUCKETS)
+WEBSOCKET_SEND_FAILURES = _counter('websocket_send_failures', "Updates that could not be delivered to a subscriber", ('message_type',))
+PARALLEL_BATCH_DURATION = _histogram('parallel_batch_duration_seconds', "ParallelProcessor batch wall time", (), AGENT_BUCKETS)
+PARALLEL_TASKS = _counter('parallel_tasks', "ParallelProcessor task outcomes", ('outcome',))
+REPORT_DURATION = _histogram('report_artifact_duration_seconds', "Report artifact build time", ('artifact', 'status'), AGENT_BUCKETS)
+
+# Out-of-process job queue (enqueued, claimed, completed, retried, released, dead, lost)
+JOB_QUEUE_EVENTS = _counter('job_queue_events', "Job queue transitions", ('event',))
+
+
+# ============================================================================
+# RECORDING
+# ============================================================================
+
+def http_outcome(status: Optional[int] = None, error: Optional[BaseException] = None) -> str:
+    """Classify a request result: ok, rate_limited, client_error, server_error, timeout or network_error"""
+    if status is not None:
+        if status == 429:
+            return 'rate_limited'
+        if status >= 500:
+            return 'server_error'
+        if status >= 400:
+            return 'client_error'
+        return 'ok'
+    if error is not None and 'timeout' in type(error).__name__.lower():
+        return 'timeout'
+    return 'network_error'
+
+
+def observe_job(status: str, seconds: float):
+    """Record a finished analysis job"""
+    JOB_DURATION.labels(status=status).observe(seconds)
+
+
+def observe_job_queue_wait(seconds: float):
+    """Record how long a job waited before it started running"""
+    JOB_QUEUE_WAIT.observe(max(seconds, 0.0))
+
+
+@contextmanager
+def track_job_in_progress() -> Iterator[None]:
+    """Count a job as running for the duration of the block"""
+    JOBS_IN_PROGRESS.inc()
+    try:
+        yield
+    finally:
+        JOBS_IN_PROGRESS.dec()
+
+
+def observe_agent(agent: str, status: str, seconds: float):
+    """Record one agent run"""
+    AGENT_DURATION.labels(agent=agent, status=status).observe(seconds)
+
+
+def observe_llm_request(
+    provider: str,
+    model: Optional[str],
+    seconds: float,
+    outcome: str = 'ok',
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None
+):
+    """Record one LLM request attempt and the tokens it used"""
+    model = model or 'unknown'
+    LLM_DURATION.labels(provider=provider, model=model, outcome=outcome).observe(seconds)
+    record_llm_tokens(provider, model, input_tokens, output_tokens)
+
+
+def record_llm_tokens(provider: str, model: Optional[str], input_tokens: Optional[int], output_tokens: Optional[int]):
+    """Add token usage for a model"""
+    model = model or 'unknown'
+    if input_tokens:
+        LLM_TOKENS.labels(provider=provider, model=model, direction='input').inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(provider=provider, model=model, direction='output').inc(output_tokens)
+
+
+def record_llm_retry(provider: str):
+    LLM_RETRIES.labels(provider=provider).inc()
+
+
+def record_llm_fallback(provider: str):
+    LLM_FALLBACKS.labels(provider=provider).inc()
+
+
+def observe_external_request(service: str, seconds: float, outcome: str = 'ok'):
+    """Record one FMP / SEC / Tavily request (see http_outcome for outcomes)"""
+    EXTERNAL_DURATION.labels(service=service, outcome=outcome).observe(seconds)
+    if outcome != 'ok':
+        EXTERNAL_ERRORS.labels(service=service, reason=outcome).inc()
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache hit or miss (hit ratio = hits / all lookups per cache)"""
+    CACHE_LOOKUPS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def observe_state_save(seconds: float, size_bytes: Optional[int] = None):
+    STATE_SAVE_DURATION.observe(seconds)
+    if size_bytes is not None:
+        STATE_SAVE_BYTES.observe(size_bytes)
+
+
+def observe_websocket_fanout(message_type: str, seconds: float, failures: int = 0):
+    WEBSOCKET_FANOUT.labels(message_type=message_type).observe(seconds)
+    if failures:
+        WEBSOCKET_SEND_FAILURES.labels(message_type=message_type).inc(failures)
+
+
+def observe_parallel_batch(seconds: float, succeeded: int, failed: int):
+    PARALLEL_BATCH_DURATION.observe(seconds)
+    PARALLEL_TASKS.labels(outcome='success').inc(succeeded)
+    PARALLEL_TASKS.labels(outcome='failure').inc(failed)
+
+
+def observe_report_artifact(artifact: str, status: str, seconds: float):
+    """Record one report artifact build (completed, failed or timeout)"""
+    REPORT_DURATION.labels(artifact=artifact, status=status).observe(seconds)
+
+
+def record_job_queue_event(event: str):
+    JOB_QUEUE_EVENTS.labels(event=event).inc()
+
+
+# ============================================================================
+# SCRAPE-TIME STATISTICS
+# ============================================================================
+
+# name -> callable returning the current value (or a {label value: value} dict)
+_live_gauges: Dict[str, Tuple[str, Optional[str], Callable[[], Any]]] = {}
+
+
+def register_live_gauge(name: str, documentation: str, read: Callable[[], Any], label: Optional[str] = None):
+    """
+    Expose a value computed at scrape time (e.g. an executor's active jobs)
+
+    Args:
+        name: Metric name (without the aimadds_ prefix)
+        documentation: Help text
+        read: Returns a number, or a {label value: number} dict when `label` is set
+        label: Label name for dict-valued gauges
+    """
+    _live_gauges[name] = (documentation, label, read)
+
+
+class _LiveStatisticsCollector:
+    """Reads registered live gauges on each scrape"""
+
+    def collect(self) -> Iterator[Any]:
+        for name, (documentation, label, read) in list(_live_gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                logger.debug(f"Metric {name} unavailable: {e}")
+                continue
+            family = GaugeMetricFamily(f"{NAMESPACE}_{name}", documentation, labels=[label] if label else None)
+            if label:
+                for label_value, sample in (value or {}).items():
+                    family.add_metric([str(label_value)], float(sample))
+            else:
+                family.add_metric([], float(value))
+            yield family
+
+
+if PROMETHEUS_AVAILABLE:
+    REGISTRY.register(_LiveStatisticsCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type"""
+    if not PROMETHEUS_AVAILABLE:
+        raise RuntimeError("prometheus-client is not installed")
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def serve_metrics(port: int) -> bool:
+    """Serve /metrics on a side port (for processes without the API, e.g. job workers)"""
+    if not PROMETHEUS_AVAILABLE:
+        return False
+    start_http_server(port)
+    logger.info(f"Prometheus metrics on :{port}/metrics")
+    return True
+
@@ -11,6 +11,9 @@ from dataclasses import dataclass
 from loguru import logger
 import time
 
+from .metrics import observe_parallel_batch
+from .tracing import start_span
+
 
 @dataclass
 class ProcessingResult:
@@ -89,11 +92,17 @@ class ParallelProcessor:
         for task, name in zip(tasks, task_names):
             wrapped_tasks.append(self._execute_single(task, name))
         
-        # Execute all tasks concurrently
-        results = await asyncio.gather(*wrapped_tasks, return_exceptions=return_exceptions)
-        
-        elapsed_time = time.time() - start_time
-        success_count = sum(1 for r in results if isinstance(r, ProcessingResult) and r.success)
+        # Execute all tasks concurrently (each task's spans nest under the batch span)
+        with start_span("parallel.batch", {
+            'parallel.task_count': len(tasks),
+            'parallel.max_concurrent': self.max_concurrent
+        }) as span:
+            results = await asyncio.gather(*wrapped_tasks, return_exceptions=return_exceptions)
+            
+            elapsed_time = time.time() - start_time
+            success_count = sum(1 for r in results if isinstance(r, ProcessingResult) and r.success)
+            span.set_attribute('parallel.success_count', success_count)
+        observe_parallel_batch(elapsed_time, success_count, len(tasks) - success_count)
         
         logger.info(
             f"Batch processing complete: {success_count}/{len(tasks)} successful in {elapsed_time:.2f}s "
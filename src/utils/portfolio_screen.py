@@ -0,0 +1,191 @@
+"""
+Vectorized Portfolio Screen - Quantitative deal metrics for many targets against one acquirer
+Valuation, accretion/dilution, contribution and exchange ratio for N targets in one pass
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+# Fundamentals used by the screen (per company)
+FUNDAMENTAL_FIELDS = (
+    'share_price', 'shares_outstanding', 'market_cap', 'revenue', 'ebitda',
+    'net_income', 'total_debt', 'cash', 'dcf_value'
+)
+
+# Composite score: weight per metric (negative = lower is better)
+SCORE_WEIGHTS = {
+    'eps_accretion_pct': 0.35,
+    'dcf_upside_pct': 0.25,
+    'implied_ev_to_ebitda': -0.15,
+    'contribution_gap_pct': 0.15,
+    'relative_size': -0.10
+}
+
+
+@dataclass
+class ScreenAssumptions:
+    """Deal assumptions applied uniformly to every candidate"""
+    premium: float = 0.30
+    cash_percentage: float = 0.5
+    debt_interest_rate: float = 0.065
+    tax_rate: float = 0.21
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _latest(statements: Any) -> Dict[str, Any]:
+    return statements[0] if isinstance(statements, list) and statements and isinstance(statements[0], dict) else {}
+
+
+def company_fundamentals(
+    profile: Optional[Dict[str, Any]],
+    income_statement: Any,
+    balance_sheet: Any,
+    dcf: Any = None,
+    share_price: Optional[float] = None,
+    shares_outstanding: Optional[float] = None,
+    market_cap: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Screen inputs from FMP data (latest annual statements)
+
+    Args:
+        profile: Company profile
+        income_statement: Annual income statements, newest first
+        balance_sheet: Annual balance sheets, newest first
+        dcf: FMP discounted-cash-flow response
+        share_price: Current price (defaults to the profile price)
+        shares_outstanding: Share count (defaults to diluted weighted average shares)
+        market_cap: Market cap (defaults to the profile market cap, then price x shares)
+
+    Returns:
+        Dictionary of FUNDAMENTAL_FIELDS (NaN where unavailable)
+    """
+    profile = profile or {}
+    income = _latest(income_statement)
+    balance = _latest(balance_sheet)
+    price = _number(share_price if share_price else profile.get('price'))
+    shares = _number(shares_outstanding or income.get('weightedAverageShsOutDil') or income.get('weightedAverageShsOut'))
+    cap = _number(market_cap or profile.get('mktCap'))
+    if np.isnan(cap) and not np.isnan(price * shares):
+        cap = price * shares
+    if np.isnan(shares) and price > 0:
+        shares = cap / price
+    return {
+        'share_price': price,
+        'shares_outstanding': shares,
+        'market_cap': cap,
+        'revenue': _number(income.get('revenue')),
+        'ebitda': _number(income.get('ebitda')),
+        'net_income': _number(income.get('netIncome')),
+        'total_debt': _number(balance.get('totalDebt')),
+        'cash': _number(balance.get('cashAndCashEquivalents')),
+        'dcf_value': _number(_latest(dcf).get('dcf') if isinstance(dcf, list) else (dcf or {}).get('dcf'))
+    }
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _percentile_rank(values: np.ndarray, higher_is_better: bool = True) -> np.ndarray:
+    """0..1 rank of each value, 1 = best (missing values rank worst)"""
+    values = values if higher_is_better else -values
+    ranks = np.zeros(values.shape)
+    valid = ~np.isnan(values)
+    count = int(valid.sum())
+    if count > 1:
+        ranks[valid] = np.argsort(np.argsort(values[valid])) / (count - 1)
+    elif count == 1:
+        ranks[valid] = 1.0
+    return ranks
+
+
+def screen_targets(
+    acquirer: Dict[str, float],
+    targets: Dict[str, Dict[str, float]],
+    assumptions: Optional[ScreenAssumptions] = None
+) -> List[Dict[str, Any]]:
+    """
+    Deal metrics and composite score for every target, best first
+
+    Args:
+        acquirer: Acquirer fundamentals (see company_fundamentals)
+        targets: Ticker -> target fundamentals
+        assumptions: Uniform deal assumptions
+
+    Returns:
+        One row per target with its metrics, score and rank. Deals larger than
+        the acquirer (relative size > 1) or of unknown size rank after every
+        affordable one.
+    """
+    a = assumptions or ScreenAssumptions()
+    tickers = list(targets)
+    if not tickers:
+        return []
+    t = {field: np.array([_number(targets[ticker].get(field)) for ticker in tickers]) for field in FUNDAMENTAL_FIELDS}
+    acq = {field: _number(acquirer.get(field)) for field in FUNDAMENTAL_FIELDS}
+    acq_cash = np.nan_to_num(acq['cash'])
+
+    # Valuation
+    purchase_price = t['market_cap'] * (1 + a.premium)
+    net_debt = np.nan_to_num(t['total_debt']) - np.nan_to_num(t['cash'])
+    ev_to_ebitda = _ratio(t['market_cap'] + net_debt, t['ebitda'])
+    implied_ev_to_ebitda = _ratio(purchase_price + net_debt, t['ebitda'])
+    dcf_upside = _ratio(t['dcf_value'], t['share_price']) - 1
+
+    # Financing and accretion/dilution (no synergies)
+    debt_needed = np.maximum(purchase_price * a.cash_percentage - acq_cash, 0.0)
+    after_tax_interest = debt_needed * a.debt_interest_rate * (1 - a.tax_rate)
+    new_shares = _ratio(purchase_price * (1 - a.cash_percentage), np.full(len(tickers), acq['share_price']))
+    pro_forma_shares = acq['shares_outstanding'] + new_shares
+    pro_forma_income = acq['net_income'] + t['net_income'] - after_tax_interest
+    acquirer_eps = acq['net_income'] / acq['shares_outstanding'] if acq['shares_outstanding'] > 0 else np.nan
+    pro_forma_eps = _ratio(pro_forma_income, pro_forma_shares)
+    eps_accretion = pro_forma_eps / acquirer_eps - 1 if acquirer_eps > 0 else np.full(len(tickers), np.nan)
+    breakeven_synergies = np.maximum(acquirer_eps * pro_forma_shares - pro_forma_income, 0.0) / (1 - a.tax_rate)
+
+    # Exchange ratio (stock component) and contribution vs ownership
+    exchange_ratio = _ratio(t['share_price'] * (1 + a.premium) * (1 - a.cash_percentage), np.full(len(tickers), acq['share_price']))
+    target_ownership = _ratio(new_shares, pro_forma_shares)
+    revenue_contribution = _ratio(t['revenue'], acq['revenue'] + t['revenue'])
+    ebitda_contribution = _ratio(t['ebitda'], acq['ebitda'] + t['ebitda'])
+    contribution_gap = ebitda_contribution - target_ownership
+    relative_size = _ratio(purchase_price, np.full(len(tickers), acq['market_cap']))
+
+    metrics = {
+        'purchase_price': purchase_price,
+        'ev_to_ebitda': ev_to_ebitda,
+        'implied_ev_to_ebitda': implied_ev_to_ebitda,
+        'dcf_upside_pct': dcf_upside * 100,
+        'eps_accretion_pct': eps_accretion * 100,
+        'breakeven_synergies': breakeven_synergies,
+        'exchange_ratio': exchange_ratio,
+        'target_ownership_pct': target_ownership * 100,
+        'revenue_contribution_pct': revenue_contribution * 100,
+        'ebitda_contribution_pct': ebitda_contribution * 100,
+        'contribution_gap_pct': contribution_gap * 100,
+        'relative_size': relative_size
+    }
+
+    score = sum(
+        abs(weight) * _percentile_rank(metrics[name], higher_is_better=weight > 0)
+        for name, weight in SCORE_WEIGHTS.items()
+    ) / sum(abs(weight) for weight in SCORE_WEIGHTS.values())
+    affordable = relative_size <= 1  # unknown size (missing data) is never escalated
+    order = np.lexsort((-score, ~affordable))
+
+    rows = []
+    for rank, i in enumerate(order, start=1):
+        row = {'ticker': tickers[i], 'rank': rank, 'score': round(float(score[i]) * 100, 1), 'affordable': bool(affordable[i])}
+        for name, values in metrics.items():
+            row[name] = None if np.isnan(values[i]) else round(float(values[i]), 4)
+        rows.append(row)
+    return rows
@@ -0,0 +1,306 @@
+"""
+Price Store - Local columnar daily price history with incremental updates
+
+One Parquet file per symbol (data/prices/<SYMBOL>.parquet). An update asks
+FMP for the days after the last stored date plus an overlap of the last
+few stored days; if FMP restated those (a split, or a dividend for
+adjClose) the whole history is fetched again, so old and new prices stay
+on one basis. The file is rewritten atomically. Reads memory-map the file into NumPy arrays. PriceHistory serves
+returns, VWAP, rolling volatility and premium-vs-average windows as array
+operations, so agents do not handle JSON price lists.
+
+Without pyarrow the store is disabled, and get_history() returns None.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+from ..integrations.fmp_client import FMPClient
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not available - price store disabled. Install with: pip install pyarrow")
+
+
+# Configuration (overridable via environment)
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/prices")
+PRICE_HISTORY_YEARS = int(os.getenv("PRICE_HISTORY_YEARS", "5"))  # depth of the first fetch
+PRICE_STORE_REFRESH_SECONDS = int(os.getenv("PRICE_STORE_REFRESH_SECONDS", "21600"))  # skip FMP if updated this recently
+PRICE_OVERLAP_DAYS = int(os.getenv("PRICE_OVERLAP_DAYS", "5"))  # stored trading days re-fetched to detect restatements
+
+TRADING_DAYS_PER_YEAR = 252
+
+# FMP field -> stored column
+COLUMNS = {
+    'open': 'open',
+    'high': 'high',
+    'low': 'low',
+    'close': 'close',
+    'adjClose': 'adj_close',
+    'volume': 'volume',
+    'vwap': 'vwap'
+}
+
+
+@dataclass
+class PriceHistory:
+    """Daily prices of one symbol, oldest first, as NumPy arrays"""
+    symbol: str
+    dates: np.ndarray  # datetime64[D]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    adj_close: np.ndarray
+    volume: np.ndarray
+    vwap: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def last_date(self) -> Optional[date]:
+        return self.dates[-1].astype(date) if len(self.dates) else None
+
+    @property
+    def last_price(self) -> Optional[float]:
+        return float(self.close[-1]) if len(self.close) else None
+
+    def window(self, days: int) -> slice:
+        """Slice covering the last `days` trading days"""
+        return slice(max(len(self) - days, 0), len(self))
+
+    def returns(self, days: Optional[int] = None, log: bool = False) -> np.ndarray:
+        """Daily returns on adjusted close (over the last `days` trading days)"""
+        prices = self.adj_close if days is None else self.adj_close[self.window(days + 1)]
+        if len(prices) < 2:
+            return np.array([])
+        return np.diff(np.log(prices)) if log else prices[1:] / prices[:-1] - 1
+
+    def total_return(self, days: int) -> Optional[float]:
+        """Return over the last `days` trading days"""
+        prices = self.adj_close[self.window(days + 1)]
+        return float(prices[-1] / prices[0] - 1) if len(prices) > 1 and prices[0] > 0 else None
+
+    def average_price(self, days: int) -> Optional[float]:
+        """Mean close over the last `days` trading days"""
+        closes = self.close[self.window(days)]
+        return float(closes.mean()) if len(closes) else None
+
+    def vwap_over(self, days: int) -> Optional[float]:
+        """Volume-weighted average price over the last `days` trading days"""
+        span = self.window(days)
+        volume = self.volume[span]
+        typical = np.where(np.isnan(self.vwap[span]), (self.high[span] + self.low[span] + self.close[span]) / 3, self.vwap[span])
+        total = volume.sum()
+        return float((typical * volume).sum() / total) if total > 0 else self.average_price(days)
+
+    def rolling_volatility(self, window: int = 30, annualize: bool = True) -> np.ndarray:
+        """Rolling standard deviation of daily log returns (one value per day after the first window)"""
+        log_returns = self.returns(log=True)
+        if len(log_returns) < window:
+            return np.array([])
+        windows = np.lib.stride_tricks.sliding_window_view(log_returns, window)
+        volatility = windows.std(axis=1, ddof=1)
+        return volatility * np.sqrt(TRADING_DAYS_PER_YEAR) if annualize else volatility
+
+    def volatility(self, days: int = 30, annualize: bool = True) -> Optional[float]:
+        """Volatility of daily log returns over the last `days` trading days"""
+        log_returns = self.returns(days, log=True)
+        if len(log_returns) < 2:
+            return None
+        value = float(log_returns.std(ddof=1))
+        return value * float(np.sqrt(TRADING_DAYS_PER_YEAR)) if annualize else value
+
+    def premium_to_average(self, price: float, days: int) -> Optional[float]:
+        """Premium of `price` over the mean close of the last `days` trading days"""
+        average = self.average_price(days)
+        return float(price / average - 1) if average else None
+
+    def high_low(self, days: int = TRADING_DAYS_PER_YEAR) -> Tuple[Optional[float], Optional[float]]:
+        """Highest high and lowest low over the last `days` trading days"""
+        span = self.window(days)
+        if not len(self.high[span]):
+            return None, None
+        return float(np.nanmax(self.high[span])), float(np.nanmin(self.low[span]))
+
+    def summary(self) -> Dict[str, Any]:
+        """Common price statistics (the inputs premium and exchange-ratio analysis use)"""
+        high_52w, low_52w = self.high_low()
+        return {
+            'as_of': self.last_date.isoformat() if self.last_date else None,
+            'current_price': self.last_price,
+            'price_1day_ago': float(self.close[-2]) if len(self) > 1 else self.last_price,
+            'price_30day_avg': self.average_price(30),
+            'vwap_30day': self.vwap_over(30),
+            'price_52week_high': high_52w,
+            'price_52week_low': low_52w,
+            'volatility_30day': self.volatility(30),
+            'volatility_1year': self.volatility(TRADING_DAYS_PER_YEAR),
+            'return_1month': self.total_return(21),
+            'return_3month': self.total_return(63),
+            'return_1year': self.total_return(TRADING_DAYS_PER_YEAR)
+        }
+
+
+class PriceStore:
+    """Per-symbol Parquet files of daily prices, updated incrementally from FMP"""
+
+    def __init__(self, root: str = PRICE_STORE_DIR, refresh_seconds: int = PRICE_STORE_REFRESH_SECONDS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.refresh_seconds = refresh_seconds
+        self._cache: Dict[str, Tuple[float, PriceHistory]] = {}  # symbol -> (file mtime, history)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.parquet"
+
+    def read(self, symbol: str) -> Optional[PriceHistory]:
+        """Stored history of a symbol (memory-mapped; None if nothing is stored)"""
+        path = self._path(symbol)
+        if not PYARROW_AVAILABLE or not path.exists():
+            return None
+        mtime = path.stat().st_mtime
+        cached = self._cache.get(symbol.upper())
+        if cached and cached[0] == mtime:
+            return cached[1]
+        table = pq.read_table(path, memory_map=True)
+        history = PriceHistory(
+            symbol=symbol.upper(),
+            dates=table.column('date').to_numpy().astype('datetime64[D]'),
+            **{column: table.column(column).to_numpy(zero_copy_only=False).astype(float) for column in COLUMNS.values()}
+        )
+        self._cache[symbol.upper()] = (mtime, history)
+        return history
+
+    async def update(self, symbol: str, client: Optional[FMPClient] = None) -> int:
+        """
+        Fetch the days after the last stored date and append them
+
+        The last PRICE_OVERLAP_DAYS stored days are fetched again; when their
+        close or adjusted close changed (split, dividend adjustment), the
+        full history is fetched and the file replaced.
+
+        Args:
+            symbol: Ticker symbol
+            client: Open FMP client to reuse (one is opened otherwise)
+
+        Returns:
+            Number of new trading days stored (all days after a restatement)
+        """
+        if not PYARROW_AVAILABLE:
+            return 0
+        symbol = symbol.upper()
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            path = self._path(symbol)
+            if path.exists() and time.time() - path.stat().st_mtime < self.refresh_seconds:
+                return 0
+
+            existing = await asyncio.to_thread(self.read, symbol)
+            if existing is not None and len(existing):
+                from_date = existing.dates[-min(max(PRICE_OVERLAP_DAYS, 1), len(existing))].astype(date)
+            else:
+                existing = None
+                from_date = date.today() - timedelta(days=365 * PRICE_HISTORY_YEARS)
+            rows = await self._fetch(symbol, client, from_date)
+            if existing is not None and self._restated(existing, rows):
+                full_from = min(existing.dates[0].astype(date), date.today() - timedelta(days=365 * PRICE_HISTORY_YEARS))
+                logger.info(f"Price store: {symbol} prices were restated (split or dividend adjustment); refetching history")
+                rows = await self._fetch(symbol, client, full_from)
+                existing = None
+            elif existing is not None:
+                last = existing.last_date.isoformat()
+                rows = [row for row in rows if row['date'] > last]
+            if not rows:
+                if path.exists():
+                    path.touch()  # Checked: nothing new since the last trading day
+                return 0
+            await asyncio.to_thread(self._append, symbol, existing, rows)
+            logger.debug(f"Price store: {symbol} +{len(rows)} day(s)")
+            return len(rows)
+
+    @staticmethod
+    async def _fetch(symbol: str, client: Optional[FMPClient], from_date: date) -> List[Dict[str, Any]]:
+        """FMP daily rows from `from_date` on"""
+        if client is None:
+            async with FMPClient() as own_client:
+                response = await own_client.get_historical_price(symbol, from_date=from_date.isoformat())
+        else:
+            response = await client.get_historical_price(symbol, from_date=from_date.isoformat())
+        rows = response.get('historical', []) if isinstance(response, dict) else []
+        return [row for row in rows if row.get('date') and row['date'] >= from_date.isoformat()]
+
+    @staticmethod
+    def _restated(existing: PriceHistory, rows: List[Dict[str, Any]]) -> bool:
+        """Whether fetched rows disagree with stored close/adjClose on the same days"""
+        stored = {str(day): i for i, day in enumerate(existing.dates)}
+        for row in rows:
+            i = stored.get(row['date'])
+            if i is None:
+                continue
+            for field, column in (('close', 'close'), ('adjClose', 'adj_close')):
+                value = row.get(field)
+                old = getattr(existing, column)[i]
+                if value is not None and not np.isnan(old) and not np.isclose(float(value), old, rtol=1e-6):
+                    return True
+        return False
+
+    def _append(self, symbol: str, existing: Optional[PriceHistory], rows: List[Dict[str, Any]]):
+        rows = sorted(rows, key=lambda row: row['date'])
+        new = {
+            'date': np.array([row['date'] for row in rows], dtype='datetime64[D]'),
+            **{
+                column: np.array([row.get(field) if row.get(field) is not None else np.nan for row in rows], dtype=float)
+                for field, column in COLUMNS.items()
+            }
+        }
+        if existing is not None and len(existing):
+            keep = existing.dates < new['date'][0]
+            new = {
+                'date': np.concatenate([existing.dates[keep], new['date']]),
+                **{column: np.concatenate([getattr(existing, column)[keep], new[column]]) for column in COLUMNS.values()}
+            }
+        table = pa.table({'date': pa.array(new['date'], type=pa.date32()), **{column: new[column] for column in COLUMNS.values()}})
+        path = self._path(symbol)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    async def get_history(self, symbol: str, update: bool = True) -> Optional[PriceHistory]:
+        """
+        History of a symbol, brought up to date first unless update=False
+
+        An FMP failure falls back to whatever is stored.
+        """
+        if not PYARROW_AVAILABLE or not symbol:
+            return None
+        if update:
+            try:
+                await self.update(symbol)
+            except Exception as e:
+                logger.warning(f"Price store update failed for {symbol}: {e}")
+        return await asyncio.to_thread(self.read, symbol)
+
+
+# Global price store instance
+_price_store: Optional[PriceStore] = None
+
+
+def get_price_store() -> PriceStore:
+    """Get global price store instance"""
+    global _price_store
+    if _price_store is None:
+        _price_store = PriceStore()
+    return _price_store
@@ -0,0 +1,237 @@
+"""
+Reference Data Service - Market-wide series shared by every job
+
+Treasury rates, the economic calendar and sector performance are the same
+for every job that runs on a given day. The service refreshes them in the
+background on a schedule and keeps them in memory and on disk
+(data/reference/<series>.json) with an as-of timestamp. Jobs read the
+current values without waiting; a job that starts before the first refresh
+of a cold deployment gets None and uses its defaults.
+
+API servers and queue workers each run the service. A refresh first reloads
+the files on disk, so a process picks up series another process fetched
+recently; there is no cross-process lock, so processes sharing the data
+directory may each fetch a series that is due at the same time. Processes
+that don't run the service (CLI scripts, the benchmark runner) fetch once,
+on first use (ensure_loaded).
+"""
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+
+from ..integrations.fmp_client import FMPClient
+
+
+# Configuration (overridable via environment)
+REFERENCE_DATA_DIR = os.getenv("REFERENCE_DATA_DIR", "data/reference")
+REFERENCE_DATA_REFRESH_SECONDS = int(os.getenv("REFERENCE_DATA_REFRESH_SECONDS", "3600"))
+REFERENCE_DATA_MAX_AGE_SECONDS = int(os.getenv("REFERENCE_DATA_MAX_AGE_SECONDS", "86400"))  # older values are reported as stale
+
+# Series name -> fetch from FMP
+SERIES: Dict[str, Callable[[FMPClient], Awaitable[Any]]] = {
+    'treasury_10y': lambda client: client.get_treasury_rates(maturity='10year'),
+    'economic_calendar': lambda client: client.get_economic_calendar(),
+    'sector_performance': lambda client: client.get_sector_performance(),
+}
+
+
+@dataclass
+class ReferenceSeries:
+    """One market-wide series with the time it was fetched"""
+    name: str
+    data: Any
+    fetched_at: float  # epoch seconds
+
+    @property
+    def as_of(self) -> str:
+        return datetime.utcfromtimestamp(self.fetched_at).isoformat()
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ReferenceDataService:
+    """Background-refreshed, in-memory and on-disk market reference data"""
+
+    def __init__(
+        self,
+        root: str = REFERENCE_DATA_DIR,
+        refresh_interval: int = REFERENCE_DATA_REFRESH_SECONDS,
+        max_age: int = REFERENCE_DATA_MAX_AGE_SECONDS
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._series: Dict[str, ReferenceSeries] = {}
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._initial_refresh: Optional[asyncio.Task] = None
+        self._load_from_disk()
+
+    async def start(self):
+        """Start the background refresh loop (idempotent)"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info(f"Reference data service started (refresh every {self.refresh_interval}s)")
+
+    async def stop(self):
+        """Stop the background refresh loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Reference data refresh failed: {e}")
+            await asyncio.sleep(min(self.refresh_interval, 300))
+
+    async def refresh(self, force: bool = False) -> List[str]:
+        """
+        Fetch every series that is due (all of them with force=True)
+
+        A series that fails to fetch keeps its previous value.
+
+        Returns:
+            Names of the series that were fetched
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            self._load_from_disk()
+            due = [
+                name for name in SERIES
+                if force or name not in self._series or self._series[name].age_seconds >= self.refresh_interval
+            ]
+            if not due:
+                return []
+
+            async with FMPClient() as client:
+                results = await asyncio.gather(*[SERIES[name](client) for name in due], return_exceptions=True)
+
+            fetched = []
+            for name, data in zip(due, results):
+                if isinstance(data, BaseException) or not data:
+                    logger.warning(f"Reference series {name} not refreshed: {data if isinstance(data, BaseException) else 'empty response'}")
+                    continue
+                series = ReferenceSeries(name=name, data=data, fetched_at=time.time())
+                self._series[name] = series
+                self._save(series)
+                fetched.append(name)
+            if fetched:
+                logger.info(f"Reference data refreshed: {', '.join(fetched)}")
+            return fetched
+
+    async def ensure_loaded(self):
+        """
+        Refresh the due series once if this process doesn't run the service
+
+        Readers call this before reading. Servers and workers refresh in the
+        background and return immediately; elsewhere the first caller fetches
+        and concurrent callers wait for the same refresh.
+        """
+        if self._task is not None:
+            return
+        if self._initial_refresh is None:
+            self._initial_refresh = asyncio.create_task(self.refresh())
+        try:
+            await asyncio.shield(self._initial_refresh)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Reference data refresh failed: {e}")
+
+    def _load_from_disk(self):
+        """Pick up series that are missing here or were refreshed by another process"""
+        for name in SERIES:
+            path = self.root / f"{name}.json"
+            if not path.exists():
+                continue
+            current = self._series.get(name)
+            if current and path.stat().st_mtime <= current.fetched_at:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    series = ReferenceSeries(**json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping unreadable reference series {path}: {e}")
+                continue
+            if not current or series.fetched_at > current.fetched_at:
+                self._series[name] = series
+
+    def _save(self, series: ReferenceSeries):
+        path = self.root / f"{series.name}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(asdict(series), f, default=str)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist reference series {series.name}: {e}")
+
+    def get(self, name: str) -> Optional[ReferenceSeries]:
+        """Current value of a series (never fetches; None before its first refresh)"""
+        return self._series.get(name)
+
+    def treasury_10y(self) -> Optional[float]:
+        """10-year treasury yield in percent"""
+        series = self.get('treasury_10y')
+        if not series or not series.data:
+            return None
+        value = series.data[0].get('value') if isinstance(series.data, list) else None
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def economic_calendar(self) -> List[Dict[str, Any]]:
+        series = self.get('economic_calendar')
+        return series.data if series and isinstance(series.data, list) else []
+
+    def sector_performance(self) -> List[Dict[str, Any]]:
+        series = self.get('sector_performance')
+        return series.data if series and isinstance(series.data, list) else []
+
+    def as_of(self) -> Dict[str, Optional[str]]:
+        """As-of timestamp of each series (None if never fetched)"""
+        return {name: self._series[name].as_of if name in self._series else None for name in SERIES}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Age and staleness of each series"""
+        return {
+            name: {
+                'as_of': series.as_of,
+                'age_seconds': round(series.age_seconds),
+                'stale': series.age_seconds > self.max_age
+            }
+            for name, series in self._series.items()
+        }
+
+
+# Global reference data service instance
+_reference_data_service: Optional[ReferenceDataService] = None
+
+
+def get_reference_data_service() -> ReferenceDataService:
+    """Get global reference data service instance"""
+    global _reference_data_service
+    if _reference_data_service is None:
+        _reference_data_service = ReferenceDataService()
+    return _reference_data_service
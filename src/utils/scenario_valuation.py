@@ -0,0 +1,569 @@
+"""
+Scenario Valuation - Compiled in-memory valuation model for what-if analysis
+
+Compiles a job's saved analysis state (historical metrics, base case DCF/LBO
+assumptions, accretion/dilution inputs) once, then re-runs DCF, LBO and
+accretion/dilution deterministically for changed assumptions. Used by the
+copilot so scenario answers quote exact model outputs instead of LLM estimates.
+"""
+import re
+import time
+from dataclasses import replace
+from typing import Dict, List, Any, Optional, Tuple
+from loguru import logger
+
+from src.utils.advanced_valuation import AdvancedValuationEngine, DCFAssumptions, LBOAssumptions
+from src.utils.accretion_dilution_model import AccretionDilutionCube, build_scenario_cube
+
+
+# Assumptions expressed as percentages, matched in priority order.
+# More specific phrases come first so "terminal growth" is not read as revenue growth.
+PERCENT_ASSUMPTIONS: List[Tuple[str, str]] = [
+    ('terminal_growth', r'terminal\s+growth(?:\s+rate)?|perpetuity\s+growth|long[- ]term\s+growth'),
+    ('wacc', r'wacc|discount\s+rate|cost\s+of\s+capital'),
+    ('tax_rate', r'tax\s+rate'),
+    ('debt_interest_rate', r'interest\s+rate|cost\s+of\s+debt|debt\s+rate'),
+    ('stock_percentage', r'(?:in\s+)?(?:stock|shares)(?!\s+price)'),
+    ('cash_percentage', r'cash\s+(?:mix|portion|percentage|consideration|component)|cash(?!\s+flow)'),
+    ('ebitda_margin', r'ebitda\s+margins?|margins?'),
+    ('revenue_growth', r'revenue\s+growth|sales\s+growth|top[- ]line\s+growth|growth\s+rate|growth'),
+]
+
+MULTIPLE_ASSUMPTIONS: List[Tuple[str, str]] = [
+    ('entry_multiple', r'entry\s+multiple|purchase\s+multiple|entry'),
+    ('exit_multiple', r'exit\s+multiple|exit'),
+]
+
+AMOUNT_ASSUMPTIONS: List[Tuple[str, str]] = [
+    ('synergies', r'synerg(?:y|ies)'),
+    ('purchase_price', r'purchase\s+price|deal\s+value|offer\s+price|consideration|pay(?:ing)?'),
+]
+
+AMOUNT_UNITS = {
+    'trillion': 1e12, 't': 1e12,
+    'billion': 1e9, 'bn': 1e9, 'b': 1e9,
+    'million': 1e6, 'mm': 1e6, 'm': 1e6,
+}
+
+_PERCENT = r'(-?\d+(?:\.\d+)?)\s*%'
+_MULTIPLE = r'(\d+(?:\.\d+)?)\s*x\b'
+_AMOUNT = r'\$?\s*(\d+(?:\.\d+)?)\s*(trillion|billion|million|bn|mm|t|b|m)\b'
+
+# Maximum gap (in non-digit characters) between a keyword and its value
+_KEYWORD_GAP = 25
+MAX_FORECAST_YEARS = 15
+
+# "WACC increases by 1%", "cut margins by 2%", "1% higher growth": changes from the
+# base case (in percentage points for rates), not new absolute values
+_UP = r'increas\w*|rais\w*|ris(?:e|es|ing)|up|expand\w*|higher|grow(?:s|n)?|improv\w*|add\w*|more'
+_DOWN = r'decreas\w*|reduc\w*|lower\w*|cut\w*|drop\w*|fall\w*|down|compress\w*|shrink\w*|declin\w*|less'
+_RELATIVE_BEFORE = re.compile(r'(?:\bby|\+)\s*\$?\s*$', re.IGNORECASE)
+_RELATIVE_AFTER = re.compile(
+    rf'\s*[%x]?\s*(?:(?:percentage\s+)?points?|pts?)?\s*({_UP}|{_DOWN})\b', re.IGNORECASE
+)
+_DIRECTION_WORD = re.compile(rf'\b(?:({_UP})|{_DOWN})\b', re.IGNORECASE)
+# Assumptions a relative change can apply to (they have a base case value)
+RELATIVE_ASSUMPTIONS = frozenset({
+    'terminal_growth', 'wacc', 'tax_rate', 'debt_interest_rate', 'cash_percentage', 'ebitda_margin',
+    'revenue_growth', 'entry_multiple', 'exit_multiple', 'synergies', 'purchase_price'
+})
+# Words around a match inspected for a relative phrasing
+_CONTEXT_CHARS = 30
+
+# Display formats for assumptions and metrics
+_PERCENT_KEYS = {
+    'revenue_growth', 'ebitda_margin', 'wacc', 'terminal_growth', 'tax_rate',
+    'debt_interest_rate', 'cash_percentage'
+}
+_MULTIPLE_KEYS = {'entry_multiple', 'exit_multiple', 'multiple_of_money'}
+_DOLLAR_KEYS = {'synergies', 'purchase_price', 'enterprise_value', 'equity_value', 'exit_equity_value',
+                'breakeven_synergies'}
+_PER_SHARE_KEYS = {'price_per_share', 'pro_forma_eps'}
+
+
+def _overlaps(span: Tuple[int, int], used: List[Tuple[int, int]]) -> bool:
+    """Check if a span overlaps any already consumed span"""
+    return any(span[0] < end and start < span[1] for start, end in used)
+
+
+def _match_assumptions(
+    message: str,
+    patterns: List[Tuple[str, str]],
+    value_pattern: str,
+    used: List[Tuple[int, int]]
+) -> Dict[str, Any]:
+    """
+    Match "<keyword> ... <value>" and "<value> <keyword>" phrases
+
+    Each keyword and value is consumed once, so a sentence such as
+    "revenue growth of 10% and WACC of 9%" yields two distinct assumptions.
+
+    Returns:
+        name -> (value groups, relative direction: +1 / -1, or None if absolute)
+    """
+    found = {}
+    for name, keyword in patterns:
+        forward = re.compile(rf'\b(?:{keyword})\b[^\d$+]{{0,{_KEYWORD_GAP}}}?\+?{value_pattern}', re.IGNORECASE)
+        backward = re.compile(rf'\+?{value_pattern}\s*(?:\w+\s+)?(?:{keyword})\b', re.IGNORECASE)
+        for regex in (forward, backward):
+            for match in regex.finditer(message):
+                if _overlaps(match.span(), used):
+                    continue
+                found[name] = (match.groups(), _direction(message, match))
+                used.append(match.span())
+                break
+            if name in found:
+                break
+    return found
+
+
+def _direction(message: str, match: re.Match) -> Optional[int]:
+    """+1 / -1 if the matched value is a change ("by 1%", "2% higher"), None if absolute"""
+    value_start, value_end = match.start(1), match.end(match.lastindex)
+    before = message[max(match.start() - _CONTEXT_CHARS, 0):value_start]
+    after = _RELATIVE_AFTER.match(message, value_end)
+    if after:
+        return 1 if _DIRECTION_WORD.fullmatch(after.group(1)).group(1) else -1
+    if not _RELATIVE_BEFORE.search(before):
+        return None
+    # "cut WACC by 1%": the verb closest to the value sets the sign
+    words = list(_DIRECTION_WORD.finditer(before))
+    return -1 if words and not words[-1].group(1) else 1
+
+
+def parse_scenario_overrides(message: str) -> Dict[str, Any]:
+    """
+    Extract assumption overrides from a natural language scenario request
+
+    Args:
+        message: User message, e.g. "What if WACC is 9% and revenue growth 12%?"
+
+    Returns:
+        Dictionary of overrides. Rates and percentages are decimals,
+        multiples are plain floats and amounts are absolute dollars.
+        Relative changes ("WACC up by 1%", "cut synergies by $100M") are
+        returned as '<name>_delta' (percentage points for rates), applied
+        to the base case by CompiledValuationModel.
+    """
+    overrides: Dict[str, Any] = {}
+    used: List[Tuple[int, int]] = []
+
+    def add(name: str, value: float, direction: Optional[int]):
+        if direction is None:
+            overrides[name] = value
+        elif name in RELATIVE_ASSUMPTIONS:
+            overrides[f'{name}_delta'] = value if value < 0 else direction * value
+
+    for name, (groups, direction) in _match_assumptions(message, PERCENT_ASSUMPTIONS, _PERCENT, used).items():
+        value = float(groups[0]) / 100
+        if name == 'stock_percentage':
+            # More stock is less cash
+            if direction is None:
+                add('cash_percentage', 1 - value, None)
+            else:
+                add('cash_percentage', value, -direction)
+            continue
+        add(name, value, direction)
+
+    for name, (groups, direction) in _match_assumptions(message, MULTIPLE_ASSUMPTIONS, _MULTIPLE, used).items():
+        add(name, float(groups[0]), direction)
+
+    for name, (groups, direction) in _match_assumptions(message, AMOUNT_ASSUMPTIONS, _AMOUNT, used).items():
+        add(name, float(groups[0]) * AMOUNT_UNITS[groups[1].lower()], direction)
+
+    if 'cash_percentage' not in overrides and 'cash_percentage_delta' not in overrides:
+        if re.search(r'\ball[- ](?:cash)\b', message, re.IGNORECASE):
+            overrides['cash_percentage'] = 1.0
+        elif re.search(r'\ball[- ](?:stock|shares?)\b', message, re.IGNORECASE):
+            overrides['cash_percentage'] = 0.0
+
+    years_match = re.search(r'(\d+)[\s-]*year', message, re.IGNORECASE)
+    if years_match and not _overlaps(years_match.span(), used):
+        years = int(years_match.group(1))
+        if 1 <= years <= MAX_FORECAST_YEARS:
+            overrides['forecast_years'] = years
+
+    if 'cash_percentage' in overrides:
+        overrides['cash_percentage'] = min(max(overrides['cash_percentage'], 0.0), 1.0)
+
+    return overrides
+
+
+class CompiledValuationModel:
+    """
+    Per-job valuation model compiled once from the saved analysis state
+
+    Holds historical metrics and base case assumptions so that each what-if
+    is a pure recomputation (no data loading, no LLM calls).
+    """
+
+    def __init__(
+        self,
+        historical: Dict[str, Any],
+        company_profile: Dict[str, Any],
+        base_dcf: DCFAssumptions,
+        base_lbo: Optional[LBOAssumptions] = None,
+        accretion_model: Optional[AccretionDilutionCube] = None
+    ):
+        """
+        Initialize model
+
+        Args:
+            historical: Output of AdvancedValuationEngine._calculate_historical_metrics
+            company_profile: Target company profile (used for shares outstanding)
+            base_dcf: Base case DCF assumptions
+            base_lbo: Base case LBO assumptions
+            accretion_model: Accretion/dilution model, if acquirer data was available
+        """
+        self.engine = AdvancedValuationEngine()
+        self.historical = historical
+        self.company_profile = company_profile or {}
+        self.base_dcf = base_dcf
+        self.base_lbo = base_lbo or LBOAssumptions()
+        self.accretion_model = accretion_model
+        self.baseline = self.evaluate({})
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> Optional['CompiledValuationModel']:
+        """
+        Compile a model from a saved analysis state
+
+        Returns:
+            CompiledValuationModel or None if the state has no financial statements
+        """
+        financial_data = state.get('financial_data', {}) or {}
+        income = financial_data.get('income_statement', [])
+        if not income:
+            logger.warning("Cannot compile valuation model: no income statements in state")
+            return None
+
+        engine = AdvancedValuationEngine()
+        historical = engine._calculate_historical_metrics(
+            income,
+            financial_data.get('balance_sheet', []),
+            financial_data.get('cash_flow', [])
+        )
+        base_dcf = engine._create_base_case_assumptions(historical)
+
+        return cls(
+            historical=historical,
+            company_profile=financial_data.get('profile', {}),
+            base_dcf=base_dcf,
+            accretion_model=cls._compile_accretion(state)
+        )
+
+    @staticmethod
+    def _compile_accretion(state: Dict[str, Any]) -> Optional[AccretionDilutionCube]:
+        """Rebuild the accretion/dilution model from the agent's saved output"""
+        accretion_data = {}
+        for output in state.get('agent_outputs', []):
+            if output.get('agent_name') == 'accretion_dilution' and output.get('data'):
+                accretion_data = output['data']
+        if not accretion_data.get('acquirer_standalone'):
+            return None
+
+        purchase_price = accretion_data.get('financing_impact', {}).get('total_consideration', 0)
+        return build_scenario_cube(
+            accretion_data['acquirer_standalone'],
+            accretion_data.get('target_standalone', {}),
+            state.get('deal_terms', {}) or {},
+            purchase_price
+        )
+
+    @staticmethod
+    def _resize(values: Optional[List[float]], years: int, default: float) -> List[float]:
+        """Truncate or extend (repeating the last value) a per-year assumption list"""
+        values = list(values) if values else [default]
+        if len(values) >= years:
+            return values[:years]
+        return values + [values[-1]] * (years - len(values))
+
+    @staticmethod
+    def _apply(overrides: Dict[str, Any], name: str, base: Any) -> Any:
+        """Resolve one assumption: absolute override, base plus a relative change, or the base"""
+        if name in overrides:
+            return overrides[name]
+        delta = overrides.get(f'{name}_delta')
+        if delta is not None and base is not None:
+            return base + delta
+        return base
+
+    def dcf_assumptions(self, overrides: Dict[str, Any]) -> DCFAssumptions:
+        """Apply overrides to the base case DCF assumptions"""
+        base = self.base_dcf
+        years = overrides.get('forecast_years', base.forecast_years)
+
+        growth = [
+            self._apply(overrides, 'revenue_growth', rate)
+            for rate in self._resize(base.revenue_growth_rates, years, 0.05)
+        ]
+        margins = [
+            self._apply(overrides, 'ebitda_margin', margin)
+            for margin in self._resize(base.ebitda_margins, years, 0.2)
+        ]
+
+        return replace(
+            base,
+            forecast_years=years,
+            wacc=self._apply(overrides, 'wacc', base.wacc),
+            terminal_growth_rate=self._apply(overrides, 'terminal_growth', base.terminal_growth_rate),
+            tax_rate=self._apply(overrides, 'tax_rate', base.tax_rate),
+            revenue_growth_rates=growth,
+            ebitda_margins=margins
+        )
+
+    def lbo_assumptions(self, overrides: Dict[str, Any]) -> LBOAssumptions:
+        """Apply overrides to the base case LBO assumptions"""
+        base = self.base_lbo
+        return replace(
+            base,
+            entry_multiple=self._apply(overrides, 'entry_multiple', base.entry_multiple),
+            exit_multiple=self._apply(overrides, 'exit_multiple', base.exit_multiple),
+            debt_interest_rate=self._apply(overrides, 'debt_interest_rate', base.debt_interest_rate),
+            tax_rate=self._apply(overrides, 'tax_rate', base.tax_rate),
+            revenue_growth=self._apply(overrides, 'revenue_growth', base.revenue_growth),
+            ebitda_margin=self._apply(overrides, 'ebitda_margin', base.ebitda_margin)
+        )
+
+    def _accretion_model(self, overrides: Dict[str, Any]) -> Optional[AccretionDilutionCube]:
+        """Apply overrides to the accretion/dilution model inputs"""
+        if self.accretion_model is None:
+            return None
+        inputs = self.accretion_model.inputs
+        changes = {
+            key: self._apply(overrides, key, getattr(inputs, key))
+            for key in ('purchase_price', 'synergies', 'cash_percentage', 'debt_interest_rate')
+            if key in overrides or f'{key}_delta' in overrides
+        }
+        if 'cash_percentage' in changes:
+            changes['cash_percentage'] = min(max(changes['cash_percentage'], 0.0), 1.0)
+        return self.accretion_model.with_inputs(**changes) if changes else self.accretion_model
+
+    @staticmethod
+    def _evaluate_accretion(model: Optional[AccretionDilutionCube]) -> Dict[str, float]:
+        """Evaluate accretion/dilution at a single point"""
+        if model is None:
+            return {}
+        cube = model.evaluate(
+            price_adjustments=(0.0,),
+            synergy_multiples=(1.0,),
+            cash_percentages=(model.inputs.cash_percentage,),
+            rate_shifts=(0.0,),
+            acquirer_price_adjustments=(0.0,)
+        )
+        return {
+            'pro_forma_eps': float(cube['pro_forma_eps'][0, 0, 0, 0, 0]),
+            'eps_impact_percent': float(cube['eps_impact_percent'][0, 0, 0, 0, 0]),
+            'breakeven_synergies': float(cube['breakeven_synergies_pretax'][0, 0, 0, 0])
+        }
+
+    @staticmethod
+    def _assumption_values(
+        dcf: DCFAssumptions,
+        lbo: LBOAssumptions,
+        accretion: Optional[AccretionDilutionCube]
+    ) -> Dict[str, Any]:
+        """Flatten model assumptions into the names used by parse_scenario_overrides"""
+        inputs = accretion.inputs if accretion else None
+        return {
+            'revenue_growth': dcf.revenue_growth_rates[0] if dcf.revenue_growth_rates else None,
+            'ebitda_margin': dcf.ebitda_margins[0] if dcf.ebitda_margins else None,
+            'wacc': dcf.wacc,
+            'terminal_growth': dcf.terminal_growth_rate,
+            'tax_rate': dcf.tax_rate,
+            'forecast_years': dcf.forecast_years,
+            'entry_multiple': lbo.entry_multiple,
+            'exit_multiple': lbo.exit_multiple,
+            'debt_interest_rate': inputs.debt_interest_rate if inputs else lbo.debt_interest_rate,
+            'cash_percentage': inputs.cash_percentage if inputs else None,
+            'synergies': inputs.synergies if inputs else None,
+            'purchase_price': inputs.purchase_price if inputs else None
+        }
+
+    def _evaluate(self, overrides: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Recompute all models for a set of overrides
+
+        Returns:
+            Tuple of (results, assumption values the models actually used).
+            The DCF may auto-correct its assumptions (e.g. raise WACC above
+            terminal growth), so used values can differ from the request.
+        """
+        dcf_assumptions = self.dcf_assumptions(overrides)
+        lbo_assumptions = self.lbo_assumptions(overrides)
+        accretion_model = self._accretion_model(overrides)
+
+        # _calculate_dcf corrects invalid assumptions in place
+        dcf = self.engine._calculate_dcf(
+            self.historical,
+            dcf_assumptions,
+            self.company_profile,
+            suppress_warnings=True
+        )
+        lbo = self.engine._calculate_lbo(self.historical, lbo_assumptions)
+        returns = lbo['returns_analysis']
+
+        results = {
+            'dcf': {
+                'enterprise_value': dcf['enterprise_value'],
+                'equity_value': dcf['equity_value'],
+                'price_per_share': dcf['price_per_share'],
+                'terminal_value_percent': dcf['terminal_value_as_percent_of_ev'],
+                'validation_warnings': dcf['validation_warnings']
+            },
+            'lbo': {
+                'irr_percent': returns['irr_percent'],
+                'multiple_of_money': returns['multiple_of_money'],
+                'exit_equity_value': returns['exit_equity_value']
+            },
+            'accretion': self._evaluate_accretion(accretion_model)
+        }
+        return results, self._assumption_values(dcf_assumptions, lbo_assumptions, accretion_model)
+
+    def evaluate(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Recompute all models for a set of overrides
+
+        Returns:
+            Dictionary with 'dcf', 'lbo' and 'accretion' metric groups
+        """
+        return self._evaluate(overrides)[0]
+
+    def compare(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a what-if scenario against the compiled base case
+
+        Returns:
+            Dictionary with before/after results, comparison rows, the
+            assumption changes (requested and actually used), warnings
+            and compute time in milliseconds. 'warnings' lists every
+            assumption the models adjusted or ignored followed by the DCF
+            validation warnings; it is empty only for a clean recompute.
+        """
+        start = time.perf_counter()
+        after, used = self._evaluate(overrides)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        rows = []
+        for group, metrics in after.items():
+            for metric, value in metrics.items():
+                if metric == 'validation_warnings':
+                    continue
+                before_value = self.baseline[group].get(metric, 0)
+                change = value - before_value
+                rows.append({
+                    'model': group,
+                    'metric': metric,
+                    'before': before_value,
+                    'after': value,
+                    'change': change,
+                    'change_percent': (change / abs(before_value) * 100) if before_value else 0.0
+                })
+
+        changes = self.assumption_changes(overrides, used)
+        adjustments = []
+        for change in changes:
+            name = change['assumption']
+            label = name.replace('_', ' ').title()
+            if change['after'] is None:
+                adjustments.append(f"ADJUSTED: {label} ignored (not available for this deal)")
+            elif change['requested'] is not None and abs(change['after'] - change['requested']) > 1e-9:
+                adjustments.append(
+                    f"ADJUSTED: {label} requested {_format_value(name, change['requested'])}, "
+                    f"model used {_format_value(name, change['after'])}"
+                )
+
+        return {
+            'before': self.baseline,
+            'after': after,
+            'rows': rows,
+            'assumption_changes': changes,
+            'adjustments': adjustments,
+            'warnings': adjustments + after['dcf']['validation_warnings'],
+            'compute_ms': elapsed_ms
+        }
+
+    def assumption_changes(
+        self,
+        overrides: Dict[str, Any],
+        used: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List each overridden assumption with its base case, requested and used values
+
+        Args:
+            overrides: Output of parse_scenario_overrides
+            used: Values the models actually used (recomputed if not given)
+        """
+        if used is None:
+            used = self._evaluate(overrides)[1]
+        base_values = self._assumption_values(self.base_dcf, self.base_lbo, self.accretion_model)
+
+        changes = []
+        for key in overrides:
+            name = key[:-len('_delta')] if key.endswith('_delta') else key
+            before = base_values.get(name)
+            changes.append({
+                'assumption': name,
+                'before': before,
+                'requested': self._apply(overrides, name, before),
+                'delta': overrides.get(f'{name}_delta'),
+                'after': used.get(name)
+            })
+        return changes
+
+
+def _format_value(key: str, value: Any) -> str:
+    """Format an assumption or metric value for display"""
+    if value is None:
+        return "N/A"
+    if key in _PERCENT_KEYS:
+        return f"{value:.2%}"
+    if key in _MULTIPLE_KEYS:
+        return f"{value:.2f}x"
+    if key in _DOLLAR_KEYS:
+        return f"${value / 1e9:,.2f}B" if abs(value) >= 1e9 else f"${value / 1e6:,.1f}M"
+    if key in _PER_SHARE_KEYS:
+        return f"${value:,.2f}"
+    if key.endswith('_percent'):
+        return f"{value:.2f}%"
+    return f"{value:,}" if isinstance(value, int) else f"{value:,.2f}"
+
+
+def format_scenario_tables(comparison: Dict[str, Any]) -> str:
+    """Render a scenario comparison as markdown tables of exact model outputs"""
+    fmt = _format_value
+
+    lines = [
+        "**Assumption Changes**",
+        "",
+        "| Assumption | Original | Updated |",
+        "|---|---|---|"
+    ]
+    for change in comparison['assumption_changes']:
+        name = change['assumption']
+        updated = fmt(name, change['after'])
+        if change['after'] is None or (
+                change['requested'] is not None and abs(change['after'] - change['requested']) > 1e-9):
+            updated += f" (requested {fmt(name, change['requested'])})"
+        lines.append(f"| {name.replace('_', ' ').title()} | {fmt(name, change['before'])} | {updated} |")
+
+    lines += [
+        "",
+        "**Valuation Impact**",
+        "",
+        "| Model | Metric | Before | After | Change |",
+        "|---|---|---|---|---|"
+    ]
+    for row in comparison['rows']:
+        metric = row['metric']
+        if metric.endswith('_percent'):
+            change = f"{row['change']:+.2f} pts"
+        else:
+            change = f"{row['change_percent']:+.1f}%" if row['before'] else "N/A"
+        lines.append(
+            f"| {row['model'].upper()} | {metric.replace('_', ' ').title()} | "
+            f"{fmt(metric, row['before'])} | {fmt(metric, row['after'])} | {change} |"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,196 @@
+"""
+Serialization - One encoder for job state, stored results and wire messages
+
+JSON (dumps / loads) is used for job files, consolidated synthesis data,
+websocket and SSE messages and queue payloads, which tools and browsers read.
+It is compact unless indent=True. Binary (pack / unpack, msgpack) is used for
+internal persistence that only this code reads back: checkpoints and the
+result store.
+
+Values the analysis produces are encoded natively: datetime/date, dataclasses,
+enums, UUIDs, numpy arrays and scalars, pandas DataFrames, Series and
+Timestamps, Decimal, sets, paths and pydantic models. Anything else becomes
+str(), as the old `default=str` did.
+
+orjson and ormsgpack are used when installed. Without them JSON falls back to
+the stdlib json module and binary persistence to JSON bytes; BINARY_FORMAT
+names the encoding so stores can tell their files apart.
+"""
+import dataclasses
+import json
+import math
+from datetime import date, datetime, time as dt_time, timezone
+from decimal import Decimal
+from enum import Enum
+from pathlib import PurePath
+from typing import Any, Union
+from uuid import UUID
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ormsgpack
+    ORMSGPACK_AVAILABLE = True
+except ImportError:
+    ORMSGPACK_AVAILABLE = False
+
+
+# Encoding written by pack(): file suffix of checkpoints and stored results
+BINARY_FORMAT = "msgpack" if ORMSGPACK_AVAILABLE else "json"
+
+if ORJSON_AVAILABLE:
+    _JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+if ORMSGPACK_AVAILABLE:
+    _PACK_OPTIONS = (
+        ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS | ormsgpack.OPT_SERIALIZE_PYDANTIC
+    )
+
+
+def _default(value: Any) -> Any:
+    """Fallback encoder for types orjson/ormsgpack (or json) don't handle natively"""
+    module = type(value).__module__
+    if module.startswith('pandas'):
+        if hasattr(value, 'to_dict'):
+            # DataFrame -> list of row dicts, Series -> {index: value}
+            return value.to_dict(orient='records') if hasattr(value, 'columns') else value.to_dict()
+        if hasattr(value, 'isoformat'):
+            return None if value != value else value.isoformat()  # NaT != NaT
+    if module == 'numpy':
+        if hasattr(value, 'tolist'):
+            return value.tolist()  # non-contiguous/object arrays and scalars
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, PurePath):
+        return str(value)
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+def _stdlib_default(value: Any) -> Any:
+    """_default plus the types orjson encodes natively, for the stdlib fallback"""
+    if type(value).__module__.startswith('pandas') or type(value).__module__ == 'numpy':
+        return _clean_numbers(_default(value))
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _clean_numbers(dataclasses.asdict(value))
+    return _clean_numbers(_default(value))
+
+
+def _clean_numbers(value: Any, wide_ints: bool = False) -> Any:
+    """
+    NaN/inf -> None, as orjson writes them (stdlib json would emit invalid JSON)
+
+    With wide_ints, integers beyond 64 bits (which msgpack cannot hold) become floats.
+    """
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if wide_ints and isinstance(value, int) and not -2 ** 63 <= value < 2 ** 64:
+        return float(value)
+    if isinstance(value, dict):
+        return {key: _clean_numbers(item, wide_ints) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean_numbers(item, wide_ints) for item in value]
+    return value
+
+
+def _stdlib_dumps(obj: Any, indent: bool, sort_keys: bool) -> str:
+    return json.dumps(
+        _clean_numbers(obj),
+        default=_stdlib_default,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+        sort_keys=sort_keys,
+        ensure_ascii=False
+    )
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Encode to UTF-8 JSON bytes
+
+    Args:
+        obj: Value to encode
+        indent: Pretty-print with two-space indentation (for files people read)
+        sort_keys: Sort dict keys (stable output for hashing)
+    """
+    if ORJSON_AVAILABLE:
+        options = _JSON_OPTIONS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=_default, option=options)
+        except TypeError:
+            # Integers beyond 64 bits, mixed-type keys with sort_keys, ...
+            pass
+    return _stdlib_dumps(obj, indent, sort_keys).encode('utf-8')
+
+
+def dumps_str(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """dumps() as str (websocket text frames, SSE data lines, redis payloads)"""
+    return dumps(obj, indent=indent, sort_keys=sort_keys).decode('utf-8')
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode JSON
+
+    Files written by older versions can contain NaN/Infinity, which orjson
+    rejects; those are decoded with the stdlib parser.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def pack(obj: Any) -> bytes:
+    """Encode for internal persistence (msgpack, or JSON bytes without ormsgpack)"""
+    if ORMSGPACK_AVAILABLE:
+        try:
+            return ormsgpack.packb(obj, default=_default, option=_PACK_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits: encode what the JSON fallback makes of the value
+            return ormsgpack.packb(_clean_numbers(loads(dumps(obj)), wide_ints=True), option=_PACK_OPTIONS)
+    return dumps(obj)
+
+
+def unpack(data: bytes, fmt: str = BINARY_FORMAT) -> Any:
+    """
+    Decode pack() output
+
+    Args:
+        data: Encoded bytes
+        fmt: Encoding of the data ("msgpack" or "json"), e.g. from the file suffix
+
+    Unlike JSON, msgpack keeps non-string dict keys (ints, dates) as they were.
+    """
+    if fmt == "msgpack":
+        if not ORMSGPACK_AVAILABLE:
+            raise ValueError("ormsgpack is not installed; cannot read msgpack data")
+        return ormsgpack.unpackb(data, option=ormsgpack.OPT_NON_STR_KEYS)
+    return loads(data)
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as a naive ISO-8601 string (same format as datetime.utcnow().isoformat())"""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
@@ -0,0 +1,288 @@
+"""
+Tracing - OpenTelemetry spans for jobs, agents, external calls and storage
+
+One analysis job becomes one trace:
+
+    analysis.job
+    ├── agent.financial_analyst
+    │   ├── fmp.request (×N)
+    │   ├── llm.chat / llm.gateway → llm.request (model, tokens, retries, fallback)
+    │   └── compute <job> → compute.worker <job> (in the worker process)
+    ├── job.save_state
+    └── analysis.reports
+
+Spans follow the OpenTelemetry context, which lives in contextvars: tasks
+started by asyncio.gather and threads started by asyncio.to_thread inherit
+the current span automatically. Process hops (the compute executor) carry
+it explicitly with inject_context() / attach_context().
+
+Export is configured from the environment:
+- TRACING_EXPORTER=otlp     OTLP/gRPC (endpoint from OTEL_EXPORTER_OTLP_ENDPOINT)
+- TRACING_EXPORTER=json     one JSON span per line in TRACING_JSON_PATH
+- TRACING_EXPORTER=console  print spans to stdout
+- TRACING_EXPORTER=none     spans are no-ops (default unless an OTLP endpoint is set)
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence
+from loguru import logger
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+    logger.warning("opentelemetry-api not available - tracing disabled")
+
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_SDK_AVAILABLE = True
+except ImportError:
+    SpanExporter = object
+    OTEL_SDK_AVAILABLE = False
+
+try:
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    OTLP_AVAILABLE = True
+except ImportError:
+    OTLP_AVAILABLE = False
+
+
+# Configuration (overridable via environment)
+TRACING_EXPORTER = os.getenv(
+    "TRACING_EXPORTER", "otlp" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "none"
+).lower()
+TRACING_JSON_PATH = os.getenv("TRACING_JSON_PATH", "logs/traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "aimadds")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+
+TRACER_NAME = "aimadds"
+
+
+class _NoopSpan:
+    """Stand-in span when opentelemetry is not installed"""
+
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Mapping[str, Any]):
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Mapping[str, Any]] = None):
+        pass
+
+    def record_exception(self, exception: BaseException, attributes: Optional[Mapping[str, Any]] = None):
+        pass
+
+    def set_status(self, *args, **kwargs):
+        pass
+
+    def end(self, *args, **kwargs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append finished spans to a local file, one JSON object per line"""
+
+    def __init__(self, path: str = TRACING_JSON_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence['ReadableSpan']) -> 'SpanExportResult':
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Could not write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+_provider: Optional['TracerProvider'] = None
+_tracer = trace.get_tracer(TRACER_NAME) if OTEL_AVAILABLE else None
+
+
+def _create_exporter(exporter: str) -> Optional['SpanExporter']:
+    if exporter == 'otlp':
+        if not OTLP_AVAILABLE:
+            logger.warning(
+                "TRACING_EXPORTER=otlp but opentelemetry-exporter-otlp-proto-grpc is not installed - "
+                f"writing spans to {TRACING_JSON_PATH} instead"
+            )
+            return JsonFileSpanExporter()
+        return OTLPSpanExporter()
+    if exporter == 'json':
+        return JsonFileSpanExporter()
+    if exporter == 'console':
+        return ConsoleSpanExporter()
+    if exporter != 'none':
+        logger.warning(f"Unknown TRACING_EXPORTER '{exporter}' - tracing disabled")
+    return None
+
+
+def setup_tracing(exporter: Optional[str] = None, service_name: Optional[str] = None) -> bool:
+    """
+    Install the process-wide tracer provider (idempotent)
+
+    Args:
+        exporter: 'otlp', 'json', 'console' or 'none' (default TRACING_EXPORTER)
+        service_name: service.name resource attribute (default OTEL_SERVICE_NAME)
+
+    Returns:
+        True if spans are being exported
+    """
+    global _provider
+    if _provider is not None:
+        return True
+    if not (OTEL_AVAILABLE and OTEL_SDK_AVAILABLE):
+        return False
+
+    exporter = (exporter or TRACING_EXPORTER).lower()
+    span_exporter = _create_exporter(exporter)
+    if span_exporter is None:
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({
+            'service.name': service_name or TRACING_SERVICE_NAME,
+            'process.pid': os.getpid()
+        }),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO))
+    )
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info(f"Tracing enabled: {exporter} exporter (sample ratio {TRACING_SAMPLE_RATIO:g})")
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans and stop the exporter"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def tracing_enabled() -> bool:
+    """Whether this process exports spans"""
+    return _provider is not None
+
+
+def _clean_attributes(attributes: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Drop None values and stringify anything OpenTelemetry can't store"""
+    cleaned = {}
+    for key, value in (attributes or {}).items():
+        if value is None:
+            continue
+        if not isinstance(value, (str, bool, int, float)):
+            value = str(value)
+        cleaned[key] = value
+    return cleaned
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: Optional[Mapping[str, Any]] = None,
+    kind: str = 'internal'
+) -> Iterator[Any]:
+    """
+    Run a block inside a span that becomes the current span
+
+    Exceptions escaping the block are recorded and mark the span as an error.
+
+    Usage:
+        with start_span("fmp.request", {'fmp.endpoint': endpoint}, kind='client') as span:
+            ...
+            span.set_attribute('http.response.status_code', 200)
+    """
+    if not OTEL_AVAILABLE:
+        yield _NOOP_SPAN
+        return
+    with _tracer.start_as_current_span(
+        name, kind=SpanKind[kind.upper()], attributes=_clean_attributes(attributes)
+    ) as span:
+        yield span
+
+
+def open_span(
+    name: str,
+    attributes: Optional[Mapping[str, Any]] = None,
+    kind: str = 'internal'
+) -> Any:
+    """Start a child of the current span without making it current (caller ends it)"""
+    if not OTEL_AVAILABLE:
+        return _NOOP_SPAN
+    return _tracer.start_span(name, kind=SpanKind[kind.upper()], attributes=_clean_attributes(attributes))
+
+
+def current_span() -> Any:
+    """The active span (a non-recording span outside any trace)"""
+    return trace.get_current_span() if OTEL_AVAILABLE else _NOOP_SPAN
+
+
+def set_span_attributes(span: Any, attributes: Mapping[str, Any]):
+    """Set attributes on a span, skipping None values"""
+    if span.is_recording():
+        span.set_attributes(_clean_attributes(attributes))
+
+
+def add_span_event(name: str, attributes: Optional[Mapping[str, Any]] = None):
+    """Add an event (e.g. a retry) to the current span"""
+    span = current_span()
+    if span.is_recording():
+        span.add_event(name, _clean_attributes(attributes))
+
+
+def mark_span_error(span: Any, description: str):
+    """Mark a span as failed without an exception (e.g. a handled HTTP error)"""
+    if span.is_recording():
+        span.set_status(Status(StatusCode.ERROR, description))
+
+
+def inject_context() -> Dict[str, str]:
+    """Serialize the current trace context (W3C traceparent) for another process"""
+    carrier: Dict[str, str] = {}
+    if OTEL_AVAILABLE:
+        propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def attach_context(carrier: Optional[Mapping[str, str]]) -> Iterator[None]:
+    """Make a trace context received from another process current"""
+    if not OTEL_AVAILABLE or not carrier:
+        yield
+        return
+    token = otel_context.attach(propagate.extract(dict(carrier)))
+    try:
+        yield
+    finally:
+        otel_context.detach(token)